@@ -0,0 +1,203 @@
+"""
+Chart Planner - Resolves and validates chart references before a workbook is built
+Supports multi-series charts drawing from several sheets and caches resolved references
+"""
+
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+from openpyxl.utils import get_column_letter, quote_sheetname
+from openpyxl.utils.cell import range_boundaries
+
+MAX_ROW = 1048576
+MAX_COL = 16384
+
+_CELL_RANGE_RE = re.compile(r'^\$?[A-Za-z]{1,3}\$?\d+(:\$?[A-Za-z]{1,3}\$?\d+)?$')
+
+
+class ChartReferenceError(ValueError):
+    """Raised when one or more chart references cannot be resolved"""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("Invalid chart references:\n  - " + "\n  - ".join(problems))
+
+
+class ChartReference:
+    """A resolved, validated cell range on a named sheet"""
+
+    __slots__ = ('sheet_name', 'min_col', 'min_row', 'max_col', 'max_row')
+
+    def __init__(self, sheet_name: str, min_col: int, min_row: int, max_col: int, max_row: int):
+        self.sheet_name = sheet_name
+        self.min_col = min_col
+        self.min_row = min_row
+        self.max_col = max_col
+        self.max_row = max_row
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        return self.min_col, self.min_row, self.max_col, self.max_row
+
+    def __str__(self) -> str:
+        return (f"{quote_sheetname(self.sheet_name)}!{get_column_letter(self.min_col)}{self.min_row}:"
+                f"{get_column_letter(self.max_col)}{self.max_row}")
+
+
+class SeriesPlan:
+    """One chart series: values plus optional title and x/category references"""
+
+    __slots__ = ('values', 'categories', 'title', 'title_ref')
+
+    def __init__(self, values: ChartReference, categories: Optional[ChartReference] = None,
+                 title: Optional[str] = None, title_ref: Optional[ChartReference] = None):
+        self.values = values
+        self.categories = categories
+        self.title = title
+        self.title_ref = title_ref
+
+
+class ChartPlan:
+    """Fully resolved chart: either a data block or an explicit list of series"""
+
+    __slots__ = ('host', 'config', 'data', 'categories', 'series')
+
+    def __init__(self, host: str, config: Dict, data: Optional[ChartReference] = None,
+                 categories: Optional[ChartReference] = None, series: Optional[List[SeriesPlan]] = None):
+        self.host = host
+        self.config = config
+        self.data = data
+        self.categories = categories
+        self.series = series or []
+
+    def references(self) -> List[ChartReference]:
+        refs = [ref for ref in (self.data, self.categories) if ref is not None]
+        for series in self.series:
+            refs.extend(ref for ref in (series.values, series.categories, series.title_ref) if ref is not None)
+        return refs
+
+
+def split_sheet_range(range_string: str) -> Tuple[Optional[str], str]:
+    """
+    Split 'Sheet!A1:B2' into ('Sheet', 'A1:B2')
+
+    Accepts quoted names ('Cash Flow'!A1) as well as unquoted names with
+    spaces (Cash Flow!A1), which is how the example configs write them.
+    """
+    if '!' not in range_string:
+        return None, range_string
+    sheet_name, cells = range_string.rsplit('!', 1)
+    sheet_name = sheet_name.strip()
+    if len(sheet_name) >= 2 and sheet_name[0] == sheet_name[-1] == "'":
+        sheet_name = sheet_name[1:-1].replace("''", "'")
+    return sheet_name, cells.strip()
+
+
+class ChartPlanner:
+    """
+    Resolves every chart reference for one workbook build
+
+    Sheet extents (rows and columns holding data) are registered up front, from
+    the config for new workbooks or from loaded sheets when editing, so a bad
+    reference is reported before any sheet is built. Resolved references are
+    cached for the lifetime of the planner, i.e. one build.
+    """
+
+    def __init__(self):
+        self._extents: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._cache: Dict[Tuple[str, str], ChartReference] = {}
+
+    def add_sheet(self, name: str, max_row: Optional[int] = None, max_col: Optional[int] = None):
+        """Register a sheet; extent None means 'unknown, do not bounds-check'"""
+        self._extents[name] = (max_row, max_col) if max_row is not None and max_col is not None else None
+
+    def has_sheet(self, name: str) -> bool:
+        return name in self._extents
+
+    @staticmethod
+    def config_extent(sheet_config: Dict) -> Optional[Tuple[int, int]]:
+        """Rows and columns a sheet config populates, or None when it cannot be known"""
+        if sheet_config.get('type', 'data') != 'data':
+            return None
+        data = sheet_config.get('data', [])
+        if hasattr(data, 'shape'):
+            # DataFrame data; its column names are the default headers
+            headers = sheet_config.get('headers', list(data.columns))
+            max_row = data.shape[0] + (1 if headers else 0)
+            max_col = max(len(headers), data.shape[1])
+        else:
+            headers = sheet_config.get('headers', [])
+            max_row = len(data) + (1 if headers else 0)
+            max_col = max([len(headers)] + [len(row) for row in data]) if (headers or data) else 0
+        for formula in sheet_config.get('formulas', []):
+            try:
+                col, row, _, _ = range_boundaries(formula['cell'])
+            except (KeyError, ValueError, TypeError):
+                continue
+            max_row, max_col = max(max_row, row), max(max_col, col)
+        return max_row, max_col
+
+    def resolve(self, range_string: Any, host: str) -> ChartReference:
+        """Resolve a range string against the host sheet, raising ValueError when invalid"""
+        key = (host, range_string)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        if not isinstance(range_string, str) or not range_string.strip():
+            raise ValueError(f"range {range_string!r} is not a range string")
+
+        sheet_name, cells = split_sheet_range(range_string)
+        sheet_name = sheet_name or host
+        if sheet_name not in self._extents:
+            raise ValueError(f"'{range_string}' refers to unknown sheet '{sheet_name}'")
+        if not _CELL_RANGE_RE.match(cells):
+            raise ValueError(f"'{range_string}' is not a valid cell range")
+
+        min_col, min_row, max_col, max_row = range_boundaries(cells)
+        if max_row > MAX_ROW or max_col > MAX_COL:
+            raise ValueError(f"'{range_string}' is outside the worksheet grid")
+
+        extent = self._extents[sheet_name]
+        if extent is not None and (min_row > extent[0] or min_col > extent[1]):
+            raise ValueError(f"'{range_string}' points past the data on '{sheet_name}' "
+                             f"(last populated cell is {get_column_letter(max(extent[1], 1))}{extent[0]})")
+
+        reference = ChartReference(sheet_name, min_col, min_row, max_col, max_row)
+        self._cache[key] = reference
+        return reference
+
+    def plan(self, chart_config: Dict, host: str) -> ChartPlan:
+        """Resolve all references of one chart config"""
+        categories_range = chart_config.get('categories_range')
+        categories = self.resolve(categories_range, host) if categories_range else None
+
+        if 'series' in chart_config:
+            series = []
+            for series_config in chart_config['series']:
+                if 'values' not in series_config:
+                    raise ValueError("every series needs a 'values' range")
+                series_categories = series_config.get('categories')
+                title_ref = series_config.get('title_ref')
+                series.append(SeriesPlan(
+                    self.resolve(series_config['values'], host),
+                    self.resolve(series_categories, host) if series_categories else categories,
+                    series_config.get('title'),
+                    self.resolve(title_ref, host) if title_ref else None
+                ))
+            return ChartPlan(host, chart_config, categories=categories, series=series)
+
+        data = self.resolve(chart_config.get('data_range', 'A1:D10'), host)
+        return ChartPlan(host, chart_config, data=data, categories=categories)
+
+    def validate(self, charts: List[Tuple[str, Dict]]) -> List[ChartPlan]:
+        """Plan every (host sheet, chart config) pair, reporting all problems at once"""
+        plans, problems = [], []
+        for host, chart_config in charts:
+            try:
+                plans.append(self.plan(chart_config, host))
+            except ValueError as e:
+                problems.append(f"{host} / {chart_config.get('title', 'Chart')}: {e}")
+        if problems:
+            raise ChartReferenceError(problems)
+        return plans
@@ -19,14 +19,48 @@ from openpyxl.styles.numbers import FORMAT_CURRENCY_USD_SIMPLE, FORMAT_PERCENTAG
 from openpyxl.chart import BarChart, LineChart, PieChart, Reference
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.worksheet.datavalidation import DataValidation
+from openpyxl.utils import get_column_letter
 import pandas as pd
 
+# Modules shared with the PowerPoint skill live in skill_common/ at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from style_rules import StyleRules
+from kpi_aggregates import KPIAggregator
+from xlsx_package import append_sheet_rows
+
 class ExcelMaster:
     """Complete Excel automation and control system"""
     
     def __init__(self):
         self.workbook = None
         self.current_sheet = None
+        # 'rules' styles tables with range-level conditional formatting,
+        # 'static' writes a fill and border onto every cell
+        self.styling_mode = 'rules'
+        # Dashboard metrics computed from each generated sheet (literal columns only)
+        self.dashboard_kpis = {
+            'Budget_Tracker': [
+                {'name': 'Net Cash Flow', 'column': 'Amount', 'agg': 'sum', 'format': '$#,##0'},
+                {'name': 'Transactions', 'column': 'Amount', 'agg': 'count', 'format': '#,##0'}
+            ],
+            'Performance_Tracker': [
+                {'name': 'Units Sold', 'column': 'Quantity', 'agg': 'sum', 'format': '#,##0'},
+                {'name': 'Avg Unit Price', 'column': 'Unit Price', 'agg': 'mean', 'format': '$#,##0.00'}
+            ],
+            'Project_Plan': [
+                {'name': 'Tasks', 'column': 'Task', 'agg': 'count', 'format': '#,##0'},
+                {'name': 'Avg Progress', 'column': 'Progress', 'agg': 'mean', 'format': '0%'}
+            ],
+            'Inventory': [
+                {'name': 'Units in Stock', 'column': 'Quantity', 'agg': 'sum', 'format': '#,##0'},
+                {'name': 'Avg Unit Cost', 'column': 'Unit Cost', 'agg': 'mean', 'format': '$#,##0.00'}
+            ],
+            'Data_Analysis': [
+                {'name': 'Metric1 Average', 'column': 'Metric1', 'agg': 'mean', 'format': '#,##0.0'},
+                {'name': 'Metric2 Total', 'column': 'Metric2', 'agg': 'sum', 'format': '#,##0'}
+            ]
+        }
         self.color_schemes = {
             'corporate': {
                 'primary': 'FF0033CC',      # Blue
@@ -122,6 +156,12 @@ class ExcelMaster:
         self.workbook.save(output_path)
         return output_path
     
+    def append_rows(self, file_path: str, sheet_name: str, rows: List[List[Any]], output_path: str = None) -> str:
+        """Append rows to a tracker sheet, continuing its formulas, formatting and charts"""
+        output_path = output_path or file_path
+        append_sheet_rows(file_path, sheet_name, rows, output_path)
+        return output_path
+    
     def _create_financial_sheet(self, prompt: str, analysis: Dict):
         """Create financial tracking spreadsheet"""
         sheet = self.workbook.create_sheet("Budget_Tracker")
@@ -333,6 +373,14 @@ class ExcelMaster:
         self._apply_table_formatting(sheet, sheet.max_row, sheet.max_column)
         
         # Add progress bar formatting
+        if self.styling_mode == 'rules':
+            StyleRules(sheet).thresholds(f"G2:G{max(sheet.max_row, 2)}", [
+                (1.0, '00FF00'),
+                (0.5, 'FFFF00'),
+                (None, 'FF0000')
+            ])
+            return
+        
         for row in range(2, sheet.max_row + 1):
             progress_cell = sheet.cell(row=row, column=7)
             if isinstance(progress_cell.value, (int, float)):
@@ -357,22 +405,30 @@ class ExcelMaster:
     
     def _apply_table_formatting(self, sheet, max_row: int, max_col: int):
         """Apply consistent table formatting"""
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'), 
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        # Apply borders to all cells
-        for row in range(1, max_row + 1):
-            for col in range(1, max_col + 1):
-                cell = sheet.cell(row=row, column=col)
-                cell.border = thin_border
-                
-                # Alternate row colors (skip header)
-                if row > 1 and row % 2 == 0:
-                    cell.fill = PatternFill(start_color='F8F9FA', end_color='F8F9FA', fill_type='solid')
+        if self.styling_mode == 'rules':
+            # Borders and alternating row colors as two range-level rules
+            last_col = get_column_letter(max(max_col, 1))
+            rules = StyleRules(sheet)
+            rules.grid(f"A1:{last_col}{max(max_row, 1)}")
+            if max_row > 1:
+                rules.banding(f"A2:{last_col}{max_row}", 'F8F9FA')
+        else:
+            thin_border = Border(
+                left=Side(style='thin'),
+                right=Side(style='thin'), 
+                top=Side(style='thin'),
+                bottom=Side(style='thin')
+            )
+            
+            # Apply borders to all cells
+            for row in range(1, max_row + 1):
+                for col in range(1, max_col + 1):
+                    cell = sheet.cell(row=row, column=col)
+                    cell.border = thin_border
+                    
+                    # Alternate row colors (skip header)
+                    if row > 1 and row % 2 == 0:
+                        cell.fill = PatternFill(start_color='F8F9FA', end_color='F8F9FA', fill_type='solid')
         
         # Auto-adjust column widths
         for column in sheet.columns:
@@ -409,13 +465,8 @@ class ExcelMaster:
     
     def _add_inventory_alerts(self, sheet):
         """Add conditional formatting for low inventory"""
-        from openpyxl.formatting.rule import CellIsRule
-        
-        # Highlight low stock in red
-        red_fill = PatternFill(start_color='FFCCCC', end_color='FFCCCC', fill_type='solid')
-        low_stock_rule = CellIsRule(operator='lessThan', formula=['$G2'], fill=red_fill)
-        
-        sheet.conditional_formatting.add('D2:D100', low_stock_rule)
+        # Highlight low stock in red, leaving headroom for rows added later
+        StyleRules(sheet).alert(f"D2:D{max(sheet.max_row, 100)}", 'lessThan', '$G2', 'FFCCCC')
     
     def _add_statistical_analysis(self, sheet):
         """Add statistical analysis formulas"""
@@ -458,11 +509,23 @@ class ExcelMaster:
         dashboard['A1'] = 'EXECUTIVE DASHBOARD'
         dashboard['A1'].font = Font(size=20, bold=True)
         
-        # Add summary metrics (would be linked to other sheets)
         dashboard['A3'] = 'Key Metrics Summary'
         dashboard['A4'] = 'Generated on:'
         dashboard['B4'] = datetime.now().strftime('%Y-%m-%d %H:%M')
         
+        # Summary metrics computed from the generated sheets in one pass per sheet
+        aggregator = KPIAggregator()
+        kpis = []
+        for sheet in self.workbook.worksheets:
+            if sheet.title in self.dashboard_kpis:
+                aggregator.add_worksheet(sheet)
+                kpis.extend(dict(kpi, source=sheet.title) for kpi in self.dashboard_kpis[sheet.title])
+        
+        for row, kpi in enumerate(aggregator.evaluate(kpis), 6):
+            dashboard.cell(row=row, column=1, value=f"{kpi['name']}:")
+            value_cell = dashboard.cell(row=row, column=2, value=kpi['value'])
+            value_cell.number_format = kpi['format']
+        
         self._apply_dashboard_formatting(dashboard)
     
     def _apply_dashboard_formatting(self, sheet):
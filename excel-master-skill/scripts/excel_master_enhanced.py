@@ -8,8 +8,12 @@ import sys
 import json
 import re
 import os
+import threading
+import warnings
+import zipfile
+from concurrent.futures import Executor
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple, Union
+from typing import Dict, List, Any, Optional, Set, Tuple, Union
 from pathlib import Path
 
 import openpyxl
@@ -18,14 +22,61 @@ from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedSty
 from openpyxl.styles.numbers import FORMAT_CURRENCY_USD_SIMPLE, FORMAT_PERCENTAGE, FORMAT_DATE_DATETIME
 from openpyxl.chart import (BarChart, LineChart, PieChart, AreaChart, ScatterChart,
                              Reference, Series, BarChart3D, LineChart3D)
-from openpyxl.chart.marker import DataLabel
+from openpyxl.chart.label import DataLabel
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.worksheet.datavalidation import DataValidation
 from openpyxl.worksheet.table import Table, TableStyleInfo
 from openpyxl.formatting.rule import ColorScaleRule, CellIsRule, IconSetRule, DataBarRule
+from openpyxl.chart.data_source import AxDataSource, NumRef
+from openpyxl.chart.series import SeriesLabel, StrRef
 from openpyxl.utils import get_column_letter
 import pandas as pd
 
+# Modules shared with the PowerPoint skill live in skill_common/ at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from skill_common.artifact_cache import content_config, fingerprint
+from skill_common.build_governor import MemoryEstimate, ResourceGovernor
+from skill_common.build_jobs import run_build
+from skill_common.build_profiler import BuildProfiler, format_report
+from skill_common.chart_data import reduce_series
+from skill_common.package_zip import CompressionPolicy
+
+from style_rules import StyleRules
+from chart_planner import ChartPlanner, ChartReference, ChartReferenceError, SeriesPlan
+from kpi_aggregates import KPIAggregator, KPIError
+from style_palette import StylePalette, detect_theme
+from workbook_cache import ArtifactCache
+from xlsx_package import (SheetManifest, append_sheet_rows, manifest_path, package_stamp, plan_rebuild,
+                          read_styles, retheme_package, save_workbook, seed_styles)
+from sheet_columns import ColumnarSheet, is_formula
+from sheet_sparklines import read_sparklines, sparkline_extension, sparkline_group_xml
+from workbook_templates import TEMPLATES, WorkbookTemplate
+from workbook_schema import (ConfigError, SheetPlan, WorkbookPlan, WorkbookEditPlan, compile_workbook,
+                           compile_workbook_edit)
+
+# Hidden sheet holding downsampled / aggregated chart series
+CHART_DATA_SHEET = '_chart_data'
+# Alignment of table_style data cells, in both style modes
+TABLE_ALIGNMENT = Alignment(horizontal='left', vertical='center')
+# Engine attributes an async build copies back from its worker engine
+BUILD_STATE = ('last_profile', 'last_cache_hit', 'last_reused_sheets', 'last_build_mode')
+
+# Peak memory model used by the resource governor, in bytes; measured with
+# tracemalloc on mixed text / number sheets
+WORKBOOK_BYTES = 2 * 1024 * 1024
+SHEET_BYTES = 256 * 1024
+COLUMN_CELL_BYTES = 24
+XML_CELL_BYTES = 80
+STATIC_CELL_BYTES = 500
+# Workbook parts openpyxl holds per loaded cell, relative to the sheet XML size
+LOADED_XML_FACTOR = 12
+# Objects an unpickled template skeleton holds, relative to its pickled size
+SKELETON_FACTOR = 5
+
+# Part of every cache key; bump whenever the generated workbooks change
+ENGINE_VERSION = '1.4.1'
+
 class AdvancedTheme:
     """Advanced Excel theme configuration"""
 
@@ -50,6 +101,22 @@ class EnhancedExcelMaster:
     def __init__(self):
         self.workbook = None
         self.themes = self._initialize_themes()
+        self.chart_planner = None
+        self.kpi_aggregator = None
+        self._pending_charts = None
+        self._columnar: Dict[str, ColumnarSheet] = {}
+        # Sheet name -> sparkline ext elements spliced into the sheet's XML on save
+        self._sparklines: Dict[str, List[bytes]] = {}
+        # Template the current build starts from, None without one
+        self._template: Optional[WorkbookTemplate] = None
+        self.profiler = BuildProfiler()
+        self.last_profile = None
+        self.last_cache_hit = False
+        self.last_reused_sheets = []
+        # 'streaming' when the resource governor chose the low-memory build
+        self.last_build_mode = 'memory'
+        # Set by the async API; builds stop at their next phase once it is set
+        self.cancel_event: Optional[threading.Event] = None
 
     def _initialize_themes(self) -> Dict[str, AdvancedTheme]:
         """Initialize professional Excel themes"""
@@ -117,36 +184,238 @@ class EnhancedExcelMaster:
         }
         return themes
 
-    def create_workbook(self, config: Dict) -> str:
+    def compile_config(self, config: Dict) -> WorkbookPlan:
+        """
+        Validate a create_workbook config into a reusable WorkbookPlan
+
+        Raises ConfigError listing every problem (unknown keys, wrong types,
+        unknown sheet/chart/rule types, bad sheet names) before any work is done.
+        """
+        return compile_workbook(config, self.themes)
+
+    def create_workbook(self, config: Union[Dict, WorkbookPlan]) -> str:
         """
         Create Excel workbook with full manual control
 
         Args:
-            config: Complete configuration dictionary with:
+            config: Complete configuration dictionary, or a plan from compile_config, with:
                 - theme: Theme name or custom theme config
                 - sheets: List of sheet configurations
                 - output_path: Where to save the file
+                - profile: Optional profiling (True, 'cprofile,memory' or a dict);
+                  the report is left in self.last_profile
+                - cache: Optional artifact cache (True, a directory or a dict with
+                  dir / max_bytes / max_age); unchanged configs are copied from it
+                - incremental: Reuse unchanged sheets of the previous build at
+                  output_path; the reused names are left in self.last_reused_sheets
+                - compression: Optional package compression, a preset ('fast',
+                  'balanced', 'small', 'store') or a dict of levels per part type
+                  (xml / media / default, 0 stores) and threads
+                - resources: Optional memory governor (True or a dict with
+                  max_bytes / streaming_bytes / headroom). A build whose estimated
+                  peak is large then runs in streaming mode, and one that cannot
+                  fit half the available memory raises ResourceLimitError; the
+                  chosen mode is left in self.last_build_mode
+                - template: Optional template workbook (.xlsx / .xltx path or a
+                  name registered with TEMPLATES.register) to start from. Its
+                  sheets, styles, named styles and defined names are kept and
+                  the config's sheets are added after them; a config sheet named
+                  like a template sheet replaces it in place. Loaded once per
+                  process; not combinable with incremental
         """
-        # Initialize workbook
-        self.workbook = Workbook()
+        plan = config if isinstance(config, WorkbookPlan) else self.compile_config(config)
+        cache = ArtifactCache.from_option(plan.cache)
+        self.last_cache_hit = False
+        self.last_reused_sheets = []
+        self.last_build_mode = 'memory'
+
+        self.profiler = BuildProfiler.from_option(plan.profile, self.cancel_event)
+        self.profiler.start('create_workbook')
+        try:
+            if cache is not None:
+                with self.profiler.phase('cache_lookup'):
+                    cache_key = self.cache_key(plan)
+                    self.last_cache_hit = cache.fetch(cache_key, plan.output_path)
+                if self.last_cache_hit:
+                    return plan.output_path
+
+            # Pick the build mode, or refuse a build that cannot fit in memory
+            governor = ResourceGovernor.from_option(plan.resources)
+            if governor is not None:
+                with self.profiler.phase('governor'):
+                    self.last_build_mode = governor.admit(self.estimate_memory(plan))
+
+            # Initialize workbook, from the template's skeleton when there is one
+            self._template = None
+            self._columnar = {}
+            self._sparklines = {}
+            template_sheets = []
+            if plan.template is not None:
+                with self.profiler.phase('template'):
+                    self._template = TEMPLATES.get(plan.template)
+                    self.workbook = self._template.workbook()
+                    template_sheets = self._template_sheets(plan)
+            else:
+                self.workbook = Workbook()
+
+                # Remove default sheet
+                if 'Sheet' in self.workbook.sheetnames:
+                    self.workbook.remove(self.workbook['Sheet'])
+
+            # Get theme
+            theme = self._get_theme(plan.theme)
+
+            # Resolve every chart reference before building anything
+            with self.profiler.phase('planning'):
+                self.chart_planner = self._plan_charts(plan.sheets)
+                self.kpi_aggregator = self._plan_kpis(plan.sheets)
+                if plan.incremental:
+                    build_key, fingerprints, reused, current = self._plan_incremental(plan, theme)
+                    self.last_reused_sheets = reused
+
+            output_path = plan.output_path
+            if plan.incremental and current:
+                # Same sheets in the same order as the previous build; the file is up to date
+                self.profiler.count('reused_sheets', len(reused))
+                return output_path
+
+            if self.last_reused_sheets:
+                seed_styles(self.workbook, output_path)
+
+            # Create sheets; charts are built last, once all their sources exist
+            self._pending_charts = []
+            for sheet_plan in plan.sheets:
+                if sheet_plan.name in self.last_reused_sheets:
+                    # Placeholder, replaced by the previous build's sheet when saving
+                    self.workbook.create_sheet(sheet_plan.name)
+                    self.profiler.count('reused_sheets')
+                else:
+                    self._create_sheet(sheet_plan, theme)
+            self._build_pending_charts()
+            if self._template is not None:
+                self._order_sheets(plan)
+
+            # Save workbook; template sheets are spliced in from the template package
+            with self.profiler.phase('save'):
+                if template_sheets:
+                    self._save(output_path, template_sheets, plan.compression, source=self._template.source())
+                else:
+                    self._save(output_path, self.last_reused_sheets, plan.compression)
+
+            if plan.incremental:
+                SheetManifest(build_key, package_stamp(output_path), fingerprints).save(manifest_path(output_path))
+
+            if cache is not None:
+                with self.profiler.phase('cache_store'):
+                    cache.store(cache_key, output_path)
+        finally:
+            self.last_profile = self.profiler.stop()
 
-        # Remove default sheet
-        if 'Sheet' in self.workbook.sheetnames:
-            self.workbook.remove(self.workbook['Sheet'])
+        return output_path
+
+    def estimate_memory(self, config: Union[Dict, WorkbookPlan]) -> MemoryEstimate:
+        """
+        Estimated peak memory of a build, per sheet, in memory and streaming mode
 
-        # Get theme
-        theme = self._get_theme(config.get('theme', 'corporate_blue'))
+        Data sheets dominate: their columns, their worksheet XML and, with a
+        static table style, one openpyxl cell per value. Streaming writes the
+        XML into the package in chunks and styles tables with rules instead.
+        """
+        plan = config if isinstance(config, WorkbookPlan) else self.compile_config(config)
+        estimate = MemoryEstimate()
+        estimate.add('workbook', WORKBOOK_BYTES)
+        if plan.template is not None:
+            # The shared template package, plus the build's skeleton and spliced parts
+            template = TEMPLATES.get(plan.template)
+            estimate.add('template', len(template.skeleton) * SKELETON_FACTOR + len(template.package))
+        for sheet_plan in plan.sheets:
+            estimate.add(f"sheet '{sheet_plan.name}'", *self._sheet_memory(sheet_plan))
+        return estimate
+
+    def _sheet_memory(self, sheet_plan: SheetPlan) -> Tuple[int, int]:
+        """(in-memory, streaming) peak bytes of one sheet"""
+        if sheet_plan.type != 'data':
+            return SHEET_BYTES, SHEET_BYTES
+        if sheet_plan.columns is not None:
+            cells, columns = sheet_plan.columns.cell_count(), sheet_plan.columns.nbytes()
+        else:
+            rows = len(sheet_plan.data)
+            cells = rows * max(len(sheet_plan.headers), len(sheet_plan.data[0]) if rows else 0)
+            columns = cells * COLUMN_CELL_BYTES
+        per_cell = STATIC_CELL_BYTES if sheet_plan.table_style and sheet_plan.style_mode == 'static' else XML_CELL_BYTES
+        return SHEET_BYTES + columns + cells * per_cell, SHEET_BYTES + columns
 
-        # Create sheets
-        sheets_config = config.get('sheets', [])
-        for sheet_config in sheets_config:
-            self._create_sheet(sheet_config, theme)
+    def cache_key(self, config: Union[Dict, WorkbookPlan]) -> str:
+        """
+        Content hash identifying the workbook a config would produce
 
-        # Save workbook
-        output_path = config.get('output_path', 'workbook.xlsx')
-        self.workbook.save(output_path)
+        Covers the config (minus output_path, profile and cache), the resolved
+        theme, so edits to a built-in theme invalidate it, the template's
+        contents and ENGINE_VERSION.
+        """
+        plan = config if isinstance(config, WorkbookPlan) else self.compile_config(config)
+        if plan.content_hash is None:
+            plan.content_hash = fingerprint(ENGINE_VERSION, content_config(plan.config))
+        template = TEMPLATES.get(plan.template).digest if plan.template is not None else None
+        return fingerprint(plan.content_hash, vars(self._get_theme(plan.theme)), template)
+
+    def _plan_incremental(self, plan: WorkbookPlan,
+                          theme: AdvancedTheme) -> Tuple[str, Dict[str, str], List[str], bool]:
+        """
+        Fingerprint every sheet and pick the ones the previous build can supply
+
+        A sheet is rebuilt when its config changed or when a sheet its charts
+        or KPIs read from is rebuilt. Everything is rebuilt when the theme,
+        ENGINE_VERSION or the previous file changed, and whenever a rebuild
+        would have to regenerate reduced chart data on the hidden helper sheet.
+        Returns the build key, the fingerprints, the reusable sheet names and
+        whether the previous file is already up to date.
+        """
+        build_key = fingerprint(ENGINE_VERSION, vars(theme))
+        fingerprints = {sheet_plan.name: fingerprint(build_key, sheet_plan.config) for sheet_plan in plan.sheets}
+
+        manifest = SheetManifest.load(manifest_path(plan.output_path))
+        current = manifest is not None and manifest.is_current(build_key, plan.output_path, fingerprints)
+        dirty = plan_rebuild(manifest, build_key, plan.output_path, fingerprints,
+                             self._sheet_dependencies(plan.sheets))
+        reduces_data = any('downsample' in chart_config or 'aggregate' in chart_config
+                           for sheet_plan in plan.sheets for chart_config in sheet_plan.charts)
+        if dirty is None or (dirty and reduces_data):
+            return build_key, fingerprints, [], current
+        return build_key, fingerprints, [name for name in fingerprints if name not in dirty], current
+
+    def _template_sheets(self, plan: WorkbookPlan) -> List[str]:
+        """
+        Template sheets to splice into the build
 
-        return output_path
+        Template sheets the config rebuilds are dropped from the skeleton,
+        their position kept for _order_sheets.
+        """
+        rebuilt = {sheet_plan.name for sheet_plan in plan.sheets}
+        for name in self._template.sheet_names:
+            if name in rebuilt:
+                self.workbook.remove(self.workbook[name])
+        return [name for name in self._template.spliced if name not in rebuilt]
+
+    def _order_sheets(self, plan: WorkbookPlan):
+        """Template order first, config sheets replacing template sheets in place, then the rest"""
+        order = list(self._template.sheet_names)
+        order.extend(sheet_plan.name for sheet_plan in plan.sheets if sheet_plan.name not in order)
+        position = {name: index for index, name in enumerate(order)}
+        self.workbook._sheets.sort(key=lambda sheet: position.get(sheet.title, len(order)))
+
+    def _sheet_dependencies(self, sheet_plans: List[SheetPlan]) -> Dict[str, Set[str]]:
+        """Sheets each sheet reads from through its chart references and computed KPIs"""
+        planner = self._get_chart_planner()
+        dependencies = {}
+        for sheet_plan in sheet_plans:
+            sources = {chart_ref.sheet_name
+                       for chart_config in sheet_plan.charts
+                       for chart_ref in planner.plan(chart_config, sheet_plan.name).references()}
+            sources.update(kpi['source'] for kpi in sheet_plan.kpis if 'source' in kpi)
+            sources.discard(sheet_plan.name)
+            dependencies[sheet_plan.name] = sources
+        return dependencies
 
     def edit_workbook(self, file_path: str, modifications: Dict) -> str:
         """
@@ -155,68 +424,200 @@ class EnhancedExcelMaster:
         Args:
             file_path: Path to existing workbook
             modifications: Dictionary of modifications:
-                - change_theme: New theme to apply
+                - change_theme: New theme to apply; the current theme is recognized
+                  from the style table's colors and every themed color and font
+                  (headers, KPIs, banding) is switched. An edit that only changes
+                  the theme rewrites styles.xml without loading the workbook
                 - update_sheets: Dict of sheet_name: new_content
                 - add_sheets: List of new sheet configs
                 - delete_sheets: List of sheet names to delete
                 - add_charts: Dict of sheet_name: chart_config
                 - add_pivot_tables: Dict of sheet_name: pivot_config
+                - profile: Optional profiling, as for create_workbook
+                - compression: Optional package compression, as for create_workbook
+                - resources: Optional memory limits, as for create_workbook
         """
-        # Load existing workbook
-        self.workbook = load_workbook(file_path)
-
-        # Change theme if requested
-        if 'change_theme' in modifications:
-            new_theme = self._get_theme(modifications['change_theme'])
-            self._apply_theme_to_workbook(new_theme)
-
-        # Update existing sheets
-        if 'update_sheets' in modifications:
-            for sheet_name, updates in modifications['update_sheets'].items():
-                if sheet_name in self.workbook.sheetnames:
-                    sheet = self.workbook[sheet_name]
-                    self._update_sheet_data(sheet, updates)
-
-        # Add new sheets
-        if 'add_sheets' in modifications:
-            theme = self._get_theme(modifications.get('theme', 'corporate_blue'))
-            for sheet_config in modifications['add_sheets']:
-                self._create_sheet(sheet_config, theme)
-
-        # Delete sheets
-        if 'delete_sheets' in modifications:
-            for sheet_name in modifications['delete_sheets']:
-                if sheet_name in self.workbook.sheetnames:
-                    self.workbook.remove(self.workbook[sheet_name])
+        plan = compile_workbook_edit(modifications, file_path, self.themes)
+        self.last_build_mode = 'memory'
+
+        self.profiler = BuildProfiler.from_option(plan.profile, self.cancel_event)
+        self.profiler.start('edit_workbook')
+        try:
+            governor = ResourceGovernor.from_option(plan.resources)
+            if governor is not None:
+                with self.profiler.phase('governor'):
+                    self.last_build_mode = governor.admit(self._edit_memory(file_path, plan))
+
+            palette = None
+            if plan.change_theme is not None:
+                with self.profiler.phase('theme'):
+                    palette = self._theme_palette(file_path, plan)
+                if plan.theme_only:
+                    with self.profiler.phase('save'):
+                        retheme_package(file_path, palette, plan.output_path,
+                                        CompressionPolicy.from_option(plan.compression))
+                    return plan.output_path
+
+            # Load existing workbook
+            with self.profiler.phase('load'):
+                with warnings.catch_warnings():
+                    # openpyxl drops sparklines on load; they are copied back into the saved sheets
+                    warnings.filterwarnings('ignore', message='Sparkline Group extension')
+                    self.workbook = load_workbook(file_path)
+                self._columnar = {}
+                self._template = None
+                self._sparklines = {name: [extension] for name, extension in read_sparklines(file_path).items()}
+
+            # Validate chart references of new sheets and charts before changing anything
+            with self.profiler.phase('planning'):
+                extra_charts = [(sheet_name, chart_config)
+                                for sheet_name, chart_configs in plan.add_charts.items()
+                                if sheet_name in self.workbook.sheetnames
+                                for chart_config in chart_configs]
+                self.chart_planner = self._plan_charts(plan.add_sheets, extra_charts)
+                self.kpi_aggregator = self._plan_kpis(plan.add_sheets)
+
+            # Update existing sheets
+            if plan.update_sheets:
+                with self.profiler.phase('update_sheets'):
+                    for sheet_name, updates in plan.update_sheets.items():
+                        if sheet_name in self.workbook.sheetnames:
+                            sheet = self.workbook[sheet_name]
+                            self._update_sheet_data(sheet, updates)
+
+            # Add new sheets
+            if plan.add_sheets:
+                theme = self._get_theme(plan.theme)
+                self._pending_charts = []
+                for sheet_plan in plan.add_sheets:
+                    self._create_sheet(sheet_plan, theme)
+                self._build_pending_charts()
+
+            # Delete sheets
+            if plan.delete_sheets:
+                for sheet_name in plan.delete_sheets:
+                    if sheet_name in self.workbook.sheetnames:
+                        self.workbook.remove(self.workbook[sheet_name])
+
+            # Add charts
+            if plan.add_charts:
+                for sheet_name, chart_configs in plan.add_charts.items():
+                    if sheet_name in self.workbook.sheetnames:
+                        sheet = self.workbook[sheet_name]
+                        for chart_config in chart_configs:
+                            self._add_chart_to_sheet(sheet, chart_config)
+
+            # Add pivot tables
+            if plan.add_pivot_tables:
+                for sheet_name, pivot_config in plan.add_pivot_tables.items():
+                    if sheet_name in self.workbook.sheetnames:
+                        sheet = self.workbook[sheet_name]
+                        self._add_pivot_table(sheet, pivot_config)
+
+            # Add data validation
+            if plan.add_validations:
+                with self.profiler.phase('validations'):
+                    for sheet_name, validations in plan.add_validations.items():
+                        if sheet_name in self.workbook.sheetnames:
+                            sheet = self.workbook[sheet_name]
+                            self._add_data_validations(sheet, validations)
+
+            # Save with new name or overwrite
+            output_path = plan.output_path
+            with self.profiler.phase('save'):
+                self._save(output_path, compression=plan.compression, palette=palette)
+        finally:
+            self.last_profile = self.profiler.stop()
 
-        # Add charts
-        if 'add_charts' in modifications:
-            for sheet_name, chart_configs in modifications['add_charts'].items():
-                if sheet_name in self.workbook.sheetnames:
-                    sheet = self.workbook[sheet_name]
-                    for chart_config in chart_configs:
-                        self._add_chart_to_sheet(sheet, chart_config)
-
-        # Add pivot tables
-        if 'add_pivot_tables' in modifications:
-            for sheet_name, pivot_config in modifications['add_pivot_tables'].items():
-                if sheet_name in self.workbook.sheetnames:
-                    sheet = self.workbook[sheet_name]
-                    self._add_pivot_table(sheet, pivot_config)
+        return output_path
 
-        # Add data validation
-        if 'add_validations' in modifications:
-            for sheet_name, validations in modifications['add_validations'].items():
-                if sheet_name in self.workbook.sheetnames:
-                    sheet = self.workbook[sheet_name]
-                    self._add_data_validations(sheet, validations)
+    def _theme_palette(self, file_path: str, plan: WorkbookEditPlan) -> StylePalette:
+        """
+        Substitutions from the workbook's current theme to change_theme
+
+        The current theme is the built-in (or the edit's custom 'theme') whose
+        colors the style table uses most; without a match nothing is remapped.
+        """
+        candidates = list(self.themes.values())
+        if isinstance(plan.theme, dict):
+            candidates.insert(0, self._get_theme(plan.theme))
+        old_theme = detect_theme(read_styles(file_path), candidates)
+        if old_theme is None:
+            return StylePalette({})
+        return StylePalette.between(old_theme, self._get_theme(plan.change_theme))
+
+    def _edit_memory(self, file_path: str, plan: WorkbookEditPlan) -> MemoryEstimate:
+        """Estimated peak memory of an edit: the loaded workbook (which cannot stream) plus new sheets"""
+        estimate = MemoryEstimate()
+        with zipfile.ZipFile(file_path) as archive:
+            loaded = sum(info.file_size for info in archive.infolist() if info.filename.startswith('xl/worksheets/'))
+        # A theme-only edit rewrites the style table and never loads the sheets
+        factor = 0 if plan.theme_only else LOADED_XML_FACTOR
+        estimate.add(f"workbook '{os.path.basename(file_path)}'", WORKBOOK_BYTES + loaded * factor)
+        for sheet_plan in plan.add_sheets:
+            estimate.add(f"sheet '{sheet_plan.name}'", *self._sheet_memory(sheet_plan))
+        return estimate
+
+    def _save(self, output_path: str, reused: Optional[List[str]] = None, compression: Any = None,
+              palette: Optional[StylePalette] = None, source: Any = None):
+        """
+        Save the workbook, writing columnar data, sparklines, reused sheets and theme switches into the package
+
+        Reused sheets come from source, or the previous build at output_path.
+        """
+        columns = {name: sheet for name, sheet in self._columnar.items() if name in self.workbook.sheetnames}
+        sparklines = {name: groups for name, groups in self._sparklines.items() if name in self.workbook.sheetnames}
+        policy = CompressionPolicy.from_option(compression)
+        streaming = self.last_build_mode == 'streaming'
+        if reused or columns or policy is not None or palette or sparklines:
+            save_workbook(self.workbook, output_path, reused or (), columns, policy, streaming, palette, source,
+                          sparklines)
+        else:
+            self.workbook.save(output_path)
 
-        # Save with new name or overwrite
-        output_path = modifications.get('output_path', file_path.replace('.xlsx', '_edited.xlsx'))
-        self.workbook.save(output_path)
+    def append_rows(self, file_path: str, sheet_name: str, rows: List[List[Any]],
+                    output_path: Optional[str] = None, compression: Any = None) -> str:
+        """
+        Append rows to a data sheet without loading the workbook
 
+        Args:
+            file_path: Path to existing workbook
+            sheet_name: Sheet to grow
+            rows: Row values in column order; None continues the formula of the
+                row above (e.g. a running balance)
+            output_path: Where to save, defaults to overwriting file_path
+            compression: Optional package compression, as for create_workbook
+        """
+        output_path = output_path or file_path
+        append_sheet_rows(file_path, sheet_name, rows, output_path,
+                          compression=CompressionPolicy.from_option(compression))
         return output_path
 
+    async def create_workbook_async(self, config: Union[Dict, WorkbookPlan],
+                                    executor: Optional[Executor] = None) -> str:
+        """
+        create_workbook for asyncio callers
+
+        The build runs on executor (the loop's default thread pool when None)
+        in a fresh engine sharing this one's themes, so any number of builds
+        can run at once; every file read and write happens there, never on
+        the event loop. Cancelling the awaiting task stops the build at its
+        next phase. The last_* attributes are copied back once it finishes.
+        """
+        return self._adopt(await run_build(_run_job, 'create_workbook', (config,), self.themes, executor=executor))
+
+    async def edit_workbook_async(self, file_path: str, modifications: Dict,
+                                  executor: Optional[Executor] = None) -> str:
+        """edit_workbook for asyncio callers, run like create_workbook_async"""
+        return self._adopt(await run_build(_run_job, 'edit_workbook', (file_path, modifications), self.themes,
+                                           executor=executor))
+
+    def _adopt(self, outcome: Tuple[str, Dict[str, Any]]) -> str:
+        result, state = outcome
+        for name, value in state.items():
+            setattr(self, name, value)
+        return result
+
     def _get_theme(self, theme_input: Any) -> AdvancedTheme:
         """Get theme from name or custom configuration"""
         if isinstance(theme_input, str):
@@ -225,77 +626,97 @@ class EnhancedExcelMaster:
             return AdvancedTheme('custom', theme_input)
         return self.themes['corporate_blue']
 
-    def _create_sheet(self, config: Dict, theme: AdvancedTheme):
+    def _create_sheet(self, config: SheetPlan, theme: AdvancedTheme):
         """Create a sheet with full customization"""
-        sheet_name = config.get('name', 'Sheet1')
-        sheet_type = config.get('type', 'data')
-
-        sheet = self.workbook.create_sheet(sheet_name)
-
-        if sheet_type == 'data':
-            self._create_data_sheet(sheet, config, theme)
-        elif sheet_type == 'pivot':
-            self._create_pivot_sheet(sheet, config, theme)
-        elif sheet_type == 'dashboard':
-            self._create_dashboard_sheet(sheet, config, theme)
-        elif sheet_type == 'chart':
-            self._create_chart_sheet(sheet, config, theme)
+        sheet_name = config.name
+        sheet_type = config.type
+
+        with self.profiler.phase('sheets') as timer:
+            sheet = self.workbook.create_sheet(sheet_name)
+
+            if sheet_type == 'data':
+                self._create_data_sheet(sheet, config, theme)
+            elif sheet_type == 'pivot':
+                self._create_pivot_sheet(sheet, config, theme)
+            elif sheet_type == 'dashboard':
+                self._create_dashboard_sheet(sheet, config, theme)
+            elif sheet_type == 'chart':
+                self._create_chart_sheet(sheet, config, theme)
+
+        if self.profiler.enabled:
+            cells = len(sheet._cells)
+            if sheet_name in self._columnar:
+                cells += self._columnar[sheet_name].cell_count()
+            self.profiler.count('sheets')
+            self.profiler.count('cells', cells)
+            self.profiler.record('sheet', sheet_name, timer.elapsed, type=sheet_type, cells=cells)
 
         return sheet
 
-    def _create_data_sheet(self, sheet, config: Dict, theme: AdvancedTheme):
+    def _create_data_sheet(self, sheet, config: SheetPlan, theme: AdvancedTheme):
         """Create data sheet with full customization"""
+        profiler = self.profiler
+
         # Add headers
-        headers = config.get('headers', [])
+        headers = config.headers
         if headers:
-            self._add_styled_headers(sheet, headers, 1, theme)
+            with profiler.phase('header_styling'):
+                self._add_styled_headers(sheet, headers, 1, theme)
 
-        # Add data
-        data = config.get('data', [])
+        # Add data as typed columns, written straight into the sheet XML on save
+        column_formats = config.column_formats
         start_row = 2
-        for row_idx, row_data in enumerate(data, start_row):
-            for col_idx, value in enumerate(row_data, 1):
-                cell = sheet.cell(row=row_idx, column=col_idx, value=value)
-
-                # Apply number formats
-                col_format = config.get('formats', {}).get(headers[col_idx-1] if col_idx <= len(headers) else '', None)
-                if col_format:
-                    cell.number_format = col_format
+        with profiler.phase('data_write'):
+            columns = config.columns or ColumnarSheet.from_rows(config.data)
+            # Streaming builds style tables with rules, which never touch the data cells
+            style_mode = 'rules' if self.last_build_mode == 'streaming' else config.style_mode
+            if config.table_style and style_mode == 'static':
+                # Static styling touches every data cell anyway
+                columns.write_cells(sheet, start_row, column_formats)
+            elif columns.row_count:
+                columns.bind(self.workbook, start_row, column_formats,
+                             TABLE_ALIGNMENT if config.table_style else None)
+                self._columnar[sheet.title] = columns
 
         # Apply styling
-        style_config = config.get('styling', {})
-        if style_config.get('table_style', True):
-            self._apply_table_style(sheet, theme, len(headers), start_row + len(data) - 1)
+        if config.table_style:
+            with profiler.phase('table_style'):
+                self._apply_table_style(sheet, theme, len(headers), start_row + columns.row_count - 1,
+                                        mode=style_mode)
 
         # Add conditional formatting
-        if 'conditional_formatting' in config:
-            self._apply_conditional_formatting(sheet, config['conditional_formatting'])
+        if config.conditional_formatting:
+            with profiler.phase('conditional_formatting'):
+                self._apply_conditional_formatting(sheet, config.conditional_formatting)
 
         # Add formulas
-        if 'formulas' in config:
-            self._add_formulas(sheet, config['formulas'])
+        if config.formulas:
+            with profiler.phase('formulas'):
+                self._add_formulas(sheet, config.formulas)
 
         # Add charts
-        if 'charts' in config:
-            for chart_config in config['charts']:
-                self._add_chart_to_sheet(sheet, chart_config)
+        for chart_config in config.charts:
+            self._add_chart_to_sheet(sheet, chart_config)
 
         # Add data validation
-        if 'validations' in config:
-            self._add_data_validations(sheet, config['validations'])
+        if config.validations:
+            with profiler.phase('validations'):
+                self._add_data_validations(sheet, config.validations)
 
-        # Add sparklines (simulated with conditional formatting)
-        if 'sparklines' in config:
-            self._add_sparklines(sheet, config['sparklines'])
+        # Add sparklines, one native sparkline group per config
+        if config.sparklines:
+            with profiler.phase('sparklines'):
+                self._add_sparklines(sheet, config.sparklines, theme)
 
         # Auto-adjust column widths
-        if style_config.get('auto_width', True):
-            self._auto_adjust_columns(sheet)
+        if config.auto_width:
+            with profiler.phase('auto_width'):
+                self._auto_adjust_columns(sheet)
 
-    def _create_dashboard_sheet(self, sheet, config: Dict, theme: AdvancedTheme):
+    def _create_dashboard_sheet(self, sheet, config: SheetPlan, theme: AdvancedTheme):
         """Create interactive dashboard"""
         # Title
-        title = config.get('title', 'Dashboard')
+        title = config.title
         sheet['A1'] = title
         sheet['A1'].font = Font(name=theme.header_font, size=20, bold=True, color=theme.primary.replace('FF', ''))
         sheet.merge_cells('A1:F1')
@@ -304,8 +725,9 @@ class EnhancedExcelMaster:
         sheet['A2'] = f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
         sheet['A2'].font = Font(size=10, italic=True)
 
-        # KPI Cards
-        kpis = config.get('kpis', [])
+        # KPI Cards, computing any declared aggregations from their source sheets
+        with self.profiler.phase('kpis'):
+            kpis = self._get_kpi_aggregator().evaluate(config.kpis)
         row = 4
         col = 1
         for kpi in kpis:
@@ -317,10 +739,10 @@ class EnhancedExcelMaster:
 
         # Charts
         chart_row = row + 5
-        charts = config.get('charts', [])
+        charts = config.charts
         for i, chart_config in enumerate(charts):
-            chart_config['position'] = f"{get_column_letter(1 + (i % 2) * 8)}{chart_row + (i // 2) * 15}"
-            self._add_chart_to_sheet(sheet, chart_config)
+            position = f"{get_column_letter(1 + (i % 2) * 8)}{chart_row + (i // 2) * 15}"
+            self._add_chart_to_sheet(sheet, dict(chart_config, position=position))
 
     def _create_kpi_card(self, sheet, row: int, col: int, kpi: Dict, theme: AdvancedTheme):
         """Create a KPI card on the dashboard"""
@@ -335,28 +757,28 @@ class EnhancedExcelMaster:
         value_cell.number_format = kpi.get('format', '#,##0')
 
         # KPI change
-        if 'change' in kpi:
+        if kpi.get('change') is not None:
             change_cell = sheet.cell(row=row+2, column=col, value=kpi['change'])
             change_color = theme.success if kpi['change'] > 0 else theme.danger
             change_cell.font = Font(size=10, color=change_color.replace('FF', ''))
             change_cell.number_format = '0.0%'
 
-        # Merge and style
-        sheet.merge_cells(start_row=row, start_column=col, end_row=row+2, end_column=col+1)
+        # Merge each card line across the card width, keeping value and change visible
+        for card_row in range(row, row + 3):
+            sheet.merge_cells(start_row=card_row, start_column=col, end_row=card_row, end_column=col+1)
 
-    def _create_pivot_sheet(self, sheet, config: Dict, theme: AdvancedTheme):
+    def _create_pivot_sheet(self, sheet, config: SheetPlan, theme: AdvancedTheme):
         """Create sheet with pivot table configuration"""
         # Note: python-openpyxl doesn't fully support creating pivot tables
         # This creates a manual pivot-like structure
         pass
 
-    def _create_chart_sheet(self, sheet, config: Dict, theme: AdvancedTheme):
+    def _create_chart_sheet(self, sheet, config: SheetPlan, theme: AdvancedTheme):
         """Create sheet dedicated to charts"""
-        charts = config.get('charts', [])
+        charts = config.charts
         row = 1
         for chart_config in charts:
-            chart_config['position'] = f"A{row}"
-            self._add_chart_to_sheet(sheet, chart_config)
+            self._add_chart_to_sheet(sheet, dict(chart_config, position=f"A{row}"))
             row += 20
 
     def _add_styled_headers(self, sheet, headers: List[str], row: int, theme: AdvancedTheme):
@@ -373,8 +795,26 @@ class EnhancedExcelMaster:
                 bottom=Side(style='thin')
             )
 
-    def _apply_table_style(self, sheet, theme: AdvancedTheme, max_col: int, max_row: int):
-        """Apply professional table styling"""
+    def _apply_table_style(self, sheet, theme: AdvancedTheme, max_col: int, max_row: int, mode: str = 'rules'):
+        """
+        Apply professional table styling
+
+        In 'rules' mode borders and alternating row colors are two range-level
+        conditional formatting rules, so cost and file size do not grow with
+        row count; the data cells' alignment comes with their column styles
+        (see ColumnarSheet.bind). 'static' mode writes a border, fill and
+        alignment per cell.
+        """
+        if max_col < 1 or max_row < 2:
+            return
+
+        if mode == 'rules':
+            data_range = f"A2:{get_column_letter(max_col)}{max_row}"
+            rules = StyleRules(sheet)
+            rules.grid(data_range)
+            rules.banding(data_range, theme.background)
+            return
+
         # Borders
         thin_border = Border(
             left=Side(style='thin'),
@@ -393,8 +833,7 @@ class EnhancedExcelMaster:
                 if row % 2 == 0:
                     cell.fill = PatternFill(start_color=theme.background, end_color=theme.background, fill_type='solid')
 
-                # Center alignment for certain columns
-                cell.alignment = Alignment(horizontal='left', vertical='center')
+                cell.alignment = TABLE_ALIGNMENT
 
     def _apply_conditional_formatting(self, sheet, cf_config: List[Dict]):
         """Apply conditional formatting rules"""
@@ -441,6 +880,15 @@ class EnhancedExcelMaster:
                 )
                 sheet.conditional_formatting.add(range_addr, rule)
 
+            elif cf_type == 'thresholds':
+                # Value bands, e.g. progress: green >= 1, yellow >= 0.5, red below
+                bands = [(band.get('min'), band['color']) for band in cf.get('bands', [])]
+                StyleRules(sheet).thresholds(range_addr, bands)
+
+            elif cf_type == 'banding':
+                # Alternating row fill over an arbitrary range
+                StyleRules(sheet).banding(range_addr, cf.get('color', 'FFF8F9FA'), every=cf.get('every', 2))
+
     def _add_formulas(self, sheet, formulas: List[Dict]):
         """Add formulas to cells"""
         for formula in formulas:
@@ -456,6 +904,18 @@ class EnhancedExcelMaster:
 
     def _add_chart_to_sheet(self, sheet, chart_config: Dict):
         """Add chart with full customization"""
+        if self._pending_charts is not None:
+            # Charts are built once every sheet exists, so cross-sheet data is in place
+            self._pending_charts.append((sheet, chart_config))
+            return
+
+        with self.profiler.phase('charts'):
+            self._build_chart(sheet, chart_config)
+        self.profiler.count('charts')
+
+    def _build_chart(self, sheet, chart_config: Dict):
+        """Build one chart from its resolved plan and anchor it on the sheet"""
+        plan = self._get_chart_planner().plan(chart_config, sheet.title)
         chart_type = chart_config.get('type', 'bar')
 
         # Create chart
@@ -480,16 +940,13 @@ class EnhancedExcelMaster:
         chart.title = chart_config.get('title', 'Chart')
         chart.style = chart_config.get('style', 10)
 
-        # Data range
-        data_range = chart_config.get('data_range', 'A1:D10')
-        data_ref = Reference(sheet, range_string=data_range)
-        chart.add_data(data_ref, titles_from_data=True)
+        # Series, reduced into the helper sheet when the chart asks for it
+        series_plans = self._plan_series(plan)
+        if 'downsample' in chart_config or 'aggregate' in chart_config:
+            series_plans = self._write_reduced_chart_data(series_plans, chart_config)
 
-        # Categories range
-        if 'categories_range' in chart_config:
-            cat_range = chart_config['categories_range']
-            cat_ref = Reference(sheet, range_string=cat_range)
-            chart.set_categories(cat_ref)
+        for series_plan in series_plans:
+            chart.series.append(self._build_series(series_plan, chart_type == 'scatter'))
 
         # Axis labels
         if 'x_axis' in chart_config:
@@ -504,6 +961,199 @@ class EnhancedExcelMaster:
 
         sheet.add_chart(chart, position)
 
+    def _get_chart_planner(self) -> ChartPlanner:
+        """Planner for the current build, registering loaded sheets on first use"""
+        if self.chart_planner is None:
+            self.chart_planner = ChartPlanner()
+        for worksheet in self.workbook.worksheets:
+            if not self.chart_planner.has_sheet(worksheet.title):
+                self.chart_planner.add_sheet(worksheet.title, *self._sheet_extent(worksheet))
+        return self.chart_planner
+
+    def _sheet_extent(self, worksheet) -> Tuple[int, int]:
+        """(max_row, max_column) of a sheet; template sheets are empty until they are spliced in"""
+        if self._template is not None and worksheet.title in self._template.spliced:
+            return self._template.extents[worksheet.title]
+        return worksheet.max_row, worksheet.max_column
+
+    def _plan_charts(self, sheet_plans: List[SheetPlan], extra_charts: Optional[List[Tuple[str, Dict]]] = None) -> ChartPlanner:
+        """
+        Resolve and validate every chart reference of a build up front
+
+        Raises ChartReferenceError listing all bad references before any
+        sheet is created, instead of failing inside openpyxl on save.
+        """
+        planner = ChartPlanner()
+        if self.workbook is not None:
+            for worksheet in self.workbook.worksheets:
+                planner.add_sheet(worksheet.title, *self._sheet_extent(worksheet))
+
+        charts = list(extra_charts or [])
+        for sheet_plan in sheet_plans:
+            name = sheet_plan.name
+            extent = ChartPlanner.config_extent(sheet_plan.config)
+            planner.add_sheet(name, *(extent or (None, None)))
+            charts.extend((name, chart_config) for chart_config in sheet_plan.charts)
+
+        planner.validate(charts)
+        return planner
+
+    def _get_kpi_aggregator(self) -> KPIAggregator:
+        """KPI aggregator for the current build, created over loaded sheets when needed"""
+        if self.kpi_aggregator is None:
+            self.kpi_aggregator = KPIAggregator()
+            for worksheet in self.workbook.worksheets:
+                self.kpi_aggregator.add_worksheet(worksheet)
+        return self.kpi_aggregator
+
+    def _plan_kpis(self, sheet_plans: List[SheetPlan]) -> KPIAggregator:
+        """
+        Register KPI source sheets and validate dashboard KPI definitions
+
+        Data sheets from the config are registered straight from their headers
+        and rows; loaded sheets are only read if a KPI actually uses them.
+        Raises KPIError listing every bad KPI before any sheet is built.
+        """
+        aggregator = KPIAggregator()
+        if self.workbook is not None:
+            for worksheet in self.workbook.worksheets:
+                aggregator.add_worksheet(worksheet)
+
+        kpis = []
+        for sheet_plan in sheet_plans:
+            if sheet_plan.type == 'data':
+                aggregator.add_source(sheet_plan.name, sheet_plan.headers, sheet_plan.data)
+            elif sheet_plan.type == 'dashboard':
+                kpis.extend(sheet_plan.kpis)
+
+        aggregator.validate(kpis)
+        return aggregator
+
+    def _build_pending_charts(self):
+        """Build the charts deferred while sheets were being created"""
+        pending, self._pending_charts = self._pending_charts or [], None
+        for sheet, chart_config in pending:
+            self._add_chart_to_sheet(sheet, chart_config)
+
+    def _plan_series(self, plan) -> List[SeriesPlan]:
+        """Explicit series, or one series per column of the data block (first row = titles)"""
+        if plan.series:
+            return plan.series
+
+        data = plan.data
+        return [
+            SeriesPlan(
+                ChartReference(data.sheet_name, col, data.min_row + 1, col, data.max_row),
+                plan.categories,
+                title_ref=ChartReference(data.sheet_name, col, data.min_row, col, data.min_row)
+            )
+            for col in range(data.min_col, data.max_col + 1)
+        ]
+
+    def _reference(self, chart_ref: ChartReference) -> Reference:
+        return Reference(self.workbook[chart_ref.sheet_name], *chart_ref.bounds)
+
+    def _build_series(self, series_plan: SeriesPlan, scatter: bool = False):
+        """openpyxl series for a resolved series plan"""
+        values = self._reference(series_plan.values)
+        categories = self._reference(series_plan.categories) if series_plan.categories else None
+
+        if scatter and categories is not None:
+            series = Series(values, xvalues=categories, title=series_plan.title)
+        else:
+            series = Series(values, title=series_plan.title)
+            if categories is not None:
+                series.cat = AxDataSource(numRef=NumRef(f=categories))
+
+        if series_plan.title_ref is not None and series_plan.title is None:
+            series.tx = SeriesLabel(strRef=StrRef(str(self._reference(series_plan.title_ref))))
+        return series
+
+    def _chart_data_sheet(self):
+        """Hidden helper sheet for reduced chart series, created on first use"""
+        if CHART_DATA_SHEET in self.workbook.sheetnames:
+            return self.workbook[CHART_DATA_SHEET]
+        helper = self.workbook.create_sheet(CHART_DATA_SHEET)
+        helper.sheet_state = 'hidden'
+        self._get_chart_planner().add_sheet(CHART_DATA_SHEET)
+        return helper
+
+    def _read_reference(self, chart_ref: ChartReference) -> List[Any]:
+        """Cell values of a single-row or single-column reference"""
+        worksheet = self.workbook[chart_ref.sheet_name]
+        min_col, min_row, max_col, max_row = chart_ref.bounds
+        rows = worksheet.iter_rows(min_col=min_col, max_col=max_col, min_row=min_row, max_row=max_row,
+                                   values_only=True)
+        columns = self._columnar.get(chart_ref.sheet_name)
+        if columns is None:
+            return [value for row in rows for value in row]
+        # Cells written through openpyxl take precedence over the sheet's columnar data
+        return [columns.value(row_idx, col_idx) if value is None else value
+                for row_idx, row in enumerate(rows, min_row)
+                for col_idx, value in enumerate(row, min_col)]
+
+    def _write_reduced_chart_data(self, series_plans: List[SeriesPlan], chart_config: Dict) -> List[SeriesPlan]:
+        """
+        Downsample or aggregate a chart's series into the hidden helper sheet
+
+        Series sharing a categories range are reduced together so they stay
+        aligned. Returns series plans pointing at the helper sheet. A group
+        with formula cells is charted from its source range unreduced: the
+        formulas have no value before Excel calculates them, and copied to the
+        helper sheet their relative references would point elsewhere.
+        """
+        groups: Dict[Optional[str], List[SeriesPlan]] = {}
+        for series_plan in series_plans:
+            key = str(series_plan.categories) if series_plan.categories else None
+            groups.setdefault(key, []).append(series_plan)
+
+        reduced_plans = []
+        for members in groups.values():
+            categories_ref = members[0].categories
+            categories = self._read_reference(categories_ref) if categories_ref else None
+            series = [self._read_reference(member.values) for member in members]
+            if any(isinstance(value, str) and is_formula(value) for values in [categories or []] + series
+                   for value in values):
+                reduced_plans.extend(members)
+                self.profiler.count('unreduced_series', len(members))
+                continue
+            categories, series = reduce_series(categories, series, chart_config)
+
+            # Each group gets its own block of columns on the helper sheet
+            helper = self._chart_data_sheet()
+            col = 1 if helper.max_column == 1 and helper['A1'].value is None else helper.max_column + 2
+            points = max((len(values) for values in series), default=0)
+
+            reduced_categories = None
+            if categories is not None:
+                helper.cell(row=1, column=col, value='Category')
+                for row_idx, value in enumerate(categories, 2):
+                    helper.cell(row=row_idx, column=col, value=value)
+                reduced_categories = ChartReference(CHART_DATA_SHEET, col, 2, col, points + 1)
+                col += 1
+
+            for member, values in zip(members, series):
+                title_ref = ChartReference(CHART_DATA_SHEET, col, 1, col, 1)
+                if member.title_ref is not None:
+                    title = self._read_reference(member.title_ref)[0]
+                    if isinstance(title, str) and is_formula(title):
+                        # A computed series name stays with its source cell
+                        title, title_ref = None, member.title_ref
+                else:
+                    title = member.title
+                helper.cell(row=1, column=col, value=title)
+                for row_idx, value in enumerate(values, 2):
+                    helper.cell(row=row_idx, column=col, value=value)
+                reduced_plans.append(SeriesPlan(
+                    ChartReference(CHART_DATA_SHEET, col, 2, col, points + 1),
+                    reduced_categories,
+                    member.title,
+                    title_ref
+                ))
+                col += 1
+
+        return reduced_plans
+
     def _add_pivot_table(self, sheet, pivot_config: Dict):
         """Add pivot table (manual aggregation since openpyxl doesn't fully support pivot tables)"""
         # This would create a manual pivot-like structure
@@ -549,22 +1199,28 @@ class EnhancedExcelMaster:
                 sheet.add_data_validation(dv)
                 dv.add(range_addr)
 
-    def _add_sparklines(self, sheet, sparkline_config: List[Dict]):
-        """Add sparklines (simulated with mini charts or conditional formatting)"""
-        # Note: True sparklines require Excel formulas like SPARKLINE()
-        # This creates visual approximations
-        pass
+    def _add_sparklines(self, sheet, sparkline_config: List[Dict], theme: AdvancedTheme):
+        """
+        Add native sparkline groups, written into the sheet's extLst on save
+
+        Each config becomes one x14 sparklineGroup with a sparkline per row
+        (or column) of its data_range, placed in the matching location cell.
+        """
+        groups = [sparkline_group_xml(sheet.title, config, theme) for config in sparkline_config]
+        self._sparklines.setdefault(sheet.title, []).append(sparkline_extension(groups))
+        self.profiler.count('sparklines', sum(group.count('<x14:sparkline>') for group in groups))
 
     def _auto_adjust_columns(self, sheet):
         """Auto-adjust column widths based on content"""
-        for column in sheet.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            adjusted_width = min(max_length + 2, 50)  # Max width 50
-            sheet.column_dimensions[column_letter].width = adjusted_width
+        columnar_widths = self._columnar[sheet.title].text_widths() if sheet.title in self._columnar else []
+        lengths = dict(enumerate(columnar_widths, 1))
+        for (_, col_idx), cell in sheet._cells.items():
+            if cell.value:
+                lengths[col_idx] = max(lengths.get(col_idx, 0), len(str(cell.value)))
+
+        for col_idx in range(1, max(sheet.max_column, len(columnar_widths)) + 1):
+            adjusted_width = min(lengths.get(col_idx, 0) + 2, 50)  # Max width 50
+            sheet.column_dimensions[get_column_letter(col_idx)].width = adjusted_width
 
     def _update_sheet_data(self, sheet, updates: Dict):
         """Update existing sheet data"""
@@ -592,18 +1248,6 @@ class EnhancedExcelMaster:
             for cell_addr in updates['clear']:
                 sheet[cell_addr].value = None
 
-    def _apply_theme_to_workbook(self, theme: AdvancedTheme):
-        """Apply theme to entire workbook"""
-        for sheet_name in self.workbook.sheetnames:
-            sheet = self.workbook[sheet_name]
-
-            # Update header row if it exists
-            if sheet.max_row > 0:
-                for cell in sheet[1]:
-                    if cell.fill and cell.fill.start_color:
-                        cell.fill = PatternFill(start_color=theme.primary, end_color=theme.primary, fill_type='solid')
-                        cell.font = Font(color='FFFFFF', bold=True)
-
     def get_available_themes(self) -> List[str]:
         """Return list of available theme names"""
         return list(self.themes.keys())
@@ -644,24 +1288,40 @@ class EnhancedExcelMaster:
         title_cell.value = title
         title_cell.font = Font(bold=True, size=14)
 
+def _run_job(method: str, args: Tuple, themes: Dict[str, AdvancedTheme],
+             cancel: Optional[threading.Event]) -> Tuple[str, Dict[str, Any]]:
+    """Executor side of the async API: one build in a fresh engine, returned with its state"""
+    master = EnhancedExcelMaster()
+    master.themes = themes
+    master.cancel_event = cancel
+    result = getattr(master, method)(*args)
+    return result, {name: getattr(master, name) for name in BUILD_STATE}
+
 def main():
     """Command line interface for enhanced Excel automation"""
-    if len(sys.argv) < 2:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--profile')]
+    profile_flags = [arg for arg in sys.argv[1:] if arg.startswith('--profile')]
+
+    if not args:
         print("Enhanced Excel Master - Full Customization Control")
         print("\nUsage:")
-        print("  python excel_master_enhanced.py config.json")
+        print("  python excel_master_enhanced.py config.json [--profile[=cprofile,memory]]")
         print("\nAvailable themes:")
         master = EnhancedExcelMaster()
         for theme in master.get_available_themes():
             print(f"  - {theme}")
         return
 
-    config_file = sys.argv[1]
+    config_file = args[0]
 
     try:
         with open(config_file, 'r') as f:
             config = json.load(f)
 
+        if profile_flags:
+            _, _, options = profile_flags[-1].partition('=')
+            config['profile'] = options or True
+
         master = EnhancedExcelMaster()
 
         # Check if editing existing file
@@ -675,6 +1335,9 @@ def main():
         print(f"📊 Theme: {config.get('theme', 'corporate_blue')}")
         print(f"📋 Sheets: {len(config.get('sheets', []))}")
 
+        if master.last_profile:
+            print(format_report(master.last_profile))
+
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         import traceback
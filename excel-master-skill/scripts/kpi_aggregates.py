@@ -0,0 +1,205 @@
+"""
+KPI Aggregates - Dashboard KPI values computed from source sheet data
+Groups KPI definitions by source sheet, computes each sheet's aggregations in a
+single vectorized pandas pass, and caches the results for the rest of the build
+"""
+
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+
+KPI_AGGREGATIONS = ('sum', 'mean', 'median', 'min', 'max', 'count', 'first', 'last', 'pop_change')
+PERIOD_FREQUENCIES = {
+    'day': 'D',
+    'week': 'W',
+    'month': 'M',
+    'quarter': 'Q',
+    'year': 'Y'
+}
+
+
+class KPIError(ValueError):
+    """Raised when a KPI refers to an unknown sheet, column or aggregation"""
+
+
+class KPISpec:
+    """One aggregation over a source column, optionally rolled up by period first"""
+
+    __slots__ = ('source', 'column', 'agg', 'date_column', 'period')
+
+    def __init__(self, source: str, column: str, agg: str, date_column: Optional[str] = None,
+                 period: Optional[str] = None):
+        self.source = source
+        self.column = column
+        self.agg = agg
+        self.date_column = date_column
+        self.period = period
+
+    @classmethod
+    def from_config(cls, config: Dict, defaults: Optional[Dict] = None) -> 'KPISpec':
+        merged = dict(defaults or {})
+        merged.update(config)
+        for key in ('source', 'column'):
+            if key not in merged:
+                raise KPIError(f"KPI '{merged.get('name', '?')}' needs a '{key}'")
+        agg = merged.get('agg', 'sum')
+        if agg not in KPI_AGGREGATIONS:
+            raise KPIError(f"Unknown KPI aggregation '{agg}', expected one of {', '.join(KPI_AGGREGATIONS)}")
+        period = merged.get('period')
+        if period is not None and period not in PERIOD_FREQUENCIES:
+            raise KPIError(f"Unknown KPI period '{period}', expected one of {', '.join(PERIOD_FREQUENCIES)}")
+        if period is not None and 'date_column' not in merged:
+            raise KPIError(f"KPI '{merged.get('name', '?')}' groups by {period} but has no 'date_column'")
+        return cls(merged['source'], merged['column'], agg, merged.get('date_column'), period)
+
+    @property
+    def key(self) -> Tuple:
+        return self.source, self.column, self.agg, self.date_column, self.period
+
+
+def is_declarative(kpi: Dict) -> bool:
+    """True when a KPI is computed from a source sheet rather than given literally"""
+    return 'source' in kpi or isinstance(kpi.get('change'), dict)
+
+
+class KPIAggregator:
+    """
+    Evaluates declarative KPIs against source sheets for one build
+
+    Sources are registered cheaply (headers plus a row loader) and turned into
+    a DataFrame only when a KPI first needs them. All specs against one source
+    are computed together, and every result is cached by spec.
+    """
+
+    def __init__(self):
+        self._headers: Dict[str, List[str]] = {}
+        self._loaders: Dict[str, Callable[[], List[List[Any]]]] = {}
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._results: Dict[Tuple, Any] = {}
+        self.passes = 0
+
+    def add_source(self, name: str, headers: List[str], rows: List[List[Any]]):
+        """Register sheet data from a config"""
+        self._headers[name] = [str(header) for header in headers]
+        self._loaders[name] = lambda: rows
+
+    def add_worksheet(self, worksheet, header_row: int = 1):
+        """Register a built or loaded worksheet; cells are only read if a KPI uses it"""
+        headers = [cell.value for cell in worksheet[header_row]] if worksheet.max_row >= header_row else []
+        self._headers[worksheet.title] = ['' if header is None else str(header) for header in headers]
+        self._loaders[worksheet.title] = lambda: list(worksheet.iter_rows(min_row=header_row + 1, values_only=True))
+
+    def _specs(self, kpi: Dict) -> Tuple[Optional[KPISpec], Optional[KPISpec]]:
+        value_spec = KPISpec.from_config(kpi) if 'source' in kpi else None
+        change_spec = None
+        if isinstance(kpi.get('change'), dict):
+            base = {key: kpi[key] for key in ('name', 'source', 'column', 'date_column', 'period') if key in kpi}
+            change_spec = KPISpec.from_config(dict({'agg': 'pop_change'}, **kpi['change']), base)
+        return value_spec, change_spec
+
+    def validate(self, kpis: List[Dict]):
+        """Check sources and columns without reading any data"""
+        problems = []
+        for kpi in kpis:
+            try:
+                for spec in self._specs(kpi):
+                    if spec is None:
+                        continue
+                    if spec.source not in self._headers:
+                        raise KPIError(f"unknown source sheet '{spec.source}'")
+                    for column in (spec.column, spec.date_column):
+                        if column is not None and column not in self._headers[spec.source]:
+                            raise KPIError(f"sheet '{spec.source}' has no column '{column}'")
+            except KPIError as e:
+                problems.append(f"{kpi.get('name', 'KPI')}: {e}")
+        if problems:
+            raise KPIError("Invalid KPI definitions:\n  - " + "\n  - ".join(problems))
+
+    def evaluate(self, kpis: List[Dict]) -> List[Dict]:
+        """Return KPI configs with 'value' and 'change' filled in from their sources"""
+        planned = [(kpi, self._specs(kpi)) for kpi in kpis]
+
+        pending: Dict[str, List[KPISpec]] = {}
+        for _, specs in planned:
+            for spec in specs:
+                if spec is not None and spec.key not in self._results:
+                    pending.setdefault(spec.source, []).append(spec)
+        for source, specs in pending.items():
+            self._compute_source(source, specs)
+
+        resolved = []
+        for kpi, (value_spec, change_spec) in planned:
+            kpi = dict(kpi)
+            if value_spec is not None:
+                kpi['value'] = self._results[value_spec.key]
+            if change_spec is not None:
+                kpi['change'] = self._results[change_spec.key]
+            resolved.append(kpi)
+        return resolved
+
+    def _frame(self, source: str) -> pd.DataFrame:
+        if source not in self._frames:
+            if source not in self._loaders:
+                raise KPIError(f"unknown source sheet '{source}'")
+            headers = self._headers[source]
+            width = len(headers)
+            rows = [list(row[:width]) + [None] * (width - len(row)) for row in self._loaders[source]()]
+            self._frames[source] = pd.DataFrame(rows, columns=headers)
+        return self._frames[source]
+
+    def _compute_source(self, source: str, specs: List[KPISpec]):
+        """All aggregations for one source sheet in one pass over its columns"""
+        self.passes += 1
+        frame = self._frame(source)
+        columns = sorted({spec.column for spec in specs})
+        missing = [column for column in columns if column not in frame.columns]
+        if missing:
+            raise KPIError(f"sheet '{source}' has no column '{missing[0]}'")
+
+        numeric = frame[columns].apply(pd.to_numeric, errors='coerce')
+
+        # Plain aggregations: one DataFrame.agg call covers every column and function
+        plain = sorted({spec.agg for spec in specs if spec.period is None and spec.agg not in ('count', 'first', 'last', 'pop_change')})
+        table = numeric.agg(plain) if plain else None
+        counts = frame[columns].notna().sum()
+
+        for spec in specs:
+            if spec.period is not None:
+                self._results[spec.key] = self._periodic(frame, numeric, spec)
+            elif spec.agg == 'count':
+                self._results[spec.key] = int(counts[spec.column])
+            elif spec.agg in ('first', 'last', 'pop_change'):
+                self._results[spec.key] = self._positional(numeric[spec.column].dropna(), spec.agg)
+            else:
+                self._results[spec.key] = _plain_value(table.at[spec.agg, spec.column])
+
+    def _periodic(self, frame: pd.DataFrame, numeric: pd.DataFrame, spec: KPISpec) -> Any:
+        """Roll the column up by calendar period (sum), then aggregate the period totals"""
+        dates = pd.to_datetime(frame[spec.date_column], errors='coerce')
+        periods = dates.dt.to_period(PERIOD_FREQUENCIES[spec.period])
+        totals = numeric[spec.column].groupby(periods).sum().sort_index()
+        if spec.agg == 'count':
+            return int(len(totals))
+        if spec.agg in ('first', 'last', 'pop_change'):
+            return self._positional(totals, spec.agg)
+        return _plain_value(totals.agg(spec.agg))
+
+    @staticmethod
+    def _positional(series: pd.Series, agg: str) -> Any:
+        if series.empty:
+            return None
+        if agg == 'first':
+            return _plain_value(series.iloc[0])
+        if agg == 'last':
+            return _plain_value(series.iloc[-1])
+        # Period-over-period change: last value against the one before it
+        if len(series) < 2 or series.iloc[-2] == 0:
+            return None
+        return _plain_value((series.iloc[-1] - series.iloc[-2]) / abs(series.iloc[-2]))
+
+
+def _plain_value(value: Any) -> Any:
+    """numpy scalar to a plain Python number, NaN to None"""
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
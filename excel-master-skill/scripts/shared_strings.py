@@ -0,0 +1,135 @@
+"""
+Shared Strings - Builder for the workbook shared string table
+Interns every distinct string once and numbers the table by frequency, so the
+most repeated values (categories, names, statuses) get the shortest indices
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set
+from xml.sax.saxutils import escape, unescape
+
+import numpy as np
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+SHARED_STRINGS_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings'
+SHARED_STRINGS_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml'
+
+STRING_ITEM = re.compile(rb'<si>.*?</si>|<si/>', re.S)
+TEXT_RUN = re.compile(rb'<t(?:\s[^>]*)?>(.*?)</t>', re.S)
+COUNT_ATTRIBUTE = re.compile(rb'<sst\b[^>]*?\scount="(\d+)"')
+
+
+class SharedStrings:
+    """
+    Shared string table built in two steps
+
+    Strings are first counted with add() or encode(), then freeze() numbers
+    them most frequent first. Entries that are already placed (loaded from an
+    existing package) keep their index, since worksheets refer to them; new
+    strings counted later are placed after everything frozen before.
+    """
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.references = 0
+        self._index: Dict[str, int] = {}
+        self._raw: Dict[int, bytes] = {}
+        self._ids: Dict[str, int] = {}
+        self._texts: List[str] = []
+        self._counts: List[int] = []
+
+    @classmethod
+    def from_xml(cls, data: bytes) -> 'SharedStrings':
+        """Table of an existing package; its entries stay in place, rich text included"""
+        table = cls()
+        for index, item in enumerate(STRING_ITEM.findall(data)):
+            text = unescape(b''.join(TEXT_RUN.findall(item)).decode('utf-8'))
+            table.strings.append(text)
+            table._index.setdefault(text, index)
+            table._raw[index] = item
+        count = COUNT_ATTRIBUTE.search(data)
+        table.references = int(count.group(1)) if count else len(table.strings)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def add(self, text: str, count: int = 1) -> int:
+        """Count count uses of a string; returns its provisional id"""
+        provisional = self._ids.get(text)
+        if provisional is None:
+            provisional = self._ids[text] = len(self._texts)
+            self._texts.append(text)
+            self._counts.append(0)
+        self._counts[provisional] += count
+        self.references += count
+        return provisional
+
+    def unreferenced(self, used: Set[int]) -> int:
+        """Placed entries that neither the used indices nor any counted string refer to"""
+        return sum(1 for index, text in enumerate(self.strings) if index not in used and text not in self._ids)
+
+    def compact(self, used: Set[int], references: int) -> Dict[int, int]:
+        """
+        Drop the placed entries nothing refers to any more
+
+        Entries at the used indices, or whose text has been counted, keep
+        their relative order; references is the number of uses outside the
+        counted strings. Returns old index -> new index, for rewriting the
+        worksheets that refer to the kept entries.
+        """
+        remap: Dict[int, int] = {}
+        strings: List[str] = []
+        raw: Dict[int, bytes] = {}
+        index: Dict[str, int] = {}
+        for old, text in enumerate(self.strings):
+            if old not in used and text not in self._ids:
+                continue
+            remap[old] = len(strings)
+            if old in self._raw:
+                raw[len(strings)] = self._raw[old]
+            index.setdefault(text, len(strings))
+            strings.append(text)
+        self.strings, self._raw, self._index = strings, raw, index
+        self.references = references + sum(self._counts)
+        return remap
+
+    def encode(self, values: Iterable[str]) -> np.ndarray:
+        """
+        Pre-encode a categorical column into provisional ids
+
+        Every value is counted; after freeze(), remap[ids] gives the final
+        table indices of the whole column in one step.
+        """
+        return np.fromiter((self.add(value) for value in values), np.int32)
+
+    def freeze(self) -> np.ndarray:
+        """
+        Place every counted string, most frequent first
+
+        Returns the remap array from provisional id to table index.
+        """
+        pending = [provisional for provisional, text in enumerate(self._texts) if text not in self._index]
+        pending.sort(key=lambda provisional: -self._counts[provisional])
+        for provisional in pending:
+            text = self._texts[provisional]
+            self._index[text] = len(self.strings)
+            self.strings.append(text)
+        return np.fromiter((self._index[text] for text in self._texts), np.int64, len(self._texts))
+
+    def index(self, text: str) -> int:
+        """Table index of a placed string"""
+        return self._index[text]
+
+    def to_xml(self) -> bytes:
+        items = []
+        for index, text in enumerate(self.strings):
+            raw: Optional[bytes] = self._raw.get(index)
+            if raw is not None:
+                items.append(raw)
+                continue
+            space = ' xml:space="preserve"' if text.strip() != text else ''
+            items.append(f'<si><t{space}>{escape(text)}</t></si>'.encode('utf-8'))
+        header = (f'<sst xmlns="{MAIN_NS}" count="{max(self.references, len(self.strings))}" '
+                  f'uniqueCount="{len(self.strings)}">')
+        return header.encode('utf-8') + b''.join(items) + b'</sst>'
@@ -0,0 +1,518 @@
+"""
+Sheet Columns - Columnar in-memory model of data sheet contents
+Holds one typed buffer per column (numpy arrays for numbers, booleans and
+dates, dictionary codes for text) and writes worksheet XML rows straight from
+them, so large data sheets never become one openpyxl Cell per value
+"""
+
+import datetime
+import decimal
+import itertools
+import numbers
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE, get_time_format
+from openpyxl.styles import Alignment
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE, BUILTIN_FORMATS_REVERSE
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import column_index_from_string, range_boundaries
+from openpyxl.utils.datetime import to_excel
+from openpyxl.utils.exceptions import IllegalCharacterError
+
+# Rows encoded per batch when writing, bounding the temporary Python objects
+CHUNK_ROWS = 4096
+
+EXCEL_EPOCH = np.datetime64('1899-12-30', 'us')
+MICROSECONDS_PER_DAY = 86400 * 10 ** 6
+
+ROW_ELEMENT = re.compile(rb'<row\b[^>]*?(?:/>|>.*?</row>)', re.S)
+ROW_NUMBER = re.compile(rb'\br="(\d+)"')
+CELL_ELEMENT = re.compile(rb'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+CELL_REFERENCE = re.compile(rb'\br="([A-Z]+)\d+"')
+DIMENSION = re.compile(rb'<dimension ref="([^"]*)"')
+
+
+def cell_style(workbook, number_format: Optional[str], alignment: Optional[Alignment] = None) -> int:
+    """Index of the cell style that only sets a number format and alignment, registered on first use"""
+    style = StyleArray()
+    if number_format:
+        if number_format in BUILTIN_FORMATS_REVERSE:
+            style.numFmtId = BUILTIN_FORMATS_REVERSE[number_format]
+        else:
+            style.numFmtId = workbook._number_formats.add(number_format) + BUILTIN_FORMATS_MAX_SIZE
+    if alignment is not None:
+        style.alignmentId = workbook._alignments.add(alignment)
+    return workbook._cell_styles.add(style)
+
+
+def _style_attribute(style: Optional[Any]) -> str:
+    return f' s="{style}"' if style else ''
+
+
+def is_formula(text: str) -> bool:
+    return text.startswith('=') and len(text) > 1
+
+
+def _string_body(text: str, shared=None) -> str:
+    """
+    Cell attributes and content for a text value
+
+    Text goes into the shared string table when one is given (it must have
+    been counted and frozen), otherwise inline as openpyxl writes it.
+    """
+    if is_formula(text):
+        return f'><f>{escape(text[1:])}</f><v></v></c>'
+    if ILLEGAL_CHARACTERS_RE.search(text):
+        raise IllegalCharacterError(f"{text!r} cannot be used in worksheets.")
+    if shared is not None:
+        return f' t="s"><v>{shared.index(text)}</v></c>'
+    space = ' xml:space="preserve"' if text.strip() != text else ''
+    return f' t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def cell_text(value: Any) -> Optional[str]:
+    """
+    Text of a value that cell_xml writes as a string, None for any other value
+
+    Values of types without a cell representation are written as their
+    str(), so they have to be counted into a shared string table like text.
+    """
+    if value is None or isinstance(value, (bool, np.bool_, numbers.Real, decimal.Decimal, datetime.datetime,
+                                           datetime.date, datetime.time, datetime.timedelta)):
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def cell_xml(reference: str, value: Any, style: Optional[Any] = None, shared=None) -> str:
+    """
+    One <c> element for a Python value
+
+    Strings starting with '=' become formulas, other strings use the shared
+    string table when given and dates become serial numbers; missing values
+    produce an empty styled cell, or nothing.
+    """
+    style_attribute = _style_attribute(style)
+    if value is None or (isinstance(value, (float, decimal.Decimal)) and value != value):
+        return f'<c r="{reference}"{style_attribute}/>' if style else ''
+    if isinstance(value, str):
+        return f'<c r="{reference}"{style_attribute}' + _string_body(value, shared)
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{reference}"{style_attribute} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time, datetime.timedelta)):
+        value = to_excel(value)
+    if isinstance(value, numbers.Integral):
+        return f'<c r="{reference}"{style_attribute}><v>{int(value)}</v></c>'
+    if isinstance(value, (numbers.Real, decimal.Decimal)):
+        return f'<c r="{reference}"{style_attribute}><v>{float(value)!r}</v></c>'
+    return f'<c r="{reference}"{style_attribute}' + _string_body(cell_text(value), shared)
+
+
+class Column:
+    """
+    Values of one column in a typed buffer
+
+    Kinds: 'int', 'float' and 'bool' hold numpy arrays (with an optional
+    missing mask; NaN marks missing floats), 'date' holds datetime64 values,
+    'string' holds dictionary codes (-1 = missing) into a list of distinct
+    strings, and 'object' keeps a plain list for mixed columns.
+    """
+
+    __slots__ = ('kind', 'values', 'missing', 'dictionary')
+
+    def __init__(self, kind: str, values: Any, missing: Optional[np.ndarray] = None,
+                 dictionary: Optional[List[str]] = None):
+        self.kind = kind
+        self.values = values
+        self.missing = missing
+        self.dictionary = dictionary
+
+    @classmethod
+    def from_values(cls, values: Sequence[Any]) -> 'Column':
+        """Column from a sequence of Python values, picking the narrowest kind"""
+        count = len(values)
+        types = set(map(type, values))
+        has_missing = type(None) in types
+        types.discard(type(None))
+        missing = np.fromiter((value is None for value in values), bool, count) if has_missing else None
+
+        if types == {int}:
+            try:
+                return cls('int', np.fromiter((0 if value is None else value for value in values), np.int64, count),
+                           missing)
+            except OverflowError:
+                pass
+        elif types == {float}:
+            return cls('float', np.fromiter((np.nan if value is None else value for value in values),
+                                            np.float64, count))
+        elif types == {bool}:
+            return cls('bool', np.fromiter((bool(value) for value in values), bool, count), missing)
+        elif types == {str}:
+            index: Dict[str, int] = {}
+            codes = np.fromiter((-1 if value is None else index.setdefault(value, len(index)) for value in values),
+                                np.int32, count)
+            return cls('string', codes, dictionary=list(index))
+        return cls('object', list(values))
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> 'Column':
+        """
+        Column over a pandas Series
+
+        Numeric, boolean and naive datetime columns and categorical codes are
+        used without copying; text is dictionary-encoded with pd.factorize.
+        """
+        dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = list(dtype.categories)
+            if all(isinstance(category, str) for category in categories):
+                return cls('string', series.cat.codes.to_numpy(), dictionary=categories)
+        elif isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+            return cls('int', series.to_numpy())
+        elif isinstance(dtype, np.dtype) and dtype.kind == 'f':
+            return cls('float', series.to_numpy())
+        elif isinstance(dtype, np.dtype) and dtype.kind == 'b':
+            return cls('bool', series.to_numpy())
+        elif isinstance(dtype, np.dtype) and dtype.kind == 'M':
+            return cls('date', series.to_numpy())
+        elif dtype.kind in 'iub':
+            # Nullable extension types (Int64, boolean) keep their own mask
+            missing = series.isna().to_numpy()
+            kind = 'bool' if dtype.kind == 'b' else 'int'
+            numpy_dtype = bool if kind == 'bool' else np.int64
+            return cls(kind, series.to_numpy(dtype=numpy_dtype, na_value=0), missing if missing.any() else None)
+        elif dtype.kind == 'f':
+            return cls('float', series.to_numpy(dtype=np.float64, na_value=np.nan))
+        elif dtype.kind in 'OSU':
+            codes, uniques = pd.factorize(series)
+            dictionary = list(uniques)
+            if all(isinstance(value, str) for value in dictionary):
+                return cls('string', codes, dictionary=dictionary)
+
+        return cls('object', series.astype(object).where(series.notna(), None).tolist())
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def value(self, index: int) -> Any:
+        """Python value at a row index, None when missing"""
+        kind = self.kind
+        if kind == 'object':
+            return self.values[index]
+        if kind == 'string':
+            code = self.values[index]
+            return None if code < 0 else self.dictionary[code]
+        if kind == 'date':
+            value = self.values[index]
+            return None if np.isnat(value) else pd.Timestamp(value).to_pydatetime()
+        if self.missing is not None and self.missing[index]:
+            return None
+        value = self.values[index].item()
+        return None if kind == 'float' and value != value else value
+
+    def chunk(self, start: int, stop: int) -> List[Any]:
+        """Python values of rows start..stop-1"""
+        if self.kind == 'object':
+            return self.values[start:stop]
+        if self.kind == 'string':
+            dictionary = self.dictionary
+            return [None if code < 0 else dictionary[code] for code in self.values[start:stop].tolist()]
+        if self.kind == 'date':
+            return [self.value(index) for index in range(start, stop)]
+        values = self.values[start:stop].tolist()
+        if self.missing is not None:
+            values = [None if missing else value for value, missing in zip(values, self.missing[start:stop].tolist())]
+        if self.kind == 'float':
+            values = [None if value != value else value for value in values]
+        return values
+
+    def text_width(self) -> int:
+        """Longest str() of a truthy value, as used for auto column widths"""
+        kind = self.kind
+        if kind == 'string':
+            codes = np.unique(self.values)
+            return max((len(self.dictionary[code]) for code in codes.tolist() if code >= 0), default=0)
+        if kind == 'object':
+            return max((len(str(value)) for value in self.values if value), default=0)
+        if kind == 'date':
+            present = self.values[~np.isnat(self.values)]
+            if not len(present):
+                return 0
+            fractional = (present.astype('datetime64[us]').astype(np.int64) % 10 ** 6 != 0).any()
+            return 26 if fractional else 19
+
+        values = self.values if self.missing is None else self.values[~self.missing]
+        if kind == 'bool':
+            return 4 if values.any() else 0
+        values = values[(values != 0) & (values == values)]
+        if not len(values):
+            return 0
+        if kind == 'int':
+            return max(len(str(values.max().item())), len(str(values.min().item())))
+        return max(len(str(value)) for value in np.unique(values).tolist())
+
+    def temporal_types(self) -> List[type]:
+        """Date and time types among the values, which get a date format unless the column has one"""
+        if self.kind == 'date':
+            return [datetime.datetime]
+        if self.kind == 'object':
+            return list({type(value) for value in self.values if _is_temporal(value)})
+        return []
+
+    def count_strings(self, shared):
+        """Count this column's text values into a shared string table"""
+        if self.kind == 'string':
+            codes = self.values[self.values >= 0]
+            counts = np.bincount(codes, minlength=len(self.dictionary)).tolist()
+            for text, count in zip(self.dictionary, counts):
+                if count and not is_formula(text):
+                    shared.add(text, count)
+        elif self.kind == 'object':
+            for value in self.values:
+                text = cell_text(value)
+                if text is not None and not is_formula(text):
+                    shared.add(text)
+
+    def encoded(self, start: int, stop: int, style: int, time_styles: Dict[type, int],
+                shared=None) -> List[Optional[str]]:
+        """
+        Cell element tails (everything after r="...") for rows start..stop-1
+
+        None marks a row without a cell in this column.
+        """
+        style_attribute = _style_attribute(style)
+        empty = f'{style_attribute}/>' if style else None
+        kind = self.kind
+
+        if kind == 'string':
+            codes = self.values[start:stop].tolist()
+            bodies = {code: style_attribute + _string_body(self.dictionary[code], shared)
+                      for code in set(codes) if code >= 0}
+            return [empty if code < 0 else bodies[code] for code in codes]
+
+        if kind == 'object':
+            tails = []
+            for value in self.values[start:stop]:
+                element = cell_xml('', value, time_styles.get(type(value)) or style, shared)
+                tails.append(element[len('<c r=""'):] if element else empty)
+            return tails
+
+        if kind == 'date':
+            values = self.values[start:stop]
+            present = ~np.isnat(values)
+            days = (values.astype('datetime64[us]') - EXCEL_EPOCH).astype(np.int64) / MICROSECONDS_PER_DAY
+            # Excel counts a 29 Feb 1900 that never existed
+            days = np.where((days >= 1) & (days < 61), days - 1, days)
+            style_attribute = _style_attribute(time_styles.get(datetime.datetime) or style)
+            return [f'{style_attribute}><v>{day!r}</v></c>' if ok else empty
+                    for day, ok in zip(days.tolist(), present.tolist())]
+
+        values = self.chunk(start, stop)
+        if kind == 'bool':
+            return [empty if value is None else f'{style_attribute} t="b"><v>{int(value)}</v></c>' for value in values]
+        if kind == 'float':
+            return [empty if value is None else f'{style_attribute}><v>{value!r}</v></c>' for value in values]
+        return [empty if value is None else f'{style_attribute}><v>{value}</v></c>' for value in values]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the column's buffers"""
+        if self.kind == 'object':
+            return 8 * len(self.values)
+        size = self.values.nbytes + (self.missing.nbytes if self.missing is not None else 0)
+        if self.dictionary is not None:
+            size += sum(len(text) + 49 for text in self.dictionary)
+        return size
+
+
+def _is_temporal(value: Any) -> bool:
+    return isinstance(value, (datetime.datetime, datetime.date, datetime.time))
+
+
+class _Rows:
+    """Read-only row view over a ColumnarSheet, for code that expects lists of rows"""
+
+    __slots__ = ('sheet',)
+
+    def __init__(self, sheet: 'ColumnarSheet'):
+        self.sheet = sheet
+
+    def __len__(self) -> int:
+        return self.sheet.row_count
+
+    def __getitem__(self, index: int) -> List[Any]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return [column.value(index) for column in self.sheet.columns]
+
+    def __iter__(self):
+        count = self.sheet.row_count
+        for start in range(0, count, CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, count)
+            yield from (list(row) for row in zip(*(column.chunk(start, stop) for column in self.sheet.columns)))
+
+
+class ColumnarSheet:
+    """
+    Data block of a sheet as typed columns
+
+    Built from config rows or a pandas DataFrame, then bound to a workbook
+    (which registers one cell style per column format) and written into the
+    sheet's XML when the package is saved.
+    """
+
+    def __init__(self, columns: List[Column], row_count: int):
+        self.columns = columns
+        self.row_count = row_count
+        self.start_row = 2
+        self.styles: List[int] = [0] * len(columns)
+        self.time_styles: List[Dict[type, int]] = [{} for _ in columns]
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[Any]]) -> 'ColumnarSheet':
+        """Columns from a list of row lists; short rows are padded with None"""
+        columns = [Column.from_values(values) for values in itertools.zip_longest(*rows)]
+        return cls(columns, len(rows))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'ColumnarSheet':
+        """Columns sharing the DataFrame's buffers wherever pandas allows it"""
+        columns = [Column.from_series(frame.iloc[:, index]) for index in range(frame.shape[1])]
+        return cls(columns, len(frame))
+
+    def rows(self) -> _Rows:
+        return _Rows(self)
+
+    def value(self, row: int, col: int) -> Any:
+        """Value of a worksheet cell inside the block, None outside it"""
+        index = row - self.start_row
+        if 0 <= index < self.row_count and 1 <= col <= len(self.columns):
+            return self.columns[col - 1].value(index)
+        return None
+
+    def cell_count(self) -> int:
+        return self.row_count * len(self.columns)
+
+    def nbytes(self) -> int:
+        return sum(column.nbytes() for column in self.columns)
+
+    def text_widths(self) -> List[int]:
+        return [column.text_width() for column in self.columns]
+
+    def bind(self, workbook, start_row: int, number_formats: Sequence[Optional[str]],
+             alignment: Optional[Alignment] = None):
+        """
+        Place the block at start_row and register the cell styles its columns use
+
+        An alignment is set on every cell of the block through its column's
+        style, so aligning a sheet costs one style per column.
+        """
+        self.start_row = start_row
+        self.styles = []
+        self.time_styles = []
+        for index, column in enumerate(self.columns):
+            number_format = number_formats[index] if index < len(number_formats) else None
+            self.styles.append(cell_style(workbook, number_format, alignment)
+                               if number_format or alignment is not None else 0)
+            # Like openpyxl, dates and times get a matching format unless the column sets one
+            self.time_styles.append({} if number_format else
+                                    {kind: cell_style(workbook, get_time_format(kind), alignment)
+                                     for kind in column.temporal_types()})
+
+    def write_cells(self, sheet, start_row: int, number_formats: Sequence[Optional[str]]):
+        """Materialize the block as openpyxl cells, for sheets styled cell by cell"""
+        for index, column in enumerate(self.columns, 1):
+            number_format = number_formats[index - 1] if index <= len(number_formats) else None
+            for row_idx, value in enumerate(column.chunk(0, self.row_count), start_row):
+                if value is None:
+                    continue
+                cell = sheet.cell(row=row_idx, column=index, value=value)
+                if number_format:
+                    cell.number_format = number_format
+
+    def count_strings(self, shared):
+        """Count every text value of the block into a shared string table"""
+        for column in self.columns:
+            column.count_strings(shared)
+
+    def _row_chunks(self, shared=None):
+        """(row number, [(column, tail)]) for every row of the block"""
+        letters = [get_column_letter(index) for index in range(1, len(self.columns) + 1)]
+        for start in range(0, self.row_count, CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, self.row_count)
+            encoded = [column.encoded(start, stop, style, time_styles, shared)
+                       for column, style, time_styles in zip(self.columns, self.styles, self.time_styles)]
+            for offset, tails in enumerate(zip(*encoded)):
+                yield self.start_row + start + offset, [(letter, tail) for letter, tail in zip(letters, tails)
+                                                         if tail is not None]
+
+    def write_into(self, sheet_xml: bytes, shared=None) -> bytes:
+        """
+        Worksheet XML with the block's rows merged into its sheetData
+
+        Cells openpyxl already wrote inside the block (formulas placed over
+        the data) win over the column values but keep the column's number
+        format when they have no style of their own. Text refers to the
+        shared string table when one is given, after count_strings() and
+        freeze().
+        """
+        return b''.join(self.iter_into(sheet_xml, shared))
+
+    def iter_into(self, sheet_xml: bytes, shared=None) -> Iterator[bytes]:
+        """write_into() in pieces of CHUNK_ROWS rows, for streaming into the package"""
+        sheet_xml = sheet_xml.replace(b'<sheetData/>', b'<sheetData></sheetData>', 1)
+        start = sheet_xml.index(b'<sheetData>') + len(b'<sheetData>')
+        end = sheet_xml.rindex(b'</sheetData>')
+        existing = {int(ROW_NUMBER.search(row).group(1)): row for row in ROW_ELEMENT.findall(sheet_xml, start, end)}
+        last_row = self.start_row + self.row_count - 1
+
+        head = sheet_xml[:start]
+        dimension = DIMENSION.search(head)
+        if dimension is not None and self.row_count and self.columns:
+            min_col, min_row, max_col, max_row = range_boundaries(dimension.group(1).decode('ascii'))
+            area = (f"A{min(min_row or 1, self.start_row)}:"
+                    f"{get_column_letter(max(max_col or 1, len(self.columns)))}{max(max_row or 1, last_row)}")
+            head = head[:dimension.start(1)] + area.encode('ascii') + head[dimension.end(1):]
+        yield head + b''.join(row for number, row in sorted(existing.items()) if number < self.start_row)
+
+        parts = []
+        for number, cells in self._row_chunks(shared):
+            row = existing.get(number)
+            if row is None:
+                parts.append(f'<row r="{number}">'.encode('ascii')
+                             + ''.join(f'<c r="{letter}{number}"{tail}' for letter, tail in cells).encode('utf-8')
+                             + b'</row>')
+            else:
+                parts.append(self._merge_row(row, number, cells))
+            if len(parts) == CHUNK_ROWS:
+                yield b''.join(parts)
+                parts = []
+        parts.extend(row for number, row in sorted(existing.items()) if number > last_row)
+        yield b''.join(parts) + sheet_xml[end:]
+
+    def _merge_row(self, row: bytes, number: int, cells: List[Tuple[str, str]]) -> bytes:
+        opening_end = row.index(b'>') + 1
+        if row.endswith(b'/>'):
+            opening, body = row[:-2] + b'>', b''
+        else:
+            opening, body = row[:opening_end], row[opening_end:-len(b'</row>')]
+
+        merged = {}
+        for match in CELL_ELEMENT.finditer(body):
+            letter = CELL_REFERENCE.search(match.group(1)).group(1).decode('ascii')
+            element = match.group(0)
+            column = column_index_from_string(letter)
+            style = self.styles[column - 1] if column <= len(self.styles) else 0
+            if style and b' s="' not in match.group(1):
+                element = element.replace(b'<c ', f'<c s="{style}" '.encode('ascii'), 1)
+            merged[column] = element
+        for letter, tail in cells:
+            column = column_index_from_string(letter)
+            if column not in merged:
+                merged[column] = f'<c r="{letter}{number}"{tail}'.encode('utf-8')
+        return opening + b''.join(merged[column] for column in sorted(merged)) + b'</row>'
@@ -0,0 +1,138 @@
+"""
+Sheet Sparklines - Native Excel sparkline groups written as x14 worksheet extensions
+Turns a sparklines config (a data range and one location cell per data row
+or column) into a single sparklineGroup element, so hundreds of in-cell
+trend lines cost one extension instead of one chart each; openpyxl drops
+worksheet extensions, so they are spliced into the saved sheet XML
+"""
+
+import re
+import zipfile
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import get_column_letter, quote_sheetname
+from openpyxl.utils.cell import range_boundaries
+
+from xlsx_package import sheet_parts
+
+# Sparkline types by config name; win / loss sparklines are 'stacked' in the file format
+SPARKLINE_TYPES = {'line': 'line', 'column': 'column', 'win_loss': 'stacked'}
+SPARKLINE_KEYS = ('data_range', 'location', 'type', 'markers', 'high_point', 'low_point', 'first_point',
+                  'last_point', 'negative_points', 'show_axis', 'color', 'negative_color', 'empty_cells')
+# Flags of a group by config key and sparklineGroup attribute
+SPARKLINE_FLAGS = (('markers', 'markers'), ('high_point', 'high'), ('low_point', 'low'),
+                   ('first_point', 'first'), ('last_point', 'last'), ('negative_points', 'negative'),
+                   ('show_axis', 'displayXAxis'))
+# How empty source cells are drawn
+EMPTY_CELLS = ('gap', 'zero', 'span')
+
+SPARKLINE_EXT_URI = '{05C60535-1F16-4fd2-B633-F4F36F0B64E0}'
+X14_NS = 'http://schemas.microsoft.com/office/spreadsheetml/2009/9/main'
+XM_NS = 'http://schemas.microsoft.com/office/excel/2006/main'
+
+SPARKLINE_EXT = re.compile(rb'<ext\b[^>]*\buri="' + re.escape(SPARKLINE_EXT_URI.encode('ascii')) + rb'".*?</ext>',
+                           re.S)
+
+
+def _bounds(reference: str) -> Tuple[int, int, int, int]:
+    min_col, min_row, max_col, max_row = range_boundaries(reference)
+    if min_row is None or min_col is None:
+        raise ValueError(f"{reference!r} is not a cell range like B2:M20")
+    return min_col, min_row, max_col, max_row
+
+
+def _area(min_col: int, min_row: int, max_col: int, max_row: int) -> str:
+    return f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}"
+
+
+def sparkline_cells(data_range: str, location: str) -> List[Tuple[Optional[str], str, str]]:
+    """
+    (source sheet, source area, location cell) of every sparkline of a group
+
+    A location with one cell per data row draws one sparkline per row, one
+    with a cell per data column one per column. data_range may name its
+    sheet ('Data!B2:M20'); the sheet the group is on when it does not.
+    Raises ValueError when the two ranges do not line up.
+    """
+    sheet, _, reference = data_range.rpartition('!')
+    sheet = sheet[1:-1].replace("''", "'") if sheet.startswith("'") and sheet.endswith("'") else sheet
+    min_col, min_row, max_col, max_row = _bounds(reference.replace('$', ''))
+    loc_min_col, loc_min_row, loc_max_col, loc_max_row = _bounds(location.replace('$', ''))
+    rows, columns = max_row - min_row + 1, max_col - min_col + 1
+    cells = [f"{get_column_letter(column)}{row}" for row in range(loc_min_row, loc_max_row + 1)
+             for column in range(loc_min_col, loc_max_col + 1)]
+
+    if len(cells) == 1 and (rows == 1 or columns == 1):
+        areas = [_area(min_col, min_row, max_col, max_row)]
+    elif loc_min_col == loc_max_col and len(cells) == rows:
+        areas = [_area(min_col, row, max_col, row) for row in range(min_row, max_row + 1)]
+    elif loc_min_row == loc_max_row and len(cells) == columns:
+        areas = [_area(column, min_row, column, max_row) for column in range(min_col, max_col + 1)]
+    else:
+        raise ValueError(f"location {location!r} needs one cell per row ({rows}) or per column ({columns}) "
+                         f"of {data_range!r}")
+    return [(sheet or None, area, cell) for area, cell in zip(areas, cells)]
+
+
+def _argb(color: str) -> str:
+    color = color.lstrip('#').upper()
+    return color if len(color) == 8 else 'FF' + color
+
+
+def sparkline_group_xml(sheet_name: str, config: Dict, theme: Any) -> str:
+    """
+    One x14:sparklineGroup element for a sparklines config
+
+    The series takes the theme's primary color (or the config's 'color'),
+    negative and low points its danger color, high points its success color
+    and markers, first and last points its accent color.
+    """
+    flags = ''.join(f' {attribute}="1"' for key, attribute in SPARKLINE_FLAGS if config.get(key))
+    kind = SPARKLINE_TYPES[config.get('type', 'line')]
+    type_attribute = '' if kind == 'line' else f' type="{kind}"'
+    series = _argb(config.get('color', theme.primary))
+    negative = _argb(config.get('negative_color', theme.danger))
+    colors = (('colorSeries', series), ('colorNegative', negative), ('colorAxis', _argb(theme.text)),
+              ('colorMarkers', _argb(theme.accent)), ('colorFirst', _argb(theme.accent)),
+              ('colorLast', _argb(theme.accent)), ('colorHigh', _argb(theme.success)), ('colorLow', negative))
+
+    parts = [f'<x14:sparklineGroup displayEmptyCellsAs="{config.get("empty_cells", "gap")}"{type_attribute}{flags}>']
+    parts.extend(f'<x14:{element} rgb="{color}"/>' for element, color in colors)
+    parts.append('<x14:sparklines>')
+    for sheet, area, cell in sparkline_cells(config['data_range'], config['location']):
+        source = f"{quote_sheetname(sheet or sheet_name)}!{area}"
+        parts.append(f'<x14:sparkline><xm:f>{escape(source)}</xm:f><xm:sqref>{cell}</xm:sqref></x14:sparkline>')
+    parts.append('</x14:sparklines></x14:sparklineGroup>')
+    return ''.join(parts)
+
+
+def sparkline_extension(groups: List[str]) -> bytes:
+    """The worksheet ext element holding sparkline groups"""
+    return (f'<ext uri="{SPARKLINE_EXT_URI}" xmlns:x14="{X14_NS}"><x14:sparklineGroups xmlns:xm="{XM_NS}">'
+            f'{"".join(groups)}</x14:sparklineGroups></ext>').encode('utf-8')
+
+
+def read_sparkline_extension(sheet_xml: bytes) -> Optional[bytes]:
+    """A sheet's sparkline ext element, with its namespaces declared on it, or None"""
+    match = SPARKLINE_EXT.search(sheet_xml)
+    if match is None:
+        return None
+    extension = match.group(0)
+    head = extension[:extension.index(b'>')]
+    for prefix, namespace in ((b'x14', X14_NS), (b'xm', XM_NS)):
+        # Excel may declare these on the worksheet element instead
+        if b'xmlns:' + prefix + b'=' not in extension:
+            head += b' xmlns:' + prefix + b'="' + namespace.encode('ascii') + b'"'
+    return head + extension[extension.index(b'>'):]
+
+
+def read_sparklines(path: str) -> Dict[str, bytes]:
+    """Sheet name -> sparkline ext element of every sheet in a package that has sparklines"""
+    extensions = {}
+    with zipfile.ZipFile(path) as archive:
+        for name, part in sheet_parts(archive).items():
+            extension = read_sparkline_extension(archive.read(part))
+            if extension is not None:
+                extensions[name] = extension
+    return extensions
@@ -0,0 +1,102 @@
+"""
+Style Palette - Theme switches as a rewrite of the workbook style table
+Every themed color and font a sheet uses lives once in styles.xml (cell
+fonts, fills and borders, and the differential styles of conditional
+formatting), so mapping the old theme's palette onto the new one re-themes
+every sheet without reading a single worksheet cell
+"""
+
+import re
+from typing import Any, Dict, Iterable, Optional
+
+THEME_COLORS = ('primary', 'secondary', 'accent', 'success', 'warning', 'danger', 'text', 'background')
+
+COLOR_ELEMENT = re.compile(rb'(<(?:color|fgColor|bgColor)\b[^>]*?\brgb="[0-9A-Fa-f]{2})([0-9A-Fa-f]{6})(")')
+FONT_ELEMENT = re.compile(rb'<font\b[^>]*?(?:/>|>.*?</font>)', re.S)
+FONT_NAME = re.compile(rb'(<name val=")([^"]*)(")')
+FONT_SIZE = re.compile(rb'(<sz val=")([^"]*)(")')
+BOLD = re.compile(rb'<b(?:\s+val="(?:1|true)")?\s*/>')
+
+
+def _rgb(color: str) -> bytes:
+    """Last six hex digits of an ARGB or RGB color, upper case"""
+    return color[-6:].upper().encode('ascii')
+
+
+class StylePalette:
+    """
+    Old theme -> new theme substitutions for a style table
+
+    Colors are matched on their RGB part, so the alpha byte each style was
+    written with is kept. Header fonts (bold) and body fonts (regular) are
+    renamed separately, and bold fonts at the old header size take the new one.
+    """
+
+    __slots__ = ('colors', 'header_fonts', 'body_fonts', 'header_sizes')
+
+    def __init__(self, colors: Dict[bytes, bytes], header_fonts: Optional[Dict[bytes, bytes]] = None,
+                 body_fonts: Optional[Dict[bytes, bytes]] = None, header_sizes: Optional[Dict[bytes, bytes]] = None):
+        self.colors = colors
+        self.header_fonts = header_fonts or {}
+        self.body_fonts = body_fonts or {}
+        self.header_sizes = header_sizes or {}
+
+    @classmethod
+    def between(cls, old: Any, new: Any) -> 'StylePalette':
+        """
+        Palette mapping one theme onto another
+
+        When the old theme uses one color for several roles the first role
+        (in THEME_COLORS order) decides what it becomes.
+        """
+        colors = {}
+        for role in THEME_COLORS:
+            colors.setdefault(_rgb(getattr(old, role)), _rgb(getattr(new, role)))
+
+        def renamed(old_value: Any, new_value: Any) -> Dict[bytes, bytes]:
+            old_value, new_value = str(old_value).encode('utf-8'), str(new_value).encode('utf-8')
+            return {old_value: new_value} if old_value != new_value else {}
+
+        return cls({old_rgb: new_rgb for old_rgb, new_rgb in colors.items() if old_rgb != new_rgb},
+                   renamed(old.header_font, new.header_font), renamed(old.body_font, new.body_font),
+                   renamed(old.header_size, new.header_size))
+
+    def __bool__(self) -> bool:
+        return bool(self.colors or self.header_fonts or self.body_fonts or self.header_sizes)
+
+    def apply(self, styles_xml: bytes) -> bytes:
+        """styles.xml with the palette substituted"""
+        if self.colors:
+            styles_xml = COLOR_ELEMENT.sub(
+                lambda match: match.group(1) + self.colors.get(match.group(2).upper(), match.group(2)) + match.group(3),
+                styles_xml)
+        if self.header_fonts or self.body_fonts or self.header_sizes:
+            styles_xml = FONT_ELEMENT.sub(lambda match: self._font(match.group(0)), styles_xml)
+        return styles_xml
+
+    def _font(self, font_xml: bytes) -> bytes:
+        bold = BOLD.search(font_xml) is not None
+        names = self.header_fonts if bold else self.body_fonts
+        if names:
+            font_xml = FONT_NAME.sub(lambda match: match.group(1) + names.get(match.group(2), match.group(2))
+                                     + match.group(3), font_xml)
+        if bold and self.header_sizes:
+            font_xml = FONT_SIZE.sub(lambda match: match.group(1) + self.header_sizes.get(match.group(2), match.group(2))
+                                     + match.group(3), font_xml)
+        return font_xml
+
+
+def palette_score(styles_xml: bytes, theme: Any) -> int:
+    """How many of a theme's colors a style table uses; the best score identifies the current theme"""
+    used = {match.group(2).upper() for match in COLOR_ELEMENT.finditer(styles_xml)}
+    return len(used & {_rgb(getattr(theme, role)) for role in THEME_COLORS})
+
+
+def detect_theme(styles_xml: bytes, themes: Iterable[Any]) -> Optional[Any]:
+    """Theme whose palette the style table uses most, None if it uses none; earlier themes win ties"""
+    best, best_score = None, 0
+    for theme in themes:
+        score = palette_score(styles_xml, theme)
+        if score > best_score:
+            best, best_score = theme, score
+    return best
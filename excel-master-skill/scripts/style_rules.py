@@ -0,0 +1,75 @@
+"""
+Rule-Based Styling - Range-level conditional formatting for table styling
+Expresses banding, grid borders, thresholds and alerts as a handful of rules
+so styling cost stays constant no matter how many rows a sheet holds
+"""
+
+from typing import List, Optional, Tuple
+
+from openpyxl.styles import PatternFill, Border, Side
+from openpyxl.formatting.rule import FormulaRule, CellIsRule
+from openpyxl.utils.cell import range_boundaries, get_column_letter
+
+# Background rules (banding, grid) sit below every other rule so explicit
+# conditional formatting from the config still wins on the same cells,
+# just as it did over the old static fills.
+BACKGROUND_PRIORITY = 10000
+
+
+def _solid_fill(color: str) -> PatternFill:
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+def _anchor_cell(range_addr: str) -> str:
+    """Top-left cell of a range, used as the relative anchor in formulas"""
+    min_col, min_row, _, _ = range_boundaries(range_addr)
+    return f"{get_column_letter(min_col)}{min_row}"
+
+
+class StyleRules:
+    """Applies table styling to a sheet as range-level conditional formatting"""
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+
+    def _add_background(self, range_addr: str, rule):
+        # Numbered after the sheet's existing background rules, so rules added
+        # by several StyleRules on one sheet never share a priority
+        priorities = [existing.priority for formatting in self.sheet.conditional_formatting
+                      for existing in formatting.rules if existing.priority]
+        rule.priority = max([BACKGROUND_PRIORITY] + priorities) + 1
+        self.sheet.conditional_formatting.add(range_addr, rule)
+
+    def banding(self, range_addr: str, color: str, every: int = 2, remainder: int = 0):
+        """Fill every Nth row of the range, e.g. MOD(ROW(),2)=0 for even rows"""
+        rule = FormulaRule(formula=[f'MOD(ROW(),{every})={remainder}'], fill=_solid_fill(color))
+        self._add_background(range_addr, rule)
+
+    def grid(self, range_addr: str, style: str = 'thin', color: Optional[str] = None):
+        """Draw cell borders across the whole range"""
+        side = Side(style=style, color=color)
+        border = Border(left=side, right=side, top=side, bottom=side)
+        self._add_background(range_addr, FormulaRule(formula=['TRUE'], border=border))
+
+    def thresholds(self, range_addr: str, bands: List[Tuple[float, str]]):
+        """
+        Color numeric cells by value bands
+
+        Args:
+            range_addr: Cells to color
+            bands: (lower_bound, color) pairs; a cell takes the color of the
+                highest bound it reaches, and bound None catches everything below
+        """
+        anchor = _anchor_cell(range_addr)
+        ordered = sorted(bands, key=lambda band: float('-inf') if band[0] is None else band[0], reverse=True)
+        for lower, color in ordered:
+            if lower is None:
+                formula = f'ISNUMBER({anchor})'
+            else:
+                formula = f'AND(ISNUMBER({anchor}),{anchor}>={lower})'
+            self.sheet.conditional_formatting.add(range_addr, FormulaRule(formula=[formula], fill=_solid_fill(color)))
+
+    def alert(self, range_addr: str, operator: str, reference: str, color: str):
+        """Highlight cells comparing against a value or relative cell reference"""
+        rule = CellIsRule(operator=operator, formula=[str(reference)], fill=_solid_fill(color))
+        self.sheet.conditional_formatting.add(range_addr, rule)
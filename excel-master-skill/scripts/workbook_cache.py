@@ -0,0 +1,14 @@
+"""
+Workbook Cache - Content-addressed cache of generated workbooks
+Keys each build by a hash of its normalized config, resolved theme and engine
+version, so an unchanged report is a file copy instead of a full rebuild
+"""
+
+from skill_common.artifact_cache import ArtifactCache as _ArtifactCache
+
+
+class ArtifactCache(_ArtifactCache):
+    """Cache of built workbooks, see skill_common.artifact_cache.ArtifactCache"""
+
+    DEFAULT_DIR = '.workbook_cache'
+    SUFFIX = '.xlsx'
@@ -0,0 +1,444 @@
+"""
+Workbook Schema - Validates workbook configs and compiles them into build plans
+Rejects typos and malformed values before any sheet is built, and resolves
+defaults once so the builders read plain attributes instead of dict lookups
+"""
+
+import difflib
+import os
+from typing import Dict, List, Any, Iterable
+
+import pandas as pd
+from openpyxl.utils.cell import coordinate_from_string
+from openpyxl.utils.exceptions import CellCoordinatesException
+
+from skill_common.build_governor import RESOURCE_OPTIONS
+from skill_common.package_zip import COMPRESSION_OPTIONS, COMPRESSION_PRESETS
+from sheet_columns import ColumnarSheet
+from sheet_sparklines import EMPTY_CELLS, SPARKLINE_FLAGS, SPARKLINE_KEYS, SPARKLINE_TYPES, sparkline_cells
+from workbook_templates import TEMPLATE_SUFFIXES, TEMPLATES
+
+SHEET_TYPES = ('data', 'pivot', 'dashboard', 'chart')
+CHART_TYPES = ('bar', 'bar_3d', 'line', 'line_3d', 'pie', 'area', 'scatter')
+CONDITIONAL_FORMAT_TYPES = ('color_scale', 'data_bar', 'icon_set', 'cell_value', 'thresholds', 'banding')
+VALIDATION_TYPES = ('list', 'number', 'date')
+STYLE_MODES = ('rules', 'static')
+
+WORKBOOK_KEYS = ('theme', 'sheets', 'output_path', 'profile', 'cache', 'incremental', 'compression', 'resources',
+                 'template')
+EDIT_KEYS = ('edit_file', 'theme', 'change_theme', 'update_sheets', 'add_sheets', 'delete_sheets',
+             'add_charts', 'add_pivot_tables', 'add_validations', 'output_path', 'profile', 'compression',
+             'resources')
+SHEET_KEYS = ('name', 'type', 'title', 'headers', 'data', 'formats', 'formulas', 'conditional_formatting',
+              'charts', 'validations', 'sparklines', 'styling', 'kpis', 'source_sheet', 'pivot_config')
+THEME_KEYS = ('primary', 'secondary', 'accent', 'success', 'warning', 'danger', 'text', 'background',
+              'header_font', 'body_font', 'header_size', 'body_size')
+STYLING_KEYS = ('table_style', 'mode', 'auto_width')
+UPDATE_KEYS = ('cells', 'range', 'clear')
+CACHE_KEYS = ('dir', 'max_bytes', 'max_age')
+
+MAX_SHEET_NAME = 31
+# Worksheet row limit; data rows past it continue on numbered copies of the sheet
+MAX_SHEET_ROWS = 1048576
+# What a continuation sheet keeps from the sheet it continues
+SHARD_KEYS = ('type', 'headers', 'formats', 'styling')
+INVALID_SHEET_NAME_CHARS = set('[]:*?/\\')
+
+
+class ConfigError(ValueError):
+    """Raised when a config fails validation; lists every problem found"""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("Invalid config:\n  - " + "\n  - ".join(problems))
+
+
+class SheetPlan:
+    """One sheet of a build, with every option resolved to its default"""
+
+    __slots__ = ('name', 'type', 'title', 'headers', 'data', 'columns', 'column_formats', 'formulas',
+                 'conditional_formatting', 'charts', 'validations', 'sparklines', 'kpis',
+                 'table_style', 'style_mode', 'auto_width', 'config')
+
+    def __init__(self, config: Dict):
+        styling = config.get('styling', {})
+        formats = config.get('formats', {})
+        self.name = config.get('name', 'Sheet1')
+        self.type = config.get('type', 'data')
+        self.title = config.get('title', 'Dashboard')
+        self.headers = config.get('headers', [])
+        self.data = config.get('data', [])
+        # A DataFrame is wrapped without copying; list rows are converted when the sheet is built
+        self.columns = None
+        if isinstance(self.data, pd.DataFrame):
+            if 'headers' not in config:
+                self.headers = [str(column) for column in self.data.columns]
+            self.columns = ColumnarSheet.from_frame(self.data)
+            self.data = self.columns.rows()
+        self.column_formats = [formats.get(header) for header in self.headers]
+        self.formulas = config.get('formulas', [])
+        self.conditional_formatting = config.get('conditional_formatting', [])
+        self.charts = config.get('charts', [])
+        self.validations = config.get('validations', [])
+        self.sparklines = config.get('sparklines', [])
+        self.kpis = config.get('kpis', [])
+        self.table_style = styling.get('table_style', True)
+        self.style_mode = styling.get('mode', 'rules')
+        self.auto_width = styling.get('auto_width', True)
+        self.config = config
+
+
+def _shards(config: Dict) -> List[Dict]:
+    """
+    A data sheet config split at the worksheet row limit
+
+    Rows that do not fit go to continuation sheets 'Name (2)', 'Name (3)', ...
+    with the same headers, formats and styling; charts, formulas, formatting
+    and validations stay on the first sheet.
+    """
+    data = config.get('data', [])
+    capacity = MAX_SHEET_ROWS - 1  # the header row comes first
+    if config.get('type', 'data') != 'data' or len(data) <= capacity:
+        return [config]
+
+    def rows(start: int):
+        return data.iloc[start:start + capacity] if isinstance(data, pd.DataFrame) else data[start:start + capacity]
+
+    shards = [dict(config, data=rows(0))]
+    name = config.get('name', 'Sheet1')
+    for number, start in enumerate(range(capacity, len(data), capacity), 2):
+        suffix = f" ({number})"
+        shard = {key: config[key] for key in SHARD_KEYS if key in config}
+        shard['name'] = name[:MAX_SHEET_NAME - len(suffix)] + suffix
+        shard['data'] = rows(start)
+        shards.append(shard)
+    return shards
+
+
+class WorkbookPlan:
+    """Validated create_workbook config; can be built any number of times"""
+
+    __slots__ = ('theme', 'sheets', 'output_path', 'profile', 'cache', 'incremental', 'compression', 'resources',
+                 'template', 'config', 'content_hash')
+
+    def __init__(self, config: Dict):
+        self.theme = config.get('theme', 'corporate_blue')
+        self.sheets = [SheetPlan(shard) for sheet_config in config.get('sheets', [])
+                       for shard in _shards(sheet_config)]
+        self.output_path = config.get('output_path', 'workbook.xlsx')
+        self.profile = config.get('profile')
+        self.cache = config.get('cache')
+        self.incremental = config.get('incremental', False)
+        self.compression = config.get('compression')
+        self.resources = config.get('resources')
+        self.template = config.get('template')
+        self.config = config
+        # Filled in by the engine the first time the plan is looked up in the cache
+        self.content_hash = None
+
+
+class WorkbookEditPlan:
+    """Validated edit_workbook modifications"""
+
+    __slots__ = ('theme', 'change_theme', 'update_sheets', 'add_sheets', 'delete_sheets', 'add_charts',
+                 'add_pivot_tables', 'add_validations', 'output_path', 'profile', 'compression', 'resources')
+
+    def __init__(self, modifications: Dict, file_path: str):
+        self.theme = modifications.get('theme', 'corporate_blue')
+        self.change_theme = modifications.get('change_theme')
+        self.update_sheets = modifications.get('update_sheets', {})
+        self.add_sheets = [SheetPlan(shard) for sheet_config in modifications.get('add_sheets', [])
+                           for shard in _shards(sheet_config)]
+        self.delete_sheets = modifications.get('delete_sheets', [])
+        self.add_charts = modifications.get('add_charts', {})
+        self.add_pivot_tables = modifications.get('add_pivot_tables', {})
+        self.add_validations = modifications.get('add_validations', {})
+        self.output_path = modifications.get('output_path', file_path.replace('.xlsx', '_edited.xlsx'))
+        self.profile = modifications.get('profile')
+        self.compression = modifications.get('compression')
+        self.resources = modifications.get('resources')
+
+    @property
+    def theme_only(self) -> bool:
+        """True when the edit only switches the theme, which needs no worksheet loaded"""
+        return self.change_theme is not None and not (
+            self.update_sheets or self.add_sheets or self.delete_sheets or self.add_charts
+            or self.add_pivot_tables or self.add_validations)
+
+
+class _Checker:
+    """Collects problems with the path to each offending value"""
+
+    def __init__(self, theme_names: Iterable[str]):
+        self.theme_names = list(theme_names)
+        self.problems: List[str] = []
+
+    def fail(self, path: str, message: str):
+        self.problems.append(f"{path}: {message}")
+
+    def keys(self, mapping: Dict, allowed: Iterable[str], path: str):
+        allowed = list(allowed)
+        for key in mapping:
+            if key not in allowed:
+                close = difflib.get_close_matches(str(key), allowed, n=1)
+                hint = f" (did you mean '{close[0]}'?)" if close else ""
+                self.fail(path, f"unknown key '{key}'{hint}")
+
+    def type(self, value: Any, types, path: str, description: str) -> bool:
+        if isinstance(value, bool) and bool not in (types if isinstance(types, tuple) else (types,)):
+            self.fail(path, f"expected {description}, got {value!r}")
+            return False
+        if not isinstance(value, types):
+            self.fail(path, f"expected {description}, got {type(value).__name__}")
+            return False
+        return True
+
+    def choice(self, value: Any, choices: Iterable[str], path: str):
+        choices = list(choices)
+        if value not in choices:
+            close = difflib.get_close_matches(str(value), choices, n=1)
+            hint = f" (did you mean '{close[0]}'?)" if close else ""
+            self.fail(path, f"unknown value {value!r}{hint}, expected one of {', '.join(choices)}")
+
+    def compression(self, compression: Any, path: str):
+        if not self.type(compression, (str, dict), path, "a preset name or an object"):
+            return
+        if isinstance(compression, str):
+            self.choice(compression, COMPRESSION_PRESETS, path)
+            return
+        self.keys(compression, COMPRESSION_OPTIONS, path)
+        for key in ('xml', 'media', 'default'):
+            level = compression.get(key, 0)
+            if isinstance(level, bool) or not isinstance(level, int) or not 0 <= level <= 9:
+                self.fail(f"{path}.{key}", f"expected a level from 0 (store) to 9, got {level!r}")
+        threads = compression.get('threads', 1)
+        if isinstance(threads, bool) or not isinstance(threads, int) or threads < 1:
+            self.fail(f"{path}.threads", f"expected a positive number of threads, got {threads!r}")
+
+    def resources(self, resources: Any, path: str):
+        if self.type(resources, (bool, dict), path, "true, false or an object") and isinstance(resources, dict):
+            self.keys(resources, RESOURCE_OPTIONS, path)
+            for key in ('max_bytes', 'streaming_bytes'):
+                if key in resources:
+                    self.type(resources[key], int, f"{path}.{key}", "a number of bytes")
+            if 'headroom' in resources:
+                self.type(resources['headroom'], (int, float), f"{path}.headroom", "a fraction of available memory")
+
+    def template(self, template: Any, path: str):
+        if not self.type(template, str, path, "a registered template name or a .xlsx / .xltx path"):
+            return
+        if template in TEMPLATES.names:
+            return
+        if not template.lower().endswith(TEMPLATE_SUFFIXES):
+            self.fail(path, f"expected a registered template name or a .xlsx / .xltx file, got {template!r}")
+        elif not os.path.isfile(template):
+            self.fail(path, f"template file not found: {template!r}")
+
+    def dict_list(self, container: Dict, key: str, path: str, required: Iterable[str] = ()) -> List[Dict]:
+        """Items of an optional list-of-dicts option that are usable for further checks"""
+        items = container.get(key, [])
+        if not self.type(items, list, f"{path}.{key}", "a list"):
+            return []
+        usable = []
+        for index, item in enumerate(items):
+            item_path = f"{path}.{key}[{index}]"
+            if self.type(item, dict, item_path, "an object"):
+                for name in required:
+                    if name not in item:
+                        self.fail(item_path, f"missing '{name}'")
+                usable.append(item)
+        return usable
+
+    def cell(self, value: Any, path: str):
+        try:
+            coordinate_from_string(value)
+        except (CellCoordinatesException, ValueError, TypeError):
+            self.fail(path, f"{value!r} is not a cell address")
+
+    def theme(self, theme: Any, path: str):
+        if isinstance(theme, str):
+            if self.theme_names:
+                self.choice(theme, self.theme_names, path)
+        elif self.type(theme, dict, path, "a theme name or object"):
+            self.keys(theme, THEME_KEYS, path)
+
+    def sheet(self, sheet: Dict, path: str):
+        self.keys(sheet, SHEET_KEYS, path)
+
+        name = sheet.get('name', 'Sheet1')
+        if self.type(name, str, f"{path}.name", "a string"):
+            if not name or len(name) > MAX_SHEET_NAME:
+                self.fail(f"{path}.name", f"sheet names must be 1-{MAX_SHEET_NAME} characters")
+            if INVALID_SHEET_NAME_CHARS & set(name):
+                self.fail(f"{path}.name", f"'{name}' contains one of {''.join(sorted(INVALID_SHEET_NAME_CHARS))}")
+        self.choice(sheet.get('type', 'data'), SHEET_TYPES, f"{path}.type")
+
+        headers = sheet.get('headers', [])
+        if self.type(headers, list, f"{path}.headers", "a list"):
+            for index, header in enumerate(headers):
+                if not isinstance(header, (str, int, float)):
+                    self.fail(f"{path}.headers[{index}]", f"expected a string, got {type(header).__name__}")
+        data = sheet.get('data', [])
+        if isinstance(data, pd.DataFrame):
+            pass
+        elif self.type(data, list, f"{path}.data", "a list of rows or a DataFrame"):
+            for index, row in enumerate(data):
+                if not isinstance(row, (list, tuple)):
+                    self.fail(f"{path}.data[{index}]", f"expected a row list, got {type(row).__name__}")
+        self.type(sheet.get('formats', {}), dict, f"{path}.formats", "an object")
+        self.type(sheet.get('title', ''), str, f"{path}.title", "a string")
+
+        for index, formula in enumerate(self.dict_list(sheet, 'formulas', path, ('cell', 'formula'))):
+            if 'cell' in formula:
+                self.cell(formula['cell'], f"{path}.formulas[{index}].cell")
+        for index, rule in enumerate(self.dict_list(sheet, 'conditional_formatting', path, ('range',))):
+            self.choice(rule.get('type', 'color_scale'), CONDITIONAL_FORMAT_TYPES,
+                        f"{path}.conditional_formatting[{index}].type")
+        self.charts(sheet.get('charts', []), f"{path}.charts")
+        self.validations(sheet.get('validations', []), f"{path}.validations")
+        self.sparklines(sheet, path)
+        self.dict_list(sheet, 'kpis', path, ('name',))
+
+        styling = sheet.get('styling', {})
+        if self.type(styling, dict, f"{path}.styling", "an object"):
+            self.keys(styling, STYLING_KEYS, f"{path}.styling")
+            self.choice(styling.get('mode', 'rules'), STYLE_MODES, f"{path}.styling.mode")
+
+    def charts(self, charts: Any, path: str):
+        if not self.type(charts, list, path, "a list"):
+            return
+        for index, chart in enumerate(charts):
+            if self.type(chart, dict, f"{path}[{index}]", "an object"):
+                self.choice(chart.get('type', 'bar'), CHART_TYPES, f"{path}[{index}].type")
+
+    def sparklines(self, sheet: Dict, path: str):
+        for index, group in enumerate(self.dict_list(sheet, 'sparklines', path, ('data_range', 'location'))):
+            group_path = f"{path}.sparklines[{index}]"
+            self.keys(group, SPARKLINE_KEYS, group_path)
+            self.choice(group.get('type', 'line'), SPARKLINE_TYPES, f"{group_path}.type")
+            self.choice(group.get('empty_cells', 'gap'), EMPTY_CELLS, f"{group_path}.empty_cells")
+            for key, _ in SPARKLINE_FLAGS:
+                self.type(group.get(key, False), bool, f"{group_path}.{key}", "true or false")
+            for key in ('color', 'negative_color'):
+                if key in group and (not isinstance(group[key], str)
+                                     or len(group[key].lstrip('#')) not in (6, 8)):
+                    self.fail(f"{group_path}.{key}", f"expected a hex color like '1F77B4', got {group[key]!r}")
+            if isinstance(group.get('data_range'), str) and isinstance(group.get('location'), str):
+                try:
+                    sparkline_cells(group['data_range'], group['location'])
+                except ValueError as error:
+                    self.fail(group_path, str(error))
+            else:
+                self.fail(group_path, "'data_range' and 'location' must be cell ranges like 'B2:M20' and 'N2:N20'")
+
+    def validations(self, validations: Any, path: str):
+        if not self.type(validations, list, path, "a list"):
+            return
+        for index, validation in enumerate(validations):
+            if self.type(validation, dict, f"{path}[{index}]", "an object"):
+                if 'range' not in validation:
+                    self.fail(f"{path}[{index}]", "missing 'range'")
+                self.choice(validation.get('type', 'list'), VALIDATION_TYPES, f"{path}[{index}].type")
+
+    def update(self, update: Any, path: str):
+        if not self.type(update, dict, path, "an object"):
+            return
+        self.keys(update, UPDATE_KEYS, path)
+        cells = update.get('cells', {})
+        if self.type(cells, dict, f"{path}.cells", "an object of cell: value"):
+            for cell_addr in cells:
+                self.cell(cell_addr, f"{path}.cells")
+        if 'range' in update and self.type(update['range'], dict, f"{path}.range", "an object"):
+            for name in ('start', 'data'):
+                if name not in update['range']:
+                    self.fail(f"{path}.range", f"missing '{name}'")
+            if 'start' in update['range']:
+                self.cell(update['range']['start'], f"{path}.range.start")
+        self.type(update.get('clear', []), list, f"{path}.clear", "a list of cells")
+
+    def sheets(self, sheets: List[Dict], path: str):
+        seen = set()
+        for index, sheet in enumerate(sheets):
+            sheet_path = f"{path}[{index}]"
+            self.sheet(sheet, sheet_path)
+            name = sheet.get('name', 'Sheet1')
+            if isinstance(name, str):
+                if name.lower() in seen:
+                    self.fail(f"{sheet_path}.name", f"duplicate sheet name '{name}'")
+                seen.add(name.lower())
+
+    def raise_problems(self):
+        if self.problems:
+            raise ConfigError(self.problems)
+
+
+def compile_workbook(config: Dict, theme_names: Iterable[str] = ()) -> WorkbookPlan:
+    """
+    Validate a create_workbook config and compile it into a WorkbookPlan
+
+    Args:
+        config: Raw config dictionary, e.g. loaded from JSON
+        theme_names: Names accepted for the 'theme' option
+    """
+    check = _Checker(theme_names)
+    if not check.type(config, dict, 'config', "an object"):
+        check.raise_problems()
+    check.keys(config, WORKBOOK_KEYS, 'config')
+    check.theme(config.get('theme', 'corporate_blue'), 'config.theme')
+    check.type(config.get('output_path', ''), str, 'config.output_path', "a string")
+    if check.type(config.get('cache', False), (bool, str, dict), 'config.cache', "true, a directory or an object"):
+        if isinstance(config.get('cache'), dict):
+            check.keys(config['cache'], CACHE_KEYS, 'config.cache')
+    check.type(config.get('incremental', False), bool, 'config.incremental', "true or false")
+    if 'compression' in config:
+        check.compression(config['compression'], 'config.compression')
+    check.resources(config.get('resources', False), 'config.resources')
+    if config.get('template') is not None:
+        check.template(config['template'], 'config.template')
+        if config.get('incremental'):
+            check.fail('config.incremental', "cannot be combined with a template")
+    check.sheets(check.dict_list(config, 'sheets', 'config'), 'config.sheets')
+    check.raise_problems()
+    return WorkbookPlan(config)
+
+
+def compile_workbook_edit(modifications: Dict, file_path: str, theme_names: Iterable[str] = ()) -> WorkbookEditPlan:
+    """
+    Validate edit_workbook modifications and compile them into a WorkbookEditPlan
+
+    Args:
+        modifications: Raw modifications dictionary
+        file_path: Workbook being edited, used for the default output path
+        theme_names: Names accepted for the theme options
+    """
+    path = 'modifications'
+    check = _Checker(theme_names)
+    if not check.type(modifications, dict, path, "an object"):
+        check.raise_problems()
+    check.keys(modifications, EDIT_KEYS, path)
+    for key in ('theme', 'change_theme'):
+        if key in modifications:
+            check.theme(modifications[key], f"{path}.{key}")
+    check.type(modifications.get('output_path', ''), str, f"{path}.output_path", "a string")
+    if 'compression' in modifications:
+        check.compression(modifications['compression'], f"{path}.compression")
+    check.resources(modifications.get('resources', False), f"{path}.resources")
+
+    updates = modifications.get('update_sheets', {})
+    if check.type(updates, dict, f"{path}.update_sheets", "an object of sheet name: updates"):
+        for sheet_name, update in updates.items():
+            check.update(update, f"{path}.update_sheets.{sheet_name}")
+
+    check.type(modifications.get('delete_sheets', []), list, f"{path}.delete_sheets", "a list of sheet names")
+    check.sheets(check.dict_list(modifications, 'add_sheets', path), f"{path}.add_sheets")
+
+    for key, validate in (('add_charts', check.charts), ('add_validations', check.validations)):
+        per_sheet = modifications.get(key, {})
+        if check.type(per_sheet, dict, f"{path}.{key}", "an object of sheet name: list"):
+            for sheet_name, items in per_sheet.items():
+                validate(items, f"{path}.{key}.{sheet_name}")
+    check.type(modifications.get('add_pivot_tables', {}), dict, f"{path}.add_pivot_tables",
+               "an object of sheet name: pivot config")
+
+    check.raise_problems()
+    return WorkbookEditPlan(modifications, file_path)
@@ -0,0 +1,145 @@
+"""
+Workbook Templates - Branded template workbooks loaded once per process
+A template is parsed a single time into a compact skeleton (the workbook with
+its styles, named styles, defined names and sheet list, but no cell data)
+kept as pickled bytes, plus its package re-stored uncompressed. Each build
+unpickles the skeleton and gets the template's worksheet XML spliced back in
+on save, so the template's sheets are never parsed again
+"""
+
+import hashlib
+import io
+import os
+import pickle
+import threading
+import zipfile
+from typing import Dict, List, Tuple
+
+from openpyxl import load_workbook
+from openpyxl.formatting.formatting import ConditionalFormattingList
+from openpyxl.worksheet.cell_range import MultiCellRange
+from openpyxl.worksheet.datavalidation import DataValidationList
+from openpyxl.worksheet.table import TableList
+
+TEMPLATE_SUFFIXES = ('.xlsx', '.xltx')
+
+
+def _clear(worksheet):
+    """Drop everything a worksheet writes into its own XML or related parts"""
+    worksheet._cells = {}
+    worksheet._charts = []
+    worksheet._images = []
+    worksheet._tables = TableList()
+    worksheet._hyperlinks = []
+    worksheet.legacy_drawing = None
+    worksheet.merged_cells = MultiCellRange()
+    worksheet.conditional_formatting = ConditionalFormattingList()
+    worksheet.data_validations = DataValidationList()
+
+
+def _stored(data: bytes) -> bytes:
+    """A package re-written with every part stored, so builds read parts without inflating them"""
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as source, zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as target:
+        for info in source.infolist():
+            target.writestr(info.filename, source.read(info))
+    return output.getvalue()
+
+
+class WorkbookTemplate:
+    """
+    One parsed template
+
+    Attributes:
+        digest: SHA-256 of the template file, part of build cache keys
+        sheet_names: Template sheets in workbook order
+        spliced: Sheets whose XML is copied from the template on save; sheets
+            with pivot tables stay fully loaded in the skeleton instead, since
+            their caches are registered on the workbook
+        extents: Sheet name -> (max_row, max_column), for chart references
+            into template sheets
+    """
+
+    __slots__ = ('path', 'digest', 'sheet_names', 'spliced', 'extents', 'skeleton', 'package')
+
+    def __init__(self, path: str, digest: str, sheet_names: List[str], spliced: List[str],
+                 extents: Dict[str, Tuple[int, int]], skeleton: bytes, package: bytes):
+        self.path = path
+        self.digest = digest
+        self.sheet_names = sheet_names
+        self.spliced = spliced
+        self.extents = extents
+        self.skeleton = skeleton
+        self.package = package
+
+    @classmethod
+    def load(cls, path: str) -> 'WorkbookTemplate':
+        with open(path, 'rb') as f:
+            data = f.read()
+        workbook = load_workbook(io.BytesIO(data))
+        # A .xltx skeleton must not turn every build into a template
+        workbook.template = False
+
+        extents = {}
+        spliced = []
+        for worksheet in workbook.worksheets:
+            extents[worksheet.title] = (worksheet.max_row, worksheet.max_column)
+            if not worksheet._pivots:
+                _clear(worksheet)
+                spliced.append(worksheet.title)
+        return cls(path, hashlib.sha256(data).hexdigest(), list(workbook.sheetnames), spliced, extents,
+                   pickle.dumps(workbook, pickle.HIGHEST_PROTOCOL), _stored(data))
+
+    def workbook(self):
+        """A new workbook holding the template's styles, names and (empty) sheets"""
+        return pickle.loads(self.skeleton)
+
+    def source(self) -> io.BytesIO:
+        """The template package, for splicing its sheets into a build"""
+        return io.BytesIO(self.package)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.skeleton) + len(self.package)
+
+
+class TemplateRegistry:
+    """
+    Templates by name or path, loaded on first use
+
+    Names registered with register() map to a file; any other key is taken
+    as a path. Templates are reloaded when their file's size or modification
+    time changes.
+    """
+
+    def __init__(self):
+        self.names: Dict[str, str] = {}
+        self._templates: Dict[str, Tuple[Tuple[int, int], WorkbookTemplate]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, path: str) -> WorkbookTemplate:
+        """Register a template under a name and load it now"""
+        self.names[name] = path
+        return self.get(name)
+
+    def path(self, template: str) -> str:
+        return self.names.get(template, template)
+
+    def get(self, template: str) -> WorkbookTemplate:
+        path = os.path.realpath(self.path(template))
+        stat = os.stat(path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._templates.get(path)
+            if cached is None or cached[0] != stamp:
+                cached = (stamp, WorkbookTemplate.load(path))
+                self._templates[path] = cached
+            return cached[1]
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+# One registry per process, shared by every engine
+TEMPLATES = TemplateRegistry()
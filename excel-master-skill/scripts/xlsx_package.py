@@ -0,0 +1,578 @@
+"""
+XLSX Package - Package-level operations on generated workbooks
+Writes columnar sheet data straight into the saved package with a shared
+string table, splices unchanged worksheet parts from the previous build for
+incremental rebuilds (per-sheet fingerprints plus a manifest next to the
+output) or from a template, appends rows to a sheet's XML and re-themes the
+style table without loading the workbook; packages are compressed once, by
+the parallel writer in skill_common.package_zip
+"""
+
+import datetime
+import io
+import json
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from xml.sax.saxutils import escape, quoteattr, unescape
+
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.stylesheet import apply_stylesheet
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import column_index_from_string
+from openpyxl.writer.excel import ExcelWriter
+
+from skill_common.package_zip import CompressionPolicy, write_package
+
+from shared_strings import SHARED_STRINGS_CONTENT_TYPE, SHARED_STRINGS_TYPE, SharedStrings
+from sheet_columns import cell_text, cell_xml, is_formula
+from style_palette import StylePalette
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+DOC_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+CT_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+CONTENT_TYPES = '[Content_Types].xml'
+WORKBOOK_PART = 'xl/workbook.xml'
+SHARED_STRINGS_PART = 'xl/sharedStrings.xml'
+STYLES_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles'
+RELATIONSHIP_TAG = re.compile(rb'<Relationship\b[^>]*>')
+TARGET_ATTRIBUTE = re.compile(rb'Target="([^"]*)"')
+TABLE_REL_TYPE = b'/relationships/table"'
+RELATIONSHIP_ID = re.compile(rb'Id="rId(\d+)"')
+
+ROW_NUMBER = re.compile(rb'\br="(\d+)"')
+CELL_ELEMENT = re.compile(rb'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+FORMULA_ELEMENT = re.compile(rb'<f\b([^>]*?)(?:/>|>(.*?)</f>)', re.S)
+ATTRIBUTE = re.compile(rb'\b([\w:]+)="([^"]*)"')
+DIMENSION = re.compile(rb'(<dimension ref=")([^"]*)(")')
+RANGE_ATTRIBUTE = re.compile(rb'(<(?:conditionalFormatting|dataValidation|autoFilter)\b[^>]*?\b(?:sq)?ref=")([^"]*)(")')
+X14_SQREF = re.compile(rb'(<xm:sqref>)([^<]*)(</xm:sqref>)')
+REF_ATTRIBUTE = re.compile(rb'(\bref=")([^"]*)(")')
+FORMULA_TEXT = re.compile(rb'(<(?:\w+:)?f>)([^<]*)(</(?:\w+:)?f>)')
+DEFINED_NAME = re.compile(rb'(<definedName\b[^>]*>)([^<]*)(</definedName>)')
+# Value of a cell holding a shared string index
+SHARED_STRING_CELL = re.compile(rb'(<c\b[^>]*?\bt="s"[^>]*>\s*<v>)(\d+)(</v>)')
+# Share of a kept shared string table nothing refers to any more at which it is compacted
+COMPACT_SHARE = 0.25
+AREA = re.compile(r'(\$?[A-Z]{1,3}\$?)(\d+):(\$?[A-Z]{1,3}\$?)(\d+)')
+SHEET_AREA = re.compile(r"(?:'((?:[^']|'')+)'|([^\s'!(),:;=]+))!(\$?[A-Z]{1,3}\$?\d+:\$?[A-Z]{1,3}\$?\d+)")
+
+
+def manifest_path(output_path: str) -> str:
+    """Hidden sidecar file recording how output_path was built"""
+    directory, name = os.path.split(output_path)
+    return os.path.join(directory, f".{name}.manifest.json")
+
+
+def package_stamp(path: str) -> Optional[List[int]]:
+    """Size and modification time of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class SheetManifest:
+    """Sheet fingerprints and sheet order of one build, tied to the exact file it produced"""
+
+    __slots__ = ('build_key', 'package', 'sheets', 'order')
+
+    def __init__(self, build_key: str, package: Optional[List[int]], sheets: Dict[str, str],
+                 order: Optional[List[str]] = None):
+        self.build_key = build_key
+        self.package = package
+        self.sheets = sheets
+        self.order = list(sheets) if order is None else order
+
+    @classmethod
+    def load(cls, path: str) -> Optional['SheetManifest']:
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data['build_key'], data['package'], data['sheets'], data['order'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'build_key': self.build_key, 'package': self.package, 'sheets': self.sheets,
+                       'order': self.order}, f, indent=1)
+
+    def matches(self, output_path: str) -> bool:
+        """True while the file on disk is still the one this manifest describes"""
+        return self.package is not None and package_stamp(output_path) == self.package
+
+    def is_current(self, build_key: str, output_path: str, fingerprints: Dict[str, str]) -> bool:
+        """
+        True when output_path already is what the build would write
+
+        Every sheet has to match, and no sheet may have been removed or moved:
+        those change the file without changing any sheet's fingerprint.
+        """
+        return (self.build_key == build_key and self.matches(output_path)
+                and self.order == list(fingerprints) and self.sheets == fingerprints)
+
+
+def plan_rebuild(manifest: Optional[SheetManifest], build_key: str, output_path: str,
+                 fingerprints: Dict[str, str], dependencies: Dict[str, Set[str]]) -> Optional[Set[str]]:
+    """
+    Names of the sheets that have to be rebuilt
+
+    Returns None when nothing from the previous build can be reused. A sheet
+    is rebuilt when its fingerprint changed or when any sheet it depends on
+    (directly or through other sheets) is rebuilt. An empty set does not mean
+    the file is up to date, as sheets may have been removed or reordered; see
+    SheetManifest.is_current.
+    """
+    if manifest is None or manifest.build_key != build_key or not manifest.matches(output_path):
+        return None
+
+    dirty = {name for name, value in fingerprints.items() if manifest.sheets.get(name) != value}
+    changed = bool(dirty)
+    while changed:
+        changed = False
+        for name, sources in dependencies.items():
+            if name not in dirty and sources & dirty:
+                dirty.add(name)
+                changed = True
+    return dirty
+
+
+def seed_styles(workbook, package_path: str):
+    """
+    Start a workbook's style tables from a previous build's styles.xml
+
+    openpyxl only appends to these tables, so the style indices used by
+    reused worksheet XML stay valid in the new package.
+    """
+    with zipfile.ZipFile(package_path) as archive:
+        apply_stylesheet(archive, workbook)
+
+
+def _rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, '_rels', name + '.rels')
+
+
+def _resolve(source_part: str, target: str) -> str:
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def sheet_parts(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """Sheet name -> worksheet part name in a package"""
+    targets = {rel.get('Id'): _resolve(WORKBOOK_PART, rel.get('Target'))
+               for rel in ET.fromstring(archive.read(_rels_path(WORKBOOK_PART)))}
+    sheets = ET.fromstring(archive.read(WORKBOOK_PART)).find(f'{{{MAIN_NS}}}sheets')
+    return {sheet.get('name'): targets[sheet.get(f'{{{DOC_REL_NS}}}id')] for sheet in sheets}
+
+
+def _free_name(part: str, taken: Set[str]) -> str:
+    """Next unused name in a part's numbered series, e.g. xl/charts/chart7.xml"""
+    match = re.match(r'(.*?)(\d*)(\.[^./]+)$', part)
+    prefix, extension = (match.group(1), match.group(3)) if match else (part, '')
+    number = 1
+    while f"{prefix}{number}{extension}" in taken:
+        number += 1
+    return f"{prefix}{number}{extension}"
+
+
+class _Splicer:
+    """Copies parts and everything they reference from one package into another"""
+
+    def __init__(self, source: zipfile.ZipFile, taken: Set[str]):
+        self.source = source
+        self.taken = taken
+        self.parts: Dict[str, bytes] = {}
+        self.renamed: Dict[str, str] = {}
+
+    def copy(self, part: str, new_part: str):
+        self.taken.add(new_part)
+        self.renamed[part] = new_part
+        self.parts[new_part] = self.source.read(part)
+
+        try:
+            rels = self.source.read(_rels_path(part))
+        except KeyError:
+            return
+
+        def retarget(tag):
+            # Relationship parts are flat, so targets are rewritten in place
+            relationship = tag.group(0)
+            target = TARGET_ATTRIBUTE.search(relationship)
+            if target is None or b'TargetMode="External"' in relationship:
+                return relationship
+            source_target = _resolve(part, target.group(1).decode('utf-8'))
+            if source_target not in self.renamed:
+                self.copy(source_target, _free_name(source_target, self.taken))
+            new_target = ('/' + self.renamed[source_target]).encode('utf-8')
+            return relationship[:target.start(1)] + new_target + relationship[target.end(1):]
+
+        self.parts[_rels_path(new_part)] = RELATIONSHIP_TAG.sub(retarget, rels)
+
+    def content_types(self, built: bytes) -> bytes:
+        """The built package's content types plus those of every copied part"""
+        source = ET.fromstring(self.source.read(CONTENT_TYPES))
+        overrides = {node.get('PartName'): node.get('ContentType') for node in source.iter(f'{{{CT_NS}}}Override')}
+        defaults = {node.get('Extension'): node.get('ContentType') for node in source.iter(f'{{{CT_NS}}}Default')}
+
+        types = ET.fromstring(built)
+        known_parts = {node.get('PartName') for node in types.iter(f'{{{CT_NS}}}Override')}
+        known_extensions = {node.get('Extension') for node in types.iter(f'{{{CT_NS}}}Default')}
+        added = []
+        for part, new_part in self.renamed.items():
+            if '/' + part in overrides and '/' + new_part not in known_parts:
+                added.append(f"<Override PartName={quoteattr('/' + new_part)} "
+                             f"ContentType={quoteattr(overrides['/' + part])}/>")
+            extension = posixpath.splitext(part)[1][1:]
+            if extension in defaults and extension not in known_extensions:
+                added.append(f"<Default Extension={quoteattr(extension)} ContentType={quoteattr(defaults[extension])}/>")
+                known_extensions.add(extension)
+        return built.replace(b'</Types>', ''.join(added).encode('utf-8') + b'</Types>')
+
+
+def _workbook_part(archive: zipfile.ZipFile, rel_type: str) -> Optional[str]:
+    """Part name of the workbook's relationship of a type, or None if it has none"""
+    for relationship in RELATIONSHIP_TAG.findall(archive.read(_rels_path(WORKBOOK_PART))):
+        if f'Type="{rel_type}"'.encode('utf-8') in relationship:
+            return _resolve(WORKBOOK_PART, TARGET_ATTRIBUTE.search(relationship).group(1).decode('utf-8'))
+    return None
+
+
+def _shared_strings_part(archive: zipfile.ZipFile) -> Optional[str]:
+    """Part name of a package's shared string table, or None if it has none"""
+    return _workbook_part(archive, SHARED_STRINGS_TYPE)
+
+
+def read_styles(path: str) -> bytes:
+    """A package's style table (styles.xml), empty if it has none"""
+    with zipfile.ZipFile(path) as archive:
+        styles_part = _workbook_part(archive, STYLES_TYPE)
+        return archive.read(styles_part) if styles_part is not None else b''
+
+
+def _register_shared_strings(rels: bytes, content_types: bytes) -> Tuple[bytes, bytes]:
+    """Workbook relationships and content types with a new shared string table part"""
+    next_id = max((int(number) for number in RELATIONSHIP_ID.findall(rels)), default=0) + 1
+    relationship = f'<Relationship Type="{SHARED_STRINGS_TYPE}" Target="/{SHARED_STRINGS_PART}" Id="rId{next_id}"/>'
+    override = f'<Override PartName="/{SHARED_STRINGS_PART}" ContentType="{SHARED_STRINGS_CONTENT_TYPE}"/>'
+    return (rels.replace(b'</Relationships>', relationship.encode('utf-8') + b'</Relationships>'),
+            content_types.replace(b'</Types>', override.encode('utf-8') + b'</Types>'))
+
+
+def _stored_package(workbook) -> io.BytesIO:
+    """The workbook as openpyxl saves it, but with every part stored uncompressed"""
+    buffer = io.BytesIO()
+    workbook.properties.modified = datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+    ExcelWriter(workbook, zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED)).save()
+    return buffer
+
+
+def _add_extensions(sheet_xml: bytes, extensions: Sequence[bytes]) -> bytes:
+    """Worksheet XML with ext elements added to its extLst, which is created when missing"""
+    data = b''.join(extensions)
+    end = sheet_xml.rfind(b'</extLst>')
+    if end != -1:
+        return sheet_xml[:end] + data + sheet_xml[end:]
+    end = sheet_xml.rindex(b'</worksheet>')
+    return sheet_xml[:end] + b'<extLst>' + data + b'</extLst>' + sheet_xml[end:]
+
+
+def save_workbook(workbook, output_path: str, reused: Sequence[str] = (), columns: Optional[Dict[str, Any]] = None,
+                  compression: Optional[CompressionPolicy] = None, streaming: bool = False,
+                  palette: Optional[StylePalette] = None, source: Any = None,
+                  extensions: Optional[Dict[str, Sequence[bytes]]] = None):
+    """
+    Save a workbook, filling in the sheet contents openpyxl does not hold
+
+    Args:
+        workbook: openpyxl workbook to save
+        output_path: Where to save
+        reused: Sheets that are empty placeholders, replaced by the worksheet
+            parts they have in the source package, together with their
+            drawings, charts and images (renumbered so they cannot clash with
+            new parts)
+        columns: Sheet name -> ColumnarSheet whose rows are written into
+            that sheet's XML; their text goes into one shared string table,
+            most frequent strings first
+        compression: Compression levels and threads for the package
+        streaming: Stream the columnar sheets' XML into the archive chunk by
+            chunk instead of building each sheet's XML in memory first
+        palette: Theme switch applied to the saved style table
+        source: Package (path or file object) the reused sheets come from;
+            the one currently at output_path when None
+        extensions: Sheet name -> worksheet ext elements (sparkline groups),
+            which openpyxl cannot hold, added to that sheet's extLst
+    """
+    buffer = _stored_package(workbook)
+    columns = columns or {}
+
+    with zipfile.ZipFile(buffer) as built:
+        built_sheets = sheet_parts(built)
+        updated = {}
+        content_types = built.read(CONTENT_TYPES)
+        shared = SharedStrings()
+
+        if reused:
+            with zipfile.ZipFile(output_path if source is None else source) as previous:
+                previous_sheets = sheet_parts(previous)
+                splicer = _Splicer(previous, set(built.namelist()))
+                for name in reused:
+                    splicer.copy(previous_sheets[name], built_sheets[name])
+                content_types = splicer.content_types(content_types)
+                updated.update(splicer.parts)
+                # Reused sheets index into the previous table, so it is kept as the prefix
+                shared_part = _shared_strings_part(previous)
+                if shared_part is not None:
+                    shared = SharedStrings.from_xml(previous.read(shared_part))
+
+        for sheet in columns.values():
+            sheet.count_strings(shared)
+        if reused and len(shared):
+            _compact_shared_strings(shared, [built_sheets[name] for name in reused], updated)
+
+        for name, sheet_extensions in (extensions or {}).items():
+            part = built_sheets[name]
+            updated[part] = _add_extensions(built.read(part), sheet_extensions)
+
+        shared.freeze()
+        for name, sheet in columns.items():
+            part = built_sheets[name]
+            write = sheet.iter_into if streaming else sheet.write_into
+            updated[part] = write(updated[part] if part in updated else built.read(part), shared)
+
+        if len(shared):
+            updated[SHARED_STRINGS_PART] = shared.to_xml()
+            workbook_rels = _rels_path(WORKBOOK_PART)
+            updated[workbook_rels], content_types = _register_shared_strings(built.read(workbook_rels), content_types)
+        updated[CONTENT_TYPES] = content_types
+        if palette:
+            styles_part = _workbook_part(built, STYLES_TYPE)
+            updated[styles_part] = palette.apply(built.read(styles_part))
+
+        entries = []
+        for info in built.infolist():
+            data = updated.pop(info.filename, None)
+            entries.append((info, built.read(info.filename) if data is None else data))
+        entries.extend(updated.items())
+    write_package(entries, output_path, compression)
+
+
+def _compact_shared_strings(shared: SharedStrings, parts: Sequence[str], updated: Dict[str, bytes]):
+    """
+    Drop the entries of a kept shared string table that no sheet uses any more
+
+    Each incremental build would otherwise keep the strings of every sheet
+    it rebuilt. Once their share passes COMPACT_SHARE the table is compacted
+    and the reused sheets' indices are rewritten; below it they stay as they are.
+    """
+    used = set()
+    references = 0
+    for part in parts:
+        for match in SHARED_STRING_CELL.finditer(updated[part]):
+            used.add(int(match.group(2)))
+            references += 1
+    if shared.unreferenced(used) <= COMPACT_SHARE * len(shared):
+        return
+    remap = shared.compact(used, references)
+    for part in parts:
+        updated[part] = SHARED_STRING_CELL.sub(
+            lambda match: match.group(1) + str(remap[int(match.group(2))]).encode('ascii') + match.group(3),
+            updated[part])
+
+
+def _extend_area(area: str, last_row: int, new_last_row: int) -> str:
+    """Stretch an A1:B5 style area that ends on or contains last_row down to new_last_row"""
+    match = AREA.fullmatch(area)
+    if match is None:
+        return area
+    min_row, max_row = int(match.group(2)), int(match.group(4))
+    if min_row <= last_row <= max_row < new_last_row:
+        return f"{match.group(1)}{min_row}:{match.group(3)}{new_last_row}"
+    return area
+
+
+def _extend_sqref(sqref: str, last_row: int, new_last_row: int) -> str:
+    return ' '.join(_extend_area(area, last_row, new_last_row) for area in sqref.split())
+
+
+def _extend_formula(formula: str, sheet_name: str, last_row: int, new_last_row: int) -> str:
+    """Stretch the areas on sheet_name in a formula such as 'Sales'!$B$2:$B$13"""
+    def extend(match):
+        sheet = match.group(1).replace("''", "'") if match.group(1) is not None else match.group(2)
+        if sheet != sheet_name:
+            return match.group(0)
+        prefix = match.group(0)[:match.start(3) - match.start(0)]
+        return prefix + _extend_area(match.group(3), last_row, new_last_row)
+
+    return SHEET_AREA.sub(extend, formula)
+
+
+def _sub_text(pattern, data: bytes, transform) -> bytes:
+    """Apply transform to the middle group of every (open, text, close) match of pattern"""
+    def replace(match):
+        text = unescape(match.group(2).decode('utf-8'))
+        return match.group(1) + escape(transform(text)).encode('utf-8') + match.group(3)
+
+    return pattern.sub(replace, data)
+
+
+def _template_cells(row_xml: bytes) -> Dict[int, Tuple[Optional[str], Optional[str]]]:
+    """
+    Column -> (style id, formula) of the table block of a row
+
+    The block is the run of cells starting in column A, so summary cells
+    placed to the right of a table are not repeated on new rows.
+    """
+    cells = {}
+    for match in CELL_ELEMENT.finditer(row_xml):
+        attributes = dict(ATTRIBUTE.findall(match.group(1)))
+        reference = attributes.get(b'r')
+        if reference is None:
+            continue
+        column = column_index_from_string(reference.rstrip(b'0123456789').decode('ascii'))
+        formula = None
+        formula_match = FORMULA_ELEMENT.search(match.group(2) or b'')
+        # Shared and array formulas are not continued
+        if formula_match and formula_match.group(2) and b't=' not in formula_match.group(1):
+            formula = '=' + unescape(formula_match.group(2).decode('utf-8'))
+        style = attributes.get(b's')
+        cells[column] = (style.decode('ascii') if style else None, formula)
+
+    block = {}
+    column = 1
+    while column in cells:
+        block[column] = cells[column]
+        column += 1
+    return block
+
+
+def _append_to_sheet(sheet_xml: bytes, rows: List[List[Any]], header_rows: int,
+                     shared: Optional[SharedStrings] = None) -> Tuple[bytes, int, int]:
+    """
+    Worksheet XML with rows added after its last row, plus the old and new last row
+
+    New text is added to the shared string table when the package has one.
+    """
+    sheet_xml = sheet_xml.replace(b'<sheetData/>', b'<sheetData></sheetData>', 1)
+    end = sheet_xml.rfind(b'</sheetData>')
+    start = sheet_xml.rfind(b'<row', 0, end)
+    last_row = 0
+    template = {}
+    if start != -1:
+        last_row = int(ROW_NUMBER.search(sheet_xml, start).group(1))
+        if last_row > header_rows:
+            template = _template_cells(sheet_xml[start:end])
+
+    new_cells = []
+    last_column = 0
+    for row_number, values in enumerate(rows, last_row + 1):
+        width = max(len(values), max(template, default=0))
+        last_column = max(last_column, width)
+        cells = []
+        for column in range(1, width + 1):
+            value = values[column - 1] if column <= len(values) else None
+            style, formula = template.get(column, (None, None))
+            letter = get_column_letter(column)
+            if value is None and formula is not None:
+                # Continue the formula above, e.g. =F5+D6 after =F4+D5
+                value = Translator(formula, origin=f"{letter}{last_row}").translate_formula(f"{letter}{row_number}")
+            cells.append((f"{letter}{row_number}", value, style))
+            text = cell_text(value)
+            if shared is not None and text is not None and not is_formula(text):
+                shared.add(text)
+        new_cells.append((row_number, cells))
+    new_last_row = last_row + len(rows)
+
+    if shared is not None:
+        shared.freeze()
+    new_rows = [f'<row r="{row_number}">{"".join(cell_xml(*cell, shared=shared) for cell in cells)}</row>'
+                for row_number, cells in new_cells]
+
+    def dimension(ref):
+        first, _, last = ref.partition(':')
+        last = last or first
+        column = max(column_index_from_string(last.rstrip('0123456789')), last_column)
+        row = max(int(last.lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ') or 1), new_last_row)
+        return f"{first}:{get_column_letter(column)}{row}"
+
+    stretch = lambda sqref: _extend_sqref(sqref, last_row, new_last_row)
+    head = _sub_text(DIMENSION, sheet_xml[:end], dimension) if last_column else sheet_xml[:end]
+    tail = _sub_text(X14_SQREF, _sub_text(RANGE_ATTRIBUTE, sheet_xml[end:], stretch), stretch)
+    return head + ''.join(new_rows).encode('utf-8') + tail, last_row, new_last_row
+
+
+def append_sheet_rows(path: str, sheet_name: str, rows: List[List[Any]], output_path: Optional[str] = None,
+                      header_rows: int = 1, compression: Optional[CompressionPolicy] = None) -> Tuple[int, int]:
+    """
+    Append rows to the end of a sheet by editing the package in place
+
+    New cells take the style of the last row's cell in the same column, and
+    cells left as None continue that row's formula with shifted references.
+    Conditional formatting, validations, filters, tables, defined names and
+    chart series on the sheet that reach its old last row are stretched to
+    the new one. Every other part is copied through unchanged.
+
+    Returns:
+        First and last row number written
+    """
+    output_path = output_path or path
+    rows = [list(row) for row in rows]
+    with zipfile.ZipFile(path) as archive:
+        sheets = sheet_parts(archive)
+        if sheet_name not in sheets:
+            raise ValueError(f"Workbook has no sheet named '{sheet_name}'")
+        sheet_part = sheets[sheet_name]
+
+        shared_part = _shared_strings_part(archive)
+        shared = SharedStrings.from_xml(archive.read(shared_part)) if shared_part is not None else None
+
+        updated = {}
+        updated[sheet_part], last_row, new_last_row = _append_to_sheet(archive.read(sheet_part), rows, header_rows,
+                                                                        shared)
+        if shared is not None:
+            updated[shared_part] = shared.to_xml()
+        stretch_area = lambda sqref: _extend_sqref(sqref, last_row, new_last_row)
+        stretch_formula = lambda formula: _extend_formula(formula, sheet_name, last_row, new_last_row)
+
+        try:
+            sheet_rels = archive.read(_rels_path(sheet_part))
+        except KeyError:
+            sheet_rels = b''
+        for relationship in RELATIONSHIP_TAG.findall(sheet_rels):
+            if TABLE_REL_TYPE in relationship:
+                table_part = _resolve(sheet_part, TARGET_ATTRIBUTE.search(relationship).group(1).decode('utf-8'))
+                updated[table_part] = _sub_text(REF_ATTRIBUTE, archive.read(table_part), stretch_area)
+
+        for name in archive.namelist():
+            if name.startswith('xl/charts/chart') and name.endswith('.xml'):
+                updated[name] = _sub_text(FORMULA_TEXT, archive.read(name), stretch_formula)
+        updated[WORKBOOK_PART] = _sub_text(DEFINED_NAME, archive.read(WORKBOOK_PART), stretch_formula)
+
+        entries = [(info, updated[info.filename] if info.filename in updated else archive.read(info.filename))
+                   for info in archive.infolist()]
+    write_package(entries, output_path, compression)
+
+    return last_row + 1, new_last_row
+
+
+def retheme_package(path: str, palette: StylePalette, output_path: Optional[str] = None,
+                    compression: Optional[CompressionPolicy] = None):
+    """
+    Switch a workbook's theme by rewriting its style table
+
+    Only styles.xml changes; worksheets keep their style indices, which now
+    resolve to the new theme's colors and fonts. Every other part is copied
+    through unchanged.
+    """
+    with zipfile.ZipFile(path) as archive:
+        styles_part = _workbook_part(archive, STYLES_TYPE)
+        entries = [(info, palette.apply(archive.read(info.filename)) if info.filename == styles_part
+                    else archive.read(info.filename))
+                   for info in archive.infolist()]
+    write_package(entries, output_path or path, compression)
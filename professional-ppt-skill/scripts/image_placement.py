@@ -0,0 +1,328 @@
+"""
+Image Placement - Aspect-aware picture placement and downscaling of oversized photos
+Reads each image's pixel size and DPI from its file header only, places it in
+a slide area by fit, fill or crop (cropping through the picture's crop
+properties, not its pixels) and downscales images far larger than their
+placement needs on a thread pool; every image is decoded at most once per
+process for a given size
+"""
+
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from PIL import Image
+
+from presentation_cache import file_digest
+
+IMAGE_FIT_MODES = ('fit', 'fill', 'crop')
+IMAGE_OPTIONS = ('max_dpi', 'quality', 'threads')
+# PowerPoint's own 'compress pictures' default resolution
+DEFAULT_MAX_DPI = 220
+DEFAULT_QUALITY = 85
+DEFAULT_THREADS = 4
+# Images are only downscaled when they have this much more resolution than needed
+RECOMPRESS_MARGIN = 1.5
+# Formats that are downscaled; others (animated GIFs, metafiles) are embedded as they are
+RECOMPRESS_FORMATS = ('JPEG', 'PNG', 'BMP', 'TIFF', 'WEBP')
+# Downscaled image bytes kept per process, least recently used dropped first
+MAX_CACHED_BYTES = 256 * 1024 * 1024
+EMU_PER_INCH = 914400
+DEFAULT_DPI = 72
+
+
+class ImageInfo:
+    """Pixel size, resolution and format of an image, read from its header"""
+
+    __slots__ = ('width', 'height', 'dpi', 'format')
+
+    def __init__(self, width: int, height: int, dpi: Tuple[float, float], format: Optional[str]):
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.format = format
+
+
+_probes: Dict[Tuple[str, int, int], ImageInfo] = {}
+
+
+def probe(path: str) -> ImageInfo:
+    """
+    Size, DPI and format of an image without decoding its pixels
+
+    Pillow only parses the header when an image is opened; results are
+    memoized by (path, size, mtime), so each file is opened once per process.
+    """
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    info = _probes.get(key)
+    if info is None:
+        with Image.open(path) as image:
+            dpi = image.info.get('dpi') or (DEFAULT_DPI, DEFAULT_DPI)
+            # PNG stores dots per meter, which Pillow reports as 149.99 and the like
+            dpi = tuple(float(round(value)) if value and value > 1 else DEFAULT_DPI for value in dpi[:2])
+            info = ImageInfo(image.width, image.height, dpi, image.format)
+        _probes[key] = info
+    return info
+
+
+class Placement:
+    """
+    Where a picture goes: its frame in EMU and the share of the image cropped from each side
+
+    shown is the size in EMU of the whole image, cropped parts included;
+    pixels() converts it to the pixels needed at a target resolution.
+    """
+
+    __slots__ = ('left', 'top', 'width', 'height', 'crop', 'shown')
+
+    def __init__(self, left: int, top: int, width: int, height: int,
+                 crop: Tuple[float, float, float, float] = (0.0, 0.0, 0.0, 0.0)):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.crop = crop
+        left_crop, top_crop, right_crop, bottom_crop = crop
+        self.shown = (width / max(1 - left_crop - right_crop, 1e-6), height / max(1 - top_crop - bottom_crop, 1e-6))
+
+    def pixels(self, max_dpi: float) -> Tuple[int, int]:
+        return (max(1, round(self.shown[0] / EMU_PER_INCH * max_dpi)),
+                max(1, round(self.shown[1] / EMU_PER_INCH * max_dpi)))
+
+
+def place(info: ImageInfo, box: Tuple[int, int, int, int], mode: Optional[str]) -> Placement:
+    """
+    Placement of an image in a box (left, top, width, height in EMU)
+
+    Modes:
+        None: the box's width at its top left, height from the aspect ratio
+        fit: as large as fits in the box, centered
+        fill: covers the box, centered, with the overflow cropped
+        crop: the image's own size (pixels / DPI), centered, with whatever
+            falls outside the box cropped
+    """
+    left, top, width, height = box
+    aspect = info.height / info.width
+    if mode is None:
+        return Placement(left, top, width, int(round(width * aspect)))
+
+    if mode == 'fit':
+        shown_width = min(width, height / aspect)
+        shown = (shown_width, shown_width * aspect)
+    elif mode == 'fill':
+        shown_width = max(width, height / aspect)
+        shown = (shown_width, shown_width * aspect)
+    else:
+        shown = (info.width / info.dpi[0] * EMU_PER_INCH, info.height / info.dpi[1] * EMU_PER_INCH)
+
+    frame_width, frame_height = min(shown[0], width), min(shown[1], height)
+    crop_x = (shown[0] - frame_width) / shown[0] / 2
+    crop_y = (shown[1] - frame_height) / shown[1] / 2
+    return Placement(int(round(left + (width - frame_width) / 2)), int(round(top + (height - frame_height) / 2)),
+                     int(round(frame_width)), int(round(frame_height)), (crop_x, crop_y, crop_x, crop_y))
+
+
+class ImagePolicy:
+    """Target resolution, JPEG quality and thread count for downscaling oversized images"""
+
+    __slots__ = ('max_dpi', 'quality', 'threads')
+
+    def __init__(self, max_dpi: float = DEFAULT_MAX_DPI, quality: int = DEFAULT_QUALITY,
+                 threads: Optional[int] = None):
+        if isinstance(max_dpi, bool) or not isinstance(max_dpi, (int, float)) or max_dpi <= 0:
+            raise ValueError(f"Image max_dpi must be a positive number, got {max_dpi!r}")
+        if isinstance(quality, bool) or not isinstance(quality, int) or not 1 <= quality <= 95:
+            raise ValueError(f"Image quality must be an integer from 1 to 95, got {quality!r}")
+        if threads is None:
+            threads = min(DEFAULT_THREADS, os.cpu_count() or 1)
+        if isinstance(threads, bool) or not isinstance(threads, int) or threads < 1:
+            raise ValueError(f"Image threads must be a positive integer, got {threads!r}")
+        self.max_dpi = max_dpi
+        self.quality = quality
+        self.threads = threads
+
+    @classmethod
+    def from_option(cls, option: Any) -> Optional['ImagePolicy']:
+        """
+        Policy from a config option
+
+        Args:
+            option: None or True (the defaults), False (embed every image as
+                it is) or a dict like {"max_dpi": 150, "quality": 80, "threads": 4}
+        """
+        if option is False:
+            return None
+        if option is None or option is True:
+            return cls()
+        if not isinstance(option, dict):
+            raise ValueError(f"Invalid images option {option!r}")
+        unknown = [name for name in option if name not in IMAGE_OPTIONS]
+        if unknown:
+            raise ValueError(f"Unknown images option '{unknown[0]}', expected one of {', '.join(IMAGE_OPTIONS)}")
+        return cls(**option)
+
+    def target(self, info: ImageInfo, placement: Placement) -> Optional[Tuple[int, int]]:
+        """Pixel size to downscale an image to, None when it should be embedded as it is"""
+        if info.format not in RECOMPRESS_FORMATS:
+            return None
+        width, height = placement.pixels(self.max_dpi)
+        if info.width < width * RECOMPRESS_MARGIN or info.height < height * RECOMPRESS_MARGIN:
+            return None
+        # Keep the aspect ratio exactly; the shown size only approximates it after rounding
+        scale = max(width / info.width, height / info.height)
+        return max(1, round(info.width * scale)), max(1, round(info.height * scale))
+
+
+def _downscale(path: str, size: Tuple[int, int], quality: int) -> Optional[bytes]:
+    """Decode an image once, resize it and encode it again; None when that does not make it smaller"""
+    with Image.open(path) as image:
+        source_format = image.format
+        # JPEG can decode straight at a fraction of its size
+        image.draft(image.mode if image.mode in ('RGB', 'L', 'CMYK') else 'RGB', size)
+        exif = image.getexif()
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        resized = image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    output = io.BytesIO()
+    if source_format == 'JPEG' or (resized.mode in ('RGB', 'L', 'CMYK') and source_format != 'PNG'):
+        if resized.mode not in ('RGB', 'L', 'CMYK'):
+            resized = resized.convert('RGB')
+        # The EXIF orientation stays, so the picture shows the same way up
+        resized.save(output, 'JPEG', quality=quality, optimize=True, exif=exif)
+    else:
+        resized.save(output, 'PNG', optimize=True)
+    data = output.getvalue()
+    return data if len(data) < os.path.getsize(path) else None
+
+
+class ImageCache:
+    """
+    Downscaled images by file content, pixel size and quality
+
+    A request that is already being decoded by another thread waits for it
+    rather than decoding the same image again.
+    """
+
+    def __init__(self, max_bytes: int = MAX_CACHED_BYTES):
+        self.max_bytes = max_bytes
+        self._images: 'OrderedDict[Tuple, Optional[bytes]]' = OrderedDict()
+        self._pending: Dict[Tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.decodes = 0
+        self.hits = 0
+
+    def get(self, path: str, size: Tuple[int, int], quality: int) -> Optional[bytes]:
+        """Downscaled image bytes, None when the original is as small"""
+        key = (file_digest(path), size, quality)
+        while True:
+            with self._lock:
+                if key in self._images:
+                    self._images.move_to_end(key)
+                    self.hits += 1
+                    return self._images[key]
+                pending = self._pending.get(key)
+                if pending is None:
+                    self._pending[key] = threading.Event()
+                    self.decodes += 1
+                    break
+            pending.wait()
+
+        try:
+            data = _downscale(path, size, quality)
+            with self._lock:
+                self._images[key] = data
+                self.nbytes += len(data or b'')
+                while self.nbytes > self.max_bytes and len(self._images) > 1:
+                    _, dropped = self._images.popitem(last=False)
+                    self.nbytes -= len(dropped or b'')
+            return data
+        finally:
+            with self._lock:
+                self._pending.pop(key).set()
+
+    def stats(self) -> Dict[str, int]:
+        return {'images': len(self._images), 'bytes': self.nbytes, 'decodes': self.decodes, 'hits': self.hits}
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.nbytes = 0
+
+
+# One cache per process, shared by every creator
+IMAGES = ImageCache()
+
+
+def image_request(config) -> Optional[Tuple[str, Tuple[int, int, int, int], Optional[str]]]:
+    """(path, box in EMU, fit mode) of an image slide plan, None when it shows no image"""
+    if not config.image_path or not os.path.exists(config.image_path):
+        return None
+    box = tuple(int(round(inches * EMU_PER_INCH)) for inches in
+                (config.image_left, config.image_top, config.image_width, config.image_height))
+    return config.image_path, box, config.image_fit
+
+
+def _request(path: str, box: Tuple[int, int, int, int], mode: Optional[str],
+             policy: Optional[ImagePolicy]) -> Tuple[ImageInfo, Placement, Optional[Tuple[int, int]]]:
+    info = probe(path)
+    placement = place(info, box, mode)
+    return info, placement, policy.target(info, placement) if policy is not None else None
+
+
+def prepare_images(requests: Iterable[Tuple[str, Tuple[int, int, int, int], Optional[str]]],
+                   policy: Optional[ImagePolicy]) -> int:
+    """
+    Downscale the oversized images of a build ahead of time, on policy.threads threads
+
+    requests are (path, box, mode) triples; Pillow releases the GIL while it
+    decodes, resizes and encodes, so the images are processed in parallel
+    and the slide builders find them in IMAGES. Returns the number of images
+    that needed downscaling.
+    """
+    if policy is None:
+        return 0
+    jobs = {}
+    for path, box, mode in requests:
+        _, _, target = _request(path, box, mode, policy)
+        if target is not None:
+            jobs[(path, target)] = None
+    if len(jobs) > 1 and policy.threads > 1:
+        with ThreadPoolExecutor(max_workers=min(policy.threads, len(jobs))) as pool:
+            list(pool.map(lambda job: IMAGES.get(job[0], job[1], policy.quality), jobs))
+    else:
+        for path, target in jobs:
+            IMAGES.get(path, target, policy.quality)
+    return len(jobs)
+
+
+def decode_bytes(requests: Iterable[Tuple[str, Tuple[int, int, int, int], Optional[str]]],
+                 policy: Optional[ImagePolicy]) -> int:
+    """Peak memory of decoding the images that need downscaling, policy.threads at a time"""
+    if policy is None:
+        return 0
+    sizes = sorted(info.width * info.height * 4 for info, _, target in
+                   (_request(path, box, mode, policy) for path, box, mode in requests) if target is not None)
+    return sum(sizes[-policy.threads:])
+
+
+def add_image(slide, path: str, box: Tuple[int, int, int, int], mode: Optional[str] = None,
+              policy: Optional[ImagePolicy] = None):
+    """Add a picture placed in a box, downscaled when the policy says it is oversized"""
+    info, placement, target = _request(path, box, mode, policy)
+    data = IMAGES.get(path, target, policy.quality) if target is not None else None
+    if mode is None:
+        # Height left to python-pptx, which rounds it the same way
+        picture = slide.shapes.add_picture(io.BytesIO(data) if data else path, placement.left, placement.top,
+                                           width=placement.width)
+    else:
+        picture = slide.shapes.add_picture(io.BytesIO(data) if data else path, placement.left, placement.top,
+                                           placement.width, placement.height)
+    if any(placement.crop):
+        picture.crop_left, picture.crop_top, picture.crop_right, picture.crop_bottom = placement.crop
+    return picture
@@ -0,0 +1,363 @@
+"""
+Master Theme - Presentation themes written once into the master, not per run
+Puts a theme's color scheme and fonts into the theme part, its text styles
+and background into the slide master and its title / section variants into
+the layouts, and builds slides from layout placeholders that inherit all of
+it; switching a deck's theme then rewrites those few parts, not every slide
+"""
+
+from typing import Any, Optional
+
+from lxml import etree
+from pptx.dml.color import RGBColor
+from pptx.enum.dml import MSO_THEME_COLOR
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.enum.text import PP_ALIGN
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
+from pptx.util import Inches, Pt
+
+from image_placement import ImagePolicy, add_image, image_request
+from slide_charts import add_chart
+from slide_tables import add_table, add_table_style
+from slide_timeline import add_timeline
+from template_manager import find_layout
+from text_layout import scale_text
+
+THEME_MODES = ('inline', 'master')
+
+# Layout types the slide types are built on, found by type so company templates work too
+TITLE_LAYOUT = 'title'
+CONTENT_LAYOUT = 'obj'
+SECTION_LAYOUT = 'secHead'
+TWO_CONTENT_LAYOUT = 'twoObj'
+TITLE_ONLY_LAYOUT = 'titleOnly'
+BLANK_LAYOUT = 'blank'
+
+# Theme color slots filled from an AdvancedTheme; the rest keep the template's values.
+# Titles use tx2 (dk2), text tx1 (dk1) and backgrounds bg1 (lt1).
+SCHEME_SLOTS = (('dk1', 'text_color'), ('lt1', 'background_color'), ('dk2', 'primary_color'),
+                ('lt2', 'secondary_color'), ('accent1', 'primary_color'), ('accent2', 'secondary_color'),
+                ('accent3', 'accent_color'))
+FILL_TAGS = (qn('a:noFill'), qn('a:solidFill'), qn('a:gradFill'), qn('a:blipFill'), qn('a:pattFill'),
+             qn('a:grpFill'))
+# Paragraph property children that come before spcAft
+BEFORE_SPACING = (qn('a:lnSpc'), qn('a:spcBef'))
+CONTENT_TITLE_SIZE = 32
+
+
+def _element(tag: str, **attributes) -> etree._Element:
+    element = etree.Element(qn(tag))
+    for name, value in attributes.items():
+        element.set(name, str(value))
+    return element
+
+
+def _scheme_fill(value: str) -> etree._Element:
+    fill = _element('a:solidFill')
+    fill.append(_element('a:schemeClr', val=value))
+    return fill
+
+
+def _set_fill(parent: etree._Element, fill: etree._Element, index: int = 0):
+    """Replace whatever fill parent has with fill"""
+    for child in list(parent):
+        if child.tag in FILL_TAGS:
+            index = list(parent).index(child)
+            parent.remove(child)
+    parent.insert(index, fill)
+
+
+def _level(list_style: etree._Element, level: int) -> etree._Element:
+    """lvlNpPr of a list style, created in order when missing"""
+    tag = qn(f'a:lvl{level}pPr')
+    existing = list_style.find(tag)
+    if existing is not None:
+        return existing
+    paragraph = _element(f'a:lvl{level}pPr')
+    index = 0
+    for position, child in enumerate(list_style):
+        if child.tag == qn('a:defPPr') or (child.tag.startswith(qn('a:lvl')) and child.tag < tag):
+            index = position + 1
+    list_style.insert(index, paragraph)
+    return paragraph
+
+
+def _style_level(paragraph: etree._Element, size: Optional[int] = None, bold: Optional[bool] = None,
+                 color: Optional[str] = None, align: Optional[str] = None, space_after: Optional[int] = None):
+    """Set the run defaults (size in points, scheme color) and paragraph properties of a list level"""
+    if align is not None:
+        paragraph.set('algn', align)
+    if space_after is not None:
+        spacing = paragraph.find(qn('a:spcAft'))
+        if spacing is not None:
+            paragraph.remove(spacing)
+        spacing = _element('a:spcAft')
+        spacing.append(_element('a:spcPts', val=space_after * 100))
+        index = sum(1 for child in paragraph if child.tag in BEFORE_SPACING)
+        paragraph.insert(index, spacing)
+
+    defaults = paragraph.find(qn('a:defRPr'))
+    if defaults is None:
+        defaults = _element('a:defRPr')
+        extension = paragraph.find(qn('a:extLst'))
+        paragraph.insert(len(paragraph) if extension is None else list(paragraph).index(extension), defaults)
+    if size is not None:
+        defaults.set('sz', str(int(size * 100)))
+    if bold is not None:
+        defaults.set('b', '1' if bold else '0')
+    if color is not None:
+        _set_fill(defaults, _scheme_fill(color), 1 if defaults.find(qn('a:ln')) is not None else 0)
+
+
+def _set_background(common_slide: etree._Element, fill: etree._Element):
+    """Give a master, layout or slide (its p:cSld) a background of its own"""
+    csld = common_slide.find(qn('p:cSld'))
+    background = csld.find(qn('p:bg'))
+    if background is not None:
+        csld.remove(background)
+    background = _element('p:bg')
+    properties = _element('p:bgPr')
+    properties.append(fill)
+    properties.append(_element('a:effectLst'))
+    background.append(properties)
+    csld.insert(0, background)
+
+
+def _background_fill(theme: Any) -> etree._Element:
+    if not theme.has_gradient:
+        return _scheme_fill('bg1')
+    gradient = _element('a:gradFill', rotWithShape=1)
+    stops = etree.SubElement(gradient, qn('a:gsLst'))
+    for position, color in ((0, 'bg1'), (100000, 'accent2')):
+        stop = etree.SubElement(stops, qn('a:gs'), pos=str(position))
+        stop.append(_element('a:schemeClr', val=color))
+    gradient.append(_element('a:lin', ang=int(theme.gradient_angle * 60000) % 21600000, scaled=0))
+    return gradient
+
+
+def _placeholder(layout_element: etree._Element, ph_type: str, idx: Optional[int] = None) -> Optional[etree._Element]:
+    for shape in layout_element.iter(qn('p:sp')):
+        ph = shape.find(f"{qn('p:nvSpPr')}/{qn('p:nvPr')}/{qn('p:ph')}")
+        if ph is not None and ph.get('type', 'obj') == ph_type and (idx is None or ph.get('idx') == str(idx)):
+            return shape
+    return None
+
+
+def _placeholder_level(shape: etree._Element, level: int = 1) -> etree._Element:
+    body = shape.find(qn('p:txBody'))
+    list_style = body.find(qn('a:lstStyle'))
+    if list_style is None:
+        list_style = _element('a:lstStyle')
+        body.insert(1, list_style)
+    return _level(list_style, level)
+
+
+def _style_placeholder(shape: Optional[etree._Element], **style):
+    """Style the first level of a layout placeholder; company templates may not have it"""
+    if shape is not None:
+        _style_level(_placeholder_level(shape), **style)
+
+
+def _write_theme_part(prs, theme: Any):
+    """Color scheme and major / minor fonts of the master's theme part"""
+    part = prs.slide_master.part.part_related_by(RT.THEME)
+    root = etree.fromstring(part.blob)
+    root.set('name', theme.name)
+    scheme = root.find(f"{qn('a:themeElements')}/{qn('a:clrScheme')}")
+    scheme.set('name', theme.name)
+    for slot, attribute in SCHEME_SLOTS:
+        color = scheme.find(qn(f'a:{slot}'))
+        for child in list(color):
+            color.remove(child)
+        color.append(_element('a:srgbClr', val=str(getattr(theme, attribute))))
+    fonts = root.find(f"{qn('a:themeElements')}/{qn('a:fontScheme')}")
+    fonts.set('name', theme.name)
+    fonts.find(f"{qn('a:majorFont')}/{qn('a:latin')}").set('typeface', theme.title_font)
+    fonts.find(f"{qn('a:minorFont')}/{qn('a:latin')}").set('typeface', theme.body_font)
+    # Theme parts are plain parts; python-pptx writes their blob as is
+    part._blob = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+def apply_master_theme(prs, theme: Any):
+    """
+    Write a theme into a presentation's theme part, slide master and layouts
+
+    Slides that do not override fonts, colors or backgrounds (those built in
+    master mode) take the theme from here; calling it again switches them.
+    """
+    _write_theme_part(prs, theme)
+
+    master = prs.slide_master._element
+    _set_background(master, _background_fill(theme))
+    styles = master.find(qn('p:txStyles'))
+    title_style = styles.find(qn('p:titleStyle'))
+    _style_level(_level(title_style, 1), size=CONTENT_TITLE_SIZE, bold=True, color='tx2', align='l')
+    body_style = styles.find(qn('p:bodyStyle'))
+    _style_level(_level(body_style, 1), size=theme.body_size, color='tx1', space_after=12)
+    _style_level(_level(body_style, 2), size=max(theme.body_size - 2, 8), color='tx1')
+    for level in range(3, 10):
+        _style_level(_level(body_style, level), size=max(theme.body_size - 4, 8), color='tx1')
+
+    title_layout = find_layout(prs, TITLE_LAYOUT)._element
+    _style_placeholder(_placeholder(title_layout, 'ctrTitle'), size=theme.title_size, bold=True, align='ctr')
+    _style_placeholder(_placeholder(title_layout, 'subTitle'), size=theme.body_size, color='tx1', align='ctr')
+
+    section_layout = find_layout(prs, SECTION_LAYOUT)._element
+    _set_background(section_layout, _scheme_fill('tx2'))
+    section_title = _placeholder(section_layout, 'title')
+    if section_title is not None:
+        title_level = _placeholder_level(section_title)
+        _style_level(title_level, size=theme.title_size + 4, bold=True, color='bg1', align='ctr')
+        title_level.find(qn('a:defRPr')).set('cap', 'none')
+        section_title.find(f"{qn('p:txBody')}/{qn('a:bodyPr')}").set('anchor', 'ctr')
+        # Centered on the slide like the inline section divider
+        transform = section_title.find(f"{qn('p:spPr')}/{qn('a:xfrm')}")
+        if transform is not None:
+            transform.find(qn('a:off')).set('x', str(Inches(1)))
+            transform.find(qn('a:off')).set('y', str(Inches(3)))
+            transform.find(qn('a:ext')).set('cx', str(Inches(8)))
+            transform.find(qn('a:ext')).set('cy', str(Inches(2)))
+
+    two_content = find_layout(prs, TWO_CONTENT_LAYOUT)._element
+    for idx in (1, 2):
+        _style_placeholder(_placeholder(two_content, 'obj', idx), size=max(theme.body_size - 2, 8))
+
+
+def _remove(shape):
+    element = shape._element
+    element.getparent().remove(element)
+
+
+def _fill_paragraphs(text_frame, lines):
+    for index, line in enumerate(lines):
+        paragraph = text_frame.paragraphs[0] if index == 0 else text_frame.add_paragraph()
+        paragraph.text = line
+
+
+class MasterSlides:
+    """
+    Slide builders for master mode
+
+    Titles and bullets go into layout placeholders and shapes use theme
+    colors, so slides carry text and geometry but no fonts, colors or
+    backgrounds of their own.
+    """
+
+    def __init__(self, prs, theme: Any, images: Optional[ImagePolicy] = None):
+        self.prs = prs
+        self.theme = theme
+        self.images = images
+
+    def build(self, slide_type: str, config):
+        builder = getattr(self, f'_{slide_type}', self._content)
+        slide = builder(config)
+        if isinstance(config.background, tuple) and len(config.background) == 3:
+            # An explicit per-slide color still overrides the master
+            fill = slide.background.fill
+            fill.solid()
+            fill.fore_color.rgb = RGBColor(*config.background)
+        return slide
+
+    def _slide(self, layout: str, title: Optional[str] = None):
+        slide = self.prs.slides.add_slide(find_layout(self.prs, layout))
+        if title is not None and slide.shapes.title is not None:
+            slide.shapes.title.text = title
+        return slide
+
+    def _text_frames(self, slide, areas):
+        """
+        Text frames of the slide's body placeholders, in idx order, one per area
+
+        Layouts of a company template with fewer placeholders get text boxes
+        at the areas (left, top, width, height in inches) for the rest.
+        """
+        bodies = sorted((shape for shape in slide.placeholders if shape.placeholder_format.idx != 0),
+                        key=lambda shape: shape.placeholder_format.idx)
+        frames = [body.text_frame for body in bodies[:len(areas)]]
+        for left, top, width, height in areas[len(frames):]:
+            box = slide.shapes.add_textbox(Inches(left), Inches(top), Inches(width), Inches(height))
+            box.text_frame.word_wrap = True
+            frames.append(box.text_frame)
+        return frames
+
+    def _title(self, config):
+        slide = self._slide(TITLE_LAYOUT, config.title)
+        subtitles = [shape for shape in slide.placeholders if shape.placeholder_format.idx != 0]
+        for index, subtitle in enumerate(subtitles):
+            if index == 0 and config.subtitle is not None:
+                subtitle.text = config.subtitle
+            else:
+                _remove(subtitle)
+        return slide
+
+    def _section(self, config):
+        slide = self._slide(SECTION_LAYOUT, config.title)
+        for body in [shape for shape in slide.placeholders if shape.placeholder_format.idx != 0]:
+            _remove(body)
+        return slide
+
+    def _content(self, config):
+        slide = self._slide(CONTENT_LAYOUT, config.title)
+        body, = self._text_frames(slide, [(0.5, 1.5, 9, 5)])
+        _fill_paragraphs(body, config.bullets)
+        scale_text(body, config.font_size, self.theme.body_size)
+        return slide
+
+    def _two_column(self, config):
+        slide = self._slide(TWO_CONTENT_LAYOUT, config.title)
+        left, right = self._text_frames(slide, [(0.5, 1.5, 4.25, 5), (5.25, 1.5, 4.25, 5)])
+        _fill_paragraphs(left, config.left_content)
+        _fill_paragraphs(right, config.right_content)
+        for column in (left, right):
+            scale_text(column, config.font_size, max(self.theme.body_size - 2, 8))
+        return slide
+
+    def _comparison(self, config):
+        slide = self._slide(TITLE_ONLY_LAYOUT, config.title)
+        for left, color, text in ((0.5, MSO_THEME_COLOR.ACCENT_2, config.left_title),
+                                  (5.5, MSO_THEME_COLOR.ACCENT_3, config.right_title)):
+            box = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(left), Inches(1.7), Inches(4), Inches(4))
+            box.fill.solid()
+            box.fill.fore_color.theme_color = color
+            box.text_frame.text = text
+
+        versus = slide.shapes.add_textbox(Inches(4.5), Inches(3.5), Inches(1), Inches(0.5)).text_frame
+        versus.text = "VS"
+        versus.paragraphs[0].font.bold = True
+        versus.paragraphs[0].font.size = Pt(24)
+        versus.paragraphs[0].alignment = PP_ALIGN.CENTER
+        return slide
+
+    def _timeline(self, config):
+        slide = self._slide(TITLE_ONLY_LAYOUT, config.title)
+        if config.timeline_page is not None:
+            add_timeline(slide, config.timeline_page)
+        return slide
+
+    def _chart(self, config):
+        slide = self._slide(TITLE_ONLY_LAYOUT, config.title)
+        add_chart(slide, config.chart, Inches(0.5), Inches(1.5), Inches(9), Inches(5))
+        return slide
+
+    def _table(self, config):
+        slide = self._slide(TITLE_ONLY_LAYOUT, config.title)
+        add_table(slide, config.table_page, add_table_style(self.prs, self.theme, master=True),
+                  Inches(0.5), Inches(1.5))
+        return slide
+
+    def _image(self, config):
+        slide = self._slide(TITLE_ONLY_LAYOUT, config.title)
+        request = image_request(config)
+        if request is not None:
+            add_image(slide, *request, policy=self.images)
+        if config.caption is not None:
+            caption = slide.shapes.add_textbox(Inches(0.5), Inches(6), Inches(9), Inches(0.5)).text_frame
+            caption.text = config.caption
+            caption.paragraphs[0].font.size = Pt(14)
+            caption.paragraphs[0].font.italic = True
+            caption.paragraphs[0].alignment = PP_ALIGN.CENTER
+        return slide
+
+    def _blank(self, config):
+        return self._slide(BLANK_LAYOUT)
@@ -16,6 +16,18 @@ from pptx.enum.shapes import MSO_SHAPE
 from pptx.dml.color import RGBColor
 from pptx.enum.dml import MSO_THEME_COLOR
 
+# Modules shared with the Excel skill live in skill_common/ at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from slide_charts import add_chart
+from template_manager import TEMPLATES
+from text_layout import MEASURER, MIN_FONT_SIZE, TextBox, scale_text
+
+# Body placeholder of the default title-and-content layout: its text area
+# (less the bullet indent), level-one size and spacing before each bullet
+CONTENT_BODY = TextBox.from_inches(9 - 0.375, 4.95, space_after=32 * 0.2)
+CONTENT_BODY_SIZE = 32
+
 class ProfessionalPPTCreator:
     """Professional PowerPoint presentation generator"""
     
@@ -110,8 +122,8 @@ class ProfessionalPPTCreator:
         """Generate complete professional presentation from prompt"""
         analysis = self.analyze_prompt(prompt)
         
-        # Create presentation
-        prs = Presentation()
+        # Create presentation from the default template, parsed once per process
+        prs = TEMPLATES.presentation()
         
         # Generate slides based on analysis
         slides_content = self._generate_slide_content(analysis, prompt)
@@ -303,13 +315,28 @@ class ProfessionalPPTCreator:
                 p = text_frame.add_paragraph()
                 p.text = bullet
                 p.level = 0
+
+            # Long bullets shrink to fit the placeholder instead of overflowing it
+            fit = MEASURER.fit_size(content['bullets'], 'Calibri', CONTENT_BODY_SIZE, CONTENT_BODY)
+            scale_text(text_frame, fit or MIN_FONT_SIZE, CONTENT_BODY_SIZE)
         
         return slide
     
     def _create_data_slide(self, prs: Presentation, content: Dict):
         """Create slide optimized for data presentation"""
-        # Implementation for charts and data visualization
-        return self._create_content_slide(prs, content)
+        if 'chart' not in content:
+            return self._create_content_slide(prs, content)
+
+        slide_layout = prs.slide_layouts[5]  # Title Only
+        slide = prs.slides.add_slide(slide_layout)
+
+        title = slide.shapes.title
+        title.text = content['title']
+
+        # Native chart from the content's chart spec (inline data, DataFrame or workbook range)
+        add_chart(slide, content['chart'], Inches(0.5), Inches(1.5), Inches(9), Inches(5.5))
+
+        return slide
     
     def _apply_color_scheme(self, slide, scheme_name: str):
         """Apply consistent color scheme to slide"""
@@ -7,17 +7,64 @@ Provides full customization control with advanced themes, animations, multimedia
 import json
 import sys
 import re
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Union
 from pathlib import Path
 from pptx import Presentation
 from pptx.util import Inches, Pt, Emu
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR, MSO_AUTO_SIZE
 from pptx.enum.shapes import MSO_SHAPE
 from pptx.dml.color import RGBColor
-from pptx.enum.dml import MSO_THEME_COLOR, MSO_LINE
+from pptx.enum.dml import MSO_THEME_COLOR
 from pptx.oxml.xmlchemy import OxmlElement
 import io
 import os
+import threading
+from concurrent.futures import Executor
+
+# Modules shared with the Excel skill live in skill_common/ at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from skill_common.artifact_cache import content_config, fingerprint
+from skill_common.build_governor import MemoryEstimate, ResourceGovernor
+from skill_common.build_jobs import run_build
+from skill_common.build_profiler import BuildProfiler, format_report
+from skill_common.package_zip import CompressionPolicy
+
+from image_placement import ImagePolicy, add_image, decode_bytes, image_request, prepare_images
+from master_theme import BLANK_LAYOUT, MasterSlides, apply_master_theme
+from presentation_cache import ArtifactCache, file_digest
+from pptx_package import SlideManifest, manifest_path, package_stamp, plan_reuse, save_presentation
+from slide_charts import add_chart, chart_digest
+from slide_tables import add_table, add_table_style, paginate_table, table_cells, table_digest
+from slide_timeline import add_timeline, paginate_timeline
+from template_manager import TEMPLATES, find_layout, strip_unused_layouts
+from text_layout import MEASURER, MIN_FONT_SIZE, TextBox
+from presentation_schema import (ConfigError, PresentationPlan, PresentationEditPlan, SlidePlan, compile_presentation,
+                           compile_presentation_edit)
+
+# Part of every cache key; bump whenever the generated presentations change
+ENGINE_VERSION = '1.4.0'
+# Engine attributes an async build copies back from its worker engine
+BUILD_STATE = ('last_profile', 'last_cache_hit', 'last_reused_slides', 'last_build_mode')
+
+# Peak memory model used by the resource governor, in bytes; measured with
+# tracemalloc on text and image decks
+PRESENTATION_BYTES = 2 * 1024 * 1024
+SLIDE_BYTES = 16 * 1024
+# Image blobs are held by their parts, then copied into the stored package and
+# compressed; streaming writes each part straight into the archive
+IMAGE_FACTOR = 3
+STREAMING_IMAGE_FACTOR = 1.2
+# Table cells live as lxml nodes, which tracemalloc does not see; about 1 KB a cell
+TABLE_CELL_BYTES = 1024
+
+# Text areas of the content and two-column builders, in inches, with the
+# paragraph spacing of their bullets in points
+CONTENT_BOX = TextBox.from_inches(9, 4.5, space_after=12)
+COLUMN_BOX = TextBox.from_inches(4.25, 4.5)
+CONTINUED_TITLE = '{title} (cont.)'
+# Area a table's pages are fitted into, in points
+TABLE_BOX = TextBox(9 * 72, 5 * 72)
 
 class AdvancedTheme:
     """Advanced theme configuration with full customization"""
@@ -43,6 +90,18 @@ class EnhancedPPTCreator:
         self.themes = self._initialize_themes()
         self.transition_types = ['none', 'fade', 'push', 'wipe', 'split', 'reveal', 'random_bars', 'shape', 'uncover', 'cover', 'flash', 'dissolve']
         self.animation_types = ['appear', 'fade', 'fly_in', 'float_in', 'split', 'wipe', 'wheel', 'random_bars', 'grow_and_turn', 'zoom', 'swivel', 'bounce']
+        self.profiler = BuildProfiler()
+        self.last_profile = None
+        self.last_cache_hit = False
+        self.last_reused_slides = []
+        # 'streaming' when the resource governor chose the low-memory build
+        self.last_build_mode = 'memory'
+        # Slide builders of the current build in master theme mode, None inline
+        self._master_slides: Optional[MasterSlides] = None
+        # Downscaling of oversized images for the current build, None to embed them as they are
+        self._image_policy: Optional[ImagePolicy] = ImagePolicy()
+        # Set by the async API; builds stop at their next phase once it is set
+        self.cancel_event: Optional[threading.Event] = None
 
     def _initialize_themes(self) -> Dict[str, AdvancedTheme]:
         """Initialize 10+ professional themes with full customization"""
@@ -185,12 +244,21 @@ class EnhancedPPTCreator:
         }
         return themes
 
-    def create_presentation(self, config: Dict) -> str:
+    def compile_config(self, config: Dict) -> PresentationPlan:
+        """
+        Validate a create_presentation config into a reusable PresentationPlan
+
+        Raises ConfigError listing every problem (unknown keys, wrong types,
+        unknown slide types, themes or transitions) before any work is done.
+        """
+        return compile_presentation(config, self.themes, self.transition_types)
+
+    def create_presentation(self, config: Union[Dict, PresentationPlan]) -> str:
         """
         Create presentation with full manual control
 
         Args:
-            config: Complete configuration dictionary with:
+            config: Complete configuration dictionary, or a plan from compile_config, with:
                 - title: Presentation title
                 - subtitle: Presentation subtitle (optional)
                 - theme: Theme name or custom theme config
@@ -198,36 +266,298 @@ class EnhancedPPTCreator:
                 - transitions: Global or per-slide transitions
                 - animations: Global or per-slide animations
                 - output_path: Where to save the file
+                - profile: Optional profiling (True, 'cprofile,memory' or a dict);
+                  the report is left in self.last_profile
+                - cache: Optional artifact cache (True, a directory or a dict with
+                  dir / max_bytes / max_age); unchanged decks are copied from it
+                - incremental: Reuse unchanged slides of the previous build at
+                  output_path; their indices are left in self.last_reused_slides
+                - compression: Optional package compression, a preset ('fast',
+                  'balanced', 'small', 'store') or a dict of levels per part type
+                  (xml / media / default, 0 stores) and threads
+                - resources: Optional memory governor (True or a dict with
+                  max_bytes / streaming_bytes / headroom). A build whose estimated
+                  peak is large then runs in streaming mode, and one that cannot
+                  fit half the available memory raises ResourceLimitError; the
+                  chosen mode is left in self.last_build_mode
+                - theme_mode: 'inline' (default) formats every run and background
+                  on the slide; 'master' writes the theme into the slide master,
+                  theme part and layouts and builds slides that inherit it
+                - template: Optional company .pptx / .potx to build on; it is
+                  parsed once per process and its sample slides are dropped.
+                  In master mode its own master and theme are kept
+                - strip_layouts: Drop the template's unused layouts and masters
+                  from the output (ignored by incremental builds, whose reused
+                  slides need them)
+                - text_fit: How bullet lists that overflow their box are handled,
+                  measured with font metrics: 'paginate' (default) shrinks them
+                  down to 12pt and otherwise continues them on '(cont.)' slides,
+                  'shrink' only shrinks, 'none' leaves them as they are
+                - images: Images with far more pixels than their placement shows
+                  at max_dpi are downscaled once, on a thread pool, before the
+                  slides are built. True (default), False to embed every image as
+                  it is, or a dict of max_dpi (220) / quality (85) / threads
         """
-        # Initialize presentation
-        prs = Presentation()
-
-        # Get theme
-        theme = self._get_theme(config.get('theme', 'corporate_blue'))
+        plan = config if isinstance(config, PresentationPlan) else self.compile_config(config)
+        cache = ArtifactCache.from_option(plan.cache)
+        self.last_cache_hit = False
+        self.last_reused_slides = []
+        self.last_build_mode = 'memory'
+
+        self.profiler = BuildProfiler.from_option(plan.profile, self.cancel_event)
+        self.profiler.start('create_presentation')
+        try:
+            if cache is not None:
+                with self.profiler.phase('cache_lookup'):
+                    cache_key = self.cache_key(plan)
+                    self.last_cache_hit = cache.fetch(cache_key, plan.output_path)
+                if self.last_cache_hit:
+                    return plan.output_path
+
+            # Pick the build mode, or refuse a build that cannot fit in memory
+            governor = ResourceGovernor.from_option(plan.resources)
+            if governor is not None:
+                with self.profiler.phase('governor'):
+                    self.last_build_mode = governor.admit(self.estimate_memory(plan))
+
+            # Initialize presentation from the parsed template
+            with self.profiler.phase('template'):
+                prs = TEMPLATES.presentation(plan.template)
+
+            # Get theme; a company template's master already carries its theme
+            theme = self._get_theme(plan.theme)
+            self._image_policy = ImagePolicy.from_option(plan.images)
+            self._use_master_theme(prs, theme, plan.theme_mode == 'master', write=plan.template is None)
+
+            # Fit bullet lists to their boxes, adding continuation slides where needed
+            slides = self._layout_slides(plan.slides, theme, plan.text_fit)
+
+            output_path = plan.output_path
+            reused = {}
+            if plan.incremental:
+                with self.profiler.phase('planning'):
+                    manifest = SlideManifest.load(manifest_path(output_path))
+                    build_key, fingerprints = self._slide_fingerprints(plan, theme, slides)
+                    reused = plan_reuse(manifest, build_key, output_path, fingerprints)
+                self.last_reused_slides = sorted(reused)
+                if (manifest is not None and manifest.slides == fingerprints and manifest.build_key == build_key
+                        and manifest.matches(output_path)):
+                    # Nothing changed since the previous build; the file is up to date
+                    self.profiler.count('reused_slides', len(reused))
+                    return output_path
+
+            # Downscale the oversized images of the slides to be built, all at once
+            self._prepare_images([slide_plan for index, slide_plan in enumerate(slides) if index not in reused])
+
+            # Create slides; transitions default to the plan's global transition
+            blank_layout = find_layout(prs, BLANK_LAYOUT)
+            for index, slide_plan in enumerate(slides):
+                if index in reused:
+                    # Placeholder, replaced by the previous build's slide when saving
+                    prs.slides.add_slide(blank_layout)
+                    if slide_plan.table_page is not None:
+                        # The reused table still refers to the theme's table style
+                        add_table_style(prs, theme, plan.theme_mode == 'master')
+                    self.profiler.count('reused_slides')
+                    continue
+
+                slide = self._create_slide(prs, slide_plan, theme)
+
+                # Apply transitions
+                if slide_plan.transition != 'none':
+                    with self.profiler.phase('transitions'):
+                        self._add_transition(slide, slide_plan.transition, slide_plan.transition_speed)
+
+                # Apply animations would be handled here (note: python-pptx has limited animation support)
+                # For full animation control, you'd need to manipulate the XML directly
+
+            if plan.strip_layouts and not plan.incremental:
+                with self.profiler.phase('strip_layouts'):
+                    self.profiler.count('stripped_layouts', strip_unused_layouts(prs))
+
+            # Save presentation
+            with self.profiler.phase('save'):
+                self._save(prs, output_path, reused, plan.compression)
+
+            if plan.incremental:
+                SlideManifest(build_key, package_stamp(output_path), fingerprints).save(manifest_path(output_path))
+
+            if cache is not None:
+                with self.profiler.phase('cache_store'):
+                    cache.store(cache_key, output_path)
+        finally:
+            self.last_profile = self.profiler.stop()
 
-        # Get global settings
-        global_transition = config.get('global_transition', 'none')
-        global_animation = config.get('global_animation', 'none')
-
-        # Create slides
-        slides_config = config.get('slides', [])
-
-        for i, slide_config in enumerate(slides_config):
-            slide = self._create_slide(prs, slide_config, theme)
+        return output_path
 
-            # Apply transitions
-            transition = slide_config.get('transition', global_transition)
-            if transition != 'none':
-                self._add_transition(slide, transition, slide_config.get('transition_speed', 'medium'))
+    def estimate_memory(self, config: Union[Dict, PresentationPlan]) -> MemoryEstimate:
+        """
+        Estimated peak memory of a build, in memory and streaming mode
 
-            # Apply animations would be handled here (note: python-pptx has limited animation support)
-            # For full animation control, you'd need to manipulate the XML directly
+        Slides are small; images dominate. Streaming writes every part into
+        the package as it is serialized instead of going through a stored
+        copy of the whole deck.
+        """
+        plan = config if isinstance(config, PresentationPlan) else self.compile_config(config)
+        estimate = MemoryEstimate()
+        estimate.add('presentation', PRESENTATION_BYTES)
+        estimate.add('slides', len(plan.slides) * SLIDE_BYTES)
+        if plan.template is not None and os.path.exists(plan.template):
+            # The parsed template stays cached next to the build's copy of it
+            estimate.add('template', os.path.getsize(plan.template) * IMAGE_FACTOR)
+        self._slide_memory(estimate, plan.slides, plan.images)
+        return estimate
+
+    def _slide_memory(self, estimate: MemoryEstimate, slide_plans: List[SlidePlan], images: Any = None):
+        """Images and tables of the slides, which outweigh everything else on them"""
+        # Decoded pixels of the images being downscaled at the same time
+        requests = [request for request in map(image_request, slide_plans) if request is not None]
+        decoding = decode_bytes(requests, ImagePolicy.from_option(images))
+        if decoding:
+            estimate.add('image decoding', decoding)
+        for slide_plan in slide_plans:
+            if slide_plan.table:
+                estimate.add('table cells', table_cells(slide_plan.table) * TABLE_CELL_BYTES)
+            if slide_plan.image_path and os.path.exists(slide_plan.image_path):
+                size = os.path.getsize(slide_plan.image_path)
+                estimate.add(f"image '{os.path.basename(slide_plan.image_path)}'",
+                             size * IMAGE_FACTOR, size * STREAMING_IMAGE_FACTOR)
+
+    def cache_key(self, config: Union[Dict, PresentationPlan]) -> str:
+        """
+        Content hash identifying the presentation a config would produce
 
-        # Save presentation
-        output_path = config.get('output_path', 'presentation.pptx')
-        prs.save(output_path)
+        Covers the config (minus output_path, profile and cache), the resolved
+        theme, the contents of the template, every referenced image and the
+        data charts and tables read from DataFrames or files, and ENGINE_VERSION.
+        """
+        plan = config if isinstance(config, PresentationPlan) else self.compile_config(config)
+        if plan.content_hash is None:
+            plan.content_hash = fingerprint(ENGINE_VERSION, content_config(plan.config))
+        images = [file_digest(slide.image_path) for slide in plan.slides if slide.image_path]
+        template = file_digest(plan.template) if plan.template else None
+        charts = [chart_digest(slide.chart) for slide in plan.slides if slide.chart]
+        tables = [table_digest(slide.table) for slide in plan.slides if slide.table]
+        return fingerprint(plan.content_hash, vars(self._get_theme(plan.theme)), template, images, charts, tables)
+
+    def _slide_fingerprints(self, plan: PresentationPlan, theme: AdvancedTheme,
+                            slides: List[SlidePlan]) -> Tuple[str, List[str]]:
+        """
+        Build key and one fingerprint per built slide for incremental builds
 
-        return output_path
+        A slide's fingerprint covers its config, fitted text size or table
+        page, resolved transition and the contents of its image or chart data;
+        the build key covers the theme, the template, the images option and
+        ENGINE_VERSION (and theme mode), so changing any rebuilds every slide.
+        """
+        build_key = fingerprint(ENGINE_VERSION, vars(theme), plan.theme_mode,
+                                file_digest(plan.template) if plan.template else None, plan.images)
+        fingerprints = [
+            fingerprint(build_key, slide_plan.config, slide_plan.font_size, slide_plan.transition,
+                        slide_plan.transition_speed,
+                        file_digest(slide_plan.image_path) if slide_plan.image_path else None,
+                        chart_digest(slide_plan.chart) if slide_plan.chart else None,
+                        (slide_plan.table_page.digest, slide_plan.table_page.start, len(slide_plan.table_page.rows))
+                        if slide_plan.table_page else None,
+                        (slide_plan.timeline_page.start, slide_plan.timeline_page.count)
+                        if slide_plan.timeline_page else None)
+            for slide_plan in slides
+        ]
+        return build_key, fingerprints
+
+    def _layout_slides(self, slides: List[SlidePlan], theme: AdvancedTheme, text_fit: str) -> List[SlidePlan]:
+        """
+        Slide plans with bullet lists fitted to their boxes, tables paginated and timelines laid out
+
+        A list that overflows is shrunk one point at a time down to
+        MIN_FONT_SIZE; in 'paginate' mode one that still does not fit is
+        split, at the theme's size, across continuation slides. Tables are
+        always split into pages of measured rows and timelines into pages of
+        placed markers, whatever text_fit says. Plans that fit as they are
+        come back unchanged.
+        """
+        if text_fit == 'none' and not any(slide_plan.type in ('table', 'timeline') for slide_plan in slides):
+            return slides
+        laid_out = []
+        with self.profiler.phase('text_layout'):
+            for slide_plan in slides:
+                if slide_plan.type == 'table':
+                    laid_out.extend(self._paginate_table(slide_plan, theme))
+                    continue
+                if slide_plan.type == 'timeline':
+                    laid_out.extend(self._paginate_timeline(slide_plan, theme))
+                    continue
+                if text_fit != 'none' and slide_plan.type == 'content':
+                    columns = {'bullets': (slide_plan.bullets, CONTENT_BOX)}
+                    size = theme.body_size
+                elif text_fit != 'none' and slide_plan.type == 'two_column':
+                    columns = {'left_content': (slide_plan.left_content, COLUMN_BOX),
+                               'right_content': (slide_plan.right_content, COLUMN_BOX)}
+                    size = theme.body_size - 2
+                else:
+                    laid_out.append(slide_plan)
+                    continue
+
+                min_size = min(MIN_FONT_SIZE, size)
+                fitted = [MEASURER.fit_size(items, theme.body_font, size, box, min_size)
+                          for items, box in columns.values()]
+                if all(fit == size for fit in fitted):
+                    laid_out.append(slide_plan)
+                elif None not in fitted or text_fit == 'shrink':
+                    shrunk = SlidePlan(slide_plan.config, slide_plan.transition)
+                    shrunk.font_size = min(fit or min_size for fit in fitted)
+                    laid_out.append(shrunk)
+                    self.profiler.count('shrunk_slides')
+                else:
+                    pages = {key: MEASURER.paginate(items, theme.body_font, size, box)
+                             for key, (items, box) in columns.items()}
+                    page_count = max(len(column_pages) for column_pages in pages.values())
+                    for page in range(page_count):
+                        config = dict(slide_plan.config, title=slide_plan.title if page == 0
+                                      else CONTINUED_TITLE.format(title=slide_plan.title))
+                        for key, column_pages in pages.items():
+                            config[key] = column_pages[page] if page < len(column_pages) else []
+                        laid_out.append(SlidePlan(config, slide_plan.transition))
+                    self.profiler.count('continuation_slides', page_count - 1)
+        return laid_out
+
+    def _prepare_images(self, slide_plans: List[SlidePlan]):
+        """Downscale the oversized images of slides about to be built, on the policy's threads"""
+        requests = [request for request in map(image_request, slide_plans) if request is not None]
+        if requests and self._image_policy is not None:
+            with self.profiler.phase('images'):
+                self.profiler.count('downscaled_images', prepare_images(requests, self._image_policy))
+
+    def _paginate_table(self, slide_plan: SlidePlan, theme: AdvancedTheme) -> List[SlidePlan]:
+        """One plan per page of a table slide's rows, titled as continuations after the first"""
+        pages = paginate_table(slide_plan.table, theme.body_font, TABLE_BOX.width, TABLE_BOX.height)
+        plans = []
+        for index, page in enumerate(pages):
+            config = slide_plan.config if index == 0 else \
+                dict(slide_plan.config, title=CONTINUED_TITLE.format(title=slide_plan.title))
+            page_plan = SlidePlan(config, slide_plan.transition)
+            page_plan.table_page = page
+            plans.append(page_plan)
+        self.profiler.count('table_rows', sum(len(page.rows) for page in pages))
+        self.profiler.count('continuation_slides', len(pages) - 1)
+        return plans
+
+    def _paginate_timeline(self, slide_plan: SlidePlan, theme: AdvancedTheme) -> List[SlidePlan]:
+        """One plan per page of a timeline slide's events, titled as continuations after the first"""
+        pages = paginate_timeline(slide_plan.events, theme.body_font)
+        if not pages:
+            return [slide_plan]
+        plans = []
+        for index, page in enumerate(pages):
+            config = slide_plan.config if index == 0 else \
+                dict(slide_plan.config, title=CONTINUED_TITLE.format(title=slide_plan.title))
+            page_plan = SlidePlan(config, slide_plan.transition)
+            page_plan.timeline_page = page
+            plans.append(page_plan)
+        self.profiler.count('timeline_events', sum(page.count for page in pages))
+        self.profiler.count('timeline_markers', sum(len(page.markers) for page in pages))
+        self.profiler.count('continuation_slides', len(pages) - 1)
+        return plans
 
     def edit_presentation(self, file_path: str, modifications: Dict) -> str:
         """
@@ -236,52 +566,133 @@ class EnhancedPPTCreator:
         Args:
             file_path: Path to existing presentation
             modifications: Dictionary of modifications to apply:
-                - change_theme: New theme to apply
+                - change_theme: New theme to apply; it is written into the slide
+                  master and layouts, which is all master-mode slides need, and
+                  inline slides are restyled one by one
                 - update_slides: Dict of slide_index: new_content
                 - reorder_slides: List of new slide order
                 - add_slides: List of new slide configs to add
                 - delete_slides: List of slide indices to delete
+                - profile: Optional profiling, as for create_presentation
+                - compression: Optional package compression, as for create_presentation
+                - resources: Optional memory limits, as for create_presentation
+                - theme_mode: How added slides are themed, as for create_presentation
+                - strip_layouts: Drop unused layouts and masters, as for create_presentation
+                - images: Downscaling of oversized added images, as for create_presentation
         """
-        # Load existing presentation
-        prs = Presentation(file_path)
-
-        # Change theme if requested
-        if 'change_theme' in modifications:
-            new_theme = self._get_theme(modifications['change_theme'])
-            self._apply_theme_to_presentation(prs, new_theme)
-
-        # Update specific slides
-        if 'update_slides' in modifications:
-            for slide_idx, new_content in modifications['update_slides'].items():
-                if slide_idx < len(prs.slides):
-                    slide = prs.slides[slide_idx]
-                    self._update_slide_content(slide, new_content)
-
-        # Add new slides
-        if 'add_slides' in modifications:
-            theme = self._get_theme(modifications.get('theme', 'corporate_blue'))
-            for slide_config in modifications['add_slides']:
-                self._create_slide(prs, slide_config, theme)
-
-        # Delete slides (in reverse order to maintain indices)
-        if 'delete_slides' in modifications:
-            for slide_idx in sorted(modifications['delete_slides'], reverse=True):
-                if slide_idx < len(prs.slides):
-                    rId = prs.slides._sldIdLst[slide_idx].rId
-                    prs.part.drop_rel(rId)
-                    del prs.slides._sldIdLst[slide_idx]
-
-        # Reorder slides
-        if 'reorder_slides' in modifications:
-            new_order = modifications['reorder_slides']
-            self._reorder_slides(prs, new_order)
-
-        # Save with new name or overwrite
-        output_path = modifications.get('output_path', file_path.replace('.pptx', '_edited.pptx'))
-        prs.save(output_path)
+        plan = compile_presentation_edit(modifications, file_path, self.themes, self.transition_types)
+        self.last_build_mode = 'memory'
+
+        self.profiler = BuildProfiler.from_option(plan.profile, self.cancel_event)
+        self.profiler.start('edit_presentation')
+        try:
+            governor = ResourceGovernor.from_option(plan.resources)
+            if governor is not None:
+                with self.profiler.phase('governor'):
+                    self.last_build_mode = governor.admit(self._edit_memory(file_path, plan))
+
+            # Load existing presentation
+            with self.profiler.phase('load'):
+                prs = Presentation(file_path)
+
+            # Change theme if requested
+            if plan.change_theme is not None:
+                new_theme = self._get_theme(plan.change_theme)
+                with self.profiler.phase('theme'):
+                    apply_master_theme(prs, new_theme)
+                    self._apply_theme_to_presentation(prs, new_theme)
+
+            # Update specific slides
+            if plan.update_slides:
+                with self.profiler.phase('update_slides'):
+                    for slide_idx, new_content in plan.update_slides.items():
+                        if slide_idx < len(prs.slides):
+                            slide = prs.slides[slide_idx]
+                            self._update_slide_content(slide, new_content)
+
+            # Add new slides
+            if plan.add_slides:
+                theme = self._get_theme(plan.theme)
+                self._image_policy = ImagePolicy.from_option(plan.images)
+                # A theme switch in the same edit has already written the master
+                self._use_master_theme(prs, theme, plan.theme_mode == 'master', write=plan.change_theme is None)
+                added = self._layout_slides(plan.add_slides, theme, plan.text_fit)
+                self._prepare_images(added)
+                for slide_plan in added:
+                    self._create_slide(prs, slide_plan, theme)
+
+            # Delete slides (in reverse order to maintain indices)
+            if plan.delete_slides:
+                with self.profiler.phase('delete_slides'):
+                    for slide_idx in sorted(set(plan.delete_slides), reverse=True):
+                        if slide_idx < len(prs.slides):
+                            rId = prs.slides._sldIdLst[slide_idx].rId
+                            prs.part.drop_rel(rId)
+                            del prs.slides._sldIdLst[slide_idx]
+
+            # Reorder slides
+            if plan.reorder_slides is not None:
+                with self.profiler.phase('reorder_slides'):
+                    self._reorder_slides(prs, plan.reorder_slides)
+
+            if plan.strip_layouts:
+                with self.profiler.phase('strip_layouts'):
+                    self.profiler.count('stripped_layouts', strip_unused_layouts(prs))
+
+            # Save with new name or overwrite
+            output_path = plan.output_path
+            with self.profiler.phase('save'):
+                self._save(prs, output_path, compression=plan.compression)
+        finally:
+            self.last_profile = self.profiler.stop()
 
         return output_path
 
+    def _edit_memory(self, file_path: str, plan: PresentationEditPlan) -> MemoryEstimate:
+        """Estimated peak memory of an edit: the loaded package plus added slides"""
+        estimate = MemoryEstimate()
+        loaded = os.path.getsize(file_path)
+        estimate.add(f"presentation '{os.path.basename(file_path)}'", PRESENTATION_BYTES + loaded * IMAGE_FACTOR,
+                     PRESENTATION_BYTES + loaded * STREAMING_IMAGE_FACTOR)
+        estimate.add('slides', len(plan.add_slides) * SLIDE_BYTES)
+        self._slide_memory(estimate, plan.add_slides, plan.images)
+        return estimate
+
+    def _save(self, prs, output_path: str, reused: Optional[Dict[int, int]] = None, compression: Any = None):
+        """Save the presentation, splicing in reused slides and compressing as configured"""
+        policy = CompressionPolicy.from_option(compression)
+        streaming = self.last_build_mode == 'streaming'
+        if reused or policy is not None or streaming:
+            save_presentation(prs, output_path, reused, policy, streaming)
+        else:
+            prs.save(output_path)
+
+    async def create_presentation_async(self, config: Union[Dict, PresentationPlan],
+                                        executor: Optional[Executor] = None) -> str:
+        """
+        create_presentation for asyncio callers
+
+        The build runs on executor (the loop's default thread pool when None)
+        in a fresh creator sharing this one's themes, so any number of builds
+        can run at once; images are read and the deck written there, never on
+        the event loop. Cancelling the awaiting task stops the build at its
+        next phase. The last_* attributes are copied back once it finishes.
+        """
+        return self._adopt(await run_build(_run_job, 'create_presentation', (config,), self.themes,
+                                           executor=executor))
+
+    async def edit_presentation_async(self, file_path: str, modifications: Dict,
+                                      executor: Optional[Executor] = None) -> str:
+        """edit_presentation for asyncio callers, run like create_presentation_async"""
+        return self._adopt(await run_build(_run_job, 'edit_presentation', (file_path, modifications), self.themes,
+                                           executor=executor))
+
+    def _adopt(self, outcome: Tuple[str, Dict[str, Any]]) -> str:
+        result, state = outcome
+        for name, value in state.items():
+            setattr(self, name, value)
+        return result
+
     def _get_theme(self, theme_input: Any) -> AdvancedTheme:
         """Get theme from name or custom configuration"""
         if isinstance(theme_input, str):
@@ -290,10 +701,36 @@ class EnhancedPPTCreator:
             return AdvancedTheme('custom', theme_input)
         return self.themes['corporate_blue']
 
-    def _create_slide(self, prs: Presentation, config: Dict, theme: AdvancedTheme):
+    def _use_master_theme(self, prs: Presentation, theme: AdvancedTheme, master: bool, write: bool = True):
+        """Switch slide building to master mode, writing the theme into the master first"""
+        self._master_slides = None
+        if master:
+            if write:
+                with self.profiler.phase('theme'):
+                    apply_master_theme(prs, theme)
+            self._master_slides = MasterSlides(prs, theme, self._image_policy)
+
+    def _create_slide(self, prs: Presentation, config: SlidePlan, theme: AdvancedTheme):
         """Create a slide with full customization"""
-        slide_type = config.get('type', 'content')
+        slide_type = config.type
+
+        with self.profiler.phase('slides') as timer:
+            slide = self._build_slide(prs, slide_type, config, theme)
 
+        if self.profiler.enabled:
+            shapes = len(slide.shapes)
+            self.profiler.count('slides')
+            self.profiler.count('shapes', shapes)
+            if slide_type == 'chart':
+                self.profiler.count('charts')
+            self.profiler.record('slide', str(len(prs.slides)), timer.elapsed, type=slide_type, shapes=shapes)
+
+        return slide
+
+    def _build_slide(self, prs: Presentation, slide_type: str, config: SlidePlan, theme: AdvancedTheme):
+        """Dispatch to the builder for one slide type"""
+        if self._master_slides is not None:
+            return self._master_slides.build(slide_type, config)
         if slide_type == 'title':
             return self._create_title_slide(prs, config, theme)
         elif slide_type == 'section':
@@ -308,18 +745,22 @@ class EnhancedPPTCreator:
             return self._create_comparison_slide(prs, config, theme)
         elif slide_type == 'timeline':
             return self._create_timeline_slide(prs, config, theme)
+        elif slide_type == 'chart':
+            return self._create_chart_slide(prs, config, theme)
+        elif slide_type == 'table':
+            return self._create_table_slide(prs, config, theme)
         elif slide_type == 'blank':
             return self._create_blank_slide(prs, config, theme)
         else:
             return self._create_content_slide(prs, config, theme)
 
-    def _create_title_slide(self, prs: Presentation, config: Dict, theme: AdvancedTheme):
+    def _create_title_slide(self, prs: Presentation, config: SlidePlan, theme: AdvancedTheme):
         """Create title slide with theme"""
-        slide_layout = prs.slide_layouts[6]  # Blank layout for full control
+        slide_layout = find_layout(prs, BLANK_LAYOUT)  # Blank layout for full control
         slide = prs.slides.add_slide(slide_layout)
 
         # Apply background
-        self._apply_background(slide, theme, config.get('background'))
+        self._apply_background(slide, theme, config.background)
 
         # Add title
         title_box = slide.shapes.add_textbox(
@@ -327,7 +768,7 @@ class EnhancedPPTCreator:
             Inches(9), Inches(2)
         )
         title_frame = title_box.text_frame
-        title_frame.text = config.get('title', 'Presentation Title')
+        title_frame.text = config.title
         title_para = title_frame.paragraphs[0]
         title_para.font.name = theme.title_font
         title_para.font.size = Pt(theme.title_size)
@@ -336,13 +777,13 @@ class EnhancedPPTCreator:
         title_para.alignment = PP_ALIGN.CENTER
 
         # Add subtitle if provided
-        if 'subtitle' in config:
+        if config.subtitle is not None:
             subtitle_box = slide.shapes.add_textbox(
                 Inches(0.5), Inches(4.5),
                 Inches(9), Inches(1)
             )
             subtitle_frame = subtitle_box.text_frame
-            subtitle_frame.text = config['subtitle']
+            subtitle_frame.text = config.subtitle
             subtitle_para = subtitle_frame.paragraphs[0]
             subtitle_para.font.name = theme.body_font
             subtitle_para.font.size = Pt(theme.body_size)
@@ -351,9 +792,9 @@ class EnhancedPPTCreator:
 
         return slide
 
-    def _create_section_slide(self, prs: Presentation, config: Dict, theme: AdvancedTheme):
+    def _create_section_slide(self, prs: Presentation, config: SlidePlan, theme: AdvancedTheme):
         """Create section divider slide"""
-        slide_layout = prs.slide_layouts[6]
+        slide_layout = find_layout(prs, BLANK_LAYOUT)
         slide = prs.slides.add_slide(slide_layout)
 
         # Full color background
@@ -365,7 +806,7 @@ class EnhancedPPTCreator:
             Inches(8), Inches(2)
         )
         title_frame = title_box.text_frame
-        title_frame.text = config.get('title', 'Section')
+        title_frame.text = config.title
         title_para = title_frame.paragraphs[0]
         title_para.font.name = theme.title_font
         title_para.font.size = Pt(theme.title_size + 4)
@@ -375,12 +816,12 @@ class EnhancedPPTCreator:
 
         return slide
 
-    def _create_content_slide(self, prs: Presentation, config: Dict, theme: AdvancedTheme):
+    def _create_content_slide(self, prs: Presentation, config: SlidePlan, theme: AdvancedTheme):
         """Create standard content slide"""
-        slide_layout = prs.slide_layouts[6]
+        slide_layout = find_layout(prs, BLANK_LAYOUT)
         slide = prs.slides.add_slide(slide_layout)
 
-        self._apply_background(slide, theme, config.get('background'))
+        self._apply_background(slide, theme, config.background)
 
         # Title
         title_box = slide.shapes.add_textbox(
@@ -388,7 +829,7 @@ class EnhancedPPTCreator:
             Inches(9), Inches(0.8)
         )
         title_frame = title_box.text_frame
-        title_frame.text = config.get('title', 'Slide Title')
+        title_frame.text = config.title
         title_para = title_frame.paragraphs[0]
         title_para.font.name = theme.title_font
         title_para.font.size = Pt(32)
@@ -404,7 +845,7 @@ class EnhancedPPTCreator:
         content_frame.word_wrap = True
 
         # Add bullets
-        bullets = config.get('bullets', [])
+        bullets = config.bullets
         for i, bullet in enumerate(bullets):
             if i == 0:
                 p = content_frame.paragraphs[0]
@@ -412,19 +853,19 @@ class EnhancedPPTCreator:
                 p = content_frame.add_paragraph()
             p.text = bullet
             p.font.name = theme.body_font
-            p.font.size = Pt(theme.body_size)
+            p.font.size = Pt(config.font_size or theme.body_size)
             p.font.color.rgb = theme.text_color
             p.level = 0
             p.space_after = Pt(12)
 
         return slide
 
-    def _create_two_column_slide(self, prs: Presentation, config: Dict, theme: AdvancedTheme):
+    def _create_two_column_slide(self, prs: Presentation, config: SlidePlan, theme: AdvancedTheme):
         """Create two-column layout slide"""
-        slide_layout = prs.slide_layouts[6]
+        slide_layout = find_layout(prs, BLANK_LAYOUT)
         slide = prs.slides.add_slide(slide_layout)
 
-        self._apply_background(slide, theme, config.get('background'))
+        self._apply_background(slide, theme, config.background)
 
         # Title
         title_box = slide.shapes.add_textbox(
@@ -432,7 +873,7 @@ class EnhancedPPTCreator:
             Inches(9), Inches(0.8)
         )
         title_frame = title_box.text_frame
-        title_frame.text = config.get('title', 'Two Column Slide')
+        title_frame.text = config.title
         title_para = title_frame.paragraphs[0]
         title_para.font.name = theme.title_font
         title_para.font.size = Pt(32)
@@ -447,7 +888,7 @@ class EnhancedPPTCreator:
         left_frame = left_box.text_frame
         left_frame.word_wrap = True
 
-        left_bullets = config.get('left_content', [])
+        left_bullets = config.left_content
         for i, bullet in enumerate(left_bullets):
             if i == 0:
                 p = left_frame.paragraphs[0]
@@ -455,7 +896,7 @@ class EnhancedPPTCreator:
                 p = left_frame.add_paragraph()
             p.text = bullet
             p.font.name = theme.body_font
-            p.font.size = Pt(theme.body_size - 2)
+            p.font.size = Pt(config.font_size or theme.body_size - 2)
             p.font.color.rgb = theme.text_color
 
         # Right column
@@ -466,7 +907,7 @@ class EnhancedPPTCreator:
         right_frame = right_box.text_frame
         right_frame.word_wrap = True
 
-        right_bullets = config.get('right_content', [])
+        right_bullets = config.right_content
         for i, bullet in enumerate(right_bullets):
             if i == 0:
                 p = right_frame.paragraphs[0]
@@ -474,17 +915,17 @@ class EnhancedPPTCreator:
                 p = right_frame.add_paragraph()
             p.text = bullet
             p.font.name = theme.body_font
-            p.font.size = Pt(theme.body_size - 2)
+            p.font.size = Pt(config.font_size or theme.body_size - 2)
             p.font.color.rgb = theme.text_color
 
         return slide
 
-    def _create_comparison_slide(self, prs: Presentation, config: Dict, theme: AdvancedTheme):
+    def _create_comparison_slide(self, prs: Presentation, config: SlidePlan, theme: AdvancedTheme):
         """Create comparison slide with vs layout"""
-        slide_layout = prs.slide_layouts[6]
+        slide_layout = find_layout(prs, BLANK_LAYOUT)
         slide = prs.slides.add_slide(slide_layout)
 
-        self._apply_background(slide, theme, config.get('background'))
+        self._apply_background(slide, theme, config.background)
 
         # Title
         title_box = slide.shapes.add_textbox(
@@ -492,7 +933,7 @@ class EnhancedPPTCreator:
             Inches(9), Inches(0.8)
         )
         title_frame = title_box.text_frame
-        title_frame.text = config.get('title', 'Comparison')
+        title_frame.text = config.title
         title_para = title_frame.paragraphs[0]
         title_para.font.name = theme.title_font
         title_para.font.size = Pt(32)
@@ -508,7 +949,7 @@ class EnhancedPPTCreator:
         left_shape.fill.solid()
         left_shape.fill.fore_color.rgb = theme.secondary_color
         left_text = left_shape.text_frame
-        left_text.text = config.get('left_title', 'Option A')
+        left_text.text = config.left_title
 
         # VS text
         vs_box = slide.shapes.add_textbox(
@@ -531,16 +972,16 @@ class EnhancedPPTCreator:
         right_shape.fill.solid()
         right_shape.fill.fore_color.rgb = theme.accent_color
         right_text = right_shape.text_frame
-        right_text.text = config.get('right_title', 'Option B')
+        right_text.text = config.right_title
 
         return slide
 
-    def _create_timeline_slide(self, prs: Presentation, config: Dict, theme: AdvancedTheme):
+    def _create_timeline_slide(self, prs: Presentation, config: SlidePlan, theme: AdvancedTheme):
         """Create timeline slide"""
-        slide_layout = prs.slide_layouts[6]
+        slide_layout = find_layout(prs, BLANK_LAYOUT)
         slide = prs.slides.add_slide(slide_layout)
 
-        self._apply_background(slide, theme, config.get('background'))
+        self._apply_background(slide, theme, config.background)
 
         # Title
         title_box = slide.shapes.add_textbox(
@@ -548,63 +989,50 @@ class EnhancedPPTCreator:
             Inches(9), Inches(0.8)
         )
         title_frame = title_box.text_frame
-        title_frame.text = config.get('title', 'Timeline')
+        title_frame.text = config.title
         title_para = title_frame.paragraphs[0]
         title_para.font.name = theme.title_font
         title_para.font.size = Pt(32)
         title_para.font.color.rgb = theme.primary_color
         title_para.font.bold = True
 
-        # Timeline events
-        events = config.get('events', [])
-        num_events = len(events)
+        # Timeline events, placed by date with staggered labels, as one group
+        if config.timeline_page is not None:
+            add_timeline(slide, config.timeline_page, theme)
 
-        if num_events > 0:
-            # Draw timeline line
-            line = slide.shapes.add_connector(
-                MSO_LINE.STRAIGHT_CONNECTOR_1,
-                Inches(1), Inches(3.5),
-                Inches(9), Inches(3.5)
-            )
-            line.line.color.rgb = theme.primary_color
-            line.line.width = Pt(3)
-
-            # Add event markers and labels
-            spacing = 8.0 / (num_events - 1) if num_events > 1 else 0
-
-            for i, event in enumerate(events):
-                x_pos = 1 + (i * spacing)
-
-                # Marker circle
-                marker = slide.shapes.add_shape(
-                    MSO_SHAPE.OVAL,
-                    Inches(x_pos - 0.15), Inches(3.35),
-                    Inches(0.3), Inches(0.3)
-                )
-                marker.fill.solid()
-                marker.fill.fore_color.rgb = theme.accent_color
-                marker.line.color.rgb = theme.primary_color
-
-                # Event label
-                label_box = slide.shapes.add_textbox(
-                    Inches(x_pos - 0.5), Inches(4),
-                    Inches(1), Inches(1)
-                )
-                label_frame = label_box.text_frame
-                label_frame.text = event
-                label_para = label_frame.paragraphs[0]
-                label_para.font.size = Pt(10)
-                label_para.alignment = PP_ALIGN.CENTER
-                label_para.font.color.rgb = theme.text_color
+        return slide
+
+    def _create_chart_slide(self, prs: Presentation, config: SlidePlan, theme: AdvancedTheme):
+        """Create slide with a native chart"""
+        slide_layout = find_layout(prs, BLANK_LAYOUT)
+        slide = prs.slides.add_slide(slide_layout)
+
+        self._apply_background(slide, theme, config.background)
+
+        # Title
+        title_box = slide.shapes.add_textbox(
+            Inches(0.5), Inches(0.5),
+            Inches(9), Inches(0.8)
+        )
+        title_frame = title_box.text_frame
+        title_frame.text = config.title
+        title_para = title_frame.paragraphs[0]
+        title_para.font.name = theme.title_font
+        title_para.font.size = Pt(32)
+        title_para.font.color.rgb = theme.primary_color
+        title_para.font.bold = True
+
+        # Chart, with long series reduced before they are embedded
+        add_chart(slide, config.chart, Inches(0.5), Inches(1.5), Inches(9), Inches(5), theme)
 
         return slide
 
-    def _create_image_slide(self, prs: Presentation, config: Dict, theme: AdvancedTheme):
-        """Create slide with image"""
-        slide_layout = prs.slide_layouts[6]
+    def _create_table_slide(self, prs: Presentation, config: SlidePlan, theme: AdvancedTheme):
+        """Create slide with one page of a table"""
+        slide_layout = find_layout(prs, BLANK_LAYOUT)
         slide = prs.slides.add_slide(slide_layout)
 
-        self._apply_background(slide, theme, config.get('background'))
+        self._apply_background(slide, theme, config.background)
 
         # Title
         title_box = slide.shapes.add_textbox(
@@ -612,30 +1040,51 @@ class EnhancedPPTCreator:
             Inches(9), Inches(0.8)
         )
         title_frame = title_box.text_frame
-        title_frame.text = config.get('title', 'Image Slide')
+        title_frame.text = config.title
         title_para = title_frame.paragraphs[0]
         title_para.font.name = theme.title_font
         title_para.font.size = Pt(32)
         title_para.font.color.rgb = theme.primary_color
         title_para.font.bold = True
 
-        # Add image if path provided
-        if 'image_path' in config and os.path.exists(config['image_path']):
-            img_path = config['image_path']
-            left = Inches(config.get('image_left', 2))
-            top = Inches(config.get('image_top', 2))
-            width = Inches(config.get('image_width', 6))
+        # Table, written in one piece and styled by the theme's table style
+        add_table(slide, config.table_page, add_table_style(prs, theme), Inches(0.5), Inches(1.5))
+
+        return slide
+
+    def _create_image_slide(self, prs: Presentation, config: SlidePlan, theme: AdvancedTheme):
+        """Create slide with image"""
+        slide_layout = find_layout(prs, BLANK_LAYOUT)
+        slide = prs.slides.add_slide(slide_layout)
+
+        self._apply_background(slide, theme, config.background)
+
+        # Title
+        title_box = slide.shapes.add_textbox(
+            Inches(0.5), Inches(0.5),
+            Inches(9), Inches(0.8)
+        )
+        title_frame = title_box.text_frame
+        title_frame.text = config.title
+        title_para = title_frame.paragraphs[0]
+        title_para.font.name = theme.title_font
+        title_para.font.size = Pt(32)
+        title_para.font.color.rgb = theme.primary_color
+        title_para.font.bold = True
 
-            pic = slide.shapes.add_picture(img_path, left, top, width=width)
+        # Add image if path provided, placed by image_fit and downscaled when oversized
+        request = image_request(config)
+        if request is not None:
+            add_image(slide, *request, policy=self._image_policy)
 
         # Add caption if provided
-        if 'caption' in config:
+        if config.caption is not None:
             caption_box = slide.shapes.add_textbox(
                 Inches(0.5), Inches(6),
                 Inches(9), Inches(0.5)
             )
             caption_frame = caption_box.text_frame
-            caption_frame.text = config['caption']
+            caption_frame.text = config.caption
             caption_para = caption_frame.paragraphs[0]
             caption_para.font.size = Pt(14)
             caption_para.alignment = PP_ALIGN.CENTER
@@ -644,17 +1093,21 @@ class EnhancedPPTCreator:
 
         return slide
 
-    def _create_blank_slide(self, prs: Presentation, config: Dict, theme: AdvancedTheme):
+    def _create_blank_slide(self, prs: Presentation, config: SlidePlan, theme: AdvancedTheme):
         """Create blank slide for full custom content"""
-        slide_layout = prs.slide_layouts[6]
+        slide_layout = find_layout(prs, BLANK_LAYOUT)
         slide = prs.slides.add_slide(slide_layout)
 
-        self._apply_background(slide, theme, config.get('background'))
+        self._apply_background(slide, theme, config.background)
 
         return slide
 
     def _apply_background(self, slide, theme: AdvancedTheme, custom_bg=None):
         """Apply background to slide"""
+        with self.profiler.phase('background'):
+            self._apply_background_fill(slide, theme, custom_bg)
+
+    def _apply_background_fill(self, slide, theme: AdvancedTheme, custom_bg=None):
         if custom_bg:
             if isinstance(custom_bg, tuple) and len(custom_bg) == 3:
                 # Custom RGB color
@@ -680,8 +1133,11 @@ class EnhancedPPTCreator:
         pass
 
     def _apply_theme_to_presentation(self, prs: Presentation, theme: AdvancedTheme):
-        """Apply theme to entire presentation"""
+        """Restyle slides that carry their own theme formatting (built inline)"""
         for slide in prs.slides:
+            if slide.follow_master_background:
+                # Master-mode slides inherit everything from the master
+                continue
             self._apply_background(slide, theme, None)
             # Update text colors throughout
             for shape in slide.shapes:
@@ -740,11 +1196,11 @@ class EnhancedPPTCreator:
         return {
             'name': theme.name,
             'colors': {
-                'primary': (theme.primary_color.r, theme.primary_color.g, theme.primary_color.b),
-                'secondary': (theme.secondary_color.r, theme.secondary_color.g, theme.secondary_color.b),
-                'accent': (theme.accent_color.r, theme.accent_color.g, theme.accent_color.b),
-                'text': (theme.text_color.r, theme.text_color.g, theme.text_color.b),
-                'background': (theme.background_color.r, theme.background_color.g, theme.background_color.b)
+                'primary': tuple(theme.primary_color),
+                'secondary': tuple(theme.secondary_color),
+                'accent': tuple(theme.accent_color),
+                'text': tuple(theme.text_color),
+                'background': tuple(theme.background_color)
             },
             'fonts': {
                 'title': theme.title_font,
@@ -752,24 +1208,40 @@ class EnhancedPPTCreator:
             }
         }
 
+def _run_job(method: str, args: Tuple, themes: Dict[str, AdvancedTheme],
+             cancel: Optional[threading.Event]) -> Tuple[str, Dict[str, Any]]:
+    """Executor side of the async API: one build in a fresh creator, returned with its state"""
+    creator = EnhancedPPTCreator()
+    creator.themes = themes
+    creator.cancel_event = cancel
+    result = getattr(creator, method)(*args)
+    return result, {name: getattr(creator, name) for name in BUILD_STATE}
+
 def main():
     """Command line interface for enhanced presentation generation"""
-    if len(sys.argv) < 2:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--profile')]
+    profile_flags = [arg for arg in sys.argv[1:] if arg.startswith('--profile')]
+
+    if not args:
         print("Enhanced PPT Creator - Full Customization Control")
         print("\nUsage:")
-        print("  python ppt_creator_enhanced.py config.json")
+        print("  python ppt_creator_enhanced.py config.json [--profile[=cprofile,memory]]")
         print("\nAvailable themes:")
         creator = EnhancedPPTCreator()
         for theme in creator.get_available_themes():
             print(f"  - {theme}")
         return
 
-    config_file = sys.argv[1]
+    config_file = args[0]
 
     try:
         with open(config_file, 'r') as f:
             config = json.load(f)
 
+        if profile_flags:
+            _, _, options = profile_flags[-1].partition('=')
+            config['profile'] = options or True
+
         creator = EnhancedPPTCreator()
 
         # Check if editing existing file
@@ -783,6 +1255,9 @@ def main():
         print(f"📊 Theme: {config.get('theme', 'corporate_blue')}")
         print(f"📋 Slides: {len(config.get('slides', []))}")
 
+        if creator.last_profile:
+            print(format_report(creator.last_profile))
+
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         import traceback
@@ -0,0 +1,268 @@
+"""
+PPTX Package - Slide-level incremental rebuilds of generated presentations
+Fingerprints every slide, keeps a manifest next to the output and splices the
+parts of unchanged slides from the previous build into the new package;
+packages are compressed once, by the parallel writer in skill_common.package_zip
+"""
+
+import io
+import json
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Set
+from xml.sax.saxutils import quoteattr
+
+from pptx.opc.serialized import PackageWriter
+
+from skill_common.package_zip import CompressionPolicy, PackageArchive, write_package
+
+
+PRESENTATION_NS = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+DOC_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+CT_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+CONTENT_TYPES = '[Content_Types].xml'
+PRESENTATION_PART = 'ppt/presentation.xml'
+RELATIONSHIP_TAG = re.compile(rb'<Relationship\b[^>]*>')
+TARGET_ATTRIBUTE = re.compile(rb'Target="([^"]*)"')
+
+
+def manifest_path(output_path: str) -> str:
+    """Hidden sidecar file recording how output_path was built"""
+    directory, name = os.path.split(output_path)
+    return os.path.join(directory, f".{name}.manifest.json")
+
+
+def package_stamp(path: str) -> Optional[List[int]]:
+    """Size and modification time of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class SlideManifest:
+    """Slide fingerprints of one build in deck order, tied to the file it produced"""
+
+    __slots__ = ('build_key', 'package', 'slides')
+
+    def __init__(self, build_key: str, package: Optional[List[int]], slides: List[str]):
+        self.build_key = build_key
+        self.package = package
+        self.slides = slides
+
+    @classmethod
+    def load(cls, path: str) -> Optional['SlideManifest']:
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data['build_key'], data['package'], data['slides'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'build_key': self.build_key, 'package': self.package, 'slides': self.slides}, f, indent=1)
+
+    def matches(self, output_path: str) -> bool:
+        """True while the file on disk is still the one this manifest describes"""
+        return self.package is not None and package_stamp(output_path) == self.package
+
+
+def plan_reuse(manifest: Optional[SlideManifest], build_key: str, output_path: str,
+               fingerprints: List[str]) -> Dict[int, int]:
+    """
+    New slide index -> index of an identical slide in the previous build
+
+    Slides are matched by fingerprint rather than position, so inserting,
+    deleting or moving slides still reuses every unchanged one.
+    """
+    if manifest is None or manifest.build_key != build_key or not manifest.matches(output_path):
+        return {}
+    previous = {}
+    for index, value in enumerate(manifest.slides):
+        previous.setdefault(value, index)
+    return {index: previous[value] for index, value in enumerate(fingerprints) if value in previous}
+
+
+def _rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, '_rels', name + '.rels')
+
+
+def _resolve(source_part: str, target: str) -> str:
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def slide_parts(archive: zipfile.ZipFile) -> List[str]:
+    """Slide part names of a package in deck order"""
+    targets = {rel.get('Id'): _resolve(PRESENTATION_PART, rel.get('Target'))
+               for rel in ET.fromstring(archive.read(_rels_path(PRESENTATION_PART)))}
+    slide_ids = ET.fromstring(archive.read(PRESENTATION_PART)).find(f'{{{PRESENTATION_NS}}}sldIdLst')
+    if slide_ids is None:
+        return []
+    return [targets[slide_id.get(f'{{{DOC_REL_NS}}}id')] for slide_id in slide_ids]
+
+
+def _free_name(part: str, taken: Set[str]) -> str:
+    """Next unused name in a part's numbered series, e.g. ppt/media/image7.png"""
+    match = re.match(r'(.*?)(\d*)(\.[^./]+)$', part)
+    prefix, extension = (match.group(1), match.group(3)) if match else (part, '')
+    number = 1
+    while f"{prefix}{number}{extension}" in taken:
+        number += 1
+    return f"{prefix}{number}{extension}"
+
+
+class _Splicer:
+    """
+    Copies slide parts and everything they reference into a new package
+
+    Parts that already exist with identical bytes in the new package (slide
+    layouts and masters, images used by rebuilt slides) are shared, not copied.
+    """
+
+    def __init__(self, source: zipfile.ZipFile, built: zipfile.ZipFile):
+        self.source = source
+        self.built = built
+        self.built_names = set(built.namelist())
+        self.taken = set(self.built_names)
+        self.parts: Dict[str, bytes] = {}
+        self.renamed: Dict[str, str] = {}
+
+    def _shared(self, part: str) -> bool:
+        if part not in self.built_names or part in self.parts:
+            return False
+        return self.built.read(part) == self.source.read(part)
+
+    def copy(self, part: str, new_part: str):
+        self.taken.add(new_part)
+        self.renamed[part] = new_part
+        self.parts[new_part] = self.source.read(part)
+
+        try:
+            rels = self.source.read(_rels_path(part))
+        except KeyError:
+            return
+
+        def retarget(tag):
+            # Relationship parts are flat, so targets are rewritten in place
+            relationship = tag.group(0)
+            target = TARGET_ATTRIBUTE.search(relationship)
+            if target is None or b'TargetMode="External"' in relationship:
+                return relationship
+            source_target = _resolve(part, target.group(1).decode('utf-8'))
+            if source_target not in self.renamed:
+                if self._shared(source_target):
+                    self.renamed[source_target] = source_target
+                else:
+                    self.copy(source_target, _free_name(source_target, self.taken))
+            new_target = ('/' + self.renamed[source_target]).encode('utf-8')
+            return relationship[:target.start(1)] + new_target + relationship[target.end(1):]
+
+        self.parts[_rels_path(new_part)] = RELATIONSHIP_TAG.sub(retarget, rels)
+
+    def content_types(self, built: bytes) -> bytes:
+        """The built package's content types plus those of every copied part"""
+        source = ET.fromstring(self.source.read(CONTENT_TYPES))
+        overrides = {node.get('PartName'): node.get('ContentType') for node in source.iter(f'{{{CT_NS}}}Override')}
+        defaults = {node.get('Extension'): node.get('ContentType') for node in source.iter(f'{{{CT_NS}}}Default')}
+
+        types = ET.fromstring(built)
+        known_parts = {node.get('PartName') for node in types.iter(f'{{{CT_NS}}}Override')}
+        known_extensions = {node.get('Extension') for node in types.iter(f'{{{CT_NS}}}Default')}
+        added = []
+        for part, new_part in self.renamed.items():
+            if '/' + part in overrides and '/' + new_part not in known_parts:
+                added.append(f"<Override PartName={quoteattr('/' + new_part)} "
+                             f"ContentType={quoteattr(overrides['/' + part])}/>")
+                known_parts.add('/' + new_part)
+            extension = posixpath.splitext(part)[1][1:]
+            if extension in defaults and extension not in known_extensions:
+                added.append(f"<Default Extension={quoteattr(extension)} ContentType={quoteattr(defaults[extension])}/>")
+                known_extensions.add(extension)
+        return built.replace(b'</Types>', ''.join(added).encode('utf-8') + b'</Types>')
+
+
+class _PartSink:
+    """Physical writer for python-pptx's PackageWriter that hands each serialized part to add(name, blob)"""
+
+    def __init__(self, add):
+        self.add = add
+
+    def write(self, pack_uri, blob: bytes):
+        self.add(pack_uri.membername, blob)
+
+
+class _PartSerializer(PackageWriter):
+    """python-pptx's package writer, leaving the archive and its compression to the caller"""
+
+    def _write(self):
+        self._write_content_types_stream(self._pkg_file)
+        self._write_pkg_rels(self._pkg_file)
+        self._write_parts(self._pkg_file)
+
+
+def _serialize(prs, add):
+    """Serialize every part of a presentation in package order, one at a time, into add(name, blob)"""
+    package = prs.part.package
+    _PartSerializer.write(_PartSink(add), package._rels, tuple(package.iter_parts()))
+
+
+def _stored_package(prs) -> io.BytesIO:
+    """The presentation as python-pptx saves it, but with every part stored uncompressed"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        _serialize(prs, archive.writestr)
+    return buffer
+
+
+def save_presentation(prs, output_path: str, reused: Optional[Dict[int, int]] = None,
+                      compression: Optional[CompressionPolicy] = None, streaming: bool = False):
+    """
+    Save a presentation, splicing in the slides of the previous build
+
+    Args:
+        prs: python-pptx Presentation to save
+        output_path: Where to save
+        reused: New slide index -> previous slide index for slides that are
+            blank placeholders; each is replaced by the parts of the matching
+            slide in the package currently at output_path, with the images and
+            other parts it references (renumbered unless an identical part is
+            already present)
+        compression: Compression levels and threads for the package
+        streaming: Compress each part into the archive as soon as it is
+            serialized, instead of assembling the package in memory first
+            (not with reused slides, which are spliced into the whole package)
+    """
+    if streaming and not reused:
+        with PackageArchive(output_path, compression) as archive:
+            _serialize(prs, archive.add)
+        return
+
+    buffer = _stored_package(prs)
+
+    with zipfile.ZipFile(buffer) as built:
+        entries = []
+        if reused:
+            with zipfile.ZipFile(output_path) as previous:
+                built_slides = slide_parts(built)
+                previous_slides = slide_parts(previous)
+                splicer = _Splicer(previous, built)
+                for index, previous_index in reused.items():
+                    splicer.copy(previous_slides[previous_index], built_slides[index])
+
+                for info in built.infolist():
+                    if info.filename == CONTENT_TYPES:
+                        entries.append((info, splicer.content_types(built.read(info.filename))))
+                    elif info.filename not in splicer.parts:
+                        entries.append((info, built.read(info.filename)))
+                entries.extend(splicer.parts.items())
+        else:
+            entries = [(info, built.read(info.filename)) for info in built.infolist()]
+    write_package(entries, output_path, compression)
@@ -0,0 +1,44 @@
+"""
+Presentation Cache - Content-addressed cache of generated presentations
+Keys each build by a hash of its normalized config, resolved theme, referenced
+images and engine version, so an unchanged deck is a file copy instead of a rebuild
+"""
+
+import hashlib
+import os
+from typing import Dict, Optional, Tuple
+
+from skill_common.artifact_cache import ArtifactCache as _ArtifactCache
+
+
+_file_digests: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_digest(path: str) -> Optional[str]:
+    """
+    SHA-256 of a referenced file, None if it does not exist
+
+    Digests are memoized by (path, size, mtime), so an unchanged image is
+    hashed once per process rather than once per build.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_digests.get(memo_key)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(block)
+        digest = hasher.hexdigest()
+        _file_digests[memo_key] = digest
+    return digest
+
+
+class ArtifactCache(_ArtifactCache):
+    """Cache of built presentations, see skill_common.artifact_cache.ArtifactCache"""
+
+    DEFAULT_DIR = '.presentation_cache'
+    SUFFIX = '.pptx'
@@ -0,0 +1,554 @@
+"""
+Presentation Schema - Validates presentation configs and compiles them into build plans
+Rejects typos and malformed values before any slide is built, and resolves
+defaults once so the builders read plain attributes instead of dict lookups
+"""
+
+import difflib
+import os
+from typing import Dict, List, Any, Iterable
+
+from pptx.dml.color import RGBColor
+
+from skill_common.build_governor import RESOURCE_OPTIONS
+from skill_common.chart_data import AGGREGATE_FUNCS, AGGREGATE_PERIODS, DOWNSAMPLE_METHODS
+from skill_common.package_zip import COMPRESSION_OPTIONS, COMPRESSION_PRESETS
+from image_placement import IMAGE_FIT_MODES, IMAGE_OPTIONS
+from master_theme import THEME_MODES
+from slide_charts import CHART_KEYS, CHART_TYPES, SERIES_KEYS, WORKBOOK_SUFFIXES, parse_range
+from slide_tables import TABLE_KEYS
+from slide_timeline import EVENT_KEYS, parse_date
+from template_manager import TEMPLATE_SUFFIXES
+from text_layout import TEXT_FIT_MODES
+
+SLIDE_TYPES = ('title', 'section', 'content', 'two_column', 'image', 'comparison', 'timeline', 'chart', 'table',
+               'blank')
+TRANSITION_SPEEDS = ('slow', 'medium', 'fast')
+
+PRESENTATION_KEYS = ('title', 'subtitle', 'theme', 'slides', 'global_transition', 'global_animation',
+                     'output_path', 'profile', 'cache', 'incremental', 'compression', 'resources', 'theme_mode', 'template',
+                     'strip_layouts', 'text_fit', 'images')
+EDIT_KEYS = ('edit_file', 'theme', 'change_theme', 'update_slides', 'add_slides', 'delete_slides',
+             'reorder_slides', 'output_path', 'profile', 'compression', 'resources', 'theme_mode', 'strip_layouts',
+             'text_fit', 'images')
+SLIDE_KEYS = ('type', 'title', 'subtitle', 'bullets', 'left_content', 'right_content', 'left_title',
+              'right_title', 'events', 'image_path', 'image_left', 'image_top', 'image_width', 'image_height',
+              'image_fit', 'caption',
+              'chart', 'table', 'background', 'transition', 'transition_speed')
+THEME_COLOR_KEYS = ('primary', 'secondary', 'accent', 'text', 'background')
+THEME_KEYS = THEME_COLOR_KEYS + ('title_font', 'body_font', 'title_size', 'body_size', 'gradient', 'gradient_angle')
+UPDATE_KEYS = ('title', 'subtitle', 'bullets')
+CACHE_KEYS = ('dir', 'max_bytes', 'max_age')
+
+# Title each slide type falls back to when the config gives none
+DEFAULT_TITLES = {
+    'title': 'Presentation Title',
+    'section': 'Section',
+    'content': 'Slide Title',
+    'two_column': 'Two Column Slide',
+    'image': 'Image Slide',
+    'comparison': 'Comparison',
+    'timeline': 'Timeline',
+    'chart': 'Chart',
+    'table': 'Table',
+    'blank': ''
+}
+
+
+class ConfigError(ValueError):
+    """Raised when a config fails validation; lists every problem found"""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("Invalid config:\n  - " + "\n  - ".join(problems))
+
+
+def _color(value: Any) -> Any:
+    """JSON [r, g, b] lists to RGBColor; anything else is passed through"""
+    if isinstance(value, (list, tuple)) and not isinstance(value, RGBColor):
+        return RGBColor(*value)
+    return value
+
+
+def _theme(theme: Any) -> Any:
+    """Theme name, or a custom theme dict with its colors converted to RGBColor"""
+    if isinstance(theme, dict):
+        return {key: _color(value) if key in THEME_COLOR_KEYS else value for key, value in theme.items()}
+    return theme
+
+
+class SlidePlan:
+    """One slide of a build, with every option resolved to its default"""
+
+    __slots__ = ('type', 'title', 'subtitle', 'bullets', 'left_content', 'right_content', 'left_title',
+                 'right_title', 'events', 'image_path', 'image_left', 'image_top', 'image_width', 'image_height',
+                 'image_fit', 'caption', 'chart', 'table', 'background', 'transition', 'transition_speed', 'font_size',
+                 'table_page', 'timeline_page', 'config')
+
+    def __init__(self, config: Dict, global_transition: str = 'none'):
+        self.type = config.get('type', 'content')
+        self.title = config.get('title', DEFAULT_TITLES[self.type])
+        self.subtitle = config.get('subtitle')
+        self.bullets = config.get('bullets', [])
+        self.left_content = config.get('left_content', [])
+        self.right_content = config.get('right_content', [])
+        self.left_title = config.get('left_title', 'Option A')
+        self.right_title = config.get('right_title', 'Option B')
+        self.events = config.get('events', [])
+        self.image_path = config.get('image_path')
+        self.image_left = config.get('image_left', 2)
+        self.image_top = config.get('image_top', 2)
+        self.image_width = config.get('image_width', 6)
+        # Height of the area an image is fitted to; only used with image_fit
+        self.image_height = config.get('image_height', 3.75)
+        self.image_fit = config.get('image_fit')
+        self.caption = config.get('caption')
+        self.chart = config.get('chart')
+        self.table = config.get('table')
+        background = config.get('background')
+        self.background = tuple(background) if isinstance(background, list) else background
+        self.transition = config.get('transition', global_transition)
+        self.transition_speed = config.get('transition_speed', 'medium')
+        # Body text size chosen by text fitting; None keeps the theme's size
+        self.font_size = None
+        # Rows of the table shown on this slide, set when tables are paginated
+        self.table_page = None
+        # Markers shown on this slide, set when timelines are laid out
+        self.timeline_page = None
+        self.config = config
+
+
+class PresentationPlan:
+    """Validated create_presentation config; can be built any number of times"""
+
+    __slots__ = ('theme', 'slides', 'global_transition', 'global_animation', 'output_path', 'profile', 'cache',
+                 'incremental', 'compression', 'resources', 'theme_mode', 'template', 'strip_layouts', 'text_fit',
+                 'images', 'config', 'content_hash')
+
+    def __init__(self, config: Dict):
+        self.theme = _theme(config.get('theme', 'corporate_blue'))
+        self.global_transition = config.get('global_transition', 'none')
+        self.global_animation = config.get('global_animation', 'none')
+        self.slides = [SlidePlan(slide_config, self.global_transition) for slide_config in config.get('slides', [])]
+        self.output_path = config.get('output_path', 'presentation.pptx')
+        self.profile = config.get('profile')
+        self.cache = config.get('cache')
+        self.incremental = config.get('incremental', False)
+        self.compression = config.get('compression')
+        self.resources = config.get('resources')
+        self.theme_mode = config.get('theme_mode', 'inline')
+        self.template = config.get('template')
+        self.strip_layouts = config.get('strip_layouts', False)
+        self.text_fit = config.get('text_fit', 'paginate')
+        self.images = config.get('images')
+        self.config = config
+        # Filled in by the engine the first time the plan is looked up in the cache
+        self.content_hash = None
+
+
+class PresentationEditPlan:
+    """Validated edit_presentation modifications, with slide indices as ints"""
+
+    __slots__ = ('theme', 'change_theme', 'update_slides', 'add_slides', 'delete_slides', 'reorder_slides',
+                 'output_path', 'profile', 'compression', 'resources', 'theme_mode', 'strip_layouts', 'text_fit',
+                 'images')
+
+    def __init__(self, modifications: Dict, file_path: str):
+        self.theme = _theme(modifications.get('theme', 'corporate_blue'))
+        self.change_theme = _theme(modifications.get('change_theme'))
+        self.update_slides = {int(index): update for index, update in modifications.get('update_slides', {}).items()}
+        self.add_slides = [SlidePlan(slide_config) for slide_config in modifications.get('add_slides', [])]
+        self.delete_slides = [int(index) for index in modifications.get('delete_slides', [])]
+        self.reorder_slides = [int(index) for index in modifications['reorder_slides']] \
+            if 'reorder_slides' in modifications else None
+        self.output_path = modifications.get('output_path', file_path.replace('.pptx', '_edited.pptx'))
+        self.profile = modifications.get('profile')
+        self.compression = modifications.get('compression')
+        self.resources = modifications.get('resources')
+        self.theme_mode = modifications.get('theme_mode', 'inline')
+        self.strip_layouts = modifications.get('strip_layouts', False)
+        self.text_fit = modifications.get('text_fit', 'paginate')
+        self.images = modifications.get('images')
+
+
+class _Checker:
+    """Collects problems with the path to each offending value"""
+
+    def __init__(self, theme_names: Iterable[str], transition_types: Iterable[str]):
+        self.theme_names = list(theme_names)
+        self.transition_types = list(transition_types)
+        self.problems: List[str] = []
+
+    def fail(self, path: str, message: str):
+        self.problems.append(f"{path}: {message}")
+
+    def keys(self, mapping: Dict, allowed: Iterable[str], path: str):
+        allowed = list(allowed)
+        for key in mapping:
+            if key not in allowed:
+                close = difflib.get_close_matches(str(key), allowed, n=1)
+                hint = f" (did you mean '{close[0]}'?)" if close else ""
+                self.fail(path, f"unknown key '{key}'{hint}")
+
+    def type(self, value: Any, types, path: str, description: str) -> bool:
+        if isinstance(value, bool) and bool not in (types if isinstance(types, tuple) else (types,)):
+            self.fail(path, f"expected {description}, got {value!r}")
+            return False
+        if not isinstance(value, types):
+            self.fail(path, f"expected {description}, got {type(value).__name__}")
+            return False
+        return True
+
+    def choice(self, value: Any, choices: Iterable[str], path: str):
+        choices = list(choices)
+        if choices and value not in choices:
+            close = difflib.get_close_matches(str(value), choices, n=1)
+            hint = f" (did you mean '{close[0]}'?)" if close else ""
+            self.fail(path, f"unknown value {value!r}{hint}, expected one of {', '.join(choices)}")
+
+    def compression(self, compression: Any, path: str):
+        if not self.type(compression, (str, dict), path, "a preset name or an object"):
+            return
+        if isinstance(compression, str):
+            self.choice(compression, COMPRESSION_PRESETS, path)
+            return
+        self.keys(compression, COMPRESSION_OPTIONS, path)
+        for key in ('xml', 'media', 'default'):
+            level = compression.get(key, 0)
+            if isinstance(level, bool) or not isinstance(level, int) or not 0 <= level <= 9:
+                self.fail(f"{path}.{key}", f"expected a level from 0 (store) to 9, got {level!r}")
+        threads = compression.get('threads', 1)
+        if isinstance(threads, bool) or not isinstance(threads, int) or threads < 1:
+            self.fail(f"{path}.threads", f"expected a positive number of threads, got {threads!r}")
+
+    def resources(self, resources: Any, path: str):
+        if self.type(resources, (bool, dict), path, "true, false or an object") and isinstance(resources, dict):
+            self.keys(resources, RESOURCE_OPTIONS, path)
+            for key in ('max_bytes', 'streaming_bytes'):
+                if key in resources:
+                    self.type(resources[key], int, f"{path}.{key}", "a number of bytes")
+            if 'headroom' in resources:
+                self.type(resources['headroom'], (int, float), f"{path}.headroom", "a fraction of available memory")
+
+    def images(self, images: Any, path: str):
+        if self.type(images, (bool, dict), path, "true, false or an object") and isinstance(images, dict):
+            self.keys(images, IMAGE_OPTIONS, path)
+            if 'max_dpi' in images:
+                value = images['max_dpi']
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+                    self.fail(f"{path}.max_dpi", f"expected a positive number of dots per inch, got {value!r}")
+            if 'quality' in images:
+                value = images['quality']
+                if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= 95:
+                    self.fail(f"{path}.quality", f"expected a JPEG quality from 1 to 95, got {value!r}")
+            if 'threads' in images:
+                value = images['threads']
+                if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                    self.fail(f"{path}.threads", f"expected a positive number of threads, got {value!r}")
+
+    def template(self, template: Any, path: str):
+        if not self.type(template, str, path, "a path to a .pptx or .potx file"):
+            return
+        if not template.lower().endswith(TEMPLATE_SUFFIXES):
+            self.fail(path, f"expected a .pptx or .potx file, got {template!r}")
+        elif not os.path.isfile(template):
+            self.fail(path, f"template file not found: {template!r}")
+
+    def cell_range(self, value: Any, path: str):
+        if self.type(value, str, path, "a range such as 'Sheet1!B1:C13'"):
+            try:
+                parse_range(value)
+            except ValueError as e:
+                self.fail(path, str(e))
+
+    def workbook(self, spec: Dict, ranges: Iterable[str], path: str):
+        """A 'source' workbook with its 'data_range' and any other ranges read from it"""
+        source = spec['source']
+        if self.type(source, str, f"{path}.source", "a path to a .xlsx file"):
+            if not source.lower().endswith(WORKBOOK_SUFFIXES):
+                self.fail(f"{path}.source", f"expected a .xlsx or .xlsm file, got {source!r}")
+            elif not os.path.isfile(source):
+                self.fail(f"{path}.source", f"workbook not found: {source!r}")
+        if 'data_range' not in spec:
+            self.fail(path, "data read from a workbook needs a 'data_range'")
+        for key in ranges:
+            if key in spec:
+                self.cell_range(spec[key], f"{path}.{key}")
+
+    def table(self, table: Any, path: str):
+        if not self.type(table, dict, path, "an object"):
+            return
+        self.keys(table, TABLE_KEYS, path)
+        sources = [key for key in ('data', 'csv', 'source', 'rows') if key in table]
+        if len(sources) != 1:
+            self.fail(path, "give exactly one of 'rows', 'data' (a DataFrame), 'csv' or 'source' (a workbook)")
+        if 'columns' in table and 'data' not in table:
+            self.fail(f"{path}.columns", "only applies to DataFrame data")
+
+        if 'data' in table:
+            frame = table['data']
+            if not hasattr(frame, 'columns'):
+                self.fail(f"{path}.data", f"expected a DataFrame, got {type(frame).__name__}")
+            elif 'columns' in table and self.type(table['columns'], list, f"{path}.columns", "a list of column names"):
+                for name in table['columns']:
+                    if name not in list(frame.columns):
+                        self.fail(f"{path}.columns", f"DataFrame has no column {name!r}")
+        if 'csv' in table and self.type(table['csv'], str, f"{path}.csv", "a path to a .csv file"):
+            if not os.path.isfile(table['csv']):
+                self.fail(f"{path}.csv", f"CSV file not found: {table['csv']!r}")
+        if 'source' in table:
+            self.workbook(table, ('data_range',), path)
+        if 'headers' in table:
+            self.strings(table['headers'], f"{path}.headers")
+        if 'rows' in table and self.type(table['rows'], list, f"{path}.rows", "a list of rows"):
+            for index, row in enumerate(table['rows']):
+                self.type(row, list, f"{path}.rows[{index}]", "a list of cell values")
+        if 'font_size' in table:
+            size = table['font_size']
+            if isinstance(size, bool) or not isinstance(size, (int, float)) or size <= 0:
+                self.fail(f"{path}.font_size", f"expected a size in points, got {size!r}")
+
+    def chart(self, chart: Any, path: str):
+        if not self.type(chart, dict, path, "an object"):
+            return
+        self.keys(chart, CHART_KEYS, path)
+        kind = chart.get('type', 'bar')
+        self.choice(kind, CHART_TYPES, f"{path}.type")
+        if 'data' in chart and 'source' in chart:
+            self.fail(path, "give either 'data' or 'source', not both")
+
+        if 'source' in chart:
+            self.workbook(chart, ('data_range', 'categories_range'), path)
+        elif 'data' in chart:
+            frame = chart['data']
+            if not hasattr(frame, 'columns'):
+                self.fail(f"{path}.data", f"expected a DataFrame, got {type(frame).__name__}")
+            else:
+                columns = list(frame.columns)
+                names = [chart['categories']] if 'categories' in chart else []
+                if 'series' in chart and self.type(chart['series'], list, f"{path}.series", "a list of column names"):
+                    names += chart['series']
+                for name in names:
+                    if name not in columns:
+                        self.fail(path, f"DataFrame has no column {name!r}")
+        else:
+            series = chart.get('series')
+            if series is None:
+                self.fail(path, "give the chart's 'series', a DataFrame as 'data' or a workbook as 'source'")
+            elif self.type(series, list, f"{path}.series", "a list of series objects"):
+                for index, series_config in enumerate(series):
+                    series_path = f"{path}.series[{index}]"
+                    if not self.type(series_config, dict, series_path, "an object"):
+                        continue
+                    self.keys(series_config, SERIES_KEYS, series_path)
+                    if 'name' in series_config:
+                        self.type(series_config['name'], str, f"{series_path}.name", "a string")
+                    values = series_config.get('values')
+                    if values is None:
+                        self.fail(series_path, "every series needs its 'values'")
+                    elif self.type(values, list, f"{series_path}.values", "a list of numbers"):
+                        for position, value in enumerate(values):
+                            if value is not None:
+                                self.type(value, (int, float), f"{series_path}.values[{position}]", "a number")
+            if 'categories' in chart:
+                self.type(chart['categories'], list, f"{path}.categories", "a list")
+
+        downsample = chart.get('downsample')
+        if downsample not in (None, False) and self.type(downsample, dict, f"{path}.downsample",
+                                                         "false or an object"):
+            self.keys(downsample, ('method', 'max_points'), f"{path}.downsample")
+            self.choice(downsample.get('method', 'lttb'), DOWNSAMPLE_METHODS, f"{path}.downsample.method")
+            max_points = downsample.get('max_points', 1)
+            if isinstance(max_points, bool) or not isinstance(max_points, int) or max_points < 1:
+                self.fail(f"{path}.downsample.max_points", f"expected a positive number of points, got {max_points!r}")
+        if 'aggregate' in chart and self.type(chart['aggregate'], dict, f"{path}.aggregate", "an object"):
+            self.keys(chart['aggregate'], ('period', 'func'), f"{path}.aggregate")
+            self.choice(chart['aggregate'].get('period', 'month'), AGGREGATE_PERIODS, f"{path}.aggregate.period")
+            self.choice(chart['aggregate'].get('func', 'sum'), AGGREGATE_FUNCS, f"{path}.aggregate.func")
+            if 'data' not in chart and 'categories' not in chart and 'categories_range' not in chart:
+                self.fail(f"{path}.aggregate", "period aggregation needs date categories")
+        for key in ('legend', 'data_labels'):
+            if key in chart:
+                self.type(chart[key], bool, f"{path}.{key}", "true or false")
+        for key in ('title', 'number_format'):
+            if key in chart:
+                self.type(chart[key], str, f"{path}.{key}", "a string")
+
+    def events(self, events: Any, path: str):
+        """Timeline events: label strings, or objects with a label and a date, but not dated and undated mixed"""
+        if not self.type(events, list, path, "a list of strings or event objects"):
+            return
+        dated = set()
+        for index, event in enumerate(events):
+            event_path = f"{path}[{index}]"
+            if isinstance(event, str):
+                dated.add(False)
+            elif self.type(event, dict, event_path, "a string or an object with 'date' and 'label'"):
+                self.keys(event, EVENT_KEYS, event_path)
+                if 'label' in event:
+                    self.type(event['label'], str, f"{event_path}.label", "a string")
+                dated.add(event.get('date') is not None)
+                if event.get('date') is not None:
+                    try:
+                        parse_date(event['date'])
+                    except ValueError as error:
+                        self.fail(f"{event_path}.date", str(error))
+        if len(dated) > 1:
+            self.fail(path, "either every event has a 'date' or none does")
+
+    def strings(self, value: Any, path: str):
+        if self.type(value, list, path, "a list of strings"):
+            for index, item in enumerate(value):
+                self.type(item, str, f"{path}[{index}]", "a string")
+
+    def rgb(self, value: Any, path: str) -> bool:
+        if (isinstance(value, (list, tuple)) and len(value) == 3
+                and all(isinstance(c, int) and not isinstance(c, bool) and 0 <= c <= 255 for c in value)):
+            return True
+        self.fail(path, f"expected an [r, g, b] color with values 0-255, got {value!r}")
+        return False
+
+    def index(self, value: Any, path: str):
+        """Slide index: a non-negative int, or its JSON object-key string form"""
+        if isinstance(value, str) and value.isdigit():
+            return
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            self.fail(path, f"expected a slide index (0-based), got {value!r}")
+
+    def theme(self, theme: Any, path: str):
+        if isinstance(theme, str):
+            self.choice(theme, self.theme_names, path)
+        elif self.type(theme, dict, path, "a theme name or object"):
+            self.keys(theme, THEME_KEYS, path)
+            for key in THEME_COLOR_KEYS:
+                if key in theme and not isinstance(theme[key], RGBColor):
+                    self.rgb(theme[key], f"{path}.{key}")
+
+    def slide(self, slide: Dict, path: str):
+        self.keys(slide, SLIDE_KEYS, path)
+        self.choice(slide.get('type', 'content'), SLIDE_TYPES, f"{path}.type")
+        for key in ('title', 'subtitle', 'left_title', 'right_title', 'caption', 'image_path'):
+            if key in slide:
+                self.type(slide[key], str, f"{path}.{key}", "a string")
+        for key in ('bullets', 'left_content', 'right_content'):
+            if key in slide:
+                self.strings(slide[key], f"{path}.{key}")
+        if 'events' in slide:
+            self.events(slide['events'], f"{path}.events")
+        for key in ('image_left', 'image_top', 'image_width', 'image_height'):
+            if key in slide:
+                self.type(slide[key], (int, float), f"{path}.{key}", "a number of inches")
+        if 'image_fit' in slide:
+            self.choice(slide['image_fit'], IMAGE_FIT_MODES, f"{path}.image_fit")
+        if 'chart' in slide:
+            self.chart(slide['chart'], f"{path}.chart")
+        elif slide.get('type') == 'chart':
+            self.fail(path, "chart slides need a 'chart' object")
+        if 'table' in slide:
+            self.table(slide['table'], f"{path}.table")
+        elif slide.get('type') == 'table':
+            self.fail(path, "table slides need a 'table' object")
+
+        background = slide.get('background')
+        if background is not None and background != 'gradient':
+            self.rgb(background, f"{path}.background")
+        if 'transition' in slide:
+            self.choice(slide['transition'], self.transition_types, f"{path}.transition")
+        self.choice(slide.get('transition_speed', 'medium'), TRANSITION_SPEEDS, f"{path}.transition_speed")
+
+    def slides(self, container: Dict, key: str, path: str):
+        slides = container.get(key, [])
+        if self.type(slides, list, f"{path}.{key}", "a list"):
+            for index, slide in enumerate(slides):
+                if self.type(slide, dict, f"{path}.{key}[{index}]", "an object"):
+                    self.slide(slide, f"{path}.{key}[{index}]")
+
+    def raise_problems(self):
+        if self.problems:
+            raise ConfigError(self.problems)
+
+
+def compile_presentation(config: Dict, theme_names: Iterable[str] = (),
+                         transition_types: Iterable[str] = ()) -> PresentationPlan:
+    """
+    Validate a create_presentation config and compile it into a PresentationPlan
+
+    Args:
+        config: Raw config dictionary, e.g. loaded from JSON
+        theme_names: Names accepted for the 'theme' option
+        transition_types: Names accepted for transitions
+    """
+    check = _Checker(theme_names, transition_types)
+    if not check.type(config, dict, 'config', "an object"):
+        check.raise_problems()
+    check.keys(config, PRESENTATION_KEYS, 'config')
+    check.theme(config.get('theme', 'corporate_blue'), 'config.theme')
+    check.type(config.get('output_path', ''), str, 'config.output_path', "a string")
+    if check.type(config.get('cache', False), (bool, str, dict), 'config.cache', "true, a directory or an object"):
+        if isinstance(config.get('cache'), dict):
+            check.keys(config['cache'], CACHE_KEYS, 'config.cache')
+    check.type(config.get('incremental', False), bool, 'config.incremental', "true or false")
+    if 'compression' in config:
+        check.compression(config['compression'], 'config.compression')
+    check.resources(config.get('resources', False), 'config.resources')
+    check.choice(config.get('theme_mode', 'inline'), THEME_MODES, 'config.theme_mode')
+    if config.get('template') is not None:
+        check.template(config['template'], 'config.template')
+    check.type(config.get('strip_layouts', False), bool, 'config.strip_layouts', "true or false")
+    check.choice(config.get('text_fit', 'paginate'), TEXT_FIT_MODES, 'config.text_fit')
+    check.images(config.get('images', True), 'config.images')
+    check.choice(config.get('global_transition', 'none'), check.transition_types, 'config.global_transition')
+    check.slides(config, 'slides', 'config')
+    check.raise_problems()
+    return PresentationPlan(config)
+
+
+def compile_presentation_edit(modifications: Dict, file_path: str, theme_names: Iterable[str] = (),
+                              transition_types: Iterable[str] = ()) -> PresentationEditPlan:
+    """
+    Validate edit_presentation modifications and compile them into a PresentationEditPlan
+
+    Slide indices given as JSON object keys ("0", "2") are converted to ints.
+
+    Args:
+        modifications: Raw modifications dictionary
+        file_path: Presentation being edited, used for the default output path
+        theme_names: Names accepted for the theme options
+        transition_types: Names accepted for transitions
+    """
+    path = 'modifications'
+    check = _Checker(theme_names, transition_types)
+    if not check.type(modifications, dict, path, "an object"):
+        check.raise_problems()
+    check.keys(modifications, EDIT_KEYS, path)
+    for key in ('theme', 'change_theme'):
+        if key in modifications:
+            check.theme(modifications[key], f"{path}.{key}")
+    check.type(modifications.get('output_path', ''), str, f"{path}.output_path", "a string")
+    if 'compression' in modifications:
+        check.compression(modifications['compression'], f"{path}.compression")
+    check.resources(modifications.get('resources', False), f"{path}.resources")
+    check.choice(modifications.get('theme_mode', 'inline'), THEME_MODES, f"{path}.theme_mode")
+    check.type(modifications.get('strip_layouts', False), bool, f"{path}.strip_layouts", "true or false")
+    check.choice(modifications.get('text_fit', 'paginate'), TEXT_FIT_MODES, f"{path}.text_fit")
+    check.images(modifications.get('images', True), f"{path}.images")
+
+    updates = modifications.get('update_slides', {})
+    if check.type(updates, dict, f"{path}.update_slides", "an object of slide index: content"):
+        for index, update in updates.items():
+            update_path = f"{path}.update_slides.{index}"
+            check.index(index, update_path)
+            if check.type(update, dict, update_path, "an object"):
+                check.keys(update, UPDATE_KEYS, update_path)
+                if 'bullets' in update:
+                    check.strings(update['bullets'], f"{update_path}.bullets")
+
+    for key in ('delete_slides', 'reorder_slides'):
+        indices = modifications.get(key, [])
+        if check.type(indices, list, f"{path}.{key}", "a list of slide indices"):
+            for position, index in enumerate(indices):
+                check.index(index, f"{path}.{key}[{position}]")
+    check.slides(modifications, 'add_slides', path)
+
+    check.raise_problems()
+    return PresentationEditPlan(modifications, file_path)
@@ -0,0 +1,328 @@
+"""
+Slide Charts - Native PowerPoint charts from inline data, DataFrames or workbook ranges
+Resolves a chart spec into categories and series, reduces long series before
+they are embedded and keeps the generated chart XML and embedded workbook of
+every distinct chart, so a chart repeated across slides or builds is only
+generated once
+"""
+
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.cell import range_boundaries
+from pptx.chart.data import CategoryChartData, XyChartData
+from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION
+from pptx.util import Pt
+
+from skill_common.artifact_cache import fingerprint
+from skill_common.chart_data import reduce_series
+
+from presentation_cache import file_digest
+
+CHART_TYPES = {
+    'bar': XL_CHART_TYPE.COLUMN_CLUSTERED,
+    'line': XL_CHART_TYPE.LINE,
+    'pie': XL_CHART_TYPE.PIE,
+    'scatter': XL_CHART_TYPE.XY_SCATTER,
+}
+CHART_KEYS = ('type', 'title', 'categories', 'series', 'data', 'source', 'data_range', 'categories_range',
+              'downsample', 'aggregate', 'legend', 'data_labels', 'number_format')
+SERIES_KEYS = ('name', 'values')
+WORKBOOK_SUFFIXES = ('.xlsx', '.xlsm')
+
+# Points per series past which a chart is downsampled unless it says otherwise
+MAX_CHART_POINTS = 500
+# Pie slices past this many are merged into one slice
+MAX_PIE_SLICES = 12
+OTHER_LABEL = 'Other'
+# Distinct charts whose generated parts are kept per process
+MAX_CACHED_CHARTS = 64
+
+_CELL_RANGE_RE = re.compile(r'^\$?[A-Za-z]{1,3}\$?\d+(:\$?[A-Za-z]{1,3}\$?\d+)?$')
+
+
+def parse_range(range_string: str) -> Tuple[Optional[str], Tuple[int, int, int, int]]:
+    """
+    Split 'Sheet!B1:C13' into ('Sheet', (min_col, min_row, max_col, max_row))
+
+    Sheet names may be quoted ('Cash Flow'!A1), as in workbook chart configs;
+    no sheet means the workbook's first sheet. Raises ValueError when the
+    cells are not a bounded range.
+    """
+    sheet_name, cells = None, range_string
+    if '!' in range_string:
+        sheet_name, cells = range_string.rsplit('!', 1)
+        sheet_name = sheet_name.strip()
+        if len(sheet_name) >= 2 and sheet_name[0] == sheet_name[-1] == "'":
+            sheet_name = sheet_name[1:-1].replace("''", "'")
+    cells = cells.strip()
+    if not _CELL_RANGE_RE.match(cells):
+        raise ValueError(f"'{range_string}' is not a valid cell range")
+    return sheet_name, range_boundaries(cells)
+
+
+_range_values: Dict[Tuple[str, int, int, str], List[List[Any]]] = {}
+
+
+def read_ranges(path: str, range_strings: List[str]) -> List[List[List[Any]]]:
+    """
+    Cell values of workbook ranges, row by row
+
+    The workbook is opened read-only and only when a range is not memoized
+    for the file's current size and modification time. Formula cells give
+    the value Excel last calculated, None in a workbook never opened in Excel.
+    """
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    keys = [(path, stat.st_size, stat.st_mtime_ns, range_string) for range_string in range_strings]
+    missing = [key for key in keys if key not in _range_values]
+    if missing:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for key in missing:
+                sheet_name, (min_col, min_row, max_col, max_row) = parse_range(key[3])
+                if sheet_name is not None and sheet_name not in workbook.sheetnames:
+                    raise ValueError(f"'{key[3]}' refers to unknown sheet '{sheet_name}'")
+                worksheet = workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+                _range_values[key] = [list(row) for row in worksheet.iter_rows(
+                    min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col, values_only=True)]
+        finally:
+            workbook.close()
+    return [_range_values[key] for key in keys]
+
+
+def chart_series(spec: Dict) -> Tuple[Optional[List[Any]], List[str], List[List[Any]]]:
+    """Categories, series names and series values of a chart spec, from whichever source it names"""
+    if 'source' in spec:
+        # Series titles come from the first row of data_range, as in workbook charts
+        ranges = [spec['data_range']] + ([spec['categories_range']] if 'categories_range' in spec else [])
+        data, *categories_rows = read_ranges(spec['source'], ranges)
+        header, rows = (data[0], data[1:]) if data else ([], [])
+        names = [str(title) if title is not None else f'Series {index + 1}' for index, title in enumerate(header)]
+        series = [[row[index] for row in rows] for index in range(len(names))]
+        categories = [row[0] for row in categories_rows[0]] if categories_rows else None
+        return categories, names, series
+
+    if 'data' in spec:
+        frame = spec['data']
+        category_column = spec.get('categories')
+        categories = frame[category_column].tolist() if category_column is not None else frame.index.tolist()
+        columns = spec.get('series') or [column for column in frame.columns if column != category_column
+                                         and pd.api.types.is_numeric_dtype(frame[column])]
+        return categories, [str(column) for column in columns], [frame[column].tolist() for column in columns]
+
+    series = spec.get('series', [])
+    names = [series_config.get('name', f'Series {index + 1}') for index, series_config in enumerate(series)]
+    return spec.get('categories'), names, [list(series_config['values']) for series_config in series]
+
+
+def _pie_slices(categories: Optional[List[Any]], values: List[Any]) -> Tuple[List[Any], List[Any]]:
+    """Keep the largest slices in their order and merge the rest into one"""
+    if categories is None:
+        categories = [f'Item {index + 1}' for index in range(len(values))]
+    if len(values) <= MAX_PIE_SLICES:
+        return categories, values
+    numbers = [value if isinstance(value, (int, float)) and not math.isnan(value) else 0 for value in values]
+    largest = set(sorted(range(len(numbers)), key=lambda index: numbers[index], reverse=True)[:MAX_PIE_SLICES - 1])
+    kept = [index for index in range(len(numbers)) if index in largest]
+    rest = sum(numbers[index] for index in range(len(numbers)) if index not in largest)
+    return [categories[index] for index in kept] + [OTHER_LABEL], [numbers[index] for index in kept] + [rest]
+
+
+def _blank(value: Any) -> Any:
+    """NaN (missing or empty periods) as a blank point"""
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def reduce_chart(kind: str, categories: Optional[List[Any]], names: List[str], series: List[List[Any]],
+                 spec: Dict) -> Tuple[Optional[List[Any]], List[str], List[List[Any]]]:
+    """
+    Series reduced for embedding
+
+    'aggregate' rolls date categories up by period first. Series longer than
+    MAX_CHART_POINTS are then downsampled (LTTB unless 'downsample' says
+    otherwise; false keeps every point). Pie charts show the first series
+    only, with slices past MAX_PIE_SLICES merged into 'Other'.
+    """
+    options = {key: spec[key] for key in ('aggregate', 'downsample') if spec.get(key)}
+    if kind == 'pie':
+        options.pop('downsample', None)
+    elif 'downsample' not in spec and max((len(values) for values in series), default=0) > MAX_CHART_POINTS:
+        options['downsample'] = {'method': 'lttb', 'max_points': MAX_CHART_POINTS}
+    if options:
+        categories, series = reduce_series(categories, series, options)
+
+    if kind == 'pie' and series:
+        categories, values = _pie_slices(categories, series[0])
+        names, series = names[:1], [values]
+    return categories, names, [[_blank(value) for value in values] for values in series]
+
+
+def _chart_data(kind: str, categories: Optional[List[Any]], names: List[str], series: List[List[Any]],
+                number_format: str):
+    length = max((len(values) for values in series), default=0)
+    if categories is None:
+        categories = list(range(1, length + 1))
+    if kind == 'scatter':
+        data = XyChartData(number_format)
+        for name, values in zip(names, series):
+            points = data.add_series(name)
+            for x, y in zip(categories, values):
+                if x is not None and y is not None:
+                    points.add_data_point(x, y)
+        return data
+
+    data = CategoryChartData(number_format)
+    data.categories = categories
+    for name, values in zip(names, series):
+        data.add_series(name, values)
+    return data
+
+
+class _ChartParts:
+    """Generated XML and embedded workbook of one chart, read by python-pptx like chart data"""
+
+    __slots__ = ('xml', 'xlsx_blob')
+
+    def __init__(self, xml: bytes, xlsx_blob: bytes):
+        self.xml = xml
+        self.xlsx_blob = xlsx_blob
+
+    def xml_bytes(self, chart_type) -> bytes:
+        return self.xml
+
+
+class ChartPartCache:
+    """
+    Chart XML and embedded workbooks by chart content
+
+    Writing a chart's XML and, above all, the workbook embedded with it is
+    most of the cost of adding a chart. Parts are keyed by the reduced data,
+    chart type and number format, so the same chart on another slide or in
+    the next build is parsed from the kept bytes; the least recently used
+    chart is dropped past max_charts.
+    """
+
+    def __init__(self, max_charts: int = MAX_CACHED_CHARTS):
+        self.max_charts = max_charts
+        self._parts: 'OrderedDict[str, _ChartParts]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def parts(self, kind: str, categories: Optional[List[Any]], names: List[str], series: List[List[Any]],
+              number_format: str) -> _ChartParts:
+        key = fingerprint(kind, categories, names, series, number_format)
+        with self._lock:
+            parts = self._parts.get(key)
+            if parts is not None:
+                self._parts.move_to_end(key)
+                self.hits += 1
+                return parts
+            self.misses += 1
+
+        data = _chart_data(kind, categories, names, series, number_format)
+        parts = _ChartParts(data.xml_bytes(CHART_TYPES[kind]), data.xlsx_blob)
+        with self._lock:
+            self._parts[key] = parts
+            while len(self._parts) > self.max_charts:
+                self._parts.popitem(last=False)
+        return parts
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {'charts': len(self._parts), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._parts.clear()
+
+
+# One cache per process, shared by every creator
+CHART_PARTS = ChartPartCache()
+
+
+def chart_digest(spec: Dict) -> Optional[str]:
+    """
+    Digest of the data a chart reads from outside its config
+
+    Covers a DataFrame's contents or the source workbook's, for cache keys;
+    None for inline data, which the config itself covers.
+    """
+    if 'data' in spec:
+        frame = spec['data']
+        try:
+            content = pd.util.hash_pandas_object(frame).to_numpy().tobytes()
+        except TypeError:
+            # Unhashable cells, such as lists
+            content = frame.to_csv().encode('utf-8')
+        return hashlib.sha256(repr(list(frame.columns)).encode('utf-8') + content).hexdigest()
+    if 'source' in spec:
+        return file_digest(spec['source'])
+    return None
+
+
+def _style(chart, kind: str, spec: Dict, theme: Any):
+    chart.has_title = 'title' in spec
+    if 'title' in spec:
+        chart.chart_title.text_frame.text = spec['title']
+
+    if spec.get('legend', len(chart.series) > 1 or kind == 'pie'):
+        chart.has_legend = True
+        chart.legend.position = XL_LEGEND_POSITION.BOTTOM
+        chart.legend.include_in_layout = False
+    else:
+        chart.has_legend = False
+
+    if spec.get('data_labels'):
+        plot = chart.plots[0]
+        plot.has_data_labels = True
+        if 'number_format' in spec:
+            plot.data_labels.number_format = spec['number_format']
+            plot.data_labels.number_format_is_linked = False
+
+    if theme is None:
+        return
+    chart.font.name = theme.body_font
+    chart.font.size = Pt(12)
+    chart.font.color.rgb = theme.text_color
+    palette = (theme.primary_color, theme.secondary_color, theme.accent_color)
+    if kind == 'pie':
+        for index, point in enumerate(chart.series[0].points if chart.series else []):
+            point.format.fill.solid()
+            point.format.fill.fore_color.rgb = palette[index % len(palette)]
+        return
+    for index, series in enumerate(chart.series):
+        color = palette[index % len(palette)]
+        if kind == 'line':
+            series.format.line.color.rgb = color
+        elif kind == 'scatter':
+            series.marker.format.fill.solid()
+            series.marker.format.fill.fore_color.rgb = color
+        else:
+            series.format.fill.solid()
+            series.format.fill.fore_color.rgb = color
+
+
+def add_chart(slide, spec: Dict, left: int, top: int, width: int, height: int, theme: Any = None):
+    """
+    Add the chart a spec describes to a slide and return its graphic frame
+
+    With a theme the series take its primary, secondary and accent colors and
+    the text its body font; without one (master mode) the chart keeps the
+    colors and fonts of the presentation's own theme.
+    """
+    kind = spec.get('type', 'bar')
+    categories, names, series = reduce_chart(kind, *chart_series(spec), spec)
+    parts = CHART_PARTS.parts(kind, categories, names, series, spec.get('number_format', 'General'))
+    frame = slide.shapes.add_chart(CHART_TYPES[kind], left, top, width, height, parts)
+    _style(frame.chart, kind, spec, theme)
+    return frame
@@ -0,0 +1,272 @@
+"""
+Slide Tables - Paginated native tables from DataFrames, CSV files or workbook ranges
+Formats the cells once, measures every row with font metrics to split the
+table across as many slides as it needs, styles all tables of a theme through
+one table style and writes each table's XML in a single pass instead of
+through python-pptx's per-cell API
+"""
+
+import csv
+import math
+import os
+import re
+import uuid
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+from pptx.util import Emu, Pt
+
+from skill_common.artifact_cache import fingerprint
+
+from presentation_cache import file_digest
+from slide_charts import chart_digest, parse_range, read_ranges
+from text_layout import LINE_SPACING, MEASURER
+
+TABLE_KEYS = ('headers', 'rows', 'data', 'csv', 'source', 'data_range', 'columns', 'font_size')
+TABLE_FONT_SIZE = 12
+# Default cell margins python-pptx and PowerPoint give table cells, in points
+CELL_INSETS = (7.2, 3.6)
+# Narrowest and widest a column is sized from its content, in points
+MIN_COLUMN_WIDTH = 36
+MAX_COLUMN_WIDTH = 252
+# Table style PowerPoint ships with ("Medium Style 2 - Accent 1"), for templates without a table style part
+BUILT_IN_STYLE = '{5C22544A-7EE6-4342-B048-85BDC9FD1C3A}'
+# Average bytes per cell of a CSV file, for sizing tables before they are read
+CSV_CELL_BYTES = 8
+# Share of the header color mixed into white for banded rows
+BAND_TINT = 0.12
+STYLE_NAMESPACE = uuid.UUID('6f6b1c52-3f57-4d77-9d3c-1c8a3e2b5a10')
+
+_CONTROL_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class TablePage:
+    """
+    Rows of a table shown on one slide
+
+    widths are the column widths of the whole table and heights the measured
+    height of the header and of each row, all in points; start is the index
+    of the first row in the table and digest covers the table's data.
+    """
+
+    __slots__ = ('headers', 'rows', 'widths', 'heights', 'size', 'start', 'digest')
+
+    def __init__(self, headers: List[str], rows: List[List[str]], widths: List[float], heights: List[float],
+                 size: float, start: int, digest: str):
+        self.headers = headers
+        self.rows = rows
+        self.widths = widths
+        self.heights = heights
+        self.size = size
+        self.start = start
+        self.digest = digest
+
+
+def _cell_text(value: Any) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, int):
+        return f'{value:,}'
+    if isinstance(value, float):
+        return f'{value:,.0f}' if value.is_integer() else f'{value:,.2f}'
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat(' ', 'minutes')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def table_rows(spec: dict) -> Tuple[List[Any], List[List[Any]]]:
+    """Headers and row values of a table spec, from whichever source it names"""
+    if 'data' in spec:
+        frame = spec['data']
+        if 'columns' in spec:
+            frame = frame[spec['columns']]
+        return list(frame.columns), frame.values.tolist()
+    if 'csv' in spec:
+        with open(spec['csv'], newline='', encoding='utf-8-sig') as f:
+            rows = list(csv.reader(f))
+    elif 'source' in spec:
+        rows, = read_ranges(spec['source'], [spec['data_range']])
+    else:
+        return spec.get('headers', []), spec.get('rows', [])
+    return (rows[0], rows[1:]) if rows else ([], [])
+
+
+def table_cells(spec: dict) -> int:
+    """Number of cells a table spec holds, estimated without reading files"""
+    if 'data' in spec:
+        return int(spec['data'].size)
+    if 'csv' in spec:
+        return os.path.getsize(spec['csv']) // CSV_CELL_BYTES if os.path.exists(spec['csv']) else 0
+    if 'source' in spec:
+        _, (min_col, min_row, max_col, max_row) = parse_range(spec['data_range'])
+        return (max_col - min_col + 1) * (max_row - min_row + 1)
+    return len(spec.get('headers', [])) + sum(len(row) for row in spec.get('rows', []))
+
+
+def table_digest(spec: dict) -> str:
+    """Digest of a table's data, covering DataFrame and file contents that the config only names"""
+    if 'csv' in spec:
+        return fingerprint(spec, file_digest(spec['csv']))
+    return fingerprint({key: value for key, value in spec.items() if key != 'data'}, chart_digest(spec))
+
+
+def column_widths(headers: List[str], rows: List[List[str]], font: str, size: float, width: float) -> List[float]:
+    """
+    Column widths in points filling width, in proportion to each column's widest text
+
+    Each column's text is measured up to MAX_COLUMN_WIDTH and no column gets
+    less than MIN_COLUMN_WIDTH unless the table is too narrow for that.
+    """
+    columns = len(headers)
+    if not columns:
+        return []
+    natural = []
+    for index in range(columns):
+        widest = MEASURER.width(headers[index], font, size, bold=True)
+        for row in rows:
+            if index < len(row):
+                widest = max(widest, MEASURER.width(row[index], font, size))
+        natural.append(min(max(widest + 2 * CELL_INSETS[0], MIN_COLUMN_WIDTH), MAX_COLUMN_WIDTH))
+    scale = width / sum(natural)
+    return [column * scale for column in natural]
+
+
+def row_height(cells: Sequence[str], widths: List[float], font: str, size: float, bold: bool = False) -> float:
+    """Height of a row in points: its tallest cell, wrapped to the column widths"""
+    lines = max((MEASURER.line_count(text, font, size, max(width - 2 * CELL_INSETS[0], 1), bold)
+                 for text, width in zip(cells, widths)), default=1)
+    return lines * size * LINE_SPACING + 2 * CELL_INSETS[1]
+
+
+def paginate_table(spec: dict, font: str, width: float, height: float, size: Optional[float] = None) -> List[TablePage]:
+    """
+    A table split into pages that each fit a box of width x height points
+
+    The header row repeats on every page and rows are never split; a row
+    taller than the box gets a page of its own.
+    """
+    headers, values = table_rows(spec)
+    size = spec.get('font_size', size or TABLE_FONT_SIZE)
+    headers = [_cell_text(header) for header in headers]
+    rows = [[_cell_text(value) for value in row] for row in values]
+    columns = max([len(headers)] + [len(row) for row in rows])
+    headers += [''] * (columns - len(headers))
+    rows = [row + [''] * (columns - len(row)) for row in rows]
+
+    widths = column_widths(headers, rows, font, size, width)
+    header_height = row_height(headers, widths, font, size, bold=True)
+    heights = [row_height(row, widths, font, size) for row in rows]
+    digest = table_digest(spec)
+
+    def page(begin: int, end: int) -> TablePage:
+        return TablePage(headers, rows[begin:end], widths, [header_height] + heights[begin:end], size, begin, digest)
+
+    pages, start, used = [], 0, header_height
+    for index, current in enumerate(heights):
+        if index > start and used + current > height:
+            pages.append(page(start, index))
+            start, used = index, header_height
+        used += current
+    pages.append(page(start, len(rows)))
+    return pages
+
+
+def _attribute(value: str) -> str:
+    return escape(value, {'"': '&quot;'})
+
+
+def _tint(color: Any, share: float) -> str:
+    """Color mixed into white"""
+    channels = (int(str(color)[i:i + 2], 16) for i in (0, 2, 4))
+    return ''.join(f'{round(255 - (255 - channel) * share):02X}' for channel in channels)
+
+
+def _style_xml(style_id: str, theme: Any, master: bool) -> str:
+    if master:
+        # Scheme colors and the theme's minor font, so the style follows the master
+        font = '<a:fontRef idx="minor"><a:prstClr val="black"/></a:fontRef>'
+        text, header_text = '<a:schemeClr val="tx1"/>', '<a:schemeClr val="bg1"/>'
+        header = '<a:schemeClr val="accent1"/>'
+        band = f'<a:schemeClr val="accent1"><a:tint val="{int(BAND_TINT * 100000)}"/></a:schemeClr>'
+        background = '<a:schemeClr val="bg1"/>'
+        rule = '<a:schemeClr val="accent1"/>'
+    else:
+        font = f'<a:font><a:latin typeface="{_attribute(theme.body_font)}"/></a:font>'
+        text = f'<a:srgbClr val="{theme.text_color}"/>'
+        header_text = background = f'<a:srgbClr val="{theme.background_color}"/>'
+        header = f'<a:srgbClr val="{theme.primary_color}"/>'
+        band = f'<a:srgbClr val="{_tint(theme.primary_color, BAND_TINT)}"/>'
+        rule = header
+    line = f'<a:ln w="12700" cmpd="sng"><a:solidFill>{rule}</a:solidFill></a:ln>'
+    return (f'<a:tblStyle {nsdecls("a")} styleId="{style_id}" styleName="{_attribute(theme.name)}">'
+            f'<a:wholeTbl><a:tcTxStyle>{font}{text}</a:tcTxStyle><a:tcStyle><a:tcBdr>'
+            f'<a:bottom>{line}</a:bottom></a:tcBdr>'
+            f'<a:fill><a:solidFill>{background}</a:solidFill></a:fill></a:tcStyle></a:wholeTbl>'
+            f'<a:band1H><a:tcStyle><a:tcBdr/><a:fill><a:solidFill>{band}</a:solidFill></a:fill></a:tcStyle></a:band1H>'
+            f'<a:firstRow><a:tcTxStyle b="on">{font}{header_text}</a:tcTxStyle><a:tcStyle><a:tcBdr/>'
+            f'<a:fill><a:solidFill>{header}</a:solidFill></a:fill></a:tcStyle></a:firstRow>'
+            f'</a:tblStyle>')
+
+
+def add_table_style(prs, theme: Any, master: bool = False) -> str:
+    """
+    Register a theme's table style in the presentation and return its id
+
+    The id is derived from the theme, so building with the same theme again
+    (or adding slides in an edit) reuses the style already in the file.
+    Templates without a table style part fall back to the built-in style,
+    which follows the theme's accent color.
+    """
+    try:
+        part = prs.part.part_related_by(RT.TABLE_STYLES)
+    except KeyError:
+        return BUILT_IN_STYLE
+    style_id = '{%s}' % str(uuid.uuid5(STYLE_NAMESPACE, fingerprint(vars(theme), master))).upper()
+    root = etree.fromstring(part.blob)
+    if not any(style.get('styleId') == style_id for style in root.iter(qn('a:tblStyle'))):
+        root.append(etree.fromstring(_style_xml(style_id, theme, master)))
+        # Table styles are a plain part; python-pptx writes its blob as is
+        part._blob = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+    return style_id
+
+
+def _cell_xml(text: str, size: int) -> str:
+    paragraphs = ''.join(
+        f'<a:p><a:r><a:rPr lang="en-US" sz="{size}" dirty="0"/><a:t>{escape(line)}</a:t></a:r></a:p>' if line else
+        f'<a:p><a:endParaRPr lang="en-US" sz="{size}" dirty="0"/></a:p>'
+        for line in _CONTROL_CHARS.sub('', text).split('\n'))
+    return f'<a:tc><a:txBody><a:bodyPr/><a:lstStyle/>{paragraphs}</a:txBody><a:tcPr/></a:tc>'
+
+
+def table_xml(page: TablePage, style_id: str) -> str:
+    """The a:tbl element of a page, header row first, as one string"""
+    size = int(page.size * 100)
+    parts = [f'<a:tbl {nsdecls("a")}><a:tblPr firstRow="1" bandRow="1"><a:tableStyleId>{style_id}</a:tableStyleId>'
+             f'</a:tblPr><a:tblGrid>']
+    parts.extend(f'<a:gridCol w="{Pt(width)}"/>' for width in page.widths)
+    parts.append('</a:tblGrid>')
+    for row, height in zip([page.headers] + page.rows, page.heights):
+        parts.append(f'<a:tr h="{Pt(height)}">')
+        parts.extend(_cell_xml(text, size) for text in row)
+        parts.append('</a:tr>')
+    parts.append('</a:tbl>')
+    return ''.join(parts)
+
+
+def add_table(slide, page: TablePage, style_id: str, left: int, top: int):
+    """Add a page of a table to a slide and return its graphic frame"""
+    width = sum(Pt(column) for column in page.widths)
+    height = sum(Pt(row) for row in page.heights)
+    frame = slide.shapes.add_table(1, 1, left, top, Emu(width), Emu(height))
+    graphic_data = frame._element.graphic.graphicData
+    graphic_data.replace(graphic_data.tbl, parse_xml(table_xml(page, style_id)))
+    return frame
@@ -0,0 +1,358 @@
+"""
+Slide Timeline - Time-scaled timelines that stay legible with hundreds of events
+Places dated events by their real dates (undated ones evenly, in order),
+merges events whose markers would touch into one cluster, staggers labels
+over rows above and below the axis so no two overlap, splits long timelines
+across slides and writes each slide's timeline as one group of event groups
+in a single pass of XML
+"""
+
+import re
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
+from pptx.util import Pt
+
+from text_layout import LINE_SPACING, MEASURER
+
+EVENT_KEYS = ('date', 'label')
+# Events shown on one slide before a timeline continues on the next
+MAX_TIMELINE_EVENTS = 40
+# Axis of the timeline, in points from the slide's top left
+AXIS_LEFT = 72
+AXIS_RIGHT = 648
+AXIS_Y = 252
+# Outermost a label may reach, in points
+LABEL_LEFT = 36
+LABEL_RIGHT = 684
+LABEL_SIZE = 10
+LABEL_LINES = 3
+MAX_LABEL_WIDTH = 108
+LABEL_HEIGHT = LABEL_LINES * LABEL_SIZE * LINE_SPACING
+# Space between labels on a row, between rows and between the axis and the nearest row
+LABEL_GAP = 4
+ROW_GAP = 6
+LABEL_OFFSET = 16
+# Label rows in the order they are tried: (above the axis, distance from it in rows)
+LABEL_ROWS = ((False, 0), (True, 0), (False, 1), (True, 1), (False, 2), (True, 2), (False, 3))
+MARKER_SIZE = 12
+CLUSTER_MARKER_SIZE = 18
+# Markers closer than this, in points, are drawn as one cluster
+MIN_MARKER_GAP = MARKER_SIZE
+ELLIPSIS = '…'
+
+_QUARTER = re.compile(r'^(\d{4})-?Q([1-4])$', re.IGNORECASE)
+_CONTROL_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def parse_date(value: Any) -> datetime:
+    """
+    Date of a timeline event
+
+    Accepts date and datetime objects and ISO strings down to the year
+    ('2024', '2024-03', '2024-03-15', '2024-03-15T09:30') or a quarter
+    ('2024-Q2'). Raises ValueError for anything else.
+    """
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if not isinstance(value, str):
+        raise ValueError(f"expected a date, got {value!r}")
+    text = value.strip()
+    quarter = _QUARTER.match(text)
+    if quarter:
+        return datetime(int(quarter.group(1)), int(quarter.group(2)) * 3 - 2, 1)
+    try:
+        if re.fullmatch(r'\d{4}', text):
+            return datetime(int(text), 1, 1)
+        if re.fullmatch(r'\d{4}-\d{2}', text):
+            return datetime.strptime(text, '%Y-%m')
+        return datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"expected an ISO date like '2024-03-15' or '2024-Q2', got {value!r}") from None
+
+
+class TimelineEvent:
+    """One event: its date (None when undated), the date as shown and its label"""
+
+    __slots__ = ('when', 'date', 'label')
+
+    def __init__(self, when: Optional[datetime], date_text: str, label: str):
+        self.when = when
+        self.date = date_text
+        self.label = label
+
+
+def _date_text(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat(' ', 'minutes')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def timeline_events(events: Sequence[Any]) -> List[TimelineEvent]:
+    """
+    Events of a timeline config in the order they are drawn
+
+    Events are strings (the label, undated) or objects with a label and an
+    optional date; dated events are sorted by date, undated ones keep their
+    order.
+    """
+    parsed = []
+    for event in events:
+        if isinstance(event, dict):
+            value = event.get('date')
+            parsed.append(TimelineEvent(parse_date(value) if value is not None else None,
+                                        _date_text(value) if value is not None else '', str(event.get('label', ''))))
+        else:
+            parsed.append(TimelineEvent(None, '', str(event)))
+    if parsed and all(event.when is not None for event in parsed):
+        parsed.sort(key=lambda event: event.when)
+    return parsed
+
+
+class TimelineMarker:
+    """
+    One marker of a timeline page and its label
+
+    x is the marker's center and left, top, width the label's box, in
+    points; count is the number of events it stands for and above whether
+    the label sits above the axis.
+    """
+
+    __slots__ = ('x', 'count', 'lines', 'left', 'top', 'width', 'above')
+
+    def __init__(self, x: float, count: int, lines: List[str]):
+        self.x = x
+        self.count = count
+        self.lines = lines
+        self.left = self.top = self.width = 0.0
+        self.above = False
+
+
+class TimelinePage:
+    """Markers of the events shown on one slide; start is the index of its first event"""
+
+    __slots__ = ('markers', 'start', 'count', 'font')
+
+    def __init__(self, markers: List[TimelineMarker], start: int, count: int, font: str):
+        self.markers = markers
+        self.start = start
+        self.count = count
+        self.font = font
+
+
+def _clip(text: str, font: str, width: float = MAX_LABEL_WIDTH) -> str:
+    """A line shortened with an ellipsis until it is at most width points wide"""
+    if MEASURER.width(text, font, LABEL_SIZE) <= width:
+        return text
+    words = text.split(' ')
+    while len(words) > 1 and MEASURER.width(' '.join(words) + ELLIPSIS, font, LABEL_SIZE) > width:
+        words.pop()
+    clipped = ' '.join(words)
+    while len(clipped) > 1 and MEASURER.width(clipped + ELLIPSIS, font, LABEL_SIZE) > width:
+        clipped = clipped[:-1]
+    return clipped.rstrip() + ELLIPSIS
+
+
+def _lines(events: Sequence[TimelineEvent]) -> List[str]:
+    """Label lines of a marker: its date (or date range) then its events' labels, at most LABEL_LINES"""
+    first, last = events[0], events[-1]
+    end = last.date
+    if end[4:5] == '-' and end[:5] == first.date[:5]:
+        # Same year: '2024-03-02 – 04-18'
+        end = end[5:]
+    heading = [first.date if first.date == last.date else f'{first.date} – {end}'] if first.date else []
+    labels = [line for event in events for line in _CONTROL_CHARS.sub('', event.label).split('\n') if line.strip()]
+    if len(events) > 1 and not first.date:
+        heading = [f'{len(events)} events']
+    room = LABEL_LINES - len(heading)
+    if len(labels) > room:
+        hidden = len(labels) - room + 1
+        labels = labels[:room - 1] + [f'+{hidden} more']
+    return heading + labels
+
+
+def _positions(events: Sequence[TimelineEvent]) -> List[float]:
+    """Marker centers along the axis: by date when every event has one, else evenly"""
+    width = AXIS_RIGHT - AXIS_LEFT
+    if all(event.when is not None for event in events):
+        start, end = events[0].when, events[-1].when
+        span = (end - start).total_seconds()
+        if span > 0:
+            return [AXIS_LEFT + (event.when - start).total_seconds() / span * width for event in events]
+        return [AXIS_LEFT + width / 2] * len(events)
+    if len(events) == 1:
+        return [AXIS_LEFT]
+    return [AXIS_LEFT + index * width / (len(events) - 1) for index in range(len(events))]
+
+
+def _marker(events: List[TimelineEvent], positions: List[float], font: str) -> TimelineMarker:
+    marker = TimelineMarker((positions[0] + positions[-1]) / 2, len(events),
+                            [_clip(line, font) for line in _lines(events)])
+    marker.width = max(MEASURER.width(line, font, LABEL_SIZE) for line in marker.lines) + LABEL_GAP
+    marker.left = min(max(marker.x - marker.width / 2, LABEL_LEFT), LABEL_RIGHT - marker.width)
+    return marker
+
+
+def layout_timeline(events: List[TimelineEvent], font: str, start: int = 0) -> TimelinePage:
+    """
+    Markers and label boxes of one slide's events
+
+    Events whose markers would touch form one cluster. Labels go, left to
+    right, on the first row where they clear the previous label; a label no
+    row has room for is merged into the cluster before it, so dense periods
+    collapse into ranges instead of overlapping.
+    """
+    positions = _positions(events)
+    groups: List[List[int]] = []
+    for index, x in enumerate(positions):
+        if groups and x - positions[groups[-1][-1]] < MIN_MARKER_GAP:
+            groups[-1].append(index)
+        else:
+            groups.append([index])
+
+    row_ends = [float('-inf')] * len(LABEL_ROWS)
+    # (event indices, marker, row, end of that row before the marker was placed)
+    placed: List[Tuple[List[int], TimelineMarker, int, float]] = []
+    pending = list(reversed(groups))
+    while pending:
+        group = pending.pop()
+        marker = _marker([events[index] for index in group], [positions[index] for index in group], font)
+        row = next((row for row, end in enumerate(row_ends) if end + LABEL_GAP <= marker.left), None)
+        if row is None:
+            previous, _, previous_row, previous_end = placed.pop()
+            row_ends[previous_row] = previous_end
+            pending.append(previous + group)
+            continue
+        placed.append((group, marker, row, row_ends[row]))
+        row_ends[row] = marker.left + marker.width
+
+    markers = []
+    for _, marker, row, _ in placed:
+        above, distance = LABEL_ROWS[row]
+        offset = LABEL_OFFSET + distance * (LABEL_HEIGHT + ROW_GAP)
+        marker.above = above
+        marker.top = AXIS_Y - offset - LABEL_HEIGHT if above else AXIS_Y + offset
+        markers.append(marker)
+    return TimelinePage(markers, start, len(events), font)
+
+
+def paginate_timeline(events: Sequence[Any], font: str,
+                      per_slide: int = MAX_TIMELINE_EVENTS) -> List[TimelinePage]:
+    """
+    A timeline split into pages of at most per_slide events, as even in size as possible
+
+    Each page scales its own date range to the full axis.
+    """
+    parsed = timeline_events(events)
+    if not parsed:
+        return []
+    page_count = -(-len(parsed) // per_slide)
+    pages = []
+    for page in range(page_count):
+        start, end = page * len(parsed) // page_count, (page + 1) * len(parsed) // page_count
+        pages.append(layout_timeline(parsed[start:end], font, start))
+    return pages
+
+
+def _attribute(value: str) -> str:
+    return escape(value, {'"': '&quot;'})
+
+
+def _color(color: Any) -> str:
+    """An RGBColor, or a theme color slot name in master mode"""
+    return f'<a:schemeClr val="{color}"/>' if isinstance(color, str) else f'<a:srgbClr val="{color}"/>'
+
+
+def _xfrm(x: float, y: float, width: float, height: float, group: bool = False) -> str:
+    offset = f'<a:off x="{Pt(x)}" y="{Pt(y)}"/><a:ext cx="{Pt(width)}" cy="{Pt(height)}"/>'
+    if group:
+        offset += f'<a:chOff x="{Pt(x)}" y="{Pt(y)}"/><a:chExt cx="{Pt(width)}" cy="{Pt(height)}"/>'
+    return f'<a:xfrm>{offset}</a:xfrm>'
+
+
+def _line_xml(shape_id: int, name: str, x: float, y: float, width: float, height: float,
+              color: Any, weight: float) -> str:
+    return (f'<p:cxnSp><p:nvCxnSpPr><p:cNvPr id="{shape_id}" name="{name}"/><p:cNvCxnSpPr/><p:nvPr/></p:nvCxnSpPr>'
+            f'<p:spPr>{_xfrm(x, y, width, height)}<a:prstGeom prst="line"><a:avLst/></a:prstGeom>'
+            f'<a:ln w="{Pt(weight)}"><a:solidFill>{_color(color)}</a:solidFill></a:ln></p:spPr></p:cxnSp>')
+
+
+def _label_xml(shape_id: int, marker: TimelineMarker, color: Any, font: Optional[str]) -> str:
+    typeface = f'<a:latin typeface="{_attribute(font)}"/>' if font else ''
+    fill = f'<a:solidFill>{_color(color)}</a:solidFill>' if color is not None else ''
+    paragraphs = []
+    for index, line in enumerate(marker.lines):
+        bold = ' b="1"' if index == 0 and len(marker.lines) > 1 else ''
+        paragraphs.append(f'<a:p><a:pPr algn="ctr"/><a:r><a:rPr lang="en-US" sz="{LABEL_SIZE * 100}"{bold} dirty="0">'
+                          f'{fill}{typeface}</a:rPr><a:t>{escape(line)}</a:t></a:r></a:p>')
+    if marker.above:
+        # Labels above the axis read from the bottom up, so the first line sits nearest to it
+        paragraphs.reverse()
+    anchor = 'b' if marker.above else 't'
+    return (f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="Event Label"/><p:cNvSpPr txBox="1"/><p:nvPr/>'
+            f'</p:nvSpPr><p:spPr>{_xfrm(marker.left, marker.top, marker.width, LABEL_HEIGHT)}'
+            f'<a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/></p:spPr>'
+            f'<p:txBody><a:bodyPr wrap="none" lIns="0" tIns="0" rIns="0" bIns="0" anchor="{anchor}"><a:noAutofit/>'
+            f'</a:bodyPr><a:lstStyle/>{"".join(paragraphs)}</p:txBody></p:sp>')
+
+
+def timeline_xml(page: TimelinePage, shape_id: int, theme: Any = None) -> str:
+    """
+    The p:grpSp of a timeline page, as one string
+
+    The timeline is a group holding the axis and one group per marker (its
+    circle, leader line and label), so PowerPoint can move the whole
+    timeline or any event as a unit. Without a theme the shapes use theme
+    color slots and the theme fonts, for master mode.
+    """
+    if theme is None:
+        axis, marker_fill, text, font = 'accent1', 'accent3', None, None
+    else:
+        axis, marker_fill, text, font = theme.primary_color, theme.accent_color, theme.text_color, page.font
+    parts = []
+    next_id = shape_id + 1
+    parts.append(_line_xml(next_id, 'Timeline Axis', AXIS_LEFT, AXIS_Y, AXIS_RIGHT - AXIS_LEFT, 0, axis, 3))
+    next_id += 1
+    top, bottom = AXIS_Y - CLUSTER_MARKER_SIZE / 2, AXIS_Y + CLUSTER_MARKER_SIZE / 2
+    for number, marker in enumerate(page.markers, 1):
+        size = CLUSTER_MARKER_SIZE if marker.count > 1 else MARKER_SIZE
+        label_edge = marker.top + LABEL_HEIGHT if marker.above else marker.top
+        leader_top, leader_bottom = (label_edge, AXIS_Y - size / 2) if marker.above else (AXIS_Y + size / 2, label_edge)
+        group_top, group_bottom = min(marker.top, AXIS_Y - size / 2), max(marker.top + LABEL_HEIGHT, AXIS_Y + size / 2)
+        group_left = min(marker.left, marker.x - size / 2)
+        group_right = max(marker.left + marker.width, marker.x + size / 2)
+        top, bottom = min(top, group_top), max(bottom, group_bottom)
+        parts.append(f'<p:grpSp><p:nvGrpSpPr><p:cNvPr id="{next_id}" name="Event {number}"/><p:cNvGrpSpPr/><p:nvPr/>'
+                     f'</p:nvGrpSpPr><p:grpSpPr>'
+                     f'{_xfrm(group_left, group_top, group_right - group_left, group_bottom - group_top, True)}'
+                     f'</p:grpSpPr>')
+        parts.append(_line_xml(next_id + 1, 'Event Leader', marker.x, leader_top, 0, leader_bottom - leader_top,
+                               axis, 0.75))
+        parts.append(f'<p:sp><p:nvSpPr><p:cNvPr id="{next_id + 2}" name="Event Marker"/><p:cNvSpPr/><p:nvPr/>'
+                     f'</p:nvSpPr><p:spPr>{_xfrm(marker.x - size / 2, AXIS_Y - size / 2, size, size)}'
+                     f'<a:prstGeom prst="ellipse"><a:avLst/></a:prstGeom>'
+                     f'<a:solidFill>{_color(marker_fill)}</a:solidFill>'
+                     f'<a:ln w="{Pt(1)}"><a:solidFill>{_color(axis)}</a:solidFill></a:ln></p:spPr></p:sp>')
+        parts.append(_label_xml(next_id + 3, marker, text, font))
+        parts.append('</p:grpSp>')
+        next_id += 4
+
+    left = min([AXIS_LEFT] + [marker.left for marker in page.markers])
+    right = max([AXIS_RIGHT] + [marker.left + marker.width for marker in page.markers])
+    return (f'<p:grpSp {nsdecls("a", "p")}><p:nvGrpSpPr><p:cNvPr id="{shape_id}" name="Timeline"/><p:cNvGrpSpPr/>'
+            f'<p:nvPr/></p:nvGrpSpPr><p:grpSpPr>{_xfrm(left, top, right - left, bottom - top, True)}</p:grpSpPr>'
+            f'{"".join(parts)}</p:grpSp>')
+
+
+def add_timeline(slide, page: TimelinePage, theme: Any = None):
+    """Add a timeline page to a slide as one group shape and return its element"""
+    group = parse_xml(timeline_xml(page, slide.shapes._next_shape_id, theme))
+    slide.shapes._spTree.insert_element_before(group, 'p:extLst')
+    return group
@@ -0,0 +1,143 @@
+"""
+Template Manager - Parsed presentation templates shared across builds
+Opens the bundled default or a company .pptx / .potx master once per process
+and hands every build a deep copy of the parsed package, finds layouts by
+their type rather than their position in a particular template and strips
+the layouts and masters a deck does not use
+"""
+
+import copy
+import io
+import os
+import zipfile
+import threading
+from typing import Dict, Optional, Tuple
+
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.package import Package
+
+TEMPLATE_SUFFIXES = ('.pptx', '.potx')
+TEMPLATE_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.presentationml.template.main+xml'
+
+# Layout types the builders ask for, with what to use when a template lacks one
+LAYOUT_FALLBACKS = {'title': 'obj', 'secHead': 'title', 'twoObj': 'obj', 'titleOnly': 'obj'}
+
+
+def _as_presentation(path: str) -> io.BytesIO:
+    """A .potx package relabelled as a .pptx; python-pptx only opens presentations"""
+    output = io.BytesIO()
+    with zipfile.ZipFile(path) as source, zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            data = source.read(info.filename)
+            if info.filename == '[Content_Types].xml':
+                data = data.replace(TEMPLATE_CONTENT_TYPE.encode('ascii'), CT.PML_PRESENTATION_MAIN.encode('ascii'))
+            target.writestr(info, data)
+    output.seek(0)
+    return output
+
+
+def _open(path: Optional[str]):
+    """Parse a template into a package with no slides"""
+    if path is None:
+        path = _default_path()
+    source = _as_presentation(path) if path.lower().endswith('.potx') else path
+    package = Package.open(source)
+    part = package.main_document_part
+    if part.content_type not in (CT.PML_PRESENTATION_MAIN, CT.PML_PRES_MACRO_MAIN):
+        raise ValueError(f"Template '{path}' is not a PowerPoint file, content type is '{part.content_type}'")
+
+    # Sample slides of a company deck are not part of the template. The
+    # elements are edited directly: python-pptx caches collection objects
+    # that would point at the original tree after a deep copy
+    slide_ids = part._element.sldIdLst
+    if slide_ids is not None:
+        for slide_id in list(slide_ids):
+            part.drop_rel(slide_id.rId)
+            slide_ids.remove(slide_id)
+    return package
+
+
+def _default_path() -> str:
+    import pptx
+    return os.path.join(os.path.dirname(pptx.__file__), 'templates', 'default.pptx')
+
+
+class TemplateManager:
+    """
+    Parsed templates keyed by path, size and modification time
+
+    A template is read and parsed the first time a build asks for it;
+    every later build gets a deep copy of the parsed package, which skips
+    the zip and XML parsing. Replacing the file on disk reloads it.
+    """
+
+    def __init__(self):
+        self._templates: Dict[Optional[str], Tuple[Optional[Tuple[int, int]], object]] = {}
+        self._lock = threading.Lock()
+
+    def presentation(self, path: Optional[str] = None):
+        """A new presentation built on a template (None for the python-pptx default)"""
+        return copy.deepcopy(self._template(path)).main_document_part.presentation
+
+    def _template(self, path: Optional[str]):
+        key = os.path.realpath(path) if path is not None else None
+        stamp = None
+        if key is not None:
+            stat = os.stat(key)
+            stamp = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._templates.get(key)
+            if cached is None or cached[0] != stamp:
+                cached = (stamp, _open(key))
+                self._templates[key] = cached
+            return cached[1]
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+# One manager per process, shared by every creator
+TEMPLATES = TemplateManager()
+
+
+def find_layout(prs, layout_type: str):
+    """
+    First layout of a type ('title', 'obj', 'secHead', 'twoObj', 'titleOnly', 'blank', ...)
+
+    Templates without the type fall back to a similar layout; a missing
+    blank layout becomes the one with the fewest placeholders.
+    """
+    layouts = [layout for master in prs.slide_masters for layout in master.slide_layouts]
+    for layout in layouts:
+        if layout._element.get('type') == layout_type:
+            return layout
+    if layout_type in LAYOUT_FALLBACKS:
+        return find_layout(prs, LAYOUT_FALLBACKS[layout_type])
+    if layout_type == 'blank':
+        return min(layouts, key=lambda layout: len(layout.placeholders))
+    return layouts[0]
+
+
+def strip_unused_layouts(prs) -> int:
+    """
+    Remove the layouts no slide uses, then masters left without layouts
+
+    One master always stays. Returns the number of layouts removed.
+    """
+    removed = 0
+    for master in prs.slide_masters:
+        for layout in list(master.slide_layouts):
+            if not layout.used_by_slides:
+                master.slide_layouts.remove(layout)
+                removed += 1
+
+    master_ids = prs.part._element.sldMasterIdLst
+    for master_id in list(master_ids):
+        if len(master_ids) == 1:
+            break
+        master = prs.part.related_part(master_id.rId).slide_master
+        if len(master.slide_layouts) == 0:
+            prs.part.drop_rel(master_id.rId)
+            master_ids.remove(master_id)
+    return removed
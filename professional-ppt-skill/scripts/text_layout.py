@@ -0,0 +1,255 @@
+"""
+Text Layout - Measures slide text with real font metrics
+Word-wraps bullets with glyph advances read from the font files through
+Pillow, so builders can shrink text to fit its box and split lists that do
+not fit across continuation slides; widths are memoized per font, glyph and
+word, which keeps measuring cheap even for decks with thousands of bullets
+"""
+
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PIL import ImageFont
+from pptx.enum.text import MSO_AUTO_SIZE
+
+TEXT_FIT_MODES = ('none', 'shrink', 'paginate')
+# Smallest size text is shrunk to before a list continues on another slide
+MIN_FONT_SIZE = 12
+LINE_SPACING = 1.2
+# Inner margins python-pptx gives a text box, in points
+BOX_INSETS = (14.4, 7.2)
+# Glyphs are measured once at this pixel size; widths scale linearly with size
+REFERENCE_SIZE = 1000
+# Width of a glyph, in ems, when no font file can be found at all
+AVERAGE_GLYPH_WIDTH = 0.5
+# Words remembered per font before the word cache starts over
+MAX_CACHED_WORDS = 100000
+
+FONT_DIRS = [os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'), '/usr/share/fonts',
+             '/usr/local/share/fonts', os.path.expanduser('~/.fonts'), os.path.expanduser('~/.local/share/fonts'),
+             '/Library/Fonts', '/System/Library/Fonts', os.path.expanduser('~/Library/Fonts')]
+# File names of common Office fonts and their metric-compatible free equivalents
+FONT_FILES = {
+    ('calibri', False): ('calibri', 'carlito-regular', 'carlito'),
+    ('calibri', True): ('calibrib', 'carlito-bold'),
+    ('arial', False): ('arial', 'liberationsans-regular', 'liberationsans', 'arimo-regular'),
+    ('arial', True): ('arialbd', 'liberationsans-bold', 'arimo-bold'),
+    ('helvetica', False): ('helvetica', 'liberationsans-regular', 'arimo-regular'),
+    ('helvetica', True): ('helvetica-bold', 'liberationsans-bold', 'arimo-bold'),
+    ('times new roman', False): ('times', 'liberationserif-regular', 'tinos-regular'),
+    ('times new roman', True): ('timesbd', 'liberationserif-bold', 'tinos-bold'),
+    ('georgia', False): ('georgia', 'gelasio-regular'),
+    ('georgia', True): ('georgiab', 'gelasio-bold'),
+    ('segoe ui', False): ('segoeui',),
+    ('segoe ui', True): ('segoeuib',),
+    ('tahoma', False): ('tahoma', 'dejavusans'),
+    ('tahoma', True): ('tahomabd', 'dejavusans-bold'),
+    ('verdana', False): ('verdana', 'dejavusans'),
+    ('verdana', True): ('verdanab', 'dejavusans-bold'),
+}
+
+
+class TextBox:
+    """Text area of a box in points, with the paragraph spacing of its text"""
+
+    __slots__ = ('width', 'height', 'space_after')
+
+    def __init__(self, width: float, height: float, space_after: float = 0):
+        self.width = width
+        self.height = height
+        self.space_after = space_after
+
+    @classmethod
+    def from_inches(cls, width: float, height: float, space_after: float = 0) -> 'TextBox':
+        """A text box of the given outer size, minus its default margins"""
+        return cls(width * 72 - 2 * BOX_INSETS[0], height * 72 - 2 * BOX_INSETS[1], space_after)
+
+
+class _FontWidths:
+    """Glyph and word widths of one font, in ems"""
+
+    __slots__ = ('font', 'glyphs', 'words')
+
+    def __init__(self, font: Optional[ImageFont.FreeTypeFont]):
+        self.font = font
+        self.glyphs: Dict[str, float] = {}
+        self.words: Dict[str, float] = {}
+
+
+class TextMeasurer:
+    """
+    Measures and wraps text with memoized font metrics
+
+    Fonts are looked up by family name in the usual font directories (Office
+    fonts fall back to their metric-compatible free equivalents, then to
+    Pillow's bundled font). Every glyph is measured once per font; sizes
+    scale the cached widths. Kerning is ignored, which errs on the wide side.
+    """
+
+    def __init__(self, font_dirs: Optional[Sequence[str]] = None):
+        self.font_dirs = list(FONT_DIRS if font_dirs is None else font_dirs)
+        self._files: Optional[Dict[str, str]] = None
+        self._fonts: Dict[Tuple[str, bool], _FontWidths] = {}
+        self._lock = threading.Lock()
+        self.glyph_hits = 0
+        self.glyph_misses = 0
+        self.word_hits = 0
+        self.word_misses = 0
+
+    def _font_files(self) -> Dict[str, str]:
+        """Lower-case file stem -> path of every font file in the font directories"""
+        if self._files is None:
+            files = {}
+            for directory in self.font_dirs:
+                for root, _, names in os.walk(directory):
+                    for name in names:
+                        stem, extension = os.path.splitext(name)
+                        if extension.lower() in ('.ttf', '.otf', '.ttc'):
+                            files.setdefault(stem.lower(), os.path.join(root, name))
+            self._files = files
+        return self._files
+
+    def _load(self, family: str, bold: bool) -> Optional[ImageFont.FreeTypeFont]:
+        key = family.lower()
+        compact = key.replace(' ', '')
+        stems = FONT_FILES.get((key, bold), ()) + ((compact + '-bold', compact + 'bd', compact + 'b') if bold else
+                                                    (compact, compact + '-regular'))
+        files = self._font_files()
+        for stem in stems:
+            if stem in files:
+                try:
+                    return ImageFont.truetype(files[stem], REFERENCE_SIZE)
+                except OSError:
+                    continue
+        try:
+            return ImageFont.load_default(REFERENCE_SIZE)
+        except (TypeError, OSError):
+            # Pillow without FreeType or older than 10.1
+            return None
+
+    def _widths(self, family: str, bold: bool) -> _FontWidths:
+        key = (family, bold)
+        widths = self._fonts.get(key)
+        if widths is None:
+            with self._lock:
+                widths = self._fonts.get(key)
+                if widths is None:
+                    widths = _FontWidths(self._load(family, bold))
+                    self._fonts[key] = widths
+        return widths
+
+    def _word_width(self, widths: _FontWidths, word: str) -> float:
+        """Width of a word in ems"""
+        width = widths.words.get(word)
+        if width is not None:
+            self.word_hits += 1
+            return width
+        self.word_misses += 1
+        width = 0.0
+        glyphs = widths.glyphs
+        for char in word:
+            glyph = glyphs.get(char)
+            if glyph is None:
+                self.glyph_misses += 1
+                glyph = (widths.font.getlength(char) / REFERENCE_SIZE if widths.font is not None
+                         else AVERAGE_GLYPH_WIDTH)
+                glyphs[char] = glyph
+            else:
+                self.glyph_hits += 1
+            width += glyph
+        if len(widths.words) >= MAX_CACHED_WORDS:
+            widths.words.clear()
+        widths.words[word] = width
+        return width
+
+    def width(self, text: str, family: str, size: float, bold: bool = False) -> float:
+        """Width of a line of text in points"""
+        widths = self._widths(family, bold)
+        words = text.split(' ')
+        space = self._word_width(widths, ' ')
+        return (sum(self._word_width(widths, word) for word in words) + space * (len(words) - 1)) * size
+
+    def line_count(self, text: str, family: str, size: float, width: float, bold: bool = False) -> int:
+        """Lines a paragraph wraps to in a box width points wide"""
+        widths = self._widths(family, bold)
+        available = width / size
+        space = self._word_width(widths, ' ')
+        lines, used = 1, 0.0
+        for word in text.split():
+            word_width = self._word_width(widths, word)
+            if used and used + space + word_width > available:
+                lines += 1
+                used = 0.0
+            if word_width > available:
+                # A word wider than the box is broken across lines
+                extra = math.ceil(word_width / available) - 1
+                lines += extra
+                used = word_width - extra * available
+            else:
+                used += (space if used else 0.0) + word_width
+        return lines
+
+    def height(self, paragraphs: Sequence[str], family: str, size: float, box: TextBox, bold: bool = False) -> float:
+        """Height in points of paragraphs set in a box"""
+        lines = sum(self.line_count(text, family, size, box.width, bold) for text in paragraphs)
+        return lines * size * LINE_SPACING + box.space_after * max(len(paragraphs) - 1, 0)
+
+    def fit_size(self, paragraphs: Sequence[str], family: str, size: float, box: TextBox,
+                 min_size: float = MIN_FONT_SIZE, bold: bool = False) -> Optional[float]:
+        """Largest whole point size from size down to min_size at which the paragraphs fit, None if none does"""
+        current = size
+        while current >= min_size:
+            if self.height(paragraphs, family, current, box, bold) <= box.height:
+                return current
+            current -= 1
+        return None
+
+    def paginate(self, paragraphs: Sequence[str], family: str, size: float, box: TextBox,
+                 bold: bool = False) -> List[List[str]]:
+        """Split paragraphs into consecutive pages that each fit the box; a paragraph is never split"""
+        pages: List[List[str]] = [[]]
+        used = 0.0
+        for text in paragraphs:
+            height = self.line_count(text, family, size, box.width, bold) * size * LINE_SPACING
+            spacing = box.space_after if pages[-1] else 0.0
+            if pages[-1] and used + spacing + height > box.height:
+                pages.append([])
+                used, spacing = 0.0, 0.0
+            pages[-1].append(text)
+            used += spacing + height
+        return pages
+
+    def stats(self) -> Dict[str, float]:
+        """Cache counters, with the share of word and glyph lookups served from the cache"""
+        lookups = self.word_hits + self.word_misses
+        glyph_lookups = self.glyph_hits + self.glyph_misses
+        return {
+            'fonts': len(self._fonts),
+            'glyphs': sum(len(widths.glyphs) for widths in self._fonts.values()),
+            'words': sum(len(widths.words) for widths in self._fonts.values()),
+            'word_hits': self.word_hits,
+            'word_misses': self.word_misses,
+            'word_hit_rate': self.word_hits / lookups if lookups else 0.0,
+            'glyph_hits': self.glyph_hits,
+            'glyph_misses': self.glyph_misses,
+            'glyph_hit_rate': self.glyph_hits / glyph_lookups if glyph_lookups else 0.0,
+        }
+
+
+# One measurer per process, so every build shares the font caches
+MEASURER = TextMeasurer()
+
+
+def scale_text(text_frame, size: Optional[float], base: float):
+    """
+    Shrink text that inherits its size (from a placeholder) to a fitted size
+
+    Writes the font scale PowerPoint itself uses for shrink-on-overflow, so
+    the runs keep no size of their own.
+    """
+    if size is None or size >= base:
+        return
+    text_frame.auto_size = MSO_AUTO_SIZE.TEXT_TO_FIT_SHAPE
+    text_frame._txBody.bodyPr.normAutofit.set('fontScale', str(int(size / base * 100000)))
@@ -0,0 +1,5 @@
+"""
+Skill Common - Modules shared by the Excel and PowerPoint skills
+Each skill's engine puts the repository root on sys.path and imports them as
+skill_common.<module>, so both skills run one implementation of each
+"""
@@ -0,0 +1,173 @@
+"""
+Artifact Cache - Content-addressed, size- and age-bounded directory of built files
+Shared by the workbook and presentation caches, which key builds by fingerprint()
+of their normalized config and pick the directory and file suffix
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Any, Optional
+
+import pandas as pd
+
+from .atomic_files import copy_file
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+CACHE_OPTIONS = ('dir', 'max_bytes', 'max_age')
+
+# Options that change where or how a build runs, not what it produces
+NON_CONTENT_KEYS = ('output_path', 'profile', 'cache', 'incremental')
+
+
+def content_config(config: Dict) -> Dict:
+    """Config without the options that do not affect the generated file"""
+    return {key: value for key, value in config.items() if key not in NON_CONTENT_KEYS}
+
+
+def _canonical(value: Any) -> Any:
+    """JSON stand-in for values json cannot encode; DataFrames hash their full contents"""
+    if isinstance(value, pd.DataFrame):
+        rows = pd.util.hash_pandas_object(value, index=False).to_numpy()
+        return [[str(column) for column in value.columns], [str(dtype) for dtype in value.dtypes],
+                hashlib.sha256(rows.tobytes()).hexdigest()]
+    return str(value)
+
+
+def fingerprint(*parts: Any) -> str:
+    """SHA-256 over the canonical JSON of the given parts"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=_canonical, separators=(',', ':')).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """
+    Directory of built files named by content hash
+
+    Entries are written atomically and their timestamp is refreshed on every
+    hit; eviction drops entries unused for longer than max_age seconds, then
+    the least recently used until the directory fits in max_bytes. Subclasses
+    set the default directory and the suffix of their files.
+    """
+
+    DEFAULT_DIR = '.artifact_cache'
+    SUFFIX = ''
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age: float = DEFAULT_MAX_AGE, suffix: Optional[str] = None):
+        self.directory = directory or self.DEFAULT_DIR
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.suffix = self.SUFFIX if suffix is None else suffix
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_option(cls, option: Any, suffix: Optional[str] = None) -> Optional['ArtifactCache']:
+        """
+        Cache from a config option
+
+        Args:
+            option: False/None (off), True (defaults), a directory path, or a
+                dict like {"dir": ".cache", "max_bytes": 100000000, "max_age": 86400}
+        """
+        if not option:
+            return None
+        if option is True:
+            return cls(suffix=suffix)
+        if isinstance(option, str):
+            return cls(option, suffix=suffix)
+        if not isinstance(option, dict):
+            raise ValueError(f"Invalid cache option {option!r}")
+        unknown = [name for name in option if name not in CACHE_OPTIONS]
+        if unknown:
+            raise ValueError(f"Unknown cache option '{unknown[0]}', expected one of {', '.join(CACHE_OPTIONS)}")
+        return cls(option.get('dir'), option.get('max_bytes', DEFAULT_MAX_BYTES),
+                   option.get('max_age', DEFAULT_MAX_AGE), suffix)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _fresh_path(self, key: str) -> Optional[str]:
+        path = self.path(key)
+        try:
+            modified = os.stat(path).st_mtime
+        except OSError:
+            return None
+        if time.time() - modified > self.max_age:
+            self._remove(path)
+            return None
+        return path
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Cached file contents, or None on a miss"""
+        path = self._fresh_path(key)
+        if path is None:
+            self.misses += 1
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        self._touch(path)
+        self.hits += 1
+        return data
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """Copy a cached file to output_path; False on a miss"""
+        path = self._fresh_path(key)
+        if path is None:
+            self.misses += 1
+            return False
+        if os.path.abspath(path) != os.path.abspath(output_path):
+            copy_file(path, output_path)
+        self._touch(path)
+        self.hits += 1
+        return True
+
+    def store(self, key: str, source_path: str):
+        """Add a freshly built file, then enforce the size and age bounds"""
+        os.makedirs(self.directory, exist_ok=True)
+        copy_file(source_path, self.path(key))
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones beyond max_bytes"""
+        now = time.time()
+        entries: List[tuple] = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _touch(path: str):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
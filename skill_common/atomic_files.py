@@ -0,0 +1,49 @@
+"""
+Atomic Files - Write-to-temp-then-rename file replacement
+Temp files from mkstemp are private (0600); before a temp file takes the place
+of its target it gets the target's mode, or the mode a plain open() would give
+a new file, so generated files keep the permissions users expect
+"""
+
+import os
+import shutil
+import stat
+import tempfile
+
+# Read once: querying the umask means setting it, which is not safe while other threads create files
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def file_mode(path: str) -> int:
+    """Permission bits for a file written to path: the existing file's, else 0666 less the umask"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def temp_file(path: str, suffix: str = '.tmp'):
+    """(handle, temp path) of a new temp file next to path, so it can be renamed onto it"""
+    return tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=suffix)
+
+
+def replace_file(temp_path: str, path: str):
+    """Move a finished temp file onto path, with the mode path has or would get"""
+    os.chmod(temp_path, file_mode(path))
+    os.replace(temp_path, path)
+
+
+def copy_file(source_path: str, path: str, suffix: str = '.tmp'):
+    """Copy source_path to path atomically; a reader never sees a partial file"""
+    handle, temp_path = temp_file(path, suffix)
+    os.close(handle)
+    try:
+        shutil.copyfile(source_path, temp_path)
+        replace_file(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,146 @@
+"""
+Build Governor - Opt-in memory ceiling for builds, checked before any work is done
+Compares a build's estimated peak memory with a budget from the config or
+from what the host (and its cgroup) still has available, then picks the
+in-memory build, the leaner streaming build or a clear rejection
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+RESOURCE_OPTIONS = ('max_bytes', 'streaming_bytes', 'headroom')
+# Builds estimated above this run in streaming mode even when memory is plentiful
+DEFAULT_STREAMING_BYTES = 256 * 1024 * 1024
+# Share of the available memory one build may take when max_bytes is not set
+DEFAULT_HEADROOM = 0.5
+
+MEMINFO = '/proc/meminfo'
+CGROUP_LIMIT = '/sys/fs/cgroup/memory.max'
+CGROUP_USAGE = '/sys/fs/cgroup/memory.current'
+
+
+class ResourceLimitError(ValueError):
+    """Raised before a build whose estimated peak memory does not fit the budget"""
+
+
+def format_bytes(count: float) -> str:
+    for unit in ('bytes', 'KB', 'MB', 'GB'):
+        if count < 1024 or unit == 'GB':
+            return f"{count:.0f} {unit}" if unit == 'bytes' else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def available_memory() -> Optional[int]:
+    """Bytes the host can still hand out, capped by the cgroup limit; None when unknown"""
+    available = None
+    try:
+        with open(MEMINFO) as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open(CGROUP_LIMIT) as f:
+            limit = f.read().strip()
+        if limit != 'max':
+            with open(CGROUP_USAGE) as f:
+                remaining = max(int(limit) - int(f.read()), 0)
+            available = remaining if available is None else min(available, remaining)
+    except (OSError, ValueError):
+        pass
+    return available
+
+
+class MemoryEstimate:
+    """Estimated peak bytes per item of a build (a sheet, the slides, the images), in both modes"""
+
+    __slots__ = ('items', 'streaming_items')
+
+    def __init__(self):
+        self.items: Dict[str, int] = {}
+        self.streaming_items: Dict[str, int] = {}
+
+    def add(self, item: str, in_memory: float, streaming: Optional[float] = None):
+        """Count an item; streaming defaults to the in-memory figure"""
+        streaming = in_memory if streaming is None else streaming
+        self.items[item] = self.items.get(item, 0) + int(in_memory)
+        self.streaming_items[item] = self.streaming_items.get(item, 0) + int(streaming)
+
+    @property
+    def total(self) -> int:
+        return sum(self.items.values())
+
+    @property
+    def streaming_total(self) -> int:
+        return sum(self.streaming_items.values())
+
+    def largest(self, streaming: bool = False) -> Tuple[str, int]:
+        items = self.streaming_items if streaming else self.items
+        return max(items.items(), key=lambda item: item[1], default=('nothing', 0))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'total_bytes': self.total, 'streaming_bytes': self.streaming_total, 'items': dict(self.items)}
+
+
+class ResourceGovernor:
+    """
+    Admits builds by estimated peak memory
+
+    The budget is max_bytes when given, otherwise headroom times the memory
+    available when the build starts, so concurrent builds on a shared host
+    see each other's usage. Without either (unknown platform) there is no
+    ceiling, only the switch to streaming.
+    """
+
+    __slots__ = ('max_bytes', 'streaming_bytes', 'headroom')
+
+    def __init__(self, max_bytes: Optional[int] = None, streaming_bytes: int = DEFAULT_STREAMING_BYTES,
+                 headroom: float = DEFAULT_HEADROOM):
+        self.max_bytes = max_bytes
+        self.streaming_bytes = streaming_bytes
+        self.headroom = headroom
+
+    @classmethod
+    def from_option(cls, option: Any) -> Optional['ResourceGovernor']:
+        """
+        Governor from a config option; builds without one are not governed
+
+        Args:
+            option: False/None (off), True (defaults) or a dict like
+                {"max_bytes": 2000000000, "streaming_bytes": 268435456, "headroom": 0.5}
+        """
+        if option is None or option is False:
+            return None
+        if option is True:
+            return cls()
+        if not isinstance(option, dict):
+            raise ValueError(f"Invalid resources option {option!r}")
+        unknown = [name for name in option if name not in RESOURCE_OPTIONS]
+        if unknown:
+            raise ValueError(f"Unknown resources option '{unknown[0]}', expected one of {', '.join(RESOURCE_OPTIONS)}")
+        return cls(option.get('max_bytes'), option.get('streaming_bytes', DEFAULT_STREAMING_BYTES),
+                   option.get('headroom', DEFAULT_HEADROOM))
+
+    def budget(self) -> Optional[int]:
+        if self.max_bytes is not None:
+            return self.max_bytes
+        available = available_memory()
+        return None if available is None else int(available * self.headroom)
+
+    def admit(self, estimate: MemoryEstimate) -> str:
+        """
+        'memory' or 'streaming' for a build
+
+        Raises ResourceLimitError when even the streaming build would not fit.
+        """
+        budget = self.budget()
+        if estimate.total <= self.streaming_bytes and (budget is None or estimate.total <= budget):
+            return 'memory'
+        if budget is None or estimate.streaming_total <= budget:
+            return 'streaming'
+        item, size = estimate.largest(streaming=True)
+        raise ResourceLimitError(
+            f"Build needs an estimated {format_bytes(estimate.streaming_total)} of memory but its budget is "
+            f"{format_bytes(budget)}; the largest part is {item} ({format_bytes(size)}). "
+            f"Split the data across builds or raise resources.max_bytes")
@@ -0,0 +1,36 @@
+"""
+Build Jobs - Runs engine builds on an executor for asyncio callers
+Each job builds in its own engine off the event loop, so one loop can await
+many builds at once; cancelling the awaiting task stops a thread-pool build
+at its next profiler phase
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+
+async def run_build(job: Callable[..., Any], *args, executor: Optional[Executor] = None) -> Any:
+    """
+    Await job(*args, cancel) on executor, the loop's default thread pool when None
+
+    cancel is a threading.Event set when the awaiting task is cancelled; the
+    task then waits for the job to stop, so no build is still writing files
+    once cancellation has gone through. Process pools cannot share the event:
+    their jobs get None, and cancelling only drops jobs that have not started.
+    """
+    cancel = None if isinstance(executor, ProcessPoolExecutor) else threading.Event()
+    future = asyncio.get_running_loop().run_in_executor(executor, job, *args, cancel)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        if cancel is None:
+            future.cancel()
+        else:
+            cancel.set()
+            await asyncio.wait([future])
+            if not future.cancelled():
+                # Retrieved so the job's BuildCancelled is not logged as unhandled
+                future.exception()
+        raise
@@ -0,0 +1,209 @@
+"""
+Build Profiler - Opt-in per-phase timing and counters for workbook and presentation builds
+Records wall time per build phase, per-sheet or per-slide counts and optional cProfile
+or tracemalloc captures, and reports them as a plain dictionary; phase
+boundaries double as the checkpoints where a cancelled build stops
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Any, Optional
+
+PROFILE_OPTIONS = ('cprofile', 'memory', 'top')
+
+
+class BuildCancelled(Exception):
+    """Raised at the next phase boundary once a build's cancel event is set"""
+
+
+class _Phase:
+    """Times one phase; nested phases are subtracted from their parent's self time"""
+
+    __slots__ = ('profiler', 'name', 'started', 'children', 'elapsed')
+
+    def __init__(self, profiler: 'BuildProfiler', name: str):
+        self.profiler = profiler
+        self.name = name
+        self.started = 0.0
+        self.children = 0.0
+        self.elapsed = 0.0
+
+    def __enter__(self) -> '_Phase':
+        self.profiler._stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.started
+        stack = self.profiler._stack
+        stack.pop()
+        if stack:
+            stack[-1].children += self.elapsed
+        stats = self.profiler.phases.setdefault(self.name, {'calls': 0, 'seconds': 0.0, 'self_seconds': 0.0})
+        stats['calls'] += 1
+        stats['seconds'] += self.elapsed
+        stats['self_seconds'] += self.elapsed - self.children
+        return False
+
+
+class _NullPhase:
+    """Shared no-op phase used while profiling is off"""
+
+    __slots__ = ()
+    elapsed = 0.0
+
+    def __enter__(self) -> '_NullPhase':
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class BuildProfiler:
+    """
+    Collects timings and counts for one build
+
+    A disabled profiler (the default) hands out a shared no-op phase, so the
+    instrumentation left in the engine costs one attribute check per phase,
+    plus one more while a cancel event is attached.
+    """
+
+    def __init__(self, enabled: bool = False, cprofile: bool = False, memory: bool = False, top: int = 20,
+                 cancel: Optional[threading.Event] = None):
+        self.enabled = enabled
+        self.cancel = cancel
+        self.cprofile = enabled and cprofile
+        self.memory = enabled and memory
+        self.top = top
+        self.operation = None
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.counts: Dict[str, int] = {}
+        self.items: List[Dict[str, Any]] = []
+        self._stack: List[_Phase] = []
+        self._started = 0.0
+        self._profile = None
+        self._owns_tracemalloc = False
+
+    @classmethod
+    def from_option(cls, option: Any, cancel: Optional[threading.Event] = None) -> 'BuildProfiler':
+        """
+        Profiler from a config or CLI option
+
+        Args:
+            option: False/None (off), True (timings only), a comma separated
+                string or list such as 'cprofile,memory', or a dict like
+                {"cprofile": true, "memory": true, "top": 20}
+            cancel: Optional event that stops the build at its next phase
+        """
+        if not option:
+            return cls(cancel=cancel)
+        if option is True:
+            return cls(enabled=True, cancel=cancel)
+        if isinstance(option, str):
+            option = [name.strip() for name in option.split(',') if name.strip()]
+        if isinstance(option, (list, tuple)):
+            option = {name: True for name in option}
+        if not isinstance(option, dict):
+            raise ValueError(f"Invalid profile option {option!r}")
+
+        unknown = [name for name in option if name not in PROFILE_OPTIONS]
+        if unknown:
+            raise ValueError(f"Unknown profile option '{unknown[0]}', expected one of {', '.join(PROFILE_OPTIONS)}")
+        return cls(enabled=True, cprofile=bool(option.get('cprofile')), memory=bool(option.get('memory')),
+                   top=int(option.get('top', 20)), cancel=cancel)
+
+    def start(self, operation: str):
+        """Begin a build; starts cProfile / tracemalloc when requested"""
+        if not self.enabled:
+            return
+        self.operation = operation
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self.cprofile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._started = time.perf_counter()
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """End the build and return the report, or None when profiling is off"""
+        if not self.enabled:
+            return None
+        total = time.perf_counter() - self._started
+        report = {
+            'operation': self.operation,
+            'total_seconds': total,
+            'phases': self.phases,
+            'counts': self.counts,
+            'items': self.items
+        }
+
+        if self._profile is not None:
+            self._profile.disable()
+            stream = io.StringIO()
+            pstats.Stats(self._profile, stream=stream).sort_stats('cumulative').print_stats(self.top)
+            report['cprofile'] = stream.getvalue()
+            self._profile = None
+
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            top_lines = tracemalloc.take_snapshot().statistics('lineno')[:self.top]
+            report['memory'] = {
+                'current_bytes': current,
+                'peak_bytes': peak,
+                'top': [str(stat) for stat in top_lines]
+            }
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+
+        return report
+
+    def phase(self, name: str):
+        """Context manager timing one phase; its .elapsed is set on exit"""
+        if self.cancel is not None and self.cancel.is_set():
+            raise BuildCancelled(f"Build cancelled before phase '{name}'")
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def count(self, name: str, amount: int = 1):
+        """Add to a build-wide counter such as sheets, cells or slides"""
+        if self.enabled:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def record(self, kind: str, name: str, seconds: float, **counts):
+        """Record one built item (e.g. a sheet or slide) with its time and counts"""
+        if self.enabled:
+            self.items.append(dict({'kind': kind, 'name': name, 'seconds': seconds}, **counts))
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Human-readable rendering of a profiler report for the CLI"""
+    lines = [f"Profile: {report['operation']} ({report['total_seconds']:.3f}s)",
+             f"  {'phase':<24}{'calls':>7}{'total (s)':>12}{'self (s)':>12}"]
+    ordered = sorted(report['phases'].items(), key=lambda item: item[1]['self_seconds'], reverse=True)
+    for name, stats in ordered:
+        lines.append(f"  {name:<24}{stats['calls']:>7}{stats['seconds']:>12.4f}{stats['self_seconds']:>12.4f}")
+
+    if report['counts']:
+        lines.append("  counts: " + ", ".join(f"{name}={value}" for name, value in report['counts'].items()))
+    for item in report['items']:
+        extra = ", ".join(f"{key}={value}" for key, value in item.items() if key not in ('kind', 'name', 'seconds'))
+        lines.append(f"  {item['kind']} {item['name']}: {item['seconds']:.4f}s" + (f" ({extra})" if extra else ""))
+
+    if 'memory' in report:
+        memory = report['memory']
+        lines.append(f"  memory: peak {memory['peak_bytes'] / 1048576:.1f} MB, "
+                     f"current {memory['current_bytes'] / 1048576:.1f} MB")
+        lines.extend(f"    {line}" for line in memory['top'])
+    if 'cprofile' in report:
+        lines.append(report['cprofile'])
+    return "\n".join(lines)
@@ -0,0 +1,156 @@
+"""
+Chart Data Reduction - Downsampling and period aggregation for chart series
+Keeps charts over very large ranges light enough to open and render quickly
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+AGGREGATE_PERIODS = {
+    'day': 'D',
+    'week': 'W',
+    'month': 'M',
+    'quarter': 'Q',
+    'year': 'Y'
+}
+AGGREGATE_FUNCS = ('sum', 'mean', 'min', 'max', 'count', 'first', 'last')
+
+
+def _to_float_array(values: Sequence[Any]) -> np.ndarray:
+    """Numeric view of a series; blanks and text become NaN"""
+    return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float)
+
+
+def x_positions(categories: Optional[Sequence[Any]], length: int) -> np.ndarray:
+    """X coordinates for triangle areas: numeric or date categories, else the point index"""
+    if categories is not None and len(categories) == length:
+        if all(isinstance(c, (int, float)) and not isinstance(c, bool) for c in categories):
+            return np.asarray(categories, dtype=float)
+        if all(isinstance(c, (date, datetime)) for c in categories):
+            return pd.to_datetime(pd.Series(categories)).astype('int64').to_numpy(dtype=float)
+    return np.arange(length, dtype=float)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets point selection
+
+    Returns sorted indices of the points to keep. The first and last points
+    are always kept; every bucket in between contributes the point forming the
+    largest triangle with the previously kept point and the next bucket's mean.
+    """
+    length = len(y)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+
+    y = np.nan_to_num(y)
+    every = (length - 2) / (threshold - 2)
+    keep = np.empty(threshold, dtype=int)
+    keep[0] = 0
+    keep[-1] = length - 1
+    previous = 0
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_start = min(end, length - 1)
+        next_end = min(int((bucket + 2) * every) + 1, length)
+        avg_x = x[next_start:max(next_end, next_start + 1)].mean()
+        avg_y = y[next_start:max(next_end, next_start + 1)].mean()
+
+        px, py = x[previous], y[previous]
+        areas = np.abs((px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py))
+        previous = start + int(np.argmax(areas))
+        keep[bucket + 1] = previous
+
+    return np.unique(keep)
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Keep the minimum and maximum of each bucket, preserving peaks and troughs"""
+    length = len(y)
+    if max_points >= length or max_points < 4:
+        return np.arange(length)
+
+    filled = np.nan_to_num(y)
+    buckets = np.array_split(np.arange(1, length - 1), (max_points - 2) // 2)
+    keep = [0, length - 1]
+    for bucket in buckets:
+        if len(bucket):
+            segment = filled[bucket]
+            keep.append(bucket[int(np.argmin(segment))])
+            keep.append(bucket[int(np.argmax(segment))])
+    return np.unique(np.asarray(keep, dtype=int))
+
+
+def downsample(categories: Optional[List[Any]], series: List[List[Any]], method: str = 'lttb',
+               max_points: int = 1000) -> Tuple[Optional[List[Any]], List[List[Any]]]:
+    """
+    Reduce every series to roughly max_points shared points
+
+    Each series picks its own points and the union is kept, so all series
+    still line up against one category axis.
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsample method '{method}', expected one of {', '.join(DOWNSAMPLE_METHODS)}")
+
+    length = max((len(values) for values in series), default=0)
+    if length <= max_points:
+        return categories, series
+
+    per_series = max(max_points // max(len(series), 1), 4)
+    x = x_positions(categories, length)
+    keep = np.zeros(0, dtype=int)
+    for values in series:
+        y = _to_float_array(values)
+        if method == 'lttb':
+            chosen = lttb_indices(x[:len(y)], y, per_series)
+        else:
+            chosen = minmax_indices(y, per_series)
+        keep = np.union1d(keep, chosen)
+
+    reduced = [[values[i] for i in keep if i < len(values)] for values in series]
+    reduced_categories = [categories[i] for i in keep] if categories is not None else None
+    return reduced_categories, reduced
+
+
+def aggregate(categories: List[Any], series: List[List[Any]], period: str = 'month',
+              func: str = 'sum') -> Tuple[List[Any], List[List[Any]]]:
+    """Roll series up by calendar period of their date categories"""
+    if period not in AGGREGATE_PERIODS:
+        raise ValueError(f"Unknown aggregate period '{period}', expected one of {', '.join(AGGREGATE_PERIODS)}")
+    if func not in AGGREGATE_FUNCS:
+        raise ValueError(f"Unknown aggregate function '{func}', expected one of {', '.join(AGGREGATE_FUNCS)}")
+
+    dates = pd.to_datetime(pd.Series(categories), errors='coerce')
+    if dates.isna().all():
+        raise ValueError("Period aggregation needs date categories")
+
+    frame = pd.DataFrame({f's{i}': _to_float_array(values) for i, values in enumerate(series)})
+    frame['period'] = dates.dt.to_period(AGGREGATE_PERIODS[period])
+    grouped = frame.dropna(subset=['period']).groupby('period', sort=True).agg(func)
+
+    labels = [str(label) for label in grouped.index]
+    return labels, [grouped[f's{i}'].tolist() for i in range(len(series))]
+
+
+def reduce_series(categories: Optional[List[Any]], series: List[List[Any]],
+                  chart_config: Dict) -> Tuple[Optional[List[Any]], List[List[Any]]]:
+    """Apply the chart's 'aggregate' then 'downsample' options, in that order"""
+    if 'aggregate' in chart_config:
+        options = chart_config['aggregate']
+        if categories is None:
+            raise ValueError("Period aggregation needs a categories_range")
+        categories, series = aggregate(categories, series, options.get('period', 'month'),
+                                       options.get('func', 'sum'))
+
+    if 'downsample' in chart_config:
+        options = chart_config['downsample']
+        categories, series = downsample(categories, series, options.get('method', 'lttb'),
+                                        options.get('max_points', 1000))
+
+    return categories, series
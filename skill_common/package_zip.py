@@ -0,0 +1,315 @@
+"""
+Package Zip - Parallel OPC package (.xlsx / .pptx) writer with a compression level per part type
+Deflates the parts of a package on a thread pool (zlib releases the GIL) at the
+level chosen for their type, then assembles the zip archive from the finished
+streams; media that is already compressed is stored as is, and parts produced
+chunk by chunk are compressed while they are written
+"""
+
+import os
+import posixpath
+import struct
+import time
+import zipfile
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, List, Optional, Tuple
+
+from .atomic_files import replace_file, temp_file
+
+COMPRESSION_OPTIONS = ('xml', 'media', 'default', 'threads')
+COMPRESSION_PRESETS = {
+    'fast': {'xml': 1, 'media': 0, 'default': 1},
+    'balanced': {'xml': 6, 'media': 0, 'default': 6},
+    'small': {'xml': 9, 'media': 9, 'default': 9},
+    'store': {'xml': 0, 'media': 0, 'default': 0},
+}
+DEFAULT_THREADS = 4
+XML_EXTENSIONS = ('.xml', '.rels', '.vml')
+MEDIA_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.jpe', '.jfif', '.gif', '.tif', '.tiff', '.wdp',
+                    '.mp3', '.m4a', '.mp4', '.m4v', '.mov', '.wmv', '.avi')
+
+# Parts larger than this are deflated in blocks, so one big part still uses every thread
+BLOCK_SIZE = 1 << 20
+# Each block is primed with the tail of the previous one, so splitting costs almost no size
+WINDOW_SIZE = 1 << 15
+ZIP32_LIMIT = 0xFFFFFFFF
+
+LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+# CRC and sizes of a local header, patched after a streamed part
+SIZES = struct.Struct('<3L')
+SIZES_OFFSET = 14
+CENTRAL_HEADER = struct.Struct('<4s4B4HL2L5H2L')
+END_RECORD = struct.Struct('<4s4H2LH')
+ZIP_VERSION = 20
+UTF8_FLAG = 0x800
+
+
+class CompressionPolicy:
+    """Deflate level per part type (0 stores the part) and the number of compression threads"""
+
+    __slots__ = ('xml', 'media', 'default', 'threads')
+
+    def __init__(self, xml: int = 6, media: int = 0, default: int = 6, threads: Optional[int] = None):
+        for name, level in (('xml', xml), ('media', media), ('default', default)):
+            if isinstance(level, bool) or not isinstance(level, int) or not 0 <= level <= 9:
+                raise ValueError(f"Compression level '{name}' must be an integer from 0 to 9, got {level!r}")
+        if threads is None:
+            threads = min(DEFAULT_THREADS, os.cpu_count() or 1)
+        if isinstance(threads, bool) or not isinstance(threads, int) or threads < 1:
+            raise ValueError(f"Compression threads must be a positive integer, got {threads!r}")
+        self.xml = xml
+        self.media = media
+        self.default = default
+        self.threads = threads
+
+    @classmethod
+    def from_option(cls, option: Any) -> Optional['CompressionPolicy']:
+        """
+        Policy from a config option
+
+        Args:
+            option: None (the writer's defaults), a preset name ('fast',
+                'balanced', 'small' or 'store') or a dict like
+                {"xml": 1, "media": 0, "default": 6, "threads": 4}
+        """
+        if option is None:
+            return None
+        if isinstance(option, str):
+            if option not in COMPRESSION_PRESETS:
+                raise ValueError(f"Unknown compression preset '{option}', "
+                                 f"expected one of {', '.join(COMPRESSION_PRESETS)}")
+            return cls(**COMPRESSION_PRESETS[option])
+        if not isinstance(option, dict):
+            raise ValueError(f"Invalid compression option {option!r}")
+        unknown = [name for name in option if name not in COMPRESSION_OPTIONS]
+        if unknown:
+            raise ValueError(f"Unknown compression option '{unknown[0]}', "
+                             f"expected one of {', '.join(COMPRESSION_OPTIONS)}")
+        return cls(**option)
+
+    def level(self, name: str) -> int:
+        """Deflate level for a part, by its extension"""
+        extension = posixpath.splitext(name)[1].lower()
+        if extension in XML_EXTENSIONS:
+            return self.xml
+        if extension in MEDIA_EXTENSIONS:
+            return self.media
+        return self.default
+
+
+def _deflate(data: bytes, level: int, start: int = 0, stop: Optional[int] = None) -> bytes:
+    """
+    Raw deflate stream of data[start:stop]
+
+    A block that is not the last ends with a sync flush, which leaves the
+    stream byte aligned and unfinished, so the blocks of a part concatenate
+    into one valid stream.
+    """
+    stop = len(data) if stop is None else stop
+    if start:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=data[max(0, start - WINDOW_SIZE):start])
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    body = compressor.compress(memoryview(data)[start:stop])
+    return body + compressor.flush(zlib.Z_FINISH if stop == len(data) else zlib.Z_SYNC_FLUSH)
+
+
+def _dos_time(timestamp: float) -> Tuple[int, int]:
+    moment = time.localtime(timestamp)
+    return ((moment.tm_hour << 11) | (moment.tm_min << 5) | (moment.tm_sec // 2),
+            ((max(moment.tm_year, 1980) - 1980) << 9) | (moment.tm_mon << 5) | moment.tm_mday)
+
+
+class _Part:
+    """One archive member: its stored or deflated blocks and the header fields"""
+
+    __slots__ = ('name', 'flags', 'level', 'method', 'crc', 'size', 'blocks', 'offset', 'compressed_size')
+
+    def __init__(self, name: str, level: int):
+        self.name = name.encode('utf-8')
+        self.flags = 0 if name.isascii() else UTF8_FLAG
+        self.level = level
+        self.method = zipfile.ZIP_STORED if level == 0 else zipfile.ZIP_DEFLATED
+        self.crc = 0
+        self.size = 0
+        self.blocks: List[Any] = []
+        self.offset = 0
+        self.compressed_size = 0
+
+    def compress(self, data: bytes, pool: Optional[ThreadPoolExecutor]):
+        """Deflate data now, or hand its blocks to the pool"""
+        self.crc = zlib.crc32(data)
+        self.size = len(data)
+        if self.level == 0:
+            self.blocks = [data]
+            return
+        bounds = list(range(0, len(data), BLOCK_SIZE)) or [0]
+        if pool is None:
+            self.blocks = [_deflate(data, self.level)]
+        elif len(bounds) == 1:
+            self.blocks = [pool.submit(_deflate, data, self.level)]
+        else:
+            self.blocks = [pool.submit(_deflate, data, self.level, start, min(start + BLOCK_SIZE, len(data)))
+                           for start in bounds]
+
+
+class _Archive:
+    """Zip archive being written: local entries as parts are ready, the central directory last"""
+
+    def __init__(self, out, policy: CompressionPolicy, pool: Optional[ThreadPoolExecutor]):
+        self.out = out
+        self.policy = policy
+        self.pool = pool
+        self.parts: List[_Part] = []
+        self.pending: List[_Part] = []
+        self.position = 0
+        self.time_field, self.date_field = _dos_time(time.time())
+
+    def add(self, name: str, data: Any):
+        """Queue bytes for the pool, or stream an iterable of chunks once the queue is written"""
+        part = _Part(name, self.policy.level(name))
+        if not isinstance(data, bytes):
+            self.flush()
+            self.write_stream(part, data)
+            return
+        part.compress(data, self.pool)
+        self.pending.append(part)
+        # Write finished parts right away, so compressed parts do not pile up
+        while self.pending and not any(isinstance(block, Future) and not block.done()
+                                       for block in self.pending[0].blocks):
+            self.write(self.pending.pop(0))
+
+    def flush(self):
+        for part in self.pending:
+            self.write(part)
+        self.pending = []
+
+    def _local_header(self, part: _Part) -> bytes:
+        return LOCAL_HEADER.pack(b'PK\x03\x04', ZIP_VERSION, 0, part.flags, part.method, self.time_field,
+                                 self.date_field, part.crc, part.compressed_size, part.size, len(part.name), 0)
+
+    def _finish(self, part: _Part, header: bytes):
+        if max(part.size, part.compressed_size, part.offset) > ZIP32_LIMIT:
+            raise ValueError(f"Part '{part.name.decode('utf-8')}' does not fit a zip32 archive")
+        self.position += len(header) + len(part.name) + part.compressed_size
+        self.parts.append(part)
+
+    def write(self, part: _Part):
+        """Write a part whose blocks are compressed or being compressed"""
+        part.offset = self.position
+        blocks = [block.result() if isinstance(block, Future) else block for block in part.blocks]
+        part.blocks = []
+        part.compressed_size = sum(len(block) for block in blocks)
+        header = self._local_header(part)
+        self.out.write(header)
+        self.out.write(part.name)
+        for block in blocks:
+            self.out.write(block)
+        self._finish(part, header)
+
+    def write_stream(self, part: _Part, chunks: Iterable[bytes]):
+        """
+        Write a part produced chunk by chunk, never holding all of it
+
+        The local header is written with placeholder sizes and patched once
+        the last chunk is compressed.
+        """
+        part.offset = self.position
+        header = self._local_header(part)
+        self.out.write(header)
+        self.out.write(part.name)
+        compressor = zlib.compressobj(part.level, zlib.DEFLATED, -15) if part.level else None
+        for chunk in chunks:
+            part.crc = zlib.crc32(chunk, part.crc)
+            part.size += len(chunk)
+            body = compressor.compress(chunk) if compressor is not None else chunk
+            self.out.write(body)
+            part.compressed_size += len(body)
+        if compressor is not None:
+            tail = compressor.flush()
+            self.out.write(tail)
+            part.compressed_size += len(tail)
+        self._finish(part, header)
+        self.out.seek(part.offset + SIZES_OFFSET)
+        self.out.write(SIZES.pack(part.crc, part.compressed_size, part.size))
+        self.out.seek(0, os.SEEK_END)
+
+    def close(self):
+        """Write the queued parts, the central directory and the end record"""
+        self.flush()
+        directory_offset = self.position
+        for part in self.parts:
+            header = CENTRAL_HEADER.pack(b'PK\x01\x02', ZIP_VERSION, 0, ZIP_VERSION, 0, part.flags, part.method,
+                                         self.time_field, self.date_field, part.crc, part.compressed_size,
+                                         part.size, len(part.name), 0, 0, 0, 0, 0, part.offset)
+            self.out.write(header)
+            self.out.write(part.name)
+            self.position += len(header) + len(part.name)
+        if len(self.parts) > 0xFFFF or self.position > ZIP32_LIMIT:
+            raise ValueError("Package does not fit a zip32 archive")
+        self.out.write(END_RECORD.pack(b'PK\x05\x06', 0, 0, len(self.parts), len(self.parts),
+                                       self.position - directory_offset, directory_offset, 0))
+
+
+class PackageArchive:
+    """
+    Package written part by part: add() parts in archive order inside a with block
+
+    Byte parts are handed to the thread pool as they come and written in
+    order as their streams finish; a part given as an iterable of chunks is
+    compressed and written as it is produced, on the calling thread. Without
+    a pool only one part is held at a time. The archive goes to a temp file
+    (named with suffix, by default output_path's extension) that replaces
+    output_path, keeping its mode, when the block ends without an error.
+    """
+
+    def __init__(self, output_path: str, policy: Optional[CompressionPolicy] = None, suffix: Optional[str] = None):
+        self.output_path = output_path
+        self.policy = policy or CompressionPolicy()
+        self.suffix = (os.path.splitext(output_path)[1] or '.tmp') if suffix is None else suffix
+        self._temp_path = None
+        self._out = None
+        self._pool = None
+        self._archive = None
+
+    def __enter__(self) -> 'PackageArchive':
+        handle, self._temp_path = temp_file(self.output_path, self.suffix)
+        self._out = os.fdopen(handle, 'wb')
+        self._pool = ThreadPoolExecutor(self.policy.threads) if self.policy.threads > 1 else None
+        self._archive = _Archive(self._out, self.policy, self._pool)
+        return self
+
+    def add(self, entry: Any, data: Any):
+        """Add a part by name or ZipInfo, as bytes or an iterable of byte chunks"""
+        self._archive.add(entry.filename if isinstance(entry, zipfile.ZipInfo) else entry, data)
+
+    def __exit__(self, exc_type, *exc_info):
+        try:
+            try:
+                if exc_type is None:
+                    self._archive.close()
+            finally:
+                self._out.close()
+                if self._pool is not None:
+                    self._pool.shutdown(cancel_futures=True)
+        except BaseException:
+            os.remove(self._temp_path)
+            raise
+        if exc_type is None:
+            replace_file(self._temp_path, self.output_path)
+        else:
+            os.remove(self._temp_path)
+        return False
+
+
+def write_package(entries: Iterable[Tuple[Any, Any]], output_path: str,
+                  policy: Optional[CompressionPolicy] = None, suffix: Optional[str] = None):
+    """
+    Write a zip package from (name or ZipInfo, bytes or chunks) entries in archive order
+
+    Entries are consumed lazily; see PackageArchive for how parts are compressed.
+    """
+    with PackageArchive(output_path, policy, suffix) as package:
+        for entry, data in entries:
+            package.add(entry, data)
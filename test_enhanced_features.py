@@ -7,6 +7,7 @@ Verifies that all new functionality works correctly
 import sys
 import os
 import json
+from datetime import datetime
 from pathlib import Path
 
 def test_imports():
@@ -283,6 +284,1454 @@ def test_conditional_formatting():
         print(f"❌ Conditional formatting test failed: {e}")
         return False
 
+def test_rule_based_styling():
+    """Test that table styling is emitted as range-level rules"""
+    print("\n" + "="*60)
+    print("Testing Rule-Based Table Styling...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        from excel_master_enhanced import EnhancedExcelMaster
+        from openpyxl import load_workbook
+
+        master = EnhancedExcelMaster()
+
+        config = {
+            "theme": "ocean_breeze",
+            "output_path": "test_output/rule_styling_test.xlsx",
+            "sheets": [
+                {
+                    "name": "Progress",
+                    "type": "data",
+                    "headers": ["Task", "Progress"],
+                    "data": [[f"Task {i}", (i % 10) / 10] for i in range(2000)],
+                    "conditional_formatting": [
+                        {
+                            "type": "thresholds",
+                            "range": "B2:B2001",
+                            "bands": [
+                                {"min": 1.0, "color": "FF00FF00"},
+                                {"min": 0.5, "color": "FFFFFF00"},
+                                {"color": "FFFF0000"}
+                            ]
+                        }
+                    ]
+                }
+            ]
+        }
+
+        os.makedirs("test_output", exist_ok=True)
+        result = master.create_workbook(config)
+        sheet = load_workbook(result)["Progress"]
+
+        rule_count = sum(len(cf.rules) for cf in sheet.conditional_formatting)
+        print(f"✅ {rule_count} conditional formatting rules for 2000 rows")
+
+        cells = (sheet["A2"], sheet["B2001"])
+        if any(cell.fill.fill_type or cell.border.left.style for cell in cells):
+            print("❌ Data cells still carry static styles")
+            return False
+        aligned = all(cell.alignment.horizontal == "left" and cell.alignment.vertical == "center" for cell in cells)
+        print(f"✅ Banding and borders expressed without per-cell styles, column alignment kept: {aligned}")
+
+        # Table and config banding on one sheet never share a priority
+        config["output_path"] = "test_output/rule_styling_banded.xlsx"
+        config["sheets"][0]["conditional_formatting"].append({"type": "banding", "range": "A2:B2001", "every": 3})
+        banded = load_workbook(master.create_workbook(config))["Progress"]
+        priorities = [rule.priority for cf in banded.conditional_formatting for rule in cf.rules]
+        print(f"✅ Rule priorities: {sorted(priorities)}")
+
+        return rule_count == 5 and aligned and len(set(priorities)) == len(priorities) == 6
+
+    except Exception as e:
+        print(f"❌ Rule-based styling test failed: {e}")
+        return False
+
+def test_chart_downsampling():
+    """Test that large chart series are reduced into the hidden helper sheet"""
+    print("\n" + "="*60)
+    print("Testing Chart Downsampling and Aggregation...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        from excel_master_enhanced import EnhancedExcelMaster
+        from openpyxl import load_workbook
+        from datetime import date, timedelta
+
+        master = EnhancedExcelMaster()
+
+        start = date(2024, 1, 1)
+        config = {
+            "theme": "corporate_blue",
+            "output_path": "test_output/chart_downsampling_test.xlsx",
+            "sheets": [
+                {
+                    "name": "Transactions",
+                    "type": "data",
+                    "headers": ["Date", "Amount"],
+                    "data": [[start + timedelta(hours=i), (i * 37) % 1000] for i in range(20000)],
+                    "charts": [
+                        {
+                            "type": "line",
+                            "title": "Amount (LTTB)",
+                            "data_range": "Transactions!B1:B20001",
+                            "categories_range": "Transactions!A2:A20001",
+                            "downsample": {"method": "lttb", "max_points": 500}
+                        },
+                        {
+                            "type": "bar",
+                            "title": "Monthly Amount",
+                            "data_range": "Transactions!B1:B20001",
+                            "categories_range": "Transactions!A2:A20001",
+                            "aggregate": {"period": "month", "func": "sum"},
+                            "position": "H25"
+                        }
+                    ]
+                }
+            ]
+        }
+
+        os.makedirs("test_output", exist_ok=True)
+        result = master.create_workbook(config)
+        helper = load_workbook(result)["_chart_data"]
+
+        print(f"✅ Helper sheet is {helper.sheet_state} with {helper.max_row - 1} reduced rows")
+
+        # Formula series are charted from their source cells, never copied to the helper sheet
+        config["output_path"] = "test_output/chart_downsampling_formulas.xlsx"
+        config["sheets"][0]["data"] = [[start + timedelta(hours=i), f"=ROW()*{i % 7}"] for i in range(20000)]
+        config["sheets"][0]["charts"] = config["sheets"][0]["charts"][:1]
+        master.create_workbook(config)
+        formulas = load_workbook(config["output_path"])
+        reference = formulas["Transactions"]._charts[0].series[0].val.numRef.f
+        print(f"✅ Formula series reads {reference}, helper sheet: {'_chart_data' in formulas.sheetnames}")
+
+        return (helper.sheet_state == "hidden" and helper.max_row <= 501
+                and reference == "'Transactions'!$B$2:$B$20001" and "_chart_data" not in formulas.sheetnames)
+
+    except Exception as e:
+        print(f"❌ Chart downsampling test failed: {e}")
+        return False
+
+def test_chart_planner():
+    """Test cross-sheet multi-series charts and up-front reference validation"""
+    print("\n" + "="*60)
+    print("Testing Chart Planner...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        from excel_master_enhanced import EnhancedExcelMaster, ChartReferenceError
+
+        master = EnhancedExcelMaster()
+
+        sheets = [
+            {
+                "name": "Dashboard",
+                "type": "dashboard",
+                "charts": [
+                    {
+                        "type": "line",
+                        "title": "Revenue vs Costs",
+                        "categories_range": "Revenue!A2:A4",
+                        "series": [
+                            {"values": "Revenue!B2:B4", "title": "Revenue"},
+                            {"values": "Cost Center!B2:B4", "title_ref": "Cost Center!B1"}
+                        ]
+                    }
+                ]
+            },
+            {"name": "Revenue", "headers": ["Month", "Revenue"], "data": [["Jan", 10], ["Feb", 12], ["Mar", 15]]},
+            {"name": "Cost Center", "headers": ["Month", "Costs"], "data": [["Jan", 7], ["Feb", 8], ["Mar", 8]]}
+        ]
+
+        os.makedirs("test_output", exist_ok=True)
+        result = master.create_workbook({"output_path": "test_output/chart_planner_test.xlsx", "sheets": sheets})
+        print(f"✅ Built multi-series cross-sheet chart: {result}")
+
+        sheets[0]["charts"][0]["series"][1]["values"] = "Cost Centre!B2:B4"
+        try:
+            master.create_workbook({"output_path": "test_output/chart_planner_bad.xlsx", "sheets": sheets})
+        except ChartReferenceError as e:
+            print(f"✅ Bad reference rejected before building: {e.problems[0]}")
+            return not os.path.exists("test_output/chart_planner_bad.xlsx")
+
+        print("❌ Bad reference was not rejected")
+        return False
+
+    except Exception as e:
+        print(f"❌ Chart planner test failed: {e}")
+        return False
+
+def test_dashboard_kpis():
+    """Test dashboard KPIs computed from source sheets"""
+    print("\n" + "="*60)
+    print("Testing Dashboard KPIs...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        from excel_master_enhanced import EnhancedExcelMaster
+        from openpyxl import load_workbook
+
+        master = EnhancedExcelMaster()
+
+        sheets = [
+            {
+                "name": "Dashboard",
+                "type": "dashboard",
+                "kpis": [
+                    {"name": "Revenue", "source": "Sales", "column": "Revenue", "agg": "sum", "format": "$#,##0",
+                     "change": {"agg": "pop_change", "period": "month", "date_column": "Date"}},
+                    {"name": "Avg Order", "source": "Sales", "column": "Revenue", "agg": "mean"},
+                    {"name": "Orders", "source": "Sales", "column": "Revenue", "agg": "count"}
+                ]
+            },
+            {
+                "name": "Sales",
+                "headers": ["Date", "Revenue"],
+                "data": [["2024-01-05", 100], ["2024-01-20", 100], ["2024-02-03", 150], ["2024-02-17", 150]]
+            }
+        ]
+
+        result = master.create_workbook({"output_path": "test_output/dashboard_kpis_test.xlsx", "sheets": sheets})
+        dashboard = load_workbook(result)["Dashboard"]
+        values = (dashboard["A5"].value, dashboard["C5"].value, dashboard["E5"].value, dashboard["A6"].value)
+        print(f"✅ KPI values: {values} in {master.kpi_aggregator.passes} pass(es)")
+
+        return values == (500, 125, 4, 0.5) and master.kpi_aggregator.passes == 1
+
+    except Exception as e:
+        print(f"❌ Dashboard KPI test failed: {e}")
+        return False
+
+def test_build_profiling():
+    """Test opt-in per-phase profiling of Excel and PPT builds"""
+    print("\n" + "="*60)
+    print("Testing Build Profiling...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        from excel_master_enhanced import EnhancedExcelMaster
+        from ppt_creator_enhanced import EnhancedPPTCreator
+
+        master = EnhancedExcelMaster()
+        master.create_workbook({
+            "output_path": "test_output/profiled.xlsx",
+            "profile": True,
+            "sheets": [{"name": "Data", "headers": ["A", "B"], "data": [[1, 2], [3, 4]]}]
+        })
+        excel_report = master.last_profile
+        print(f"✅ Excel phases: {', '.join(excel_report['phases'])}")
+
+        creator = EnhancedPPTCreator()
+        creator.create_presentation({
+            "output_path": "test_output/profiled.pptx",
+            "profile": "cprofile",
+            "slides": [{"type": "title", "title": "Profiled"}, {"type": "content", "bullets": ["One"]}]
+        })
+        ppt_report = creator.last_profile
+        print(f"✅ PPT counts: {ppt_report['counts']}")
+
+        master.create_workbook({"output_path": "test_output/unprofiled.xlsx", "sheets": [{"name": "Data"}]})
+
+        return ('data_write' in excel_report['phases'] and 'save' in excel_report['phases']
+                and excel_report['counts']['cells'] == 6
+                and ppt_report['counts']['slides'] == 2 and 'cprofile' in ppt_report
+                and master.last_profile is None)
+
+    except Exception as e:
+        print(f"❌ Build profiling test failed: {e}")
+        return False
+
+def test_config_validation():
+    """Test config validation, compiled plan reuse and slide index normalization"""
+    print("\n" + "="*60)
+    print("Testing Config Validation...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        from excel_master_enhanced import EnhancedExcelMaster, ConfigError
+        from ppt_creator_enhanced import EnhancedPPTCreator
+
+        master = EnhancedExcelMaster()
+        try:
+            master.create_workbook({"sheet": [], "sheets": [{"name": "Data", "type": "dat"}]})
+            print("❌ Bad workbook config was not rejected")
+            return False
+        except ConfigError as e:
+            print(f"✅ Rejected workbook config with {len(e.problems)} problems")
+            rejected = len(e.problems) == 2
+
+        plan = master.compile_config({"sheets": [{"name": "Data", "headers": ["A"], "data": [[1], [2]]}]})
+        for index in range(2):
+            plan.output_path = f"test_output/compiled_plan_{index}.xlsx"
+            master.create_workbook(plan)
+        print("✅ Built one compiled plan twice")
+
+        creator = EnhancedPPTCreator()
+        creator.create_presentation({
+            "output_path": "test_output/validation_deck.pptx",
+            "slides": [{"type": "title", "title": "Deck"}, {"type": "content", "title": "Old"}]
+        })
+        result = creator.edit_presentation("test_output/validation_deck.pptx", {
+            "update_slides": {"1": {"title": "New"}},
+            "output_path": "test_output/validation_deck_edited.pptx"
+        })
+        from pptx import Presentation
+        title = Presentation(result).slides[1].shapes[0].text_frame.text
+        print(f"✅ JSON string slide index updated slide 1: {title}")
+
+        return rejected and os.path.exists("test_output/compiled_plan_1.xlsx") and title == "New"
+
+    except Exception as e:
+        print(f"❌ Config validation test failed: {e}")
+        return False
+
+def test_artifact_cache():
+    """Test that unchanged configs are served from the build cache"""
+    print("\n" + "="*60)
+    print("Testing Artifact Cache...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        import shutil
+        from excel_master_enhanced import EnhancedExcelMaster
+        from ppt_creator_enhanced import EnhancedPPTCreator
+        from workbook_cache import ArtifactCache
+        from PIL import Image
+
+        cache_dir = 'test_output/cache'
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        for path in ("test_output/cached.xlsx", "test_output/cached.pptx"):
+            if os.path.exists(path):
+                os.remove(path)
+
+        master = EnhancedExcelMaster()
+        workbook_hits = []
+        for value in (1, 1, 2):
+            master.create_workbook({
+                "output_path": "test_output/cached.xlsx",
+                "cache": {"dir": cache_dir},
+                "sheets": [{"name": "Data", "headers": ["A"], "data": [[value]]}]
+            })
+            workbook_hits.append(master.last_cache_hit)
+        print(f"✅ Workbook cache hits: {workbook_hits}")
+
+        image_path = 'test_output/cached_image.png'
+        Image.new('RGB', (20, 20), 'red').save(image_path)
+        config = {
+            "output_path": "test_output/cached.pptx",
+            "cache": cache_dir,
+            "slides": [{"type": "image", "title": "Cached", "image_path": image_path}]
+        }
+        creator = EnhancedPPTCreator()
+        deck_hits = []
+        for color in ('red', 'red', 'blue'):
+            Image.new('RGB', (20, 20), color).save(image_path)
+            creator.create_presentation(config)
+            deck_hits.append(creator.last_cache_hit)
+        print(f"✅ Presentation cache hits (image changed last): {deck_hits}")
+
+        umask = os.umask(0o022)
+        os.umask(umask)
+        modes = {oct(os.stat(os.path.join(cache_dir, name)).st_mode & 0o777) for name in os.listdir(cache_dir)}
+        for path in ("test_output/cached.xlsx", "test_output/cached.pptx"):
+            modes.add(oct(os.stat(path).st_mode & 0o777))
+        print(f"✅ Cache entries and outputs follow the umask: {modes}")
+        import pandas as pd
+        import presentation_cache
+        from skill_common import artifact_cache
+        shared = (issubclass(ArtifactCache, artifact_cache.ArtifactCache)
+                  and issubclass(presentation_cache.ArtifactCache, artifact_cache.ArtifactCache)
+                  and not any(os.path.exists(f"{skill}/scripts/{name}")
+                              for skill in ("excel-master-skill", "professional-ppt-skill")
+                              for name in ("artifact_cache.py", "atomic_files.py"))
+                  and artifact_cache.fingerprint(pd.DataFrame({"A": [1]}))
+                  != artifact_cache.fingerprint(pd.DataFrame({"A": [2]})))
+        print(f"✅ One cache implementation and fingerprint shared by both skills: {shared}")
+
+        ArtifactCache(cache_dir, max_bytes=0).evict()
+        evicted = not any(name.endswith('.xlsx') for name in os.listdir(cache_dir))
+        print(f"✅ Size-bounded eviction emptied the workbook cache: {evicted}")
+
+        return (workbook_hits == [False, True, False] and deck_hits == [False, True, False]
+                and os.path.exists("test_output/cached.xlsx") and evicted
+                and modes == {oct(0o666 & ~umask)} and shared)
+
+    except Exception as e:
+        print(f"❌ Artifact cache test failed: {e}")
+        return False
+
+def test_incremental_rebuild():
+    """Test that only changed sheets and their dependents are rebuilt"""
+    print("\n" + "="*60)
+    print("Testing Incremental Rebuild...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        from excel_master_enhanced import EnhancedExcelMaster
+        from xlsx_package import manifest_path
+        from openpyxl import load_workbook
+
+        output_path = "test_output/incremental.xlsx"
+        for path in (output_path, manifest_path(output_path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+        def config(sales, costs):
+            return {
+                "output_path": output_path,
+                "incremental": True,
+                "sheets": [
+                    {"name": "Sales", "headers": ["Month", "Sales"], "data": [["Jan", sales], ["Feb", 120]]},
+                    {"name": "Costs", "headers": ["Month", "Costs"], "data": [["Jan", costs], ["Feb", 80]]},
+                    {"name": "Dashboard", "type": "dashboard", "title": "Costs",
+                     "charts": [{"type": "bar", "data_range": "Costs!B1:B3", "categories_range": "Costs!A2:A3"}]}
+                ]
+            }
+
+        master = EnhancedExcelMaster()
+        reused = []
+        for sales, costs in ((100, 70), (100, 70), (110, 70), (110, 75)):
+            master.create_workbook(config(sales, costs))
+            reused.append(master.last_reused_sheets)
+        print(f"✅ Reused sheets per build: {reused}")
+
+        workbook = load_workbook(output_path)
+        values = (workbook["Sales"]["B2"].value, workbook["Costs"]["B2"].value)
+        charts = len(workbook["Dashboard"]._charts)
+        print(f"✅ Spliced workbook values {values}, dashboard charts {charts}")
+
+        # Removing or reordering sheets changes the file even though no sheet changed
+        layouts = []
+        for names in (["Sales", "Costs", "Dashboard"], ["Sales", "Dashboard", "Costs"], ["Dashboard", "Costs"]):
+            sheets = {sheet["name"]: sheet for sheet in config(110, 75)["sheets"]}
+            master.create_workbook(dict(config(110, 75), sheets=[sheets[name] for name in names]))
+            layouts.append((load_workbook(output_path).sheetnames, len(master.last_reused_sheets)))
+        print(f"✅ Sheet order after reordering and removing: {layouts}")
+
+        # Strings of rebuilt sheets are dropped from the kept table, and reused sheets follow the new indices
+        import zipfile
+        from shared_strings import SharedStrings
+        notes_path = "test_output/incremental_notes.xlsx"
+        for path in (notes_path, manifest_path(notes_path)):
+            if os.path.exists(path):
+                os.remove(path)
+        sizes = []
+        for build in range(5):
+            master.create_workbook({"output_path": notes_path, "incremental": True, "sheets": [
+                {"name": "Notes", "headers": ["Note"], "data": [[f"note {build}-{i}"] for i in range(4)]},
+                {"name": "Regions", "headers": ["Region", "Sales"], "data": [["North", 1], ["South", 2]]}]})
+            with zipfile.ZipFile(notes_path) as archive:
+                sizes.append(len(SharedStrings.from_xml(archive.read("xl/sharedStrings.xml"))))
+        notes = load_workbook(notes_path)
+        regions = [row[0].value for row in notes["Regions"].iter_rows(min_row=2)]
+        print(f"✅ Shared string table sizes {sizes}, reused sheet values {regions}")
+
+        return (reused == [[], ["Sales", "Costs", "Dashboard"], ["Costs", "Dashboard"], ["Sales"]]
+                and values == (110, 75) and charts == 1
+                and workbook["Sales"]["A1"].font.b
+                and layouts == [(["Sales", "Costs", "Dashboard"], 3), (["Sales", "Dashboard", "Costs"], 3),
+                                (["Dashboard", "Costs"], 2)]
+                and sizes == [6] * 5 and regions == ["North", "South"]
+                and notes["Notes"]["A2"].value == "note 4-0")
+
+    except Exception as e:
+        print(f"❌ Incremental rebuild test failed: {e}")
+        return False
+
+def test_incremental_slides():
+    """Test that only new or changed slides are rebuilt"""
+    print("\n" + "="*60)
+    print("Testing Incremental Slides...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        from ppt_creator_enhanced import EnhancedPPTCreator
+        from pptx_package import manifest_path
+        from pptx import Presentation
+        from PIL import Image
+
+        output_path = "test_output/incremental.pptx"
+        for path in (output_path, manifest_path(output_path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+        image_path = 'test_output/incremental_image.png'
+        Image.new('RGB', (20, 20), 'red').save(image_path)
+        slides = [{"type": "content", "title": f"Slide {i}", "bullets": [f"Point {i}"]} for i in range(5)]
+        slides.append({"type": "image", "title": "Picture", "image_path": image_path})
+
+        creator = EnhancedPPTCreator()
+        reused = []
+        for step in range(4):
+            if step == 2:
+                slides.insert(0, {"type": "title", "title": "Inserted"})
+            if step == 3:
+                Image.new('RGB', (30, 30), 'blue').save(image_path)
+            creator.create_presentation({"output_path": output_path, "incremental": True, "slides": slides})
+            reused.append(len(creator.last_reused_slides))
+        print(f"✅ Reused slides per build: {reused}")
+
+        prs = Presentation(output_path)
+        titles = [prs.slides[i].shapes[0].text_frame.text for i in (0, 1, 6)]
+        picture = [shape for shape in prs.slides[6].shapes if shape.shape_type == 13][0]
+        print(f"✅ Spliced deck titles {titles}, picture {picture.image.size}")
+
+        # An empty deck builds on the first incremental run, and again once its file is gone
+        empty_path = "test_output/incremental_empty.pptx"
+        for path in (empty_path, manifest_path(empty_path)):
+            if os.path.exists(path):
+                os.remove(path)
+        empty_built = []
+        for step in range(3):
+            if step == 2:
+                os.remove(empty_path)
+            creator.create_presentation({"output_path": empty_path, "incremental": True, "slides": []})
+            empty_built.append(os.path.exists(empty_path) and len(Presentation(empty_path).slides) == 0)
+        print(f"✅ Empty incremental deck built: {empty_built}")
+
+        return (reused == [0, 6, 6, 6] and len(prs.slides) == 7
+                and titles == ["Inserted", "Slide 0", "Picture"] and picture.image.size == (30, 30)
+                and empty_built == [True, True, True])
+
+    except Exception as e:
+        print(f"❌ Incremental slides test failed: {e}")
+        return False
+
+def test_append_rows():
+    """Test appending rows to an existing sheet without reloading the workbook"""
+    print("\n" + "="*60)
+    print("Testing Append Rows...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        from excel_master import ExcelMaster
+        from excel_master_enhanced import EnhancedExcelMaster
+        from openpyxl import load_workbook
+
+        master = ExcelMaster()
+        budget_path = master.create_spreadsheet("Create a budget tracker for monthly expenses",
+                                                "test_output/append_budget.xlsx")
+        master.append_rows(budget_path, "Budget_Tracker", [
+            [datetime(2024, 2, 1), "Food", "Lunch", -25.5, "Debit"],
+            [datetime(2024, 2, 2), "Salary", "Pay & bonus", 3000, "Credit"]
+        ])
+        sheet = load_workbook(budget_path)["Budget_Tracker"]
+        balances = (sheet["F6"].value, sheet["F7"].value)
+        ranges = sorted(str(cf.sqref) for cf in sheet.conditional_formatting)
+        print(f"✅ Running balance continued: {balances}, formatting ranges {ranges}")
+
+        enhanced = EnhancedExcelMaster()
+        sales_path = enhanced.create_workbook({
+            "output_path": "test_output/append_sales.xlsx",
+            "sheets": [{"name": "Sales", "headers": ["Month", "Sales"],
+                        "data": [["Jan", 100], ["Feb", 120]],
+                        "charts": [{"type": "line", "data_range": "Sales!B1:B3",
+                                    "categories_range": "Sales!A2:A3"}]}]
+        })
+        os.chmod(sales_path, 0o640)
+        enhanced.append_rows(sales_path, "Sales", [["Mar", 130], ["Apr", 150]])
+        mode = os.stat(sales_path).st_mode & 0o777
+        print(f"✅ Appended file keeps its mode: {oct(mode)}")
+        sales = load_workbook(sales_path)["Sales"]
+        series = sales._charts[0].series[0]
+        reference = series.val.numRef.f
+        print(f"✅ Chart series now reads {reference}")
+
+        return (balances == ("=F5+D6", "=F6+D7") and ranges == ["A1:I7", "A2:I7"]
+                and sheet["C7"].value == "Pay & bonus" and sheet["D6"].number_format == sheet["D5"].number_format
+                and sales["B5"].value == 150 and reference.endswith("$B$5")
+                and series.cat.numRef.f.endswith("$A$5") and mode == 0o640)
+
+    except Exception as e:
+        print(f"❌ Append rows test failed: {e}")
+        return False
+
+def test_columnar_sheets():
+    """Test that data sheets are written from typed columns, including DataFrames"""
+    print("\n" + "="*60)
+    print("Testing Columnar Sheet Data...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        import numpy as np
+        import pandas as pd
+        from excel_master_enhanced import EnhancedExcelMaster
+        from openpyxl import load_workbook
+
+        frame = pd.DataFrame({
+            "Region": pd.Categorical(["North", "South", "North", "East"]),
+            "Units": np.array([10, 20, 30, 40]),
+            "Price": [2.5, 3.0, np.nan, 4.25],
+            "Shipped": pd.date_range("2024-01-01", periods=4, freq="D")
+        })
+        master = EnhancedExcelMaster()
+        plan = master.compile_config({
+            "output_path": "test_output/columnar.xlsx",
+            "sheets": [
+                {"name": "Orders", "data": frame, "formats": {"Price": "#,##0.00"},
+                 "formulas": [{"cell": "C4", "formula": "=B4*0.1"}]},
+                {"name": "Log", "headers": ["Status", "Count"],
+                 "data": [["Open", 1], ["Closed", 2], ["Open", None]]}
+            ]
+        })
+        shared = np.shares_memory(plan.sheets[0].columns.columns[1].values, frame["Units"].to_numpy())
+        print(f"✅ DataFrame columns shared without copying: {shared}")
+        master.create_workbook(plan)
+
+        workbook = load_workbook("test_output/columnar.xlsx")
+        orders, log = workbook["Orders"], workbook["Log"]
+        headers = [cell.value for cell in orders[1]]
+        row = [cell.value for cell in orders[2]]
+        print(f"✅ Orders {headers}: {row}")
+        print(f"✅ Log rows: {[[cell.value for cell in row] for row in log.iter_rows(min_row=2)]}")
+
+        return (shared and headers == ["Region", "Units", "Price", "Shipped"]
+                and row == ["North", 10, 2.5, datetime(2024, 1, 1)]
+                and orders["C2"].number_format == "#,##0.00" and orders["C4"].value == "=B4*0.1"
+                and orders["C4"].number_format == "#,##0.00" and orders["D2"].is_date
+                and log["B4"].value is None and log["A4"].value == "Open"
+                and orders.column_dimensions["A"].width == 8)
+
+    except Exception as e:
+        print(f"❌ Columnar sheet test failed: {e}")
+        return False
+
+def test_shared_strings():
+    """Test the frequency-ordered shared string table of generated workbooks"""
+    print("\n" + "="*60)
+    print("Testing Shared Strings...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        import zipfile
+        from decimal import Decimal
+        from excel_master_enhanced import EnhancedExcelMaster
+        from shared_strings import SharedStrings
+        from openpyxl import load_workbook
+
+        table = SharedStrings()
+        ids = table.encode(["Debit", "Credit", "Debit", "Open", "Debit", "Credit"])
+        remap = table.freeze()
+        print(f"✅ Pre-encoded column: {remap[ids].tolist()}, table {table.strings}")
+
+        output_path = "test_output/shared_strings.xlsx"
+        master = EnhancedExcelMaster()
+        master.create_workbook({
+            "output_path": output_path,
+            "sheets": [{"name": "Ledger", "headers": ["Type", "Amount"],
+                        "data": [["Credit", 100], ["Debit", -20], ["Debit", -35], ["Debit", -5]]}]
+        })
+        master.append_rows(output_path, "Ledger", [["Transfer", 40], ["Debit", -10]])
+
+        with zipfile.ZipFile(output_path) as archive:
+            stored = SharedStrings.from_xml(archive.read("xl/sharedStrings.xml")).strings
+        values = [row[0].value for row in load_workbook(output_path)["Ledger"].iter_rows(min_row=2)]
+        print(f"✅ Workbook table {stored}, column values {values}")
+
+        # Decimals are numbers; values of other types are written (and counted) as their text
+        mixed_path = "test_output/shared_strings_mixed.xlsx"
+        master.create_workbook({
+            "output_path": mixed_path,
+            "sheets": [{"name": "Mixed", "headers": ["Amount", "Ref"],
+                        "data": [[Decimal("1.5"), complex(1, 2)], [Decimal("-0.25"), "Open"]]}]
+        })
+        master.append_rows(mixed_path, "Mixed", [[Decimal("2"), complex(0, 1)]])
+        mixed = [[cell.value for cell in row] for row in load_workbook(mixed_path)["Mixed"].iter_rows(min_row=2)]
+        print(f"✅ Decimal and other values: {mixed}")
+
+        return (remap[ids].tolist() == [0, 1, 0, 2, 0, 1] and table.strings == ["Debit", "Credit", "Open"]
+                and stored == ["Debit", "Credit", "Transfer"]
+                and values == ["Credit", "Debit", "Debit", "Debit", "Transfer", "Debit"]
+                and mixed == [[1.5, "(1+2j)"], [-0.25, "Open"], [2, "1j"]])
+
+    except Exception as e:
+        print(f"❌ Shared strings test failed: {e}")
+        return False
+
+def test_output_compression():
+    """Test per-part-type compression levels of the package writers"""
+    print("\n" + "="*60)
+    print("Testing Output Compression...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        import zipfile
+        from excel_master_enhanced import EnhancedExcelMaster
+        from ppt_creator_enhanced import EnhancedPPTCreator
+        from openpyxl import load_workbook
+        from pptx import Presentation
+        from PIL import Image
+
+        sizes = {}
+        for preset in ("store", "small"):
+            output_path = f"test_output/compression_{preset}.xlsx"
+            EnhancedExcelMaster().create_workbook({
+                "output_path": output_path,
+                "compression": preset,
+                "sheets": [{"name": "Data", "headers": ["Region", "Sales"],
+                            "data": [[f"Region {i % 7}", i * 10] for i in range(2000)]}]
+            })
+            with zipfile.ZipFile(output_path) as archive:
+                methods = {info.compress_type for info in archive.infolist()}
+            sizes[preset] = os.path.getsize(output_path)
+            print(f"✅ Workbook '{preset}': {sizes[preset]} bytes, zip methods {sorted(methods)}")
+        rows = load_workbook("test_output/compression_small.xlsx")["Data"].max_row
+
+        image_path = "test_output/compression_image.png"
+        Image.new("RGB", (64, 64), (0, 102, 204)).save(image_path)
+        deck_path = "test_output/compression.pptx"
+        EnhancedPPTCreator().create_presentation({
+            "output_path": deck_path,
+            "compression": {"xml": 1, "media": 0, "threads": 2},
+            "slides": [{"type": "title", "title": "Compression"},
+                       {"type": "image", "title": "Chart", "image_path": image_path}]
+        })
+        with zipfile.ZipFile(deck_path) as archive:
+            media = {info.compress_type for info in archive.infolist() if info.filename.startswith("ppt/media/")}
+            xml = {info.compress_type for info in archive.infolist() if info.filename.endswith(".xml")}
+            intact = archive.testzip() is None
+        slides = len(Presentation(deck_path).slides)
+        print(f"✅ Deck media methods {media}, xml methods {xml}, {slides} slides")
+
+        return (sizes["small"] < sizes["store"] and rows == 2001 and intact and slides == 2
+                and media == {zipfile.ZIP_STORED} and xml == {zipfile.ZIP_DEFLATED})
+
+    except Exception as e:
+        print(f"❌ Output compression test failed: {e}")
+        return False
+
+def test_async_builds():
+    """Test the asyncio API: concurrent builds and cancellation"""
+    print("\n" + "="*60)
+    print("Testing Async Builds...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        import asyncio
+        from excel_master_enhanced import EnhancedExcelMaster
+        from ppt_creator_enhanced import EnhancedPPTCreator
+        from openpyxl import load_workbook
+
+        master = EnhancedExcelMaster()
+        creator = EnhancedPPTCreator()
+        cancelled_path = "test_output/async_cancelled.xlsx"
+        if os.path.exists(cancelled_path):
+            os.remove(cancelled_path)
+
+        async def run():
+            built = await asyncio.gather(*[
+                master.create_workbook_async({
+                    "output_path": f"test_output/async_{index}.xlsx", "profile": True,
+                    "sheets": [{"name": "Data", "headers": ["Item", "Value"],
+                                "data": [[f"Item {row}", row * index] for row in range(50)]}]})
+                for index in range(3)
+            ], creator.create_presentation_async({
+                "output_path": "test_output/async.pptx",
+                "slides": [{"type": "title", "title": "Async"}]}))
+            edited = await master.edit_workbook_async("test_output/async_0.xlsx", {
+                "output_path": "test_output/async_0_edited.xlsx",
+                "update_sheets": {"Data": {"cells": {"B2": 99}}}})
+
+            task = asyncio.ensure_future(master.create_workbook_async({
+                "output_path": cancelled_path,
+                "sheets": [{"name": f"Sheet{index}", "headers": ["A"], "data": [[index]] * 200}
+                           for index in range(40)]}))
+            await asyncio.sleep(0)
+            task.cancel()
+            try:
+                await task
+                cancelled = False
+            except asyncio.CancelledError:
+                cancelled = True
+            return built, edited, cancelled
+
+        built, edited, cancelled = asyncio.run(run())
+        print(f"✅ Built concurrently: {built}")
+        value = load_workbook(edited)["Data"]["B2"].value
+        print(f"✅ Edited: {edited} (B2 = {value})")
+        print(f"✅ Cancelled: {cancelled}, output written: {os.path.exists(cancelled_path)}")
+
+        return (len(built) == 4 and all(os.path.exists(path) for path in built) and value == 99
+                and cancelled and not os.path.exists(cancelled_path))
+
+    except Exception as e:
+        print(f"❌ Async builds test failed: {e}")
+        return False
+
+def test_resource_governor():
+    """Test memory estimates, streaming builds, rejection and sheet sharding"""
+    print("\n" + "="*60)
+    print("Testing Resource Governor...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        import workbook_schema
+        from skill_common.build_governor import ResourceLimitError
+        from excel_master_enhanced import EnhancedExcelMaster
+        from ppt_creator_enhanced import EnhancedPPTCreator
+        from openpyxl import load_workbook
+        from pptx import Presentation
+
+        master = EnhancedExcelMaster()
+        config = {"output_path": "test_output/governed.xlsx",
+                  "sheets": [{"name": "Data", "headers": ["Item", "Value"], "styling": {"mode": "static"},
+                              "data": [[f"Item {row}", row] for row in range(25)]}]}
+        estimate = master.estimate_memory(config)
+        print(f"✅ Estimate: {estimate.total} bytes in memory, {estimate.streaming_total} streaming")
+
+        # The governor is opt-in: builds without resources never consult it
+        master.create_workbook(dict(config, profile=True))
+        ungoverned = (master.last_build_mode, 'governor' in master.last_profile['phases'])
+        print(f"✅ Build without resources: mode {ungoverned[0]}, governor consulted {ungoverned[1]}")
+
+        master.create_workbook(dict(config, resources={"streaming_bytes": 0}))
+        streamed = master.last_build_mode
+        rows = load_workbook(config["output_path"])["Data"].max_row
+        print(f"✅ Streaming build: mode {streamed}, {rows} rows")
+
+        try:
+            master.create_workbook(dict(config, resources={"max_bytes": 1024}))
+            rejected = False
+        except ResourceLimitError as e:
+            rejected = True
+            print(f"✅ Rejected: {e}")
+
+        # Shard at a small row limit instead of a million rows
+        limit = workbook_schema.MAX_SHEET_ROWS
+        workbook_schema.MAX_SHEET_ROWS = 11
+        try:
+            master.create_workbook(dict(config, output_path="test_output/sharded.xlsx"))
+        finally:
+            workbook_schema.MAX_SHEET_ROWS = limit
+        sharded = load_workbook("test_output/sharded.xlsx")
+        shards = {name: sharded[name].max_row for name in sharded.sheetnames}
+        print(f"✅ Sharded: {shards}")
+
+        creator = EnhancedPPTCreator()
+        creator.create_presentation({"output_path": "test_output/governed.pptx",
+                                     "resources": {"streaming_bytes": 0},
+                                     "slides": [{"type": "title", "title": "Governed"},
+                                                {"type": "content", "title": "Points", "bullets": ["One", "Two"]}]})
+        slides = len(Presentation("test_output/governed.pptx").slides)
+        print(f"✅ PPT streaming build: mode {creator.last_build_mode}, {slides} slides")
+
+        return (estimate.streaming_total < estimate.total and ungoverned == ('memory', False)
+                and streamed == 'streaming' and rows == 26 and rejected
+                and shards == {"Data": 11, "Data (2)": 11, "Data (3)": 6}
+                and creator.last_build_mode == 'streaming' and slides == 2)
+
+    except Exception as e:
+        print(f"❌ Resource governor test failed: {e}")
+        return False
+
+def test_theme_switch():
+    """Test re-theming a workbook through its style table"""
+    print("\n" + "="*60)
+    print("Testing Theme Switch...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        from excel_master_enhanced import EnhancedExcelMaster
+        from openpyxl import load_workbook
+
+        master = EnhancedExcelMaster()
+        master.create_workbook({
+            "output_path": "test_output/retheme.xlsx",
+            "theme": "corporate_blue",
+            "sheets": [
+                {"name": "Data", "headers": ["Item", "Value"], "data": [[f"Item {row}", row] for row in range(10)]},
+                {"name": "Summary", "type": "dashboard", "title": "Summary",
+                 "kpis": [{"name": "Total", "value": 45, "change": -0.05}]}
+            ]
+        })
+        master.edit_workbook("test_output/retheme.xlsx", {"change_theme": "modern_dark", "profile": True,
+                                                          "output_path": "test_output/retheme_dark.xlsx"})
+        loaded = 'load' in master.last_profile['phases']
+        master.edit_workbook("test_output/retheme.xlsx", {"change_theme": "modern_dark",
+                                                          "update_sheets": {"Data": {"cells": {"B2": 99}}},
+                                                          "output_path": "test_output/retheme_updated.xlsx"})
+
+        dark = master.themes['modern_dark']
+        results = []
+        for path in ("test_output/retheme_dark.xlsx", "test_output/retheme_updated.xlsx"):
+            workbook = load_workbook(path)
+            data, summary = workbook["Data"], workbook["Summary"]
+            banding = [rule.dxf.fill.fgColor.rgb for ranges in data.conditional_formatting
+                       for rule in ranges.rules if rule.dxf is not None and rule.dxf.fill is not None]
+            colors = (data["A1"].fill.start_color.rgb, summary["A1"].font.color.rgb[-6:],
+                      summary["A6"].font.color.rgb[-6:], banding)
+            print(f"✅ {path}: header, title, loss, banding = {colors}")
+            results.append(colors == (dark.primary, dark.primary[-6:], dark.danger[-6:], [dark.background]))
+        print(f"✅ Theme-only edit loaded the workbook: {loaded}")
+
+        return all(results) and not loaded and load_workbook("test_output/retheme_updated.xlsx")["Data"]["B2"].value == 99
+
+    except Exception as e:
+        print(f"❌ Theme switch test failed: {e}")
+        return False
+
+def test_master_theme():
+    """Test master theme mode: slides inherit the theme from master and layouts"""
+    print("\n" + "="*60)
+    print("Testing Master Theme Mode...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        import zipfile
+        from ppt_creator_enhanced import EnhancedPPTCreator
+        from pptx import Presentation
+
+        creator = EnhancedPPTCreator()
+        slides = [
+            {"type": "title", "title": "Quarterly Review", "subtitle": "Q3"},
+            {"type": "section", "title": "Results"},
+            {"type": "content", "title": "Highlights", "bullets": ["Revenue up", "Costs down"]},
+            {"type": "timeline", "title": "Plan", "events": ["Q1", "Q2", "Q3"]}
+        ]
+
+        def slide_parts(path):
+            with zipfile.ZipFile(path) as archive:
+                return {name: archive.read(name) for name in archive.namelist()
+                        if name.startswith('ppt/slides/slide')}
+
+        sizes = {}
+        for mode in ("inline", "master"):
+            for theme in ("corporate_blue", "tech_startup"):
+                path = f"test_output/master_{mode}_{theme}.pptx"
+                creator.create_presentation({"output_path": path, "theme": theme, "theme_mode": mode,
+                                             "slides": slides})
+                sizes[mode, theme] = sum(len(data) for data in slide_parts(path).values())
+        print(f"✅ Slide XML bytes: {sizes}")
+        same_slides = (slide_parts("test_output/master_master_corporate_blue.pptx")
+                       == slide_parts("test_output/master_master_tech_startup.pptx"))
+        print(f"✅ Master-mode slides independent of the theme: {same_slides}")
+
+        prs = Presentation("test_output/master_master_corporate_blue.pptx")
+        content = prs.slides[2]
+        inherits = (content.follow_master_background and content.shapes.title.text == "Highlights"
+                    and all(run.font.color.type is None for shape in content.shapes
+                            for paragraph in shape.text_frame.paragraphs for run in paragraph.runs))
+        print(f"✅ Content slide inherits fonts, colors and background: {inherits}")
+
+        creator.edit_presentation("test_output/master_master_corporate_blue.pptx", {
+            "change_theme": "tech_startup", "output_path": "test_output/master_switched.pptx"})
+        with zipfile.ZipFile("test_output/master_switched.pptx") as switched, \
+                zipfile.ZipFile("test_output/master_master_tech_startup.pptx") as built:
+            same_theme = switched.read("ppt/theme/theme1.xml") == built.read("ppt/theme/theme1.xml")
+        print(f"✅ change_theme rewrote the theme part: {same_theme}")
+
+        return (sizes["master", "corporate_blue"] < sizes["inline", "corporate_blue"] and same_slides
+                and inherits and same_theme)
+
+    except Exception as e:
+        print(f"❌ Master theme test failed: {e}")
+        return False
+
+def test_ppt_templates():
+    """Test company templates: .potx masters parsed once, layouts found by type, unused ones stripped"""
+    print("\n" + "="*60)
+    print("Testing PPT Templates...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        import zipfile
+        from ppt_creator_enhanced import EnhancedPPTCreator
+        from pptx import Presentation
+        from template_manager import TEMPLATES
+
+        # A company master: a sample slide, no two-content layout, saved as a .potx
+        company = Presentation()
+        company.slides.add_slide(company.slide_layouts[0]).shapes.title.text = "Sample"
+        company.slide_layouts.remove(company.slide_layouts[3])
+        company.save("test_output/company.pptx")
+        with zipfile.ZipFile("test_output/company.pptx") as source, \
+                zipfile.ZipFile("test_output/company.potx", "w", zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                data = source.read(info.filename)
+                if info.filename == "[Content_Types].xml":
+                    data = data.replace(b"presentationml.presentation.main+xml", b"presentationml.template.main+xml")
+                target.writestr(info, data)
+
+        creator = EnhancedPPTCreator()
+        slides = [
+            {"type": "title", "title": "Company Deck", "subtitle": "Q4"},
+            {"type": "two_column", "title": "Split", "left_content": ["Left"], "right_content": ["Right"]},
+            {"type": "blank"}
+        ]
+        creator.create_presentation({"output_path": "test_output/template_full.pptx", "slides": slides,
+                                     "template": "test_output/company.potx", "theme_mode": "master"})
+        creator.create_presentation({"output_path": "test_output/template_stripped.pptx", "slides": slides,
+                                     "template": "test_output/company.potx", "theme_mode": "master",
+                                     "strip_layouts": True})
+        parsed_once = TEMPLATES._template("test_output/company.potx") is TEMPLATES._template("test_output/company.potx")
+        print(f"✅ Template parsed once per process: {parsed_once}")
+
+        full = Presentation("test_output/template_full.pptx")
+        stripped = Presentation("test_output/template_stripped.pptx")
+        titles = [slide.shapes.title.text if slide.shapes.title is not None else "" for slide in full.slides]
+        print(f"✅ Slides built on the template: {titles}")
+        two_column = [shape.text_frame.text for shape in full.slides[1].shapes if shape.has_text_frame]
+        print(f"✅ Two-column slide without a two-content layout: {two_column}")
+        print(f"✅ Layouts: {len(full.slide_layouts)} full, {len(stripped.slide_layouts)} stripped; "
+              f"{os.path.getsize('test_output/template_full.pptx')} -> "
+              f"{os.path.getsize('test_output/template_stripped.pptx')} bytes")
+        with zipfile.ZipFile("test_output/company.pptx") as template, \
+                zipfile.ZipFile("test_output/template_full.pptx") as built:
+            kept_theme = template.read("ppt/theme/theme1.xml") == built.read("ppt/theme/theme1.xml")
+        print(f"✅ Company theme kept in master mode: {kept_theme}")
+
+        return (parsed_once and titles == ["Company Deck", "Split", ""] and "Left" in two_column
+                and "Right" in two_column and len(stripped.slide_layouts) < len(full.slide_layouts)
+                and kept_theme)
+
+    except Exception as e:
+        print(f"❌ PPT templates test failed: {e}")
+        return False
+
+def test_workbook_templates():
+    """Test workbook templates: loaded once, template sheets spliced, config sheets layered on top"""
+    print("\n" + "="*60)
+    print("Testing Excel Workbook Templates...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        import time
+        from excel_master_enhanced import EnhancedExcelMaster
+        from openpyxl import Workbook, load_workbook
+        from openpyxl.styles import Font, NamedStyle
+        from openpyxl.workbook.defined_name import DefinedName
+        from workbook_templates import TEMPLATES
+
+        # A branded template: cover sheet, named style, reference tab and a defined name
+        template = Workbook()
+        cover = template.active
+        cover.title = "Cover"
+        cover["A1"] = "ACME Corp"
+        cover["A1"].font = Font(bold=True, size=20, color="FF003366")
+        cover.sheet_properties.tabColor = "003366"
+        brand = NamedStyle("brand")
+        brand.font = Font(bold=True, color="FF003366")
+        template.add_named_style(brand)
+        rates = template.create_sheet("Rates")
+        for month in range(1, 13):
+            rates.append([f"M{month}", month * 1.5])
+        template.defined_names["FirstRate"] = DefinedName("FirstRate", attr_text="Rates!$B$1")
+        template.save("test_output/brand_template.xlsx")
+
+        master = EnhancedExcelMaster()
+        TEMPLATES.register("brand", "test_output/brand_template.xlsx")
+        config = {
+            "template": "brand",
+            "output_path": "test_output/templated.xlsx",
+            "sheets": [
+                {"name": "Sales", "type": "data", "headers": ["Month", "Revenue"],
+                 "data": [["Jan", 100], ["Feb", 120]],
+                 "charts": [{"type": "line", "title": "Rates", "data_range": "Rates!B1:B12", "position": "D2"}]},
+                {"name": "Rates", "type": "data", "headers": ["Month", "Rate"], "data": [["Jan", 2.5]]}
+            ]
+        }
+        master.create_workbook(config)
+        started = time.perf_counter()
+        master.create_workbook(dict(config, sheets=config["sheets"][:1], output_path="test_output/templated_kept.xlsx"))
+        template_seconds = time.perf_counter() - started
+        print(f"✅ Build from the loaded template: {template_seconds:.3f}s")
+
+        replaced = load_workbook("test_output/templated.xlsx")
+        kept = load_workbook("test_output/templated_kept.xlsx")
+        print(f"✅ Sheets: {replaced.sheetnames} / {kept.sheetnames}")
+        cover_kept = (kept["Cover"]["A1"].value == "ACME Corp" and kept["Cover"]["A1"].font.b
+                      and kept["Cover"].sheet_properties.tabColor.rgb.endswith("003366"))
+        print(f"✅ Template cover sheet kept with its styling: {cover_kept}")
+        names_kept = "brand" in kept.named_styles and "FirstRate" in kept.defined_names
+        print(f"✅ Named styles and defined names kept: {names_kept}")
+        print(f"✅ Rates replaced in place: {replaced['Rates']['A2'].value}, kept: {kept['Rates']['B12'].value}")
+        print(f"✅ Chart on template data: {len(kept['Sales']._charts)}")
+
+        return (replaced.sheetnames == ["Cover", "Rates", "Sales"] and kept.sheetnames == ["Cover", "Rates", "Sales"]
+                and cover_kept and names_kept and replaced["Rates"]["A2"].value == "Jan"
+                and kept["Rates"]["B12"].value == 18 and len(kept["Sales"]._charts) == 1)
+
+    except Exception as e:
+        print(f"❌ Workbook templates test failed: {e}")
+        return False
+
+def test_text_fit():
+    """Test text fitting: long bullet lists shrink to fit or continue on new slides"""
+    print("\n" + "="*60)
+    print("Testing PPT Text Fit...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        import time
+        from ppt_creator_enhanced import EnhancedPPTCreator
+        from pptx import Presentation
+        from text_layout import MEASURER, TextBox
+
+        creator = EnhancedPPTCreator()
+        long_list = [f"Action item {i}: follow up with the regional team on the quarterly numbers" for i in range(30)]
+        medium_list = [f"Point {i} with a little more detail than usual" for i in range(11)]
+        slides = [
+            {"type": "content", "title": "Short", "bullets": ["One", "Two"]},
+            {"type": "content", "title": "Medium", "bullets": medium_list},
+            {"type": "content", "title": "Backlog", "bullets": long_list}
+        ]
+        creator.create_presentation({"output_path": "test_output/text_fit.pptx", "slides": slides})
+        prs = Presentation("test_output/text_fit.pptx")
+        titles = [shape.text_frame.text for slide in prs.slides for shape in slide.shapes][::2]
+        print(f"✅ Slides: {titles}")
+
+        def body_size(slide):
+            return slide.shapes[1].text_frame.paragraphs[0].font.size.pt
+
+        sizes = [body_size(slide) for slide in prs.slides]
+        print(f"✅ Body sizes: {sizes}")
+        carried = sum(len(slide.shapes[1].text_frame.paragraphs) for slide in list(prs.slides)[2:])
+        print(f"✅ Bullets over the continuation slides: {carried}")
+
+        creator.create_presentation({"output_path": "test_output/text_fit_none.pptx", "slides": slides,
+                                     "text_fit": "none"})
+        unfitted = len(Presentation("test_output/text_fit_none.pptx").slides)
+
+        bullets = [f"Generated bullet number {i} about topic {i % 97}" for i in range(10000)]
+        started = time.perf_counter()
+        pages = MEASURER.paginate(bullets, "Calibri", 18, TextBox.from_inches(9, 4.5, space_after=12))
+        seconds = time.perf_counter() - started
+        stats = MEASURER.stats()
+        print(f"✅ 10,000 bullets onto {len(pages)} slides in {seconds:.3f}s; "
+              f"word cache hit rate {stats['word_hit_rate']:.1%}, glyph cache {stats['glyph_hit_rate']:.1%}")
+
+        return (len(prs.slides) > 3 and unfitted == 3 and titles[3] == "Backlog (cont.)"
+                and sizes[0] == 18 and 12 <= sizes[1] < 18 and carried == len(long_list)
+                and seconds < 2 and stats['word_hit_rate'] > 0.5)
+
+    except Exception as e:
+        print(f"❌ Text fit test failed: {e}")
+        return False
+
+def test_chart_slides():
+    """Test native chart slides from inline data, DataFrames and workbook ranges"""
+    print("\n" + "="*60)
+    print("Testing PPT Chart Slides...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        import pandas as pd
+        from excel_master_enhanced import EnhancedExcelMaster
+        from ppt_creator_enhanced import EnhancedPPTCreator, ConfigError
+        from pptx import Presentation
+        from slide_charts import CHART_PARTS, MAX_CHART_POINTS, MAX_PIE_SLICES
+
+        EnhancedExcelMaster().create_workbook({
+            "output_path": "test_output/chart_source.xlsx",
+            "sheets": [{"name": "Sales", "headers": ["Month", "North", "South"],
+                        "data": [[f"M{i}", i * 10, i * 7] for i in range(1, 13)]}]
+        })
+        frame = pd.DataFrame({"day": pd.date_range("2020-01-01", periods=20000, freq="h"),
+                              "load": [(i % 240) * 1.5 for i in range(20000)]})
+        quarterly = {"type": "bar", "categories": ["Q1", "Q2", "Q3", "Q4"],
+                     "series": [{"name": "Revenue", "values": [120, 135, 150, 170]}]}
+        slides = [
+            {"type": "chart", "title": "Quarterly", "chart": quarterly},
+            {"type": "chart", "title": "Load", "chart": {"type": "line", "data": frame, "categories": "day"}},
+            {"type": "chart", "title": "Regions", "chart": {"type": "bar", "source": "test_output/chart_source.xlsx",
+                                                           "data_range": "Sales!B1:C13",
+                                                           "categories_range": "Sales!A2:A13"}},
+            {"type": "chart", "title": "Mix", "chart": {"type": "pie", "categories": [f"P{i}" for i in range(20)],
+                                                       "series": [{"values": list(range(20))}]}},
+            {"type": "chart", "title": "Spread", "chart": {"type": "scatter", "categories": [1, 2, 3],
+                                                          "series": [{"name": "Fit", "values": [2, 4, 5]}]}},
+            {"type": "chart", "title": "Quarterly again", "chart": quarterly}
+        ]
+        creator = EnhancedPPTCreator()
+        before = CHART_PARTS.hits
+        creator.create_presentation({"output_path": "test_output/charts.pptx", "slides": slides, "profile": True})
+        chart_count = creator.last_profile['counts']['charts']
+        charts = [shape.chart for slide in Presentation("test_output/charts.pptx").slides
+                  for shape in slide.shapes if shape.has_chart]
+        points = [len(chart.plots[0].series[0].values) for chart in charts]
+        print(f"✅ {len(charts)} native charts, points per chart: {points}")
+        regions = charts[2].plots[0]
+        print(f"✅ Workbook series: {[series.name for series in regions.series]}, "
+              f"categories {list(regions.categories)[:3]}...")
+        size = os.path.getsize("test_output/charts.pptx")
+        print(f"✅ Deck size with a 20,000-point series: {size // 1024} KB, "
+              f"repeated chart parts reused: {CHART_PARTS.hits - before}")
+
+        creator.create_presentation({"output_path": "test_output/charts_master.pptx", "slides": slides[:1],
+                                     "theme_mode": "master"})
+        master_chart = Presentation("test_output/charts_master.pptx").slides[0].shapes[1]
+
+        try:
+            creator.create_presentation({"slides": [{"type": "chart", "chart": {"type": "donut", "series": [{}]}}]})
+            rejected = False
+        except ConfigError as e:
+            rejected = len(e.problems) == 2
+
+        return (len(charts) == 6 and points[0] == 4 and 0 < points[1] <= MAX_CHART_POINTS
+                and [series.name for series in regions.series] == ["North", "South"]
+                and list(regions.series[1].values)[-1] == 84 and points[3] == MAX_PIE_SLICES
+                and CHART_PARTS.hits - before >= 1 and chart_count == 6
+                and size < 200 * 1024 and master_chart.has_chart and rejected)
+
+    except Exception as e:
+        print(f"❌ Chart slides test failed: {e}")
+        return False
+
+def test_table_slides():
+    """Test paginated table slides from DataFrames, CSV files and workbook ranges"""
+    print("\n" + "="*60)
+    print("Testing PPT Table Slides...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        import time
+        import pandas as pd
+        from excel_master_enhanced import EnhancedExcelMaster
+        from ppt_creator_enhanced import EnhancedPPTCreator
+        from pptx import Presentation
+
+        frame = pd.DataFrame({"Region": [f"Region {i}" for i in range(1200)],
+                              "Revenue": [i * 1234.5 for i in range(1200)],
+                              "Units": list(range(1200)),
+                              "Notes": ["Renewal pending with procurement" if i % 5 == 0 else "" for i in range(1200)]})
+        with open("test_output/table_source.csv", "w") as f:
+            f.write("Product,Price\nWidget,9.99\nGadget,19.50\n")
+        EnhancedExcelMaster().create_workbook({
+            "output_path": "test_output/table_source.xlsx",
+            "sheets": [{"name": "Stock", "headers": ["Item", "Count"], "data": [["Bolts", 120], ["Nuts", 80]]}]
+        })
+
+        creator = EnhancedPPTCreator()
+        started = time.perf_counter()
+        creator.create_presentation({"output_path": "test_output/tables.pptx", "profile": True, "slides": [
+            {"type": "table", "title": "Regions", "table": {"data": frame}},
+            {"type": "table", "title": "Prices", "table": {"csv": "test_output/table_source.csv"}},
+            {"type": "table", "title": "Stock", "table": {"source": "test_output/table_source.xlsx",
+                                                         "data_range": "Stock!A1:B3"}}
+        ]})
+        seconds = time.perf_counter() - started
+        counts = creator.last_profile['counts']
+        prs = Presentation("test_output/tables.pptx")
+        tables = [shape.table for slide in prs.slides for shape in slide.shapes if shape.has_table]
+        rows = sum(len(table.rows) - 1 for table in tables[:-2])
+        fits = all(shape.top + shape.height <= prs.slide_height for slide in prs.slides for shape in slide.shapes)
+        print(f"✅ {counts['table_rows']} rows over {len(prs.slides)} slides in {seconds:.2f}s, all within the slide: {fits}")
+        print(f"✅ Continuation title: {prs.slides[1].shapes[0].text_frame.text}, "
+              f"header repeated: {tables[1].cell(0, 0).text}")
+        print(f"✅ CSV cell: {tables[-2].cell(1, 1).text}, workbook cell: {tables[-1].cell(2, 0).text}")
+        style_ids = {table._tbl.tblPr[0].text for table in tables}
+        print(f"✅ Table styles used: {len(style_ids)}")
+
+        return (rows == len(frame) and fits and len(prs.slides) > 3 and seconds < 10
+                and prs.slides[1].shapes[0].text_frame.text == "Regions (cont.)"
+                and tables[1].cell(0, 0).text == "Region" and tables[0].cell(2, 1).text == "1,234.50"
+                and tables[-2].cell(1, 1).text == "9.99" and tables[-1].cell(2, 0).text == "Nuts"
+                and len(style_ids) == 1)
+
+    except Exception as e:
+        print(f"❌ Table slides test failed: {e}")
+        return False
+
+def test_image_placement():
+    """Test header-only image probing, fit / fill / crop placement and one-time downscaling"""
+    print("\n" + "="*60)
+    print("Testing PPT Image Placement...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        from PIL import Image
+        from image_placement import IMAGES, probe
+        from ppt_creator_enhanced import EnhancedPPTCreator
+        from pptx import Presentation
+        from pptx.util import Inches
+
+        Image.new("RGB", (4000, 1000), (200, 40, 40)).save("test_output/wide_photo.jpg", quality=95)
+        Image.new("RGBA", (300, 600), (40, 200, 40, 128)).save("test_output/tall_logo.png", dpi=(150, 150))
+        info = probe("test_output/tall_logo.png")
+        print(f"✅ Probed {info.format} {info.width}x{info.height} at {info.dpi[0]:.0f} dpi")
+
+        slides = [
+            {"type": "image", "title": "Fit", "image_path": "test_output/wide_photo.jpg", "image_fit": "fit"},
+            {"type": "image", "title": "Fill", "image_path": "test_output/wide_photo.jpg", "image_fit": "fill"},
+            {"type": "image", "title": "Crop", "image_path": "test_output/tall_logo.png", "image_fit": "crop",
+             "image_height": 3},
+            {"type": "image", "title": "Legacy", "image_path": "test_output/tall_logo.png"}
+        ]
+        creator = EnhancedPPTCreator()
+        creator.create_presentation({"output_path": "test_output/images.pptx", "profile": True, "slides": slides})
+        downscaled = creator.last_profile['counts'].get('downscaled_images', 0)
+        decodes = IMAGES.decodes
+        creator.create_presentation({"output_path": "test_output/images_again.pptx", "slides": slides})
+
+        prs = Presentation("test_output/images.pptx")
+        fit, fill, crop, legacy = [[shape for shape in slide.shapes if shape.shape_type == 13][0]
+                                   for slide in prs.slides]
+        box_width, box_height = Inches(6), Inches(3.75)
+        print(f"✅ Fit: {fit.width}x{fit.height} EMU, centered at top {fit.top}")
+        print(f"✅ Fill: {fill.width}x{fill.height} EMU, cropped {fill.crop_left:.3f} from each side")
+        print(f"✅ Crop: {crop.width}x{crop.height} EMU, cropped {crop.crop_top:.3f} top and bottom")
+        blob = fit.image.blob
+        print(f"✅ Downscaled {downscaled} image(s) to {fit.image.size[0]}x{fit.image.size[1]} px, "
+              f"{len(blob):,} bytes; decodes after the rebuild: {IMAGES.decodes - decodes}")
+
+        return (info.width == 300 and info.height == 600 and round(info.dpi[0]) == 150
+                and fit.width == box_width and fit.height == box_width // 4 and fit.top > Inches(2)
+                and (fill.width, fill.height) == (box_width, box_height) and fill.crop_left > 0.2
+                and crop.width == Inches(2) and crop.height == Inches(3) and abs(crop.crop_top - 0.125) < 0.001
+                and legacy.width == Inches(6) and legacy.height == Inches(12)
+                and downscaled == 1 and fit.image.size == (1320, 330) and fill.image.size == (4000, 1000)
+                and IMAGES.decodes == decodes)
+
+    except Exception as e:
+        print(f"❌ Image placement test failed: {e}")
+        return False
+
+def test_timeline_slides():
+    """Test time-scaled timelines with clustered, staggered labels split across slides"""
+    print("\n" + "="*60)
+    print("Testing PPT Timeline Slides...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'professional-ppt-skill/scripts')
+        import time
+        from datetime import date, timedelta
+        from ppt_creator_enhanced import EnhancedPPTCreator
+        from pptx import Presentation
+        from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+        roadmap = [{"date": (date(2024, 1, 1) + timedelta(days=i * 2 + (i % 7) ** 2)).isoformat(),
+                    "label": f"Milestone {i} review"} for i in range(500)]
+        creator = EnhancedPPTCreator()
+        started = time.perf_counter()
+        creator.create_presentation({"output_path": "test_output/timelines.pptx", "profile": True, "slides": [
+            {"type": "timeline", "title": "Roadmap", "events": roadmap},
+            {"type": "timeline", "title": "Launch", "events": [
+                {"date": "2024-12-31", "label": "Launch"}, {"date": "2024-01-01", "label": "Kickoff"},
+                {"date": "2024-02-01", "label": "Design"}]}
+        ]})
+        seconds = time.perf_counter() - started
+        counts = creator.last_profile['counts']
+        prs = Presentation("test_output/timelines.pptx")
+
+        overlaps = 0
+        for slide in prs.slides:
+            labels = [shape for group in slide.shapes if group.shape_type == MSO_SHAPE_TYPE.GROUP
+                      for event in group.shapes if event.shape_type == MSO_SHAPE_TYPE.GROUP
+                      for shape in event.shapes if shape.name == "Event Label"]
+            for index, a in enumerate(labels):
+                for b in labels[index + 1:]:
+                    if (a.left < b.left + b.width and b.left < a.left + a.width
+                            and a.top < b.top + b.height and b.top < a.top + a.height):
+                        overlaps += 1
+        print(f"✅ {counts['timeline_events']} events on {len(prs.slides)} slides as "
+              f"{counts['timeline_markers']} markers in {seconds:.2f}s, overlapping labels: {overlaps}")
+
+        launch = prs.slides[-1].shapes[1]
+        markers = [shape for event in launch.shapes if event.shape_type == MSO_SHAPE_TYPE.GROUP
+                   for shape in event.shapes if shape.name == "Event Marker"]
+        kickoff, design, end = [marker.left + marker.width // 2 for marker in markers]
+        share = (design - kickoff) / (end - kickoff)
+        print(f"✅ February sits {share:.0%} along a one-year axis, continuation: {prs.slides[1].shapes[0].text_frame.text}")
+
+        return (counts['timeline_events'] == 503 and len(prs.slides) == 14 and overlaps == 0 and seconds < 10
+                and counts['timeline_markers'] < 500 and abs(share - 31 / 365) < 0.01
+                and prs.slides[1].shapes[0].text_frame.text == "Roadmap (cont.)" and len(prs.slides[0].shapes) == 2)
+
+    except Exception as e:
+        print(f"❌ Timeline slides test failed: {e}")
+        return False
+
+def test_sparklines():
+    """Test native sparklines: one group per config, kept through edits"""
+    print("\n" + "="*60)
+    print("Testing Excel Sparklines...")
+    print("="*60)
+
+    try:
+        sys.path.insert(0, 'excel-master-skill/scripts')
+        import time
+        import zipfile
+        from excel_master_enhanced import EnhancedExcelMaster, ConfigError
+        from openpyxl import load_workbook
+
+        months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun"]
+        rows = [[f"Region {i}"] + [(i * 7 + m * 13) % 50 - 10 for m in range(6)] for i in range(500)]
+        master = EnhancedExcelMaster()
+        started = time.perf_counter()
+        master.create_workbook({"output_path": "test_output/sparklines.xlsx", "profile": True, "sheets": [
+            {"name": "Trends", "headers": ["Region"] + months + ["Trend"], "data": rows,
+             "sparklines": [{"data_range": "B2:G501", "location": "H2:H501", "markers": True, "high_point": True},
+                            {"data_range": "B2:G501", "location": "B502:G502", "type": "column"}]}
+        ]})
+        seconds = time.perf_counter() - started
+        counts = master.last_profile['counts']
+
+        with zipfile.ZipFile("test_output/sparklines.xlsx") as archive:
+            sheet_xml = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        print(f"✅ {counts['sparklines']} sparklines in {sheet_xml.count('<x14:sparklineGroup ')} groups "
+              f"in {seconds:.2f}s")
+        first = "<xm:f>'Trends'!B2:G2</xm:f><xm:sqref>H2</xm:sqref>" in sheet_xml
+        column = "<xm:f>'Trends'!G2:G501</xm:f><xm:sqref>G502</xm:sqref>" in sheet_xml
+        print(f"✅ Row and column sparklines placed: {first and column}")
+
+        master.edit_workbook("test_output/sparklines.xlsx", {"update_sheets": {"Trends": {"cells": {"A2": "North"}}}})
+        with zipfile.ZipFile("test_output/sparklines_edited.xlsx") as archive:
+            edited_xml = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        edited = load_workbook("test_output/sparklines_edited.xlsx")["Trends"]["A2"].value
+        print(f"✅ Sparklines after edit: {edited_xml.count('<x14:sparkline>')}, A2: {edited}")
+
+        try:
+            master.create_workbook({"output_path": "test_output/bad_sparklines.xlsx", "sheets": [
+                {"name": "Trends", "headers": ["A", "B"], "data": [[1, 2], [3, 4]],
+                 "sparklines": [{"data_range": "A2:B3", "location": "C2:C9", "type": "area"}]}
+            ]})
+            rejected = False
+        except ConfigError as e:
+            rejected = "location" in str(e) and "type" in str(e)
+            print(f"✅ Bad sparklines rejected: {e}")
+
+        return (counts['sparklines'] == 506 and sheet_xml.count('<x14:sparklineGroup ') == 2
+                and sheet_xml.count('<x14:sparkline>') == 506 and sheet_xml.count('<extLst>') == 1
+                and first and column and edited_xml.count('<x14:sparkline>') == 506 and edited == "North"
+                and rejected and seconds < 10)
+
+    except Exception as e:
+        print(f"❌ Sparklines test failed: {e}")
+        return False
+
 def print_summary(results):
     """Print test summary"""
     print("\n" + "="*60)
@@ -323,6 +1772,31 @@ def main():
         results["Example Configurations"] = test_example_configs()
         results["PPT Slide Types"] = test_slide_types()
         results["Excel Conditional Formatting"] = test_conditional_formatting()
+        results["Excel Rule-Based Styling"] = test_rule_based_styling()
+        results["Excel Chart Downsampling"] = test_chart_downsampling()
+        results["Excel Chart Planner"] = test_chart_planner()
+        results["Excel Dashboard KPIs"] = test_dashboard_kpis()
+        results["Build Profiling"] = test_build_profiling()
+        results["Config Validation"] = test_config_validation()
+        results["Artifact Cache"] = test_artifact_cache()
+        results["Excel Incremental Rebuild"] = test_incremental_rebuild()
+        results["PPT Incremental Slides"] = test_incremental_slides()
+        results["Excel Append Rows"] = test_append_rows()
+        results["Excel Columnar Sheets"] = test_columnar_sheets()
+        results["Excel Shared Strings"] = test_shared_strings()
+        results["Output Compression"] = test_output_compression()
+        results["Async Builds"] = test_async_builds()
+        results["Resource Governor"] = test_resource_governor()
+        results["Excel Theme Switch"] = test_theme_switch()
+        results["PPT Master Theme"] = test_master_theme()
+        results["PPT Templates"] = test_ppt_templates()
+        results["Excel Workbook Templates"] = test_workbook_templates()
+        results["PPT Text Fit"] = test_text_fit()
+        results["PPT Chart Slides"] = test_chart_slides()
+        results["PPT Table Slides"] = test_table_slides()
+        results["PPT Image Placement"] = test_image_placement()
+        results["PPT Timeline Slides"] = test_timeline_slides()
+        results["Excel Sparklines"] = test_sparklines()
     else:
         print("\n❌ Package imports failed. Please install required packages:")
         print("   pip install python-pptx openpyxl pandas pillow")